@@ -8,6 +8,8 @@
 #
 #
 import datetime
+import threading
+from collections import OrderedDict
 from itertools import tee
 
 import numpy as np
@@ -16,11 +18,10 @@ from matplotlib.container import ErrorbarContainer
 from matplotlib.colors import LogNorm
 from matplotlib.ticker import LogLocator
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
-from scipy.interpolate import interp1d
 
 import mantid.api
 import mantid.kernel
-from mantid.api import MultipleExperimentInfos, MatrixWorkspace
+from mantid.api import AnalysisDataServiceObserver, BinEdgeAxis, MultipleExperimentInfos, MatrixWorkspace
 from mantid.dataobjects import EventWorkspace, MDHistoWorkspace, Workspace2D
 from mantid.plots.legend import convert_color_to_hex
 from mantid.plots.utility import MantidAxType
@@ -476,34 +477,16 @@ def get_matrix_2d_ragged(workspace, normalize_by_bin_width, histogram2D=False, t
         except:
             spec_info = None
 
+    ragged_data = get_ragged_workspace_data(workspace)
     if extent is None:
-        common_bins = workspace.isCommonBins()
-        delta = np.finfo(np.float64).max
-        min_value = np.finfo(np.float64).max
-        max_value = np.finfo(np.float64).min
-
-        for spectrum_index in range(workspace.getNumberHistograms()):
-            if not (spec_info and spec_info.hasDetectors(spectrum_index) and spec_info.isMonitor(spectrum_index)):
-                xtmp = workspace.readX(spectrum_index)
-                if workspace.isHistogramData():
-                    # input x is edges
-                    xtmp = mantid.plots.datafunctions.points_from_boundaries(xtmp)
-                else:
-                    # input x is centers
-                    pass
-                min_value = min(min_value, xtmp.min())
-                max_value = max(max_value, xtmp.max())
-                diff = np.diff(xtmp)
-                delta = min(delta, diff.min())
-                if common_bins:
-                    break
-                xtmp = workspace.readX(0)
-        if delta == np.finfo(np.float64).max:
-            delta = np.diff(xtmp).min()
-        if min_value == np.finfo(np.float64).max:
-            min_value = xtmp.min()
-        if max_value == np.finfo(np.float64).min:
-            max_value = xtmp.max()
+        workspace_indices = np.flatnonzero(~ragged_data.monitors(spec_info))
+        if workspace.isCommonBins():
+            workspace_indices = workspace_indices[:1]
+        if len(workspace_indices) > 0:
+            min_value, max_value, delta = ragged_data.x_range(workspace_indices)
+        else:
+            xtmp = workspace.readX(0)
+            min_value, max_value, delta = xtmp.min(), xtmp.max(), np.diff(xtmp).min()
         num_edges = int(np.ceil((max_value - min_value) / delta)) + 1
         x_centers = np.linspace(min_value, max_value, num=num_edges)
         y = mantid.plots.datafunctions.boundaries_from_points(workspace.getAxis(1).extractValues())
@@ -532,6 +515,59 @@ def get_matrix_2d_ragged(workspace, normalize_by_bin_width, histogram2D=False, t
         return x, y, counts
 
 
+def _axis_edges(workspace):
+    """
+    Get the edges of the bins of the vertical axis, such that the workspace index of a value is the index of the
+    bin which contains it, as Axis.indexOfValue does for spectra axes and bin edge axes.
+
+    :param workspace: a MatrixWorkspace
+    :return: a :class:`numpy.ndarray` of bin edges or None if the axis is not a spectra or bin edge axis
+    """
+    axis = workspace.getAxis(1)
+    if axis.isSpectra() and workspace.getNumberHistograms() > 1:
+        return boundaries_from_points(axis.extractValues())
+    if isinstance(axis, BinEdgeAxis):
+        return axis.extractValues()
+    return None
+
+
+def _workspace_indices_from_axis(values, workspace):
+    """
+    Get the workspace indices of values on the vertical axis in one pass, with the results of Axis.indexOfValue.
+
+    :param values: a :class:`numpy.ndarray` of values on the vertical axis
+    :param workspace: a MatrixWorkspace
+    :return: an integer :class:`numpy.ndarray` of workspace indices, and a boolean :class:`numpy.ndarray` which is
+        False for values which are outside the axis
+    """
+    values = np.asarray(values, dtype=np.float64)
+    axis = workspace.getAxis(1)
+    edges = _axis_edges(workspace)
+    if edges is not None:
+        indices = np.searchsorted(edges, values, side='left')
+        valid = (values >= edges[0]) & (indices < len(edges))
+        return np.maximum(indices - 1, 0), valid
+    if axis.isNumeric() and axis.length() > 1:
+        centers = axis.extractValues()
+        low_edge = centers[0] - 0.5 * (centers[1] - centers[0])
+        high_edge = centers[-1] + 0.5 * (centers[-1] - centers[-2])
+        indices = np.minimum(np.searchsorted(centers, values, side='left'), len(centers) - 1)
+        previous = np.maximum(indices - 1, 0)
+        indices[(indices > 0) & (values < centers[previous] + 0.5 * (centers[indices] - centers[previous]))] -= 1
+        return indices, (values >= low_edge) & (values <= high_edge)
+
+    # Other axes, such as a numeric axis of length one, fall back to the axis itself
+    indices = np.zeros(len(values), dtype=np.int64)
+    valid = np.zeros(len(values), dtype=bool)
+    for i, value in enumerate(values):
+        try:
+            indices[i] = axis.indexOfValue(value)
+            valid[i] = True
+        except IndexError:
+            continue
+    return indices, valid
+
+
 def pairwise(iterable):
     a, b = tee(iterable)
     next(b, None)
@@ -539,29 +575,30 @@ def pairwise(iterable):
 
 
 def _workspace_indices(y_bins, workspace):
-    workspace_indices = []
-    for y in y_bins:
-        try:
-            workspace_index = workspace.getAxis(1).indexOfValue(y)
-            workspace_indices.append(workspace_index)
-        except IndexError:
-            continue
-    return workspace_indices
+    workspace_indices, valid = _workspace_indices_from_axis(y_bins, workspace)
+    return workspace_indices[valid]
 
 
 def _workspace_indices_maxpooling(y_bins, workspace):
-    summed_spectra_workspace = _integrate_workspace(workspace)
-    summed_spectra = summed_spectra_workspace.extractY()
-    workspace_indices = []
-    for y_range in pairwise(y_bins):
-        try:
-            workspace_range = range(workspace.getAxis(1).indexOfValue(np.math.floor(y_range[0])),
-                                    workspace.getAxis(1).indexOfValue(np.math.ceil(y_range[1])))
-            workspace_index = workspace_range[np.argmax(summed_spectra[workspace_range])]
-            workspace_indices.append(workspace_index)
-        except IndexError:
-            continue
-    return workspace_indices
+    """
+    Get the workspace index of the spectrum with the most counts between each pair of consecutive y bins.
+    """
+    y_bins = np.asarray(y_bins, dtype=np.float64)
+    if len(y_bins) < 2:
+        return np.zeros(0, dtype=np.int64)
+    lower, lower_valid = _workspace_indices_from_axis(np.floor(y_bins[:-1]), workspace)
+    upper, upper_valid = _workspace_indices_from_axis(np.ceil(y_bins[1:]), workspace)
+    valid = lower_valid & upper_valid
+    lower, upper = lower[valid], upper[valid]
+    # A range which does not span a spectrum uses the spectrum at its lower end
+    lengths = np.maximum(upper - lower, 1)
+
+    summed_spectra = get_ragged_workspace_data(workspace).summed_spectra(workspace)
+    segments = np.repeat(np.arange(len(lower)), lengths)
+    candidates = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + lower[segments]
+    # Sort by range, then by decreasing counts, such that the first candidate of each range is its maximum
+    order = np.lexsort((candidates, -summed_spectra[candidates], segments))
+    return candidates[order][np.cumsum(lengths) - lengths]
 
 
 def _integrate_workspace(workspace):
@@ -580,32 +617,216 @@ def _integrate_workspace(workspace):
 def interpolate_y_data(workspace, x, y, normalize_by_bin_width, spectrum_info=None, maxpooling=False):
     workspace_indices = _workspace_indices_maxpooling(y, workspace) \
         if maxpooling else _workspace_indices(y, workspace)
-    counts = np.full([len(workspace_indices), x.size], np.nan, dtype=np.float64)
-    previous_index = -1
-    index = -1
-    for workspace_index in workspace_indices:
-        index += 1
-        # avoid repeating calculations
-        if previous_index == workspace_index:
-            counts[index, :] = counts[index - 1]
-            continue
-        previous_index = workspace_index
-        if not (spectrum_info and spectrum_info.hasDetectors(workspace_index) and spectrum_info.isMonitor(
-                workspace_index)):
-            centers, ztmp, _, _ = get_spectrum(workspace, workspace_index,
-                                               normalize_by_bin_width=normalize_by_bin_width,
-                                               withDy=False, withDx=False)
-            interpolation_function = interp1d(centers, ztmp, kind='nearest', bounds_error=False,
-                                              fill_value="extrapolate")
-            # only set values in the range of workspace
-            x_range = np.where((x >= workspace.readX(workspace_index)[0]) &
-                               (x <= workspace.readX(workspace_index)[-1]))
-            # set values outside x data to nan
-            counts[index, x_range] = interpolation_function(x[x_range])
-    counts = np.ma.masked_invalid(counts, copy=False)
+    ragged_data = get_ragged_workspace_data(workspace)
+    # avoid repeating calculations for spectra which are drawn on several rows
+    unique_indices, rows = np.unique(workspace_indices, return_inverse=True)
+    unique_counts = np.full([len(unique_indices), x.size], np.nan, dtype=np.float64)
+    # monitors are left as nan
+    detectors = ~ragged_data.monitors(spectrum_info)[unique_indices]
+    unique_counts[detectors] = ragged_data.resample(unique_indices[detectors], x, normalize_by_bin_width)
+    counts = np.ma.masked_invalid(unique_counts[rows], copy=False)
     return counts
 
 
+class RaggedWorkspaceData(object):
+    """
+    The data of all spectra of a MatrixWorkspace, extracted once into contiguous arrays, for resampling the
+    workspace onto a regular grid. The points of spectrum i are centers[offsets[i]:offsets[i + 1]].
+    """
+    # Upper limit on the number of bin boundaries processed at once by resample
+    BLOCK_SIZE = 2**22
+
+    def __init__(self, workspace):
+        number_of_histograms = workspace.getNumberHistograms()
+        try:
+            x = workspace.extractX()
+            y = workspace.extractY()
+            self.first_x, self.last_x = x[:, 0].copy(), x[:, -1].copy()
+            lengths = np.full(number_of_histograms, y.shape[1], dtype=np.int64)
+        except RuntimeError:
+            # the spectra are not the same length
+            x = [workspace.readX(index) for index in range(number_of_histograms)]
+            y = [workspace.readY(index) for index in range(number_of_histograms)]
+            self.first_x = np.array([spectrum_x[0] for spectrum_x in x])
+            self.last_x = np.array([spectrum_x[-1] for spectrum_x in x])
+            lengths = np.array([len(spectrum_y) for spectrum_y in y], dtype=np.int64)
+
+        self.histogram = workspace.isHistogramData()
+        self.distribution = workspace.isDistribution()
+        if self.histogram:
+            self.centers = np.concatenate([points_from_boundaries(spectrum_x) for spectrum_x in x]) \
+                if isinstance(x, list) else (0.5 * (x[:, :-1] + x[:, 1:])).ravel()
+            self.widths = np.concatenate([np.diff(spectrum_x) for spectrum_x in x]) \
+                if isinstance(x, list) else np.diff(x, axis=1).ravel()
+        else:
+            self.centers = np.concatenate(x) if isinstance(x, list) else x.ravel()
+            self.widths = None
+        self.values = np.concatenate(y) if isinstance(y, list) else y.ravel()
+        self.offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+        try:
+            spectrum_info = workspace.spectrumInfo()
+            for index in range(number_of_histograms):
+                if spectrum_info.isMasked(index):
+                    self.values[self.offsets[index]:self.offsets[index + 1]] = np.nan
+        except:
+            pass
+
+        self._monitors = None
+        self._summed_spectra = None
+        self._x_ranges = None
+
+    def monitors(self, spectrum_info):
+        """
+        Get a boolean array which is True for the spectra of monitors.
+
+        :param spectrum_info: the SpectrumInfo of the workspace or None, in which case no spectrum is a monitor
+        """
+        number_of_histograms = len(self.offsets) - 1
+        if spectrum_info is None:
+            return np.zeros(number_of_histograms, dtype=bool)
+        if self._monitors is None:
+            self._monitors = np.array([spectrum_info.hasDetectors(index) and spectrum_info.isMonitor(index)
+                                       for index in range(number_of_histograms)], dtype=bool)
+        return self._monitors
+
+    def summed_spectra(self, workspace):
+        """
+        Get the integrated counts of each spectrum, as a 1D array
+        """
+        if self._summed_spectra is None:
+            self._summed_spectra = _integrate_workspace(workspace).extractY()[:, 0]
+        return self._summed_spectra
+
+    def x_range(self, workspace_indices):
+        """
+        Get the smallest and largest point, and the smallest spacing of points, of a set of spectra
+        """
+        if self._x_ranges is None:
+            starts, stops = self.offsets[:-1], self.offsets[1:]
+            spacings = np.diff(self.centers, append=np.inf)
+            spacings[stops[stops > 0] - 1] = np.inf
+            non_empty = np.flatnonzero(stops > starts)
+            self._x_ranges = np.full((3, len(starts)), np.nan)
+            self._x_ranges[0, non_empty] = np.minimum.reduceat(self.centers, starts[non_empty])
+            self._x_ranges[1, non_empty] = np.maximum.reduceat(self.centers, starts[non_empty])
+            self._x_ranges[2, non_empty] = np.minimum.reduceat(spacings, starts[non_empty])
+        x_ranges = self._x_ranges[:, workspace_indices]
+        return np.nanmin(x_ranges[0]), np.nanmax(x_ranges[1]), np.nanmin(x_ranges[2])
+
+    def resample(self, workspace_indices, x, normalize_by_bin_width):
+        """
+        Get the values of the nearest points of the spectra at the points x, as an interpolation of kind 'nearest'
+        does, with nan outside the x range of each spectrum.
+
+        :param workspace_indices: an integer :class:`numpy.ndarray` of the spectra to resample
+        :param x: a sorted :class:`numpy.ndarray` of points
+        :param normalize_by_bin_width: if True, histogram data which is not a distribution is divided by the bin width
+        :return: a :class:`numpy.ndarray` of shape (# of spectra, # of points)
+        """
+        x = np.asarray(x, dtype=np.float64)
+        starts = self.offsets[workspace_indices]
+        lengths = self.offsets[workspace_indices + 1] - starts
+        nearest = np.empty([len(workspace_indices), x.size], dtype=np.int64)
+        # bound the size of the temporary arrays for spectra with many points
+        ends = np.cumsum(lengths)
+        first = 0
+        while first < len(lengths):
+            last = max(int(np.searchsorted(ends, ends[first] - lengths[first] + self.BLOCK_SIZE, side='right')),
+                       first + 1)
+            nearest[first:last] = self._nearest_points(starts[first:last], lengths[first:last], x)
+            first = last
+
+        empty = lengths == 0
+        nearest[empty] = 0
+        counts = self.values[nearest]
+        if normalize_by_bin_width and self.histogram and not self.distribution:
+            counts /= self.widths[nearest]
+        counts[empty] = np.nan
+        # set values outside x data to nan
+        counts[(x < self.first_x[workspace_indices, np.newaxis]) | (x > self.last_x[workspace_indices, np.newaxis])] = np.nan
+        return counts
+
+    def _nearest_points(self, starts, lengths, x):
+        # The nearest point to x[j] is the number of midpoints between the points of the spectrum which are below
+        # x[j], that is the number of midpoints m with searchsorted(x, m, side='right') <= j
+        number_of_midpoints = np.maximum(lengths - 1, 0)
+        segments = np.repeat(np.arange(len(starts)), number_of_midpoints)
+        first_points = np.arange(number_of_midpoints.sum()) + \
+            np.repeat(starts - np.cumsum(number_of_midpoints) + number_of_midpoints, number_of_midpoints)
+        midpoints = 0.5 * (self.centers[first_points] + self.centers[first_points + 1])
+        positions = np.searchsorted(x, midpoints, side='right')
+        below = np.bincount(segments * (x.size + 1) + positions, minlength=len(starts) * (x.size + 1))
+        return np.cumsum(below.reshape((len(starts), x.size + 1)), axis=1)[:, :x.size] + starts[:, np.newaxis]
+
+
+class _RaggedWorkspaceCache(AnalysisDataServiceObserver):
+    """
+    Keeps the RaggedWorkspaceData of the most recently resampled workspaces in the ADS, such that panning and
+    zooming an image does not extract the data again. An entry is removed when its workspace is replaced, renamed
+    or deleted.
+    """
+    MAX_ENTRIES = 4
+
+    def __init__(self):
+        super(_RaggedWorkspaceCache, self).__init__()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.observeReplace(True)
+        self.observeRename(True)
+        self.observeDelete(True)
+        self.observeClear(True)
+
+    def get(self, workspace):
+        name = workspace.name()
+        if not name:
+            return RaggedWorkspaceData(workspace)
+        with self._lock:
+            ragged_data = self._entries.get(name)
+            if ragged_data is not None:
+                self._entries.move_to_end(name)
+                return ragged_data
+        ragged_data = RaggedWorkspaceData(workspace)
+        with self._lock:
+            self._entries[name] = ragged_data
+            while len(self._entries) > self.MAX_ENTRIES:
+                self._entries.popitem(last=False)
+        return ragged_data
+
+    def _remove(self, name):
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def replaceHandle(self, name, workspace):
+        self._remove(name)
+
+    def renameHandle(self, old_name, new_name):
+        self._remove(old_name)
+        self._remove(new_name)
+
+    def deleteHandle(self, name, workspace):
+        self._remove(name)
+
+    def clearHandle(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_ragged_workspace_cache = None
+
+
+def get_ragged_workspace_data(workspace):
+    """
+    Get the RaggedWorkspaceData of a workspace, which is cached for workspaces in the ADS until they are replaced
+
+    :param workspace: a MatrixWorkspace
+    """
+    global _ragged_workspace_cache
+    if _ragged_workspace_cache is None:
+        _ragged_workspace_cache = _RaggedWorkspaceCache()
+    return _ragged_workspace_cache.get(workspace)
+
+
 def get_matrix_2d_data(workspace, distribution, histogram2D=False, transpose=False):
     '''
     Get all data from a Matrix workspace that has the same number of bins
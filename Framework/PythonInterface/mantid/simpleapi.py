@@ -29,9 +29,12 @@ Importing this module starts the FrameworkManager instance.
 # std libs
 from collections import OrderedDict, namedtuple
 from contextlib import contextmanager
+import hashlib
 import inspect
+import json
 import os
 import sys
+import tempfile
 
 import mantid
 # This is a simple API so give access to the aliases by default as well
@@ -1078,16 +1081,30 @@ def _create_algorithm_object(name, version=-1, startProgress=None, endProgress=N
         if (startProgress is not None) and (endProgress is not None):
             kwargs['startProgress'] = float(startProgress)
             kwargs['endProgress'] = float(endProgress)
-        alg = parent.createChildAlgorithm(name, **kwargs)
+        alg = _create_with_deferred_plugins(parent.createChildAlgorithm, name, **kwargs)
     else:
         # managed algorithm so that progress reporting
         # can be more easily wired up automatically
-        alg = AlgorithmManager.create(name, version)
+        alg = _create_with_deferred_plugins(AlgorithmManager.create, name, version)
     # common traits
     alg.setRethrows(True)
     return alg
 
 
+def _create_with_deferred_plugins(create, *args, **kwargs):
+    """
+    Calls the given algorithm creation function. If the algorithm is not registered and
+    the import of the Python plugins has been deferred, they are imported and the creation retried.
+    """
+    try:
+        return create(*args, **kwargs)
+    except RuntimeError:
+        if not _deferred_plugin_files:
+            raise
+    _load_deferred_plugins()
+    return create(*args, **kwargs)
+
+
 # -------------------------------------------------------------------------------------------------------------
 
 
@@ -1182,10 +1199,11 @@ def _mockup(plugins):
         create_fake_function(name)
 
 
-def _translate():
+def _translate(index=None):
     """
         Loop through the algorithms and register a function call
         for each of them
+        :param index: If given, a lazy simpleapi index whose algorithms and methods are filled in
         :returns: a list of the name of new function calls
     """
     from mantid.api import AlgorithmFactory, AlgorithmManager
@@ -1219,6 +1237,11 @@ def _translate():
                                    % (method_name, algm_object.name(), other_alg))
             _attach_algorithm_func_as_method(method_name, algorithm_wrapper, algm_object)
             new_methods[method_name] = algm_object.name()
+            if index is not None:
+                index["methods"].append([method_name, name, algm_object.workspaceMethodInputProperty(),
+                                         list(algm_object.workspaceMethodOn())])
+        if index is not None:
+            index["algorithms"][name] = {"version": max(versions), "aliases": algm_object.alias().strip().split()}
         new_func_attrs.append(name)
 
     return new_func_attrs
@@ -1260,16 +1283,238 @@ def _update_sys_path(dirs):
             sys.path.remove(dir_path)
 
 
+# -------------------------------------------------------------------------------------------------------------
+# Lazy simpleapi
+#
+# When enabled, importing this module only reads an index of the algorithms, aliases, workspace methods and fit
+# functions that was persisted by an earlier import. The algorithm and fit function wrappers are created by the
+# module __getattr__ on first access and the Python plugins are imported when the first Python algorithm or fit
+# function is accessed. The index is regenerated by a full import whenever its key changes.
+# -------------------------------------------------------------------------------------------------------------
+
+# The ConfigService key which enables the lazy simpleapi
+LAZY_SIMPLEAPI_KEY = 'python.simpleapi.lazy'
+# The name of the index file in the application data directory
+LAZY_INDEX_FILENAME = 'simpleapi_index.json'
+# Increment when the format of the index changes
+LAZY_INDEX_FORMAT = 1
+
+# The index when the lazy simpleapi is in use, otherwise None
+_lazy_index = None
+# The Python plugins whose import has been deferred
+_deferred_plugin_files = []
+_deferred_plugin_dirs = set()
+
+
+class _DeferredAlgorithm(object):
+    """
+        Stands in for the algorithm object given to _create_algorithm_function. The algorithm is only
+        created when its documentation is requested.
+    """
+
+    def __init__(self, name, version, aliases):
+        self._name = name
+        self._version = version
+        self._aliases = aliases
+        self._algorithm = None
+
+    def alias(self):
+        return " ".join(self._aliases)
+
+    def initialize(self):
+        self._get_algorithm().initialize()
+
+    def docString(self):
+        return self._get_algorithm().docString()
+
+    def _get_algorithm(self):
+        if self._algorithm is None:
+            from mantid.api import AlgorithmManager
+            self._algorithm = AlgorithmManager.createUnmanaged(self._name, self._version)
+        return self._algorithm
+
+
+def _lazy_simpleapi_enabled():
+    """
+        :returns: True if the lazy simpleapi has been enabled in the ConfigService
+    """
+    if ConfigService.Instance()[LAZY_SIMPLEAPI_KEY].strip().lower() not in ('1', 'true', 'on'):
+        return False
+    if sys.version_info < (3, 7):
+        logger.warning("simpleapi: The lazy simpleapi requires Python 3.7 or later. All algorithms will be loaded.")
+        return False
+    return True
+
+
+def _get_lazy_index_path():
+    return os.path.join(ConfigService.Instance().getAppDataDirectory(), LAZY_INDEX_FILENAME)
+
+
+def _get_lazy_index_key(plugins_manifest_path, plugin_files):
+    """
+        Computes the key of the index from everything that determines its content: the mantid version,
+        the algorithms and fit functions registered by the C++ libraries, the plugin manifest and
+        the Python plugin files.
+        :param plugins_manifest_path: The path to the Python plugins manifest
+        :param plugin_files: The list of Python plugin files
+        :returns: A string key
+    """
+    from mantid.api import AlgorithmFactory, FunctionFactory
+
+    def file_state(path):
+        try:
+            stat = os.stat(path)
+            return [path, stat.st_mtime_ns, stat.st_size]
+        except OSError:
+            return [path, None, None]
+
+    algorithms = AlgorithmFactory.getRegisteredAlgorithms(True)
+    state = [LAZY_INDEX_FORMAT, mantid.__version__,
+             sorted([name, sorted(versions)] for name, versions in algorithms.items()),
+             sorted(FunctionFactory.getFunctionNames()),
+             file_state(plugins_manifest_path)] + [file_state(path) for path in plugin_files]
+    return hashlib.sha256(json.dumps(state).encode('utf-8')).hexdigest()
+
+
+def _read_lazy_index(key):
+    """
+        Reads the persisted index
+        :param key: The key the index must have to be valid
+        :returns: The index or None if there is no valid index
+    """
+    try:
+        with open(_get_lazy_index_path()) as index_file:
+            index = json.load(index_file)
+    except (IOError, OSError, ValueError):
+        return None
+    return index if index.get("key") == key else None
+
+
+def _write_lazy_index(index):
+    """
+        Persists the index, replacing the file atomically so concurrent imports never read a partial index
+        :param index: The index to write
+    """
+    index_path = _get_lazy_index_path()
+    try:
+        with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(index_path), suffix='.tmp',
+                                         delete=False) as index_file:
+            json.dump(index, index_file)
+        os.replace(index_file.name, index_path)
+    except (IOError, OSError) as exc:
+        logger.debug("simpleapi: Unable to write the lazy simpleapi index: {}".format(str(exc)))
+
+
+def _create_lazy_index(key):
+    """
+        Creates an empty index. The C++ algorithms and fit functions must be registered, and the Python plugins
+        not yet loaded, so that the Python entries can be identified once the index is complete.
+        :param key: The key of the index
+    """
+    from mantid.api import AlgorithmFactory, FunctionFactory
+    return {"key": key, "algorithms": {}, "methods": [], "functions": {},
+            "cpp_algorithms": {name: max(versions)
+                               for name, versions in AlgorithmFactory.getRegisteredAlgorithms(True).items()},
+            "cpp_functions": FunctionFactory.getFunctionNames()}
+
+
+def _complete_lazy_index(index):
+    """
+        Marks the algorithms and fit functions which were registered by the Python plugins, adds the fit
+        functions and persists the index
+        :param index: An index created by _create_lazy_index and filled in by _translate
+    """
+    from mantid.api import FunctionFactory
+    from .fitfunctions import _do_not_wrap
+    cpp_algorithms = index.pop("cpp_algorithms")
+    cpp_functions = set(index.pop("cpp_functions"))
+    for name, entry in index["algorithms"].items():
+        entry["python"] = cpp_algorithms.get(name) != entry["version"]
+    index["functions"] = {name: name not in cpp_functions for name in FunctionFactory.getFunctionNames()
+                          if name not in _do_not_wrap}
+    _write_lazy_index(index)
+
+
+def _load_deferred_plugins():
+    """
+        Imports the Python plugins whose import was deferred by the lazy simpleapi
+    """
+    global _deferred_plugin_files
+    plugin_files, _deferred_plugin_files = _deferred_plugin_files, []
+    if plugin_files:
+        with _update_sys_path(_deferred_plugin_dirs):
+            _plugin_helper.load(plugin_files)
+
+
+def _lazy_algorithm_function(name):
+    """
+        Creates the function of an algorithm in the index
+        :param name: The name of the algorithm
+        :returns: The algorithm wrapper
+    """
+    entry = _lazy_index["algorithms"][name]
+    if entry["python"]:
+        _load_deferred_plugins()
+    return _create_algorithm_function(name, entry["version"],
+                                      _DeferredAlgorithm(name, entry["version"], entry["aliases"]))
+
+
+def _use_lazy_index(index, plugin_files, plugin_dirs):
+    """
+        Sets up the module from a valid index. Only the workspace methods are created up front.
+        :param index: The index read from file
+        :param plugin_files: The Python plugin files whose import is deferred
+        :param plugin_dirs: The directories containing the plugin files
+    """
+    global _lazy_index, _deferred_plugin_files, _deferred_plugin_dirs
+    index["aliases"] = {alias: name for name, entry in index["algorithms"].items() for alias in entry["aliases"]}
+    _lazy_index = index
+    _deferred_plugin_files = list(plugin_files)
+    _deferred_plugin_dirs = set(plugin_dirs)
+    for method_name, name, input_prop, workspace_types in index["methods"]:
+        _api._workspaceops.attach_func_as_method(method_name, _lazy_algorithm_function(name), input_prop, name,
+                                                 workspace_types)
+
+
+def __getattr__(name):
+    """
+        Creates algorithm and fit function wrappers on first access when the lazy simpleapi is in use
+        :param name: The name of the attribute
+    """
+    if _lazy_index is not None:
+        if name == '__all__':
+            return sorted(set(key for key in globals() if not key.startswith('_')) | set(_lazy_index["algorithms"])
+                          | set(_lazy_index["aliases"]) | set(_lazy_index["functions"]))
+        algorithm_name = _lazy_index["aliases"].get(name, name)
+        if algorithm_name in _lazy_index["algorithms"]:
+            _lazy_algorithm_function(algorithm_name)
+            return globals()[name]
+        if name in _lazy_index["functions"]:
+            if _lazy_index["functions"][name]:
+                _load_deferred_plugins()
+            from .fitfunctions import _create_wrapper_function
+            wrapper = _create_wrapper_function(name)
+            globals()[name] = wrapper
+            return wrapper
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+
+
+def __dir__():
+    names = set(globals())
+    if _lazy_index is not None:
+        names |= set(_lazy_index["algorithms"]) | set(_lazy_index["aliases"]) | set(_lazy_index["functions"])
+    return sorted(names)
+
+
 # Initialization:
 #   - start FrameworkManager (if necessary). The check is necessary as
 #    _FrameworkManagerImpl.Instance() will import this module and deadlock if it
 #    calls Instance again while importing this module
-#   - loads the python plugins and create new algorithm functions
+#   - with the lazy simpleapi and a valid index, defer everything else until first access
+#   - otherwise loads the python plugins and create new algorithm functions
 if not _api.FrameworkManagerImpl.hasInstance():
     _api.FrameworkManagerImpl.Instance()
-_translate()
 
-# Load the Python plugins
 # The exported C++ plugins
 from . import _plugins  # noqa
 
@@ -1320,21 +1565,36 @@ try:
             logger.warning(f"Error occurred during plugin discovery: {str(e)}")
             continue
 
-    # Mock out the expected functions
-    _mockup(_plugin_files)
-    # Load the plugins.
-    with _update_sys_path(_plugin_dirs):
-        _plugin_modules = _plugin_helper.load(_plugin_files)
-    # Create the final proper algorithm definitions for the plugins
-    _plugin_attrs = _translate()
-    # Finally, overwrite the mocked function definitions in the loaded modules with the real ones
-    _plugin_helper.sync_attrs(globals(), _plugin_attrs, _plugin_modules)
-
-    # Attach fit function wrappers
-    from .fitfunctions import _wrappers
-
-    _globals = globals()
-    _globals.update(_wrappers())
+    # Use the persisted index of the lazy simpleapi if it is still valid, otherwise create a new one
+    _new_lazy_index = None
+    if _lazy_simpleapi_enabled():
+        _lazy_index_key = _get_lazy_index_key(plugins_manifest_path, _plugin_files)
+        _valid_lazy_index = _read_lazy_index(_lazy_index_key)
+        if _valid_lazy_index is not None:
+            _use_lazy_index(_valid_lazy_index, _plugin_files, _plugin_dirs)
+        else:
+            _new_lazy_index = _create_lazy_index(_lazy_index_key)
+
+    if _lazy_index is None:
+        _translate()
+        # Mock out the expected functions
+        _mockup(_plugin_files)
+        # Load the plugins.
+        with _update_sys_path(_plugin_dirs):
+            _plugin_modules = _plugin_helper.load(_plugin_files)
+        # Create the final proper algorithm definitions for the plugins
+        _plugin_attrs = _translate(_new_lazy_index)
+        # Finally, overwrite the mocked function definitions in the loaded modules with the real ones
+        _plugin_helper.sync_attrs(globals(), _plugin_attrs, _plugin_modules)
+
+        # Attach fit function wrappers
+        from .fitfunctions import _wrappers
+
+        _globals = globals()
+        _globals.update(_wrappers())
+
+        if _new_lazy_index is not None:
+            _complete_lazy_index(_new_lazy_index)
 except Exception:
     # If an error gets raised remove the attribute to be consistent
     # with standard python behaviour and reraise the exception
@@ -0,0 +1,221 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Managed directory of cache files for the powder diffraction reduction.
+
+The cache files themselves are unchanged NeXus files named by
+CreateCacheFilename. The cache keeps an sqlite index next to them with the
+tier, size, times and key properties of every file, and counts the lookups
+of each tier so the hit rate can be queried. Files are written under a
+temporary name and moved into place once complete, so a file is never
+read while another job is writing it.
+"""
+from collections import namedtuple
+from contextlib import contextmanager
+import os
+import sqlite3
+import time
+import uuid
+
+# tiers in the order they are evicted when the cache is over its size limit
+TIER_UNFOCUSED = 'unfocused'
+TIER_FOCUSED = 'focused'
+TIER_VANADIUM = 'vanadium'
+TIERS = (TIER_UNFOCUSED, TIER_FOCUSED, TIER_VANADIUM)
+
+INDEX_FILENAME = 'cacheindex.sqlite'
+# time to wait for another job to release the index
+INDEX_TIMEOUT = 60.
+SECONDS_PER_DAY = 24. * 60. * 60.
+
+CacheEntry = namedtuple('CacheEntry', ['filename', 'tier', 'size', 'created', 'accessed', 'properties'])
+TierStatistics = namedtuple('TierStatistics', ['hits', 'misses', 'entries', 'size'])
+
+
+class ReductionCache(object):
+    """
+    Index, evict and atomically write the cache files in a directory
+    """
+
+    def __init__(self, cache_dir, size_limit=0., age_limit=0.):
+        """
+        :param cache_dir: directory containing the cache files and the index
+        :param size_limit: maximum total size of the cache files in bytes. 0 means unlimited
+        :param age_limit: files not used for this many days are removed. 0 means they are kept
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.size_limit = size_limit
+        self.age_limit = age_limit
+        self._index = os.path.join(self.cache_dir, INDEX_FILENAME)
+        with self._connect() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS entries (filename TEXT PRIMARY KEY, tier TEXT NOT NULL, '
+                               'size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL, properties TEXT)')
+            connection.execute('CREATE TABLE IF NOT EXISTS lookups (tier TEXT PRIMARY KEY, hits INTEGER NOT NULL, '
+                               'misses INTEGER NOT NULL)')
+
+    @contextmanager
+    def _connect(self):
+        """Connection to the index which commits, or rolls back, and closes at the end of a with block"""
+        connection = sqlite3.connect(self._index, timeout=INDEX_TIMEOUT)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _key(self, filename):
+        """Files are indexed by their name relative to the cache directory"""
+        return os.path.relpath(os.path.abspath(filename), self.cache_dir)
+
+    def lookup(self, filename, tier, record=True):
+        """
+        Check for a cache file and mark it as used
+
+        :param filename: full path of the cache file, as given by CreateCacheFilename
+        :param tier: tier the file belongs to
+        :param record: whether to count the lookup in the hit rate of the tier
+        :return: True if the file is in the cache
+        """
+        _check_tier(tier)
+        key = self._key(filename)
+        now = time.time()
+        with self._connect() as connection:
+            found = os.path.isfile(filename)
+            if found:
+                updated = connection.execute('UPDATE entries SET accessed = ? WHERE filename = ?', (now, key))
+                if updated.rowcount == 0:
+                    # a file written before the index existed
+                    connection.execute('INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                                       (key, tier, os.path.getsize(filename), os.path.getmtime(filename), now, None))
+            else:
+                connection.execute('DELETE FROM entries WHERE filename = ?', (key,))
+            if record:
+                _count_lookups(connection, tier, hits=int(found), misses=int(not found))
+        return found
+
+    def record_hits(self, tier, hits):
+        """Count hits that were found without a lookup, such as each file in a cached sum"""
+        _check_tier(tier)
+        with self._connect() as connection:
+            _count_lookups(connection, tier, hits=hits)
+
+    def write(self, filename, tier, save, properties=None):
+        """
+        Write a cache file under a temporary name, move it into place and add it to the index
+
+        :param filename: full path of the cache file, as given by CreateCacheFilename
+        :param tier: tier the file belongs to
+        :param save: function taking the temporary filename to write to, e.g. a call to SaveNexusProcessed
+        :param properties: key properties the file was created from, stored in the index
+        """
+        _check_tier(tier)
+        directory, basename = os.path.split(os.path.abspath(filename))
+        stem, extension = os.path.splitext(basename)
+        # hidden, and in the same directory so the rename is atomic
+        tempname = os.path.join(directory, '.{}.{}.part{}'.format(stem, uuid.uuid4().hex, extension))
+        try:
+            save(tempname)
+            os.replace(tempname, filename)
+        finally:
+            if os.path.exists(tempname):
+                os.remove(tempname)
+
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                               (self._key(filename), tier, os.path.getsize(filename), now, now, properties))
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the files that have not been used within the age limit, then the least recently used
+        files of the lowest tiers until the cache is within its size limit
+
+        :return: list of the files removed
+        """
+        entries = self.entries()
+        removed = []
+        if self.age_limit > 0.:
+            oldest = time.time() - self.age_limit * SECONDS_PER_DAY
+            removed.extend(entry for entry in entries if entry.accessed < oldest)
+        if self.size_limit > 0.:
+            kept = [entry for entry in entries if entry not in removed]
+            size = sum(entry.size for entry in kept)
+            for entry in sorted(kept, key=lambda entry: (_tier_order(entry.tier), entry.accessed)):
+                if size <= self.size_limit:
+                    break
+                removed.append(entry)
+                size -= entry.size
+        self._remove(removed)
+        return [os.path.join(self.cache_dir, entry.filename) for entry in removed]
+
+    def clear(self):
+        """Remove every file in the index and reset the hit rates"""
+        self._remove(self.entries())
+        with self._connect() as connection:
+            connection.execute('DELETE FROM lookups')
+
+    def entries(self, tier=None):
+        """
+        :param tier: only list the files of this tier
+        :return: list of CacheEntry for the files in the index
+        """
+        query = 'SELECT * FROM entries'
+        args = ()
+        if tier is not None:
+            _check_tier(tier)
+            query += ' WHERE tier = ?'
+            args = (tier,)
+        with self._connect() as connection:
+            return [CacheEntry(*row) for row in connection.execute(query, args)]
+
+    def statistics(self):
+        """
+        :return: dict of TierStatistics for each tier
+        """
+        statistics = {}
+        with self._connect() as connection:
+            lookups = {tier: (hits, misses) for (tier, hits, misses) in connection.execute('SELECT * FROM lookups')}
+            for tier in TIERS:
+                entries, size = connection.execute('SELECT COUNT(*), TOTAL(size) FROM entries WHERE tier = ?',
+                                                   (tier,)).fetchone()
+                hits, misses = lookups.get(tier, (0, 0))
+                statistics[tier] = TierStatistics(hits, misses, entries, int(size))
+        return statistics
+
+    def hit_rates(self):
+        """
+        :return: dict of the fraction of lookups that were found in the cache for each tier, None if there were none
+        """
+        rates = {}
+        for (tier, stats) in self.statistics().items():
+            lookups = stats.hits + stats.misses
+            rates[tier] = float(stats.hits) / lookups if lookups else None
+        return rates
+
+    def _remove(self, entries):
+        with self._connect() as connection:
+            connection.executemany('DELETE FROM entries WHERE filename = ?', [(entry.filename,) for entry in entries])
+        for entry in entries:
+            try:
+                os.remove(os.path.join(self.cache_dir, entry.filename))
+            except FileNotFoundError:
+                pass  # already removed by another job
+
+
+def _check_tier(tier):
+    if tier not in TIERS:
+        raise ValueError('Unknown cache tier "{}". Allowed values are {}'.format(tier, ', '.join(TIERS)))
+
+
+def _tier_order(tier):
+    return TIERS.index(tier) if tier in TIERS else -1
+
+
+def _count_lookups(connection, tier, hits=0, misses=0):
+    connection.execute('INSERT OR IGNORE INTO lookups VALUES (?, 0, 0)', (tier,))
+    connection.execute('UPDATE lookups SET hits = hits + ?, misses = misses + ? WHERE tier = ?', (hits, misses, tier))
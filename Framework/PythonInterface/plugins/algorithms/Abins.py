@@ -21,7 +21,7 @@ from mantid.api import WorkspaceFactory, AnalysisDataService
 
 # noinspection PyProtectedMember
 from mantid.simpleapi import CloneWorkspace, GroupWorkspaces, SaveAscii, Load, Scale
-from mantid.kernel import logger, StringListValidator, Direction, StringArrayProperty, Atom
+from mantid.kernel import logger, StringListValidator, Direction, StringArrayProperty, Atom, IntBoundedValidator
 import abins
 
 
@@ -42,6 +42,7 @@ class Abins(PythonAlgorithm):
     _out_ws_name = None
     _num_quantum_order_events = None
     _extracted_ab_initio_data = None
+    _number_of_processes = None
 
     def category(self):
         return "Simulation"
@@ -119,6 +120,10 @@ class Abins(PythonAlgorithm):
                              doc="Number of quantum order effects included in the calculation "
                                  "(1 -> FUNDAMENTALS, 2-> first overtone + FUNDAMENTALS + 2nd order combinations")
 
+        self.declareProperty(name="NumberOfProcesses", defaultValue=1,
+                             validator=IntBoundedValidator(lower=1),
+                             doc="Number of processes used to calculate S in parallel over atoms and k-points.")
+
         self.declareProperty(WorkspaceProperty("OutputWorkspace", '', Direction.Output),
                              doc="Name to give the output workspace.")
 
@@ -153,6 +158,11 @@ class Abins(PythonAlgorithm):
         if output["Invalid"]:
             issues["VibrationalOrPhononFile"] = output["Comment"]
 
+        number_of_processes = self.getProperty("NumberOfProcesses").value
+        if number_of_processes > os.cpu_count():
+            issues["NumberOfProcesses"] = "Number of processes cannot exceed the number of CPUs ({}).".format(
+                os.cpu_count())
+
         workspace_name = self.getPropertyValue("OutputWorkspace")
         # list of special keywords which cannot be used in the name of workspace
         forbidden_keywords = ["total"]
@@ -195,7 +205,8 @@ class Abins(PythonAlgorithm):
                                                      sample_form=self._sample_form, abins_data=ab_initio_data,
                                                      instrument=self._instrument,
                                                      quantum_order_num=self._num_quantum_order_events,
-                                                     bin_width=self._bin_width)
+                                                     bin_width=self._bin_width,
+                                                     number_of_processes=self._number_of_processes)
         s_data = s_calculator.get_formatted_data()
 
         prog_reporter.report("Dynamical structure factors have been determined.")
@@ -939,6 +950,10 @@ class Abins(PythonAlgorithm):
 
         self._scale_by_cross_section = self.getPropertyValue('ScaleByCrossSection')
         self._out_ws_name = self.getPropertyValue('OutputWorkspace')
+
+        # number of processes is a performance parameter, so it does not invalidate previously cached results
+        self._number_of_processes = self.getProperty("NumberOfProcesses").value
+
         self._calc_partial = (len(self._atoms) > 0)
 
         # Sampling mesh is determined by
@@ -6,12 +6,17 @@
 # SPDX - License - Identifier: GPL - 3.0 +
 from mantid.api import mtd, AlgorithmFactory, DistributedDataProcessorAlgorithm, ITableWorkspaceProperty, \
     MatrixWorkspaceProperty, MultipleFileProperty, PropertyMode
-from mantid.kernel import Direction, PropertyManagerDataService
+from mantid.kernel import Direction, FloatBoundedValidator, IntBoundedValidator, PropertyManagerDataService, \
+    StringListValidator
 from mantid.simpleapi import AlignAndFocusPowder, CompressEvents, ConvertDiffCal, ConvertUnits, CopyLogs, \
     CopySample, CreateCacheFilename, DeleteWorkspace, DetermineChunking, Divide, EditInstrumentGeometry, FilterBadPulses, \
     LoadDiffCal, Load, LoadIDFFromNexus, LoadNexusProcessed, PDDetermineCharacterizations, Plus, \
     RebinToWorkspace, RemoveLogs, RenameWorkspace, SaveNexusProcessed
+from mantid.utils import reductioncache
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import os
+import threading
 import numpy as np
 
 EXTENSIONS_NXS = ["_event.nxs", ".nxs.h5"]
@@ -31,6 +36,9 @@ PROPS_FOR_ALIGN = [CAL_FILE, GROUP_FILE,
 PROPS_FOR_ALIGN.extend(PROPS_IN_PD_CHARACTER)
 PROPS_FOR_ALIGN.extend(PROPS_FOR_INSTR)
 PROPS_FOR_PD_CHARACTER = ['FrequencyLogNames', 'WaveLengthLogNames']
+# HDF5 is not built thread safe on all platforms, so the loads in the background of
+# MaxChunksInFlight and the NeXus reads and writes of the main thread take turns
+FILE_IO_LOCK = threading.RLock()
 
 
 def determineChunking(filename, chunkSize):
@@ -60,6 +68,15 @@ def determineChunking(filename, chunkSize):
     return strategy
 
 
+def executeLoader(loader):
+    '''Run a loader and return the name of the algorithm that actually did the loading'''
+    with FILE_IO_LOCK:
+        loader.execute()
+    if loader.name() == 'Load':
+        return loader.getPropertyValue('LoaderName')
+    return loader.name()
+
+
 def uniqueDescription(name, wksp):
     wksp = str(wksp)
     if name == 'AbsorptionWorkspace':
@@ -107,12 +124,24 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
                              "Specify maximum Gbytes of file to read in one chunk.  Default is whole file.")
         self.declareProperty("FilterBadPulses", 0.,
                              doc="Filter out events measured while proton charge is more than 5% below average")
+        self.declareProperty("MaxChunksInFlight", 1, IntBoundedValidator(lower=1),
+                             doc="Maximum number of loaded chunks held in memory at once. With more than one, the next "
+                             "chunks and files are loaded in the background while the current chunk is focused")
 
         self.declareProperty(MatrixWorkspaceProperty('AbsorptionWorkspace', '',
                                                      Direction.Input, PropertyMode.Optional),
                              doc='Divide data by this Pixel-by-pixel workspace')
 
         self.copyProperties('CreateCacheFilename', 'CacheDir')
+        self.declareProperty("CacheTier", reductioncache.TIER_FOCUSED,
+                             StringListValidator([reductioncache.TIER_FOCUSED, reductioncache.TIER_VANADIUM]),
+                             doc="Tier of the cache files written. Vanadium files are the last to be removed when the "
+                             "cache is over its size limit")
+        self.declareProperty("CacheSizeLimit", 0., FloatBoundedValidator(lower=0.),
+                             doc="Maximum size of the cache files in GiB. Beyond it the least recently used files of the "
+                             "lowest tier are removed. Default is unlimited")
+        self.declareProperty("CacheAgeLimit", 0., FloatBoundedValidator(lower=0.),
+                             doc="Cache files not used for this many days are removed. Default is to keep them")
 
         self.declareProperty(MatrixWorkspaceProperty('OutputWorkspace', '',
                                                      Direction.Output),
@@ -148,14 +177,17 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
                 linearizedRuns.append(item)
         return linearizedRuns
 
-    def __createLoader(self, filename, wkspname, progstart=None, progstop=None, skipLoadingLogs=False, **kwargs):
+    def __createLoader(self, filename, wkspname, progstart=None, progstop=None, skipLoadingLogs=False, loaderName=None,
+                       **kwargs):
         # load a chunk - this is a bit crazy long because we need to get an output property from `Load` when it
         # is run and the algorithm history doesn't exist until the parent algorithm (this) has finished
         # the kwargs are extra things to be supplied to the loader
+        if loaderName is None:
+            loaderName = self.__loaderName
         if progstart is None or progstop is None:
-            loader = self.createChildAlgorithm(self.__loaderName)
+            loader = self.createChildAlgorithm(loaderName)
         else:
-            loader = self.createChildAlgorithm(self.__loaderName,
+            loader = self.createChildAlgorithm(loaderName,
                                                startProgress=progstart, endProgress=progstop)
         loader.setAlwaysStoreInADS(True)
         loader.setLogging(True)
@@ -163,8 +195,8 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
         loader.setPropertyValue('Filename', filename)
         loader.setPropertyValue('OutputWorkspace', wkspname)
         if skipLoadingLogs:
-            if self.__loaderName != 'LoadEventNexus':
-                raise RuntimeError('Cannot set LoadLogs=False in {}'.format(self.__loaderName))
+            if loaderName != 'LoadEventNexus':
+                raise RuntimeError('Cannot set LoadLogs=False in {}'.format(loaderName))
             loader.setProperty('LoadLogs', False)
         for key, value in kwargs.items():
             if isinstance(value, str):
@@ -296,11 +328,14 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
         if not PropertyManagerDataService.doesExist(reductionPropertiesName):
             reductionPropertiesName = ''  # do not specify non-existant manager
 
-        return CreateCacheFilename(Prefix=prefix,
-                                   PropertyManager=reductionPropertiesName,
-                                   Properties=propman_properties,
-                                   OtherProperties=alignandfocusargs,
-                                   CacheDir=cachedir).OutputFilename
+        cachefile = CreateCacheFilename(Prefix=prefix,
+                                        PropertyManager=reductionPropertiesName,
+                                        Properties=propman_properties,
+                                        OtherProperties=alignandfocusargs,
+                                        CacheDir=cachedir).OutputFilename
+        # key properties to store in the index of the cache
+        self.__cacheProperties[cachefile] = ','.join(sorted(alignandfocusargs))
+        return cachefile
 
     def __getGroupCacheName(self, group):
         wsname = self.__getGroupWkspName(group)
@@ -308,50 +343,68 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
         newprop = 'files_to_sum={}'.format(filenames_str)
         return self.__getCacheName('summed_'+wsname, additional_props=[newprop])
 
-    def __processFile(self, filename, file_prog_start, determineCharacterizations, createUnfocused):  # noqa: C902,C901
+    def __getFileWkspNames(self, filename, createUnfocused):
         # create a unique name for the workspace
         wkspname = '__' + self.__wkspNameFromFile(filename)
         wkspname += '_f%d' % self._filenames.index(filename)  # add file number to be unique
         unfocusname = ''
         if createUnfocused:
             unfocusname = wkspname + '_unfocused'
+        return wkspname, unfocusname
 
-        # check for a cachefilename
+    def __getChunkWkspNames(self, wkspname, unfocusname, chunkIndex, numChunks):
+        # if reading all at once, put the data into the final name directly
+        if numChunks == 1:
+            return wkspname, unfocusname
+        chunkname = '{}_c{:d}'.format(wkspname, chunkIndex)
+        unfocusname_chunk = ''
+        if unfocusname:  # only create unfocus chunk if needed
+            unfocusname_chunk = '{}_c{:d}'.format(unfocusname, chunkIndex)
+        return chunkname, unfocusname_chunk
+
+    def __getProgressPerChunkStep(self, numChunks, createUnfocused):
+        numSteps = 6  # for better progress reporting - 6 steps per chunk
+        if createUnfocused:
+            numSteps = 7  # one more for accumulating the unfocused workspace
+        return numSteps, self.prog_per_file * 1./(numSteps*float(numChunks))
+
+    def __loadFromCache(self, filename, wkspname, createUnfocused):
+        '''@returns the name of the cache file and True if the file's data was loaded from it'''
         cachefile = self.__getCacheName(self.__wkspNameFromFile(filename))
         self.log().information('looking for cachefile "{}"'.format(cachefile))
-        if (not createUnfocused) and self.useCaching and os.path.exists(cachefile):
+        if (not createUnfocused) and self.useCaching and self.__cache.lookup(cachefile, self.cacheTier):
             try:
                 if self.__loadCacheFile(cachefile, wkspname):
-                    return wkspname, ''
+                    return cachefile, True
             except RuntimeError as e:
                 # log as a warning and carry on as though the cache file didn't exist
                 self.log().warning('Failed to load cache file "{}": {}'.format(cachefile, e))
         else:
             self.log().information('not using cache')
+        return cachefile, False
+
+    def __processFile(self, filename, file_prog_start, determineCharacterizations, createUnfocused, lookupCache=True):
+        wkspname, unfocusname = self.__getFileWkspNames(filename, createUnfocused)
+
+        # check for a cachefilename
+        if lookupCache:
+            cachefile, loadedFromCache = self.__loadFromCache(filename, wkspname, createUnfocused)
+            if loadedFromCache:
+                return wkspname, ''
+        else:
+            cachefile = self.__getCacheName(self.__wkspNameFromFile(filename))
 
         chunks = determineChunking(filename, self.chunkSize)
-        numSteps = 6  # for better progress reporting - 6 steps per chunk
-        if createUnfocused:
-            numSteps = 7  # one more for accumulating the unfocused workspace
+        numSteps, prog_per_chunk_step = self.__getProgressPerChunkStep(len(chunks), createUnfocused)
         self.log().information('Processing \'{}\' in {:d} chunks'.format(filename, len(chunks)))
-        prog_per_chunk_step = self.prog_per_file * 1./(numSteps*float(len(chunks)))
 
-        unfocusname_chunk = ''
         canSkipLoadingLogs = False
 
         # inner loop is over chunks
         haveAccumulationForFile = False
         for (j, chunk) in enumerate(chunks):
             prog_start = file_prog_start + float(j) * float(numSteps - 1) * prog_per_chunk_step
-
-            # if reading all at once, put the data into the final name directly
-            if len(chunks) == 1:
-                chunkname = wkspname
-                unfocusname_chunk = unfocusname
-            else:
-                chunkname = '{}_c{:d}'.format(wkspname, j)
-                if unfocusname:  # only create unfocus chunk if needed
-                    unfocusname_chunk = '{}_c{:d}'.format(unfocusname, j)
+            chunkname, unfocusname_chunk = self.__getChunkWkspNames(wkspname, unfocusname, j, len(chunks))
 
             # load a chunk - this is a bit crazy long because we need to get an output property from `Load` when it
             # is run and the algorithm history doesn't exist until the parent algorithm (this) has finished
@@ -359,7 +412,8 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
                                          skipLoadingLogs=(len(chunks) > 1 and canSkipLoadingLogs and haveAccumulationForFile),
                                          progstart=prog_start, progstop=prog_start + prog_per_chunk_step,
                                          **chunk)
-            loader.execute()
+            with FILE_IO_LOCK:
+                loader.execute()
             if j == 0:
                 self.__setupCalibration(chunkname)
 
@@ -368,7 +422,8 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
                 CopyLogs(InputWorkspace=wkspname, OutputWorkspace=chunkname, MergeStrategy='WipeExisting')
                 # re-load instrument so detector positions that depend on logs get initialized
                 try:
-                    LoadIDFFromNexus(Workspace=chunkname, Filename=filename, InstrumentParentPath='/entry')
+                    with FILE_IO_LOCK:
+                        LoadIDFFromNexus(Workspace=chunkname, Filename=filename, InstrumentParentPath='/entry')
                 except RuntimeError as e:
                     self.log().warning('Reloading instrument using "LoadIDFFromNexus" failed: {}'.format(e))
 
@@ -383,56 +438,73 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
                 self.__determineCharacterizations(filename, chunkname)  # updates instance variable
                 determineCharacterizations = False
 
-            if self.__loaderName == 'LoadEventNexus' and mtd[chunkname].getNumberEvents() == 0:
-                self.log().notice('Chunk {} of {} contained no events. Skipping to next chunk.'.format(j+1,len(chunks)))
-                continue
-
-            prog_start += prog_per_chunk_step
-            if self.filterBadPulses > 0.:
-                FilterBadPulses(InputWorkspace=chunkname, OutputWorkspace=chunkname,
-                                LowerCutoff=self.filterBadPulses,
-                                startProgress=prog_start, endProgress=prog_start+prog_per_chunk_step)
-                if mtd[chunkname].getNumberEvents() == 0:
-                    msg = 'FilterBadPulses removed all events from '
-                    if len(chunks) == 1:
-                        raise RuntimeError(msg + filename)
-                    else:
-                        raise RuntimeError(msg + 'chunk {} of {} in {}'.format(j, len(chunks), filename))
-
-            prog_start += prog_per_chunk_step
-
-            # absorption correction workspace
-            if self.absorption is not None and len(str(self.absorption)) > 0:
-                ConvertUnits(InputWorkspace=chunkname, OutputWorkspace=chunkname,
-                             Target='Wavelength', EMode='Elastic')
-                # rebin the absorption correction to match the binning of the inputs if in histogram mode
-                # EventWorkspace will compare the wavelength of each individual event
-                absWksp = self.absorption
-                if mtd[chunkname].id() != 'EventWorkspace':
-                    absWksp = '__absWkspRebinned'
-                    RebinToWorkspace(WorkspaceToRebin=self.absorption, WorkspaceToMatch=chunkname, OutputWorkspace=absWksp)
-                Divide(LHSWorkspace=chunkname, RHSWorkspace=absWksp, OutputWorkspace=chunkname,
-                       startProgress=prog_start, endProgress=prog_start+prog_per_chunk_step)
-                if absWksp != self.absorption:  # clean up
-                    DeleteWorkspace(Workspace=absWksp)
-                ConvertUnits(InputWorkspace=chunkname, OutputWorkspace=chunkname,
-                             Target='TOF', EMode='Elastic')
-            prog_start += prog_per_chunk_step
-
-            if self.kwargs is None:
-                raise RuntimeError('Somehow arguments for "AlignAndFocusPowder" aren\'t set')
-
-            AlignAndFocusPowder(InputWorkspace=chunkname,
-                                OutputWorkspace=chunkname, UnfocussedWorkspace=unfocusname_chunk,
-                                startProgress=prog_start, endProgress=prog_start+2.*prog_per_chunk_step,
-                                **self.kwargs)
-            prog_start += 2. * prog_per_chunk_step  # AlignAndFocusPowder counts for two steps
-
-            self.__accumulate(chunkname, wkspname, unfocusname_chunk, unfocusname, not haveAccumulationForFile,
-                              removelogs=canSkipLoadingLogs)
-
-            haveAccumulationForFile = True
+            if self.__focusAndAccumulateChunk(filename, chunkname, unfocusname_chunk, wkspname, unfocusname, j,
+                                              len(chunks), prog_start, prog_per_chunk_step,
+                                              firstAccumulation=not haveAccumulationForFile,
+                                              removelogs=canSkipLoadingLogs):
+                haveAccumulationForFile = True
         # end of inner loop
+        self.__finishFile(filename, wkspname, cachefile)
+
+        return wkspname, unfocusname
+
+    def __focusAndAccumulateChunk(self, filename, chunkname, unfocusname_chunk, wkspname, unfocusname,
+                                  chunkIndex, numChunks, prog_start, prog_per_chunk_step, firstAccumulation,
+                                  removelogs):
+        '''Filter, correct and focus a loaded chunk, then accumulate it into the workspace for the file
+
+        @returns False if the chunk was skipped because it contained no events'''
+        if self.__loaderName == 'LoadEventNexus' and mtd[chunkname].getNumberEvents() == 0:
+            self.log().notice('Chunk {} of {} contained no events. Skipping to next chunk.'.format(chunkIndex+1,
+                                                                                                   numChunks))
+            return False
+
+        prog_start += prog_per_chunk_step
+        if self.filterBadPulses > 0.:
+            FilterBadPulses(InputWorkspace=chunkname, OutputWorkspace=chunkname,
+                            LowerCutoff=self.filterBadPulses,
+                            startProgress=prog_start, endProgress=prog_start+prog_per_chunk_step)
+            if mtd[chunkname].getNumberEvents() == 0:
+                msg = 'FilterBadPulses removed all events from '
+                if numChunks == 1:
+                    raise RuntimeError(msg + filename)
+                else:
+                    raise RuntimeError(msg + 'chunk {} of {} in {}'.format(chunkIndex, numChunks, filename))
+
+        prog_start += prog_per_chunk_step
+
+        # absorption correction workspace
+        if self.absorption is not None and len(str(self.absorption)) > 0:
+            ConvertUnits(InputWorkspace=chunkname, OutputWorkspace=chunkname,
+                         Target='Wavelength', EMode='Elastic')
+            # rebin the absorption correction to match the binning of the inputs if in histogram mode
+            # EventWorkspace will compare the wavelength of each individual event
+            absWksp = self.absorption
+            if mtd[chunkname].id() != 'EventWorkspace':
+                absWksp = '__absWkspRebinned'
+                RebinToWorkspace(WorkspaceToRebin=self.absorption, WorkspaceToMatch=chunkname, OutputWorkspace=absWksp)
+            Divide(LHSWorkspace=chunkname, RHSWorkspace=absWksp, OutputWorkspace=chunkname,
+                   startProgress=prog_start, endProgress=prog_start+prog_per_chunk_step)
+            if absWksp != self.absorption:  # clean up
+                DeleteWorkspace(Workspace=absWksp)
+            ConvertUnits(InputWorkspace=chunkname, OutputWorkspace=chunkname,
+                         Target='TOF', EMode='Elastic')
+        prog_start += prog_per_chunk_step
+
+        if self.kwargs is None:
+            raise RuntimeError('Somehow arguments for "AlignAndFocusPowder" aren\'t set')
+
+        AlignAndFocusPowder(InputWorkspace=chunkname,
+                            OutputWorkspace=chunkname, UnfocussedWorkspace=unfocusname_chunk,
+                            startProgress=prog_start, endProgress=prog_start+2.*prog_per_chunk_step,
+                            **self.kwargs)
+        prog_start += 2. * prog_per_chunk_step  # AlignAndFocusPowder counts for two steps
+
+        self.__accumulate(chunkname, wkspname, unfocusname_chunk, unfocusname, firstAccumulation,
+                          removelogs=removelogs)
+        return True
+
+    def __finishFile(self, filename, wkspname, cachefile):
         if not mtd.doesExist(wkspname):
             raise RuntimeError('Failed to process any data from file "{}"'.format(filename))
 
@@ -444,10 +516,16 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
         # write out the cachefile for the main reduced data independent of whether
         # the unfocussed workspace was requested
         if self.useCaching and not os.path.exists(cachefile):
-            self.log().information('Saving data to cachefile "{}"'.format(cachefile))
-            SaveNexusProcessed(InputWorkspace=wkspname, Filename=cachefile)
+            self.__saveToCache(wkspname, cachefile)
 
-        return wkspname, unfocusname
+    def __saveToCache(self, wkspname, cachefile):
+        '''Write the workspace to a temporary file and move it into the cache when complete'''
+        self.log().information('Saving data to cachefile "{}"'.format(cachefile))
+
+        def save(filename):
+            with FILE_IO_LOCK:
+                SaveNexusProcessed(InputWorkspace=wkspname, Filename=filename)
+        self.__cache.write(cachefile, self.cacheTier, save, properties=self.__cacheProperties.get(cachefile))
 
     def __compressEvents(self, wkspname):
         if self.kwargs['PreserveEvents'] and self.kwargs['CompressTolerance'] > 0.:
@@ -534,13 +612,14 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
         if loadCalibration or loadGrouping or loadMask:
             if not wksp:
                 raise RuntimeError('Trying to load calibration without a donor workspace')
-            LoadDiffCal(InputWorkspace=wksp,
-                        Filename=self.getPropertyValue('CalFileName'),
-                        GroupFilename=self.getPropertyValue('GroupFilename'),
-                        MakeCalWorkspace=loadCalibration,
-                        MakeGroupingWorkspace=loadGrouping,
-                        MakeMaskWorkspace=loadMask,
-                        WorkspaceName=self.instr)
+            with FILE_IO_LOCK:
+                LoadDiffCal(InputWorkspace=wksp,
+                            Filename=self.getPropertyValue('CalFileName'),
+                            GroupFilename=self.getPropertyValue('GroupFilename'),
+                            MakeCalWorkspace=loadCalibration,
+                            MakeGroupingWorkspace=loadGrouping,
+                            MakeMaskWorkspace=loadMask,
+                            WorkspaceName=self.instr)
         if loadCalibration:
             self.__calWksp = self.instr + '_cal'
             self.setPropertyValue('CalibrationWorkspace', self.instr + '_cal')
@@ -559,9 +638,13 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
         self.__loaderName = 'Load'   # set the loader to be generic on first load
         self.filterBadPulses = self.getProperty('FilterBadPulses').value
         self.chunkSize = self.getProperty('MaxChunkSize').value
+        self.maxChunksInFlight = self.getProperty('MaxChunksInFlight').value
         self.absorption = self.getProperty('AbsorptionWorkspace').value
         self.charac = self.getProperty('Characterizations').value
         self.useCaching = len(self.getProperty('CacheDir').value) > 0
+        self.cacheTier = self.getProperty('CacheTier').value
+        self.__cacheProperties = dict()
+        self.__cache = None
         self.__calWksp = ''
         self.__grpWksp = ''
         self.__mskWksp = ''
@@ -579,6 +662,10 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
                 self.log().warning('CacheDir is specified with "UnfocussedWorkspace" - reading cache files disabled')
         else:
             self.log().warning('CacheDir is not specified - functionality disabled')
+        if self.useCaching:
+            self.__cache = reductioncache.ReductionCache(self.getProperty('CacheDir').value,
+                                                         size_limit=self.getProperty('CacheSizeLimit').value * 1024.**3,
+                                                         age_limit=self.getProperty('CacheAgeLimit').value)
 
         assert len(self._filenames), "No files specified"
         self.prog_per_file = 1./float(len(self._filenames))  # for better progress reporting
@@ -605,6 +692,9 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
         # create cache of everything summed together
         if self.useCaching and len(self._filenames) > 1:
             self.__saveSummedGroupToCache(self._filenames, wkspname=finalname)
+        if self.useCaching:
+            self.log().information('Cache hit rate of the {} tier: {}'.format(self.cacheTier,
+                                                                              self.__cache.hit_rates()[self.cacheTier]))
 
         # with more than one chunk or file the integrated proton charge is
         # generically wrong
@@ -622,7 +712,8 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
         else:
             return False
 
-        LoadNexusProcessed(Filename=filename, OutputWorkspace=wkspname)
+        with FILE_IO_LOCK:
+            LoadNexusProcessed(Filename=filename, OutputWorkspace=wkspname)
         # TODO LoadNexusProcessed has a bug. When it finds the
         # instrument name without xml it reads in from an IDF
         # in the instrument directory.
@@ -657,7 +748,10 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
                 summed_cache_file = self.__getGroupCacheName(fileSubset)
                 wkspname = self.__getGroupWkspName(fileSubset)
                 try:
-                    if self.__loadCacheFile(summed_cache_file, wkspname):
+                    # the files are counted as hits only if the sum is found
+                    if self.__cache.lookup(summed_cache_file, self.cacheTier, record=False) \
+                            and self.__loadCacheFile(summed_cache_file, wkspname):
+                        self.__cache.record_hits(self.cacheTier, len(fileSubset))
                         self.__accumulate(wkspname, finalname, '', '', firstTime)
                         found = True
                         break
@@ -696,10 +790,11 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
             grain_size = int(math.sqrt(numberFilesToProcess))  # grain size
         else:
             grain_size = numberFilesToProcess
-        for (i, filename) in enumerate(files):
-            self.__loaderName = 'Load'  # reset to generic load with each file
-            wkspname, unfocusname = self.__processFile(filename, self.prog_per_file * float(i), not self.useCaching,
-                                                       bool(finalunfocusname))
+        if self.maxChunksInFlight > 1:
+            processed = self.__processFilesPipelined(files, bool(finalunfocusname))
+        else:
+            processed = self.__processFilesSequentially(files, bool(finalunfocusname))
+        for (i, (wkspname, unfocusname)) in enumerate(processed):
             # accumulate into partial sum
             grain_start = i//grain_size*grain_size
             grain_end = min((i//grain_size+1)*grain_size, numberFilesToProcess)
@@ -720,10 +815,108 @@ class AlignAndFocusPowderFromFiles(DistributedDataProcessorAlgorithm):
                 self.__accumulate(partialsum_wkspname, finalname, partialsum_unfocusname, finalunfocusname,
                                   (not hasAccumulated) or i == 0)
 
+    def __processFilesSequentially(self, files, createUnfocused):
+        """generate the names of the focused (and unfocused) workspaces of each file in turn"""
+        for (i, filename) in enumerate(files):
+            self.__loaderName = 'Load'  # reset to generic load with each file
+            yield self.__processFile(filename, self.prog_per_file * float(i), not self.useCaching, createUnfocused)
+
+    def __processFilesPipelined(self, files, createUnfocused):
+        """generate the same workspaces as __processFilesSequentially, but load up to MaxChunksInFlight - 1
+        of the following chunks, from this or the next files, in the background while each chunk is focused.
+
+        Focusing and accumulating stay on this thread and in the same order as the sequential version.
+        The background loads hold FILE_IO_LOCK, so they never overlap the NeXus reads and writes of this thread.
+        """
+        # the chunking is decided up front. Files that have a cache file are processed when it is their turn
+        plans = []
+        loads = deque()
+        for (i, filename) in enumerate(files):
+            wkspname, unfocusname = self.__getFileWkspNames(filename, createUnfocused)
+            cachefile = self.__getCacheName(self.__wkspNameFromFile(filename))
+            # the lookup is recorded in the hit rate, as in __loadFromCache
+            if (not createUnfocused) and self.useCaching and self.__cache.lookup(cachefile, self.cacheTier):
+                plans.append((filename, wkspname, unfocusname, cachefile, None))
+                continue
+            chunks = determineChunking(filename, self.chunkSize)
+            self.log().information('Processing \'{}\' in {:d} chunks'.format(filename, len(chunks)))
+            plans.append((filename, wkspname, unfocusname, cachefile, chunks))
+            numSteps, prog_per_chunk_step = self.__getProgressPerChunkStep(len(chunks), createUnfocused)
+            for (j, chunk) in enumerate(chunks):
+                chunkname, _ = self.__getChunkWkspNames(wkspname, unfocusname, j, len(chunks))
+                # loading is the first step of each chunk, as in __processFile
+                prog_start = self.prog_per_file * float(i) + float(j) * float(numSteps - 1) * prog_per_chunk_step
+                loads.append((filename, chunkname, chunk, prog_start, prog_start + prog_per_chunk_step))
+
+        executor = ThreadPoolExecutor(max_workers=self.maxChunksInFlight - 1)
+        loading = deque()  # (chunkname, future) in the order they will be focused
+
+        def startLoads():
+            while loads and len(loading) < self.maxChunksInFlight - 1:
+                filename, chunkname, chunk, progstart, progstop = loads.popleft()
+                # algorithms are created here as creating child algorithms is not thread safe
+                loader = self.__createLoader(filename, chunkname, progstart=progstart, progstop=progstop,
+                                             loaderName='Load', **chunk)
+                loading.append((chunkname, executor.submit(executeLoader, loader)))
+
+        try:
+            startLoads()
+            for (i, (filename, wkspname, unfocusname, cachefile, chunks)) in enumerate(plans):
+                file_prog_start = self.prog_per_file * float(i)
+                if chunks is None:
+                    try:
+                        if self.__loadCacheFile(cachefile, wkspname):
+                            yield wkspname, ''
+                            continue
+                    except RuntimeError as e:
+                        # log as a warning and carry on as though the cache file didn't exist
+                        self.log().warning('Failed to load cache file "{}": {}'.format(cachefile, e))
+                    # the cache file was removed since the lookup, so process the file without looking it up again
+                    self.__loaderName = 'Load'
+                    yield self.__processFile(filename, file_prog_start, not self.useCaching, createUnfocused,
+                                             lookupCache=False)
+                    continue
+
+                numSteps, prog_per_chunk_step = self.__getProgressPerChunkStep(len(chunks), createUnfocused)
+                haveAccumulationForFile = False
+                for j in range(len(chunks)):
+                    prog_start = file_prog_start + float(j) * float(numSteps - 1) * prog_per_chunk_step
+                    chunkname, unfocusname_chunk = self.__getChunkWkspNames(wkspname, unfocusname, j, len(chunks))
+
+                    # wait for this chunk then keep the loading ahead of the focusing
+                    _, future = loading.popleft()
+                    self.__loaderName = future.result()
+                    startLoads()
+
+                    if j == 0:
+                        self.__setupCalibration(chunkname)
+                        if not self.useCaching:
+                            self.__determineCharacterizations(filename, chunkname)  # updates instance variable
+
+                    # the logs of the other chunks are already in the accumulation
+                    removelogs = self.__loaderName == 'LoadEventNexus' and self.filterBadPulses <= 0. \
+                        and haveAccumulationForFile
+                    if self.__focusAndAccumulateChunk(filename, chunkname, unfocusname_chunk, wkspname, unfocusname,
+                                                      j, len(chunks), prog_start, prog_per_chunk_step,
+                                                      firstAccumulation=not haveAccumulationForFile,
+                                                      removelogs=removelogs):
+                        haveAccumulationForFile = True
+                self.__finishFile(filename, wkspname, cachefile)
+
+                yield wkspname, unfocusname
+        finally:
+            # stop loading ahead and remove what was loaded, but not used, when an error stopped the processing
+            for (_, future) in loading:
+                future.cancel()
+            executor.shutdown(wait=True)
+            for (chunkname, _) in loading:
+                if mtd.doesExist(chunkname):
+                    DeleteWorkspace(Workspace=chunkname)
+
     def __saveSummedGroupToCache(self, group, wkspname):
         cache_file = self.__getGroupCacheName(group)
         if not os.path.exists(cache_file):
-            SaveNexusProcessed(InputWorkspace=wkspname, Filename=cache_file)
+            self.__saveToCache(wkspname, cache_file)
         return
 
 
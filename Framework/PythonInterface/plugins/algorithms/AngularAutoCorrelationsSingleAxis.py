@@ -14,6 +14,8 @@ import numpy as np
 import re
 import time
 
+import correlationhelper
+
 
 class AngularAutoCorrelationsSingleAxis(PythonAlgorithm):
 
@@ -135,93 +137,44 @@ class AngularAutoCorrelationsSingleAxis(PythonAlgorithm):
 
         logger.information(str(time.time()-start_time) + " s")
 
-        logger.information("Transforming coordinates...")
+        logger.information("Calculating orientation vectors...")
         start_time=time.time()
 
-        # Box size for each timestep. Shape: timesteps x (3 consecutive 3-vectors)
-        box_size=trajectory.variables["box_size"]
-
-        # Reshape the paralellepipeds into 3x3 tensors for coordinate transformations.
-        # Shape: (# of timesteps) x (3-vectors) x (# of spatial dimensions)
-        box_size_tensors=10.0*np.array([box_size[j].reshape((3,3)) for j in range(n_timesteps)])
-
-        # Extract box dimensions (assuming orthorhombic simulation cell, diagonal matrix)
-        box_size_x=np.array([box_size_tensors[i,0,0] for i in range(n_timesteps)])
-        box_size_y=np.array([box_size_tensors[i,1,1] for i in range(n_timesteps)])
-        box_size_z=np.array([box_size_tensors[i,2,2] for i in range(n_timesteps)])
-
-        # Copy the configuration object into a numpy array
-        configuration_copy=np.array([configuration[i] for i in range(n_timesteps)])
-
-        # Swap the time and particle axes
-        configuration_copy=np.swapaxes(configuration_copy,0,1)
+        # Find which constituents of each molecule belong to species one and which belong to species two
+        species_one=[]
+        species_two=[]
+        for i in range(n_molecules):
+            temp=molecules_to_atoms[i]
+            species_one.append([j for j in temp if atoms_to_species[j]==type1.lower()])
+            species_two.append([j for j in temp if atoms_to_species[j]==type2.lower()])
+            if not species_one[i] or not species_two[i]:
+                raise RuntimeError("Molecule "+str(i)+" does not contain both species. Please try again...")
 
-        # Transform particle trajectories (configuration array) to Cartesian coordinates at each time step.
-        cartesian_configuration=np.array([[np.dot(box_size_tensors[j],np.transpose(configuration_copy[i,j]))
-                                           for j in range(n_timesteps)] for i in range(n_particles)])
+        # Sparse matrices which average the positions of species one and two
+        average_species_one=correlationhelper.averaging_matrix(species_one,n_particles)
+        average_species_two=correlationhelper.averaging_matrix(species_two,n_particles)
 
-        logger.information(str(time.time()-start_time) + " s")
-
-        logger.information("Calculating orientation vectors...")
-        start_time=time.time()
-
-        # Initialise orientation vector array. Shape: (# of molecules) x (# of timesteps) x (# of dimensions)
+        # Orientation vector array. Shape: (# of molecules) x (# of timesteps) x (# of dimensions)
         orientation_vectors=np.zeros((n_molecules,n_timesteps,n_dimensions))
 
-        for i in range(n_molecules):
-            # Retrieve constituents of the ith molecule
-            temp=molecules_to_atoms[i]
-            # Find which constituents belong to species one and which belong to species two
-            species_one=[]
-            species_two=[]
-            for j in temp:
-                if atoms_to_species[j]==type1.lower():
-                    species_one.append(j)
-                if atoms_to_species[j]==type2.lower():
-                    species_two.append(j)
-            # Find the average positions and the orientation vector
-            sum_position_species_one=np.zeros((n_timesteps,n_dimensions))
-            sum_position_species_two=np.zeros((n_timesteps,n_dimensions))
-
-            for k in species_one:
-                sum_position_species_one+=cartesian_configuration[k]
-            for l in species_two:
-                sum_position_species_two+=cartesian_configuration[l]
-            avg_position_species_one=1.0*sum_position_species_one/len(species_one)
-            avg_position_species_two=1.0*sum_position_species_two/len(species_two)
-
-            # Find the vectors connecting the two atoms
-            vectors=avg_position_species_two-avg_position_species_one
-
-            # Scaled coordinates
-            diffX=np.divide(vectors[:,0],box_size_x)
-            diffY=np.divide(vectors[:,1],box_size_y)
-            diffZ=np.divide(vectors[:,2],box_size_z)
-
-            # Wrapping the vectors
-            vectorX=np.array([(diffX[k]-round(diffX[k]))*box_size_x[k] for k in range(n_timesteps)])
-            vectorY=np.array([(diffY[k]-round(diffY[k]))*box_size_y[k] for k in range(n_timesteps)])
-            vectorZ=np.array([(diffZ[k]-round(diffZ[k]))*box_size_z[k] for k in range(n_timesteps)])
-
-            # Normalisation
-            norm=np.sqrt(vectorX*vectorX+vectorY*vectorY+vectorZ*vectorZ)
-            vectorX=np.divide(vectorX,norm)
-            vectorY=np.divide(vectorY,norm)
-            vectorZ=np.divide(vectorZ,norm)
-
-            # Store calculations in the orientation_vectors array
-            orientation_vectors[i]=np.swapaxes(np.array([vectorX,vectorY,vectorZ]),0,1)
+        # Stream the trajectory in blocks of timesteps
+        bytes_per_timestep=8*n_dimensions*(2*n_particles+5*n_molecules)
+        for start,stop in correlationhelper.blocks(n_timesteps,bytes_per_timestep):
+            # Transform particle trajectories (configuration array) to Cartesian coordinates at each time step.
+            cartesian_configuration=correlationhelper.cartesian_coordinates(trajectory,start,stop,scale=10.0)
+            box_size_tensors=10.0*correlationhelper.box_tensors(trajectory,start,stop)
+
+            # Find the vectors connecting the average positions of the two species, wrapped into the box and normalised
+            vectors=correlationhelper.average_positions(average_species_two,cartesian_configuration)-\
+                correlationhelper.average_positions(average_species_one,cartesian_configuration)
+            orientation_vectors[:,start:stop]=correlationhelper.minimum_image_unit_vectors(vectors,box_size_tensors)
 
         logger.information(str(time.time()-start_time) + " s")
 
         logger.information("Calculating angular auto-correlations...")
         start_time=time.time()
 
-        R_avg=np.zeros(n_timesteps)
-        for i in range(n_molecules):
-            R_avg+=self.auto_correlation(orientation_vectors[i])
-
-        R_avg=1.0*R_avg/n_molecules
+        R_avg=correlationhelper.auto_correlation_sum(orientation_vectors)/n_molecules
 
         logger.information(str(time.time()-start_time)+" s")
 
@@ -252,21 +205,6 @@ class AngularAutoCorrelationsSingleAxis(PythonAlgorithm):
                                      DataY=yvals,DataE=evals,NSpec=nrows,VerticalAxisUnit="Text",VerticalAxisValues=["FT Axis 1"])
         self.setProperty("OutputWorkspaceFT",FT_output_ws)
 
-    def auto_correlation(self, vector):
-        # Returns angular auto-correlation of a normalised time-dependent 3-vector
-        num=np.shape(vector)[0]
-        norm=np.arange(np.ceil(num/2.0),num+1)
-        norm=np.append(norm,(np.arange(int(num/2)+1,num)[::-1]))
-
-        # x dimension
-        autoCorr=np.divide(np.correlate(vector[:,0],vector[:,0],"same"),norm)
-        # y dimension
-        autoCorr+=np.divide(np.correlate(vector[:,1],vector[:,1],"same"),norm)
-        # z dimension
-        autoCorr+=np.divide(np.correlate(vector[:,2],vector[:,2],"same"),norm)
-
-        return autoCorr
-
     def fold_correlation(self,omega):
         # Folds an array with symmetrical values into half by averaging values around the centre
         right_half=omega[int(len(omega)/2):]
@@ -11,6 +11,7 @@ from mantid.simpleapi import *
 from mantid.api import (PythonAlgorithm, AlgorithmFactory, PropertyMode, MatrixWorkspaceProperty,
                         WorkspaceGroupProperty, InstrumentValidator, Progress)
 from mantid.kernel import (StringListValidator, IntBoundedValidator, FloatBoundedValidator, Direction, logger)
+from PaalmanPingsIntegration import cylinder_absorption
 
 
 def set_material_density(set_material_alg, density_type, density, number_density_unit):
@@ -56,6 +57,7 @@ class CylinderPaalmanPingsCorrection(PythonAlgorithm):
     _density = None
     _radii = None
     _interpolate = False
+    _number_of_processes = 1
 
 #------------------------------------------------------------------------------
 
@@ -181,6 +183,11 @@ class CylinderPaalmanPingsCorrection(PythonAlgorithm):
                              doc='Analyser energy (mev). By default will be read from the instrument parameters. '
                                  'Specify manually to override. This is used in energy transfer modes other than Elastic.')
 
+        self.declareProperty(name='NumberOfProcesses', defaultValue=1,
+                             validator=IntBoundedValidator(1),
+                             doc='Number of processes to share the detector angles between. '
+                                 'The results do not depend on the number of processes.')
+
         self.declareProperty(WorkspaceGroupProperty('OutputWorkspace', '',
                                                     direction=Direction.Output),
                              doc='The output corrections workspace group')
@@ -241,20 +248,11 @@ class CylinderPaalmanPingsCorrection(PythonAlgorithm):
         self._get_angles()
         self._transmission()
 
-        dataA1 = []
-        dataA2 = []
-        dataA3 = []
-        dataA4 = []
-
-        data_prog = Progress(self, start=0.1, end=0.85, nreports=len(self._angles))
-        for angle in self._angles:
-            (A1, A2, A3, A4) = self._cyl_abs(angle)
-            logger.information('Angle : %f * successful' % angle)
-            data_prog.report('Appending data for angle %f' % angle)
-            dataA1 = np.append(dataA1, A1)
-            dataA2 = np.append(dataA2, A2)
-            dataA3 = np.append(dataA3, A3)
-            dataA4 = np.append(dataA4, A4)
+        data_prog = Progress(self, start=0.1, end=0.85, nreports=1)
+        data_prog.report('Calculating corrections for %d angles' % len(self._angles))
+        # each factor has shape (angles, wavelengths), which is the spectrum by spectrum order of the output
+        dataA1, dataA2, dataA3, dataA4 = [factor.ravel() for factor in self._cyl_abs()]
+        logger.information('Angles : %d * successful' % len(self._angles))
 
         dataX = self._waves * len(self._angles)
 
@@ -391,6 +389,7 @@ class CylinderPaalmanPingsCorrection(PythonAlgorithm):
 
         self._emode = self.getPropertyValue('Emode')
         self._efixed = self.getProperty('Efixed').value
+        self._number_of_processes = self.getProperty('NumberOfProcesses').value
 
         if self._emode == 'Efixed':
             logger.information('No interpolation is possible in Efixed mode.')
@@ -589,196 +588,39 @@ class CylinderPaalmanPingsCorrection(PythonAlgorithm):
 
 #------------------------------------------------------------------------------
 
-    def _cyl_abs(self, angle):
+    def _cyl_abs(self):
         #  Parameters :
-        #  self._step_size - step size
         #  self._beam - beam parameters
-        #  nan - number of annuli
         #  radii - list of radii (for each annulus)
         #  density - list of densities (for each annulus)
         #  sigs - list of scattering cross-sections (for each annulus)
         #  siga - list of absorption cross-sections (for each annulus)
-        #  angle - list of angles
+        #  angles - list of angles
         #  wavelas - elastic wavelength
         #  waves - list of wavelengths
         #  Output parameters :  A1 - Ass ; A2 - Assc ; A3 - Acsc ; A4 - Acc
+        #  each with shape (number of angles, number of wavelengths)
 
-        amu_scat = np.zeros(self._number_can)
         amu_scat = self._density*self._sig_s
-        sig_abs = np.zeros(self._number_can)
         sig_abs = self._density*self._sig_a
-        amu_tot_i = np.zeros(self._number_can)
-        amu_tot_s = np.zeros(self._number_can)
-
-        theta = angle*math.pi/180.
-        A1 = []
-        A2 = []
-        A3 = []
-        A4 = []
-        #loop over wavelengths
-        for wave in self._waves:
-            #loop over annuli
-            if self._emode == 'Elastic':
-                amu_tot_i = amu_scat + sig_abs*self._elastic/1.7979
-                amu_tot_s = amu_scat + sig_abs*self._elastic/1.7979
-            elif self._emode == 'Direct':
-                amu_tot_i = amu_scat + sig_abs*self._fixed/1.7979
-                amu_tot_s = amu_scat + sig_abs*wave/1.7979
-            elif self._emode == 'Indirect':
-                amu_tot_i = amu_scat + sig_abs*wave/1.7979
-                amu_tot_s = amu_scat + sig_abs*self._fixed/1.7979
-            elif self._emode == 'Efixed':
-                amu_tot_i = amu_scat + sig_abs*self._fixed/1.7979
-                amu_tot_s = amu_scat + sig_abs*self._fixed/1.7979
-            (Ass, Assc, Acsc, Acc) = self._acyl(theta, amu_scat, amu_tot_i, amu_tot_s)
-            A1.append(Ass)
-            A2.append(Assc)
-            A3.append(Acsc)
-            A4.append(Acc)
-        return A1, A2, A3, A4
-
-#------------------------------------------------------------------------------
 
-    def _acyl(self, theta, amu_scat, amu_tot_i, amu_tot_s):
-        A = self._beam[1]
-        Area_s = 0.0
-        Ass = 0.0
-        Acc = 0.0
-        Acsc = 0.0
-        Assc = 0.0
-        nan = self._number_can
-        if self._number_can < 2:
-#
-#  No. STEPS ARE CHOSEN SO THAT STEP WIDTH IS THE SAME FOR ALL ANNULI
-#
-            AAAA, BBBA, Area_A = self._sum_rom(0, 0, A, self._radii[0], self._radii[1], self._ms,
-                                               theta, amu_scat, amu_tot_i, amu_tot_s)
-            AAAB, BBBB, Area_B = self._sum_rom(0, 0, -A, self._radii[0], self._radii[1], self._ms,
-                                               theta, amu_scat, amu_tot_i, amu_tot_s)
-            Area_s += Area_A + Area_B
-            Ass += AAAA + AAAB
-            Ass /= Area_s
+        waves = np.asarray(self._waves, dtype=float)
+        elastic = np.full_like(waves, self._elastic)
+        fixed = np.full_like(waves, self._fixed)
+        if self._emode == 'Elastic':
+            wave_i, wave_s = elastic, elastic
+        elif self._emode == 'Direct':
+            wave_i, wave_s = fixed, waves
+        elif self._emode == 'Indirect':
+            wave_i, wave_s = waves, fixed
         else:
-            for i in range(0, self._number_can -1):
-                radius_1 = self._radii[i]
-                radius_2 = self._radii[i+1]
-#
-#  No. STEPS ARE CHOSEN SO THAT STEP WIDTH IS THE SAME FOR ALL ANNULI
-#
-                ms = int(self._ms*(radius_2 - radius_1)/(self._radii[1] - self._radii[0]))
-                if ms < 1:
-                    ms = 1
-                AAAA, BBBA, Area_A = self._sum_rom(i, 0, A, radius_1, radius_2,
-                                                   ms, theta, amu_scat, amu_tot_i, amu_tot_s)
-                AAAB, BBBB, Area_B = self._sum_rom(i, 0, -A, radius_1, radius_2,
-                                                   ms, theta, amu_scat, amu_tot_i, amu_tot_s)
-                Area_s += Area_A + Area_B
-                Ass += AAAA + AAAB
-                Assc += BBBA + BBBB
-            Ass = Ass/Area_s
-            Assc = Assc/Area_s
-            radius_1 = self._radii[nan -1]
-            radius_2 = self._radii[nan]
-            ms = int(self._ms*(radius_2 - radius_1)/(self._radii[1] - self._radii[0]))
-            if ms < 1:
-                ms = 1
-            AAAA, BBBA, Area_A = self._sum_rom(nan-1, 1, A, radius_1, radius_2,
-                                               ms, theta, amu_scat, amu_tot_i, amu_tot_s)
-            AAAB, BBBB, Area_B = self._sum_rom(nan-1, 1, -A, radius_1, radius_2,
-                                               ms, theta, amu_scat, amu_tot_i, amu_tot_s)
-            Area_C = Area_A + Area_B
-            Acsc = (AAAA + AAAB)/Area_C
-            Acc = (BBBA + BBBB)/Area_C
-        return Ass, Assc, Acsc, Acc
-
-#------------------------------------------------------------------------------
-
-    def _sum_rom(self, n_scat, n_abs, a, r1, r2, ms, theta, amu_scat, amu_tot_i, amu_tot_s):
-        #n_scat is region for scattering
-        #n_abs is region for absorption
-        nan = self._number_can
-        omega_add = 0.
-        if a < 0.:
-            omega_add = math.pi
-        AAA = 0.
-        BBB = 0.
-        Area = 0.
-        theta_deg = math.pi - theta
-        num = ms
-        r_step = (r2 - r1)/ms
-        r_add = -0.5*r_step + r1
-
-# start loop over M
-        for M in range(1, num+1):
-            r = M*r_step + r_add
-            number_omega = int(math.pi*r/r_step)
-            omega_ster = math.pi/number_omega
-            omega_deg = -0.5*omega_ster + omega_add
-            Area_y = r*r_step*omega_ster*amu_scat[n_scat]
-            sum_1 = 0.
-            sum_2 = 0.
-            I = 1
-            Area_sum = 0.
-            for _ in range(1, number_omega +1):
-                omega = I*omega_ster + omega_deg
-                distance = r*math.sin(omega)
-
-                skip = True
-                if abs(distance) <= a:
-#
-# CALCULATE DISTANCE INCIDENT NEUTRON PASSES THROUGH EACH ANNULUS
-                    LIS = []
-                    for j in range(0, nan):
-                        LIST = self._distance(r, self._radii[j], omega)
-                        LISN = self._distance(r, self._radii[j+1], omega)
-                        LIS.append(LISN - LIST)
-#
-# CALCULATE DISTANCE SCATTERED NEUTRON PASSES THROUGH EACH ANNULUS
-                    O = omega + theta_deg
-                    LSS = []
-                    for j in range(0, nan):
-                        LSST = self._distance(r, self._radii[j], O)
-                        LSSN = self._distance(r, self._radii[j+1], O)
-                        LSS.append(LSSN - LSST)
-#
-# CALCULATE ABSORPTION FOR PATH THROUGH ALL ANNULI,AND THROUGH INNER ANNULI
-                    path = np.zeros(3)
-#	split into input (I) and scattered (S) paths
-                    path[0] += amu_tot_i[0]*LIS[0] + amu_tot_s[0]*LSS[0]
-                    if nan == 2:
-                        path[2] += amu_tot_i[1]*LIS[1] + amu_tot_s[1]*LSS[1]
-                        path[1] = path[0] + path[2]
-                    sum_1 += math.exp(-path[n_abs])
-                    sum_2 += math.exp(-path[n_abs +1])
-                    Area_sum += 1.0
-                    skip = False
-
-                if skip:
-                    I = number_omega -I +2
-                else:
-                    I += 1
-        AAA += sum_1*Area_y
-        BBB += sum_2*Area_y
-        Area += Area_sum*Area_y
-        return AAA, BBB, Area
+            wave_i, wave_s = fixed, fixed
+        # attenuation coefficients with shape (number of wavelengths, number of annuli)
+        amu_tot_i = amu_scat + sig_abs*wave_i[:, np.newaxis]/1.7979
+        amu_tot_s = amu_scat + sig_abs*wave_s[:, np.newaxis]/1.7979
 
-#------------------------------------------------------------------------------
-
-    def _distance(self, r1, radius, omega):
-        r = r1
-        distance = 0.
-        b = r*math.sin(omega)
-        if abs(b) < radius:
-            t = r*math.cos(omega)
-            c = radius*radius -b*b
-            d = math.sqrt(c)
-            if r <= radius:
-                distance = t + d
-            else:
-                distance = d*(1.0 + math.copysign(1.0, t))
-        return distance
-
-#------------------------------------------------------------------------------
+        return cylinder_absorption(self._radii, amu_scat, amu_tot_i, amu_tot_s, self._angles, self._beam[1],
+                                   number_steps=self._ms, number_of_processes=self._number_of_processes)
 
 
 # Register algorithm with Mantid
@@ -15,7 +15,7 @@ from mantid.kernel import (
     ConfigService, Direction, EnabledWhenProperty, FloatArrayProperty, FloatBoundedValidator, IntArrayBoundedValidator,
     IntArrayProperty, Property, PropertyCriterion, PropertyManagerDataService, StringListValidator)
 from mantid.dataobjects import SplittersWorkspace  # SplittersWorkspace
-from mantid.utils import absorptioncorrutils
+from mantid.utils import absorptioncorrutils, reductioncache
 if AlgorithmFactory.exists('GatherWorkspaces'):
     HAVE_MPI = True
     from mpi4py import MPI
@@ -219,10 +219,10 @@ class SNSPowderReduction(DistributedDataProcessorAlgorithm):
         self.declareProperty(FileProperty(name="OutputDirectory", defaultValue="",action=FileAction.Directory))
 
         # Caching options
-        self.copyProperties('AlignAndFocusPowderFromFiles', 'CacheDir')
+        self.copyProperties('AlignAndFocusPowderFromFiles', ['CacheDir', 'CacheSizeLimit', 'CacheAgeLimit'])
         self.declareProperty('CleanCache', False, 'Remove all cache files within CacheDir')
         self.setPropertySettings('CleanCache', EnabledWhenProperty('CacheDir', PropertyCriterion.IsNotDefault))
-        property_names = ('CacheDir', 'CleanCache')
+        property_names = ('CacheDir', 'CacheSizeLimit', 'CacheAgeLimit', 'CleanCache')
         [self.setPropertyGroup(name, 'Caching') for name in property_names]
 
         self.declareProperty("FinalDataUnits", "dSpacing", StringListValidator(["dSpacing","MomentumTransfer"]))
@@ -367,6 +367,7 @@ class SNSPowderReduction(DistributedDataProcessorAlgorithm):
 
         # Clean the cache directory if so requested
         if self._clean_cache:
+            reductioncache.ReductionCache(self._cache_dir).clear()
             api.CleanFileCache(CacheDir=self._cache_dir, AgeInDays=0)
 
         # Process data
@@ -753,7 +754,8 @@ class SNSPowderReduction(DistributedDataProcessorAlgorithm):
                                % (left["wavelength"].value, right["wavelength"].value))
 
     #pylint: disable=too-many-arguments
-    def _focusAndSum(self, filenames, preserveEvents=True, final_name=None, absorptionWksp=''):
+    def _focusAndSum(self, filenames, preserveEvents=True, final_name=None, absorptionWksp='',
+                     cacheTier=reductioncache.TIER_FOCUSED):
         """Load, sum, and focus data in chunks
         Purpose:
             Load, sum and focus data in chunks;
@@ -765,6 +767,7 @@ class SNSPowderReduction(DistributedDataProcessorAlgorithm):
         @param extension:
         @param preserveEvents:
         @param absorptionWksp: will be divided from the data at a per-pixel level
+        @param cacheTier: tier of the cache files of the focused data
         @return: string as the summed workspace's name
         """
         if final_name is None:
@@ -795,6 +798,9 @@ class SNSPowderReduction(DistributedDataProcessorAlgorithm):
                                          FilterBadPulses=self._filterBadPulses,
                                          Characterizations=characterizations,
                                          CacheDir=self._cache_dir,
+                                         CacheTier=cacheTier,
+                                         CacheSizeLimit=self.getProperty('CacheSizeLimit').value,
+                                         CacheAgeLimit=self.getProperty('CacheAgeLimit').value,
                                          Params=self._binning,
                                          ResampleX=self._resampleX,
                                          Dspacing=self._bin_in_dspace,
@@ -1375,10 +1381,10 @@ class SNSPowderReduction(DistributedDataProcessorAlgorithm):
 
             if self.getProperty("Sum").value:
                 self._focusAndSum(van_run_number_list, preserveEvents=True, final_name=van_run_ws_name,
-                                  absorptionWksp=__V_corr_eff)
+                                  absorptionWksp=__V_corr_eff, cacheTier=reductioncache.TIER_VANADIUM)
             else:
                 self._focusAndSum([van_run_number], preserveEvents=True, final_name=van_run_ws_name,
-                                  absorptionWksp=__V_corr_eff)
+                                  absorptionWksp=__V_corr_eff, cacheTier=reductioncache.TIER_VANADIUM)
 
             # load the vanadium background (if appropriate)
             van_bkgd_run_number_list = self._info["vanadium_background"].value
@@ -1396,10 +1402,10 @@ class SNSPowderReduction(DistributedDataProcessorAlgorithm):
                     # load background runs and sum if necessary
                     if self.getProperty("Sum").value:
                         self._focusAndSum(van_bkgd_run_number_list, preserveEvents=True, final_name=van_bkgd_ws_name,
-                                          absorptionWksp=__V_corr_eff)
+                                          absorptionWksp=__V_corr_eff, cacheTier=reductioncache.TIER_VANADIUM)
                     else:
                         self._focusAndSum([van_bkgd_run_number], preserveEvents=True, final_name=van_bkgd_ws_name,
-                                          absorptionWksp=__V_corr_eff)
+                                          absorptionWksp=__V_corr_eff, cacheTier=reductioncache.TIER_VANADIUM)
 
                     # do the subtraction
                     van_bkgd_ws = get_workspace(van_bkgd_ws_name)
@@ -50,6 +50,7 @@ class VesuvioCorrections(VesuvioBase):
     _correction_workspaces = None
     _linear_fit_table = None
     _correction_wsg = None
+    _correction_prefix = None
     _corrected_wsg = None
     _container_ws = None
     _spec_idx = None
@@ -287,6 +288,12 @@ class VesuvioCorrections(VesuvioBase):
         self._correction_wsg = self.getPropertyValue("CorrectionWorkspaces")
         self._corrected_wsg = self.getPropertyValue("CorrectedWorkspaces")
         self._linear_fit_table = self.getPropertyValue("LinearFitResult")
+        # Without a group the corrections are temporary, named after the output so that
+        # corrections of different spectra can be calculated at the same time
+        if self._correction_wsg != "":
+            self._correction_prefix = self._correction_wsg
+        else:
+            self._correction_prefix = "__" + self._output_ws + "_Correction"
         self._masses = self.getProperty("Masses").value
         self._index_to_symbol_map = self.getProperty("MassIndexToSymbolMap").value
         self._hydrogen_constraints = self.getProperty("HydrogenConstraints").value
@@ -355,7 +362,7 @@ class VesuvioCorrections(VesuvioBase):
 
         # Calculate and output corrected workspaces as a WorkspaceGroup
         if self._corrected_wsg != "":
-            corrected_workspaces = [ws_name.replace(self._correction_wsg, self._corrected_wsg)
+            corrected_workspaces = [ws_name.replace(self._correction_prefix, self._corrected_wsg)
                                     for ws_name in self._correction_workspaces]
             for corrected, correction in zip(corrected_workspaces, self._correction_workspaces):
                 ms.Minus(LHSWorkspace=self._output_ws,
@@ -388,7 +395,7 @@ class VesuvioCorrections(VesuvioBase):
         self._correction_workspaces = list()
 
         if self._container_ws != "":
-            container_name = str(self._correction_wsg) + "_Container"
+            container_name = self._correction_prefix + "_Container"
             self._container_ws = ms.ExtractSingleSpectrum(InputWorkspace=self._container_ws,
                                                           OutputWorkspace=container_name,
                                                           WorkspaceIndex=self._spec_idx)
@@ -468,7 +475,7 @@ class VesuvioCorrections(VesuvioBase):
     # ------------------------------------------------------------------------------
 
     def _gamma_correction(self):
-        correction_background_ws = str(self._correction_wsg) + "_GammaBackground"
+        correction_background_ws = self._correction_prefix + "_GammaBackground"
 
         fit_opts = parse_fit_options(mass_values=self._masses,
                                      profile_strs=self.getProperty("MassProfiles").value,
@@ -476,11 +483,12 @@ class VesuvioCorrections(VesuvioBase):
         params_dict = TableWorkspaceDictionaryFacade(self.getProperty("FitParameters").value)
         func_str = fit_opts.create_function_str(params_dict)
 
+        corrected_dummy_ws = self._correction_prefix + "_CorrectedDummy"
         ms.VesuvioCalculateGammaBackground(InputWorkspace=self._output_ws,
                                            ComptonFunction=func_str,
                                            BackgroundWorkspace=correction_background_ws,
-                                           CorrectedWorkspace='__corrected_dummy')
-        ms.DeleteWorkspace('__corrected_dummy')
+                                           CorrectedWorkspace=corrected_dummy_ws)
+        ms.DeleteWorkspace(corrected_dummy_ws)
 
         return correction_background_ws
 
@@ -588,8 +596,8 @@ class VesuvioCorrections(VesuvioBase):
                                                         self.getProperty("SampleDepth").value / 100.))
 
         # Massage options into how algorithm expects them
-        total_scatter_correction = str(self._correction_wsg) + "_TotalScattering"
-        multi_scatter_correction = str(self._correction_wsg) + "_MultipleScattering"
+        total_scatter_correction = self._correction_prefix + "_TotalScattering"
+        multi_scatter_correction = self._correction_prefix + "_MultipleScattering"
 
         # Calculation
         # In the thin sample limit, 1-exp(-n*dens*sigma) ~ n*dens*sigma, effectively the same
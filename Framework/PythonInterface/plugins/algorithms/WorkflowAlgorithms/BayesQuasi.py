@@ -12,18 +12,13 @@ import numpy as np
 from IndirectImport import *
 from mantid.api import (PythonAlgorithm, AlgorithmFactory, MatrixWorkspaceProperty, PropertyMode,
                         WorkspaceGroupProperty, Progress)
-from mantid.kernel import StringListValidator, Direction
+from mantid.kernel import IntBoundedValidator, StringListValidator, Direction
 import mantid.simpleapi as s_api
 from mantid import config, logger
 from IndirectCommon import *
 
 MTD_PLOT = import_mantidplot()
 
-if is_supported_f2py_platform():
-    QLr = import_f2py("QLres")
-    QLd = import_f2py("QLdata")
-    Qse = import_f2py("QLse")
-
 
 class BayesQuasi(PythonAlgorithm):
     _program = None
@@ -40,6 +35,7 @@ class BayesQuasi(PythonAlgorithm):
     _res_norm = None
     _wfile = None
     _loop = None
+    _number_of_processes = 1
 
     def category(self):
         return "Workflow\\MIDAS"
@@ -97,6 +93,11 @@ class BayesQuasi(PythonAlgorithm):
 
         self.declareProperty(name='Loop', defaultValue=True, doc='Switch Sequential fit On/Off')
 
+        self.declareProperty(name='NumberOfProcesses', defaultValue=1, validator=IntBoundedValidator(1),
+                             doc='Number of processes to fit the spectra in. With more than one, each spectrum is '
+                                 'fitted on its own and the results are collected in memory, so the Fortran output '
+                                 'files are not written to the save directory')
+
         self.declareProperty(WorkspaceGroupProperty('OutputWorkspaceFit', '', direction=Direction.Output),
                              doc='The name of the fit output workspaces')
 
@@ -133,6 +134,7 @@ class BayesQuasi(PythonAlgorithm):
         self._res_norm = self.getProperty('UseResNorm').value
         self._wfile = self.getPropertyValue('WidthFile')
         self._loop = self.getProperty('Loop').value
+        self._number_of_processes = self.getProperty('NumberOfProcesses').value
 
     # pylint: disable=too-many-locals,too-many-statements
     def PyExec(self):
@@ -140,6 +142,7 @@ class BayesQuasi(PythonAlgorithm):
         self.check_platform_support()
 
         from IndirectBayes import (CalcErange, GetXYE)
+        from IndirectBayesSpectra import merge_parameters
         setup_prog = Progress(self, start=0.0, end=0.3, nreports=5)
         self.log().information('BayesQuasi input')
 
@@ -229,19 +232,12 @@ class BayesQuasi(PythonAlgorithm):
 
         setup_prog.report('Initialising probability list')
         # initialise probability list
-        if self._program == 'QL':
-            prob0, prob1, prob2, prob3 = [], [], [], []
-        xQ = np.array([Q[0]])
-        for m in range(1, nsam):
-            xQ = np.append(xQ, Q[m])
-        xProb = xQ
-        xProb = np.append(xProb, xQ)
-        xProb = np.append(xProb, xQ)
-        xProb = np.append(xProb, xQ)
+        probabilities = []
+        xProb = np.tile(np.asarray(Q[:nsam], dtype=float), 4)
         eProb = np.zeros(4 * nsam)
 
-        group = ''
         workflow_prog = Progress(self, start=0.3, end=0.7, nreports=nsam * 3)
+        spectra_args = []
         for spectrum in range(0, nsam):
             logger.information('Group {0} at angle {1} '.format(spectrum, theta[spectrum]))
             nsp = spectrum + 1
@@ -258,114 +254,57 @@ class BayesQuasi(PythonAlgorithm):
             numb = [nsam, nsp, ntc, Ndat, nbin, Imin, Imax, Nb, nrbin]
             rscl = 1.0
             reals = [efix, theta[spectrum], rscl, bnorm]
-
+            spectra_args.append((numb, Xv, Yv, Ev, reals, fitOp, Xdat, Xb, Yb, Eb, Wy, We, dtn, xsc))
+
+        fitWS = fname + '_Workspaces'
+        group = []
+        parameters = []
+        fits = self._fit_spectra(prog, spectra_args, wrks, wrkr, lwrk)
+        for (spectrum, (fit, spectrum_parameters)) in enumerate(fits):
+            yprob = fit[-1]
+            parameters.append(spectrum_parameters)
             if prog == 'QLr':
                 workflow_prog.report('Processing Sample number {0} as Lorentzian'.format(spectrum))
-                nd, xout, yout, eout, yfit, yprob = QLr.qlres(numb, Xv, Yv, Ev, reals, fitOp,
-                                                              Xdat, Xb, Yb, Wy, We, dtn, xsc,
-                                                              wrks, wrkr, lwrk)
                 logger.information(' Log(prob) : {0} {1} {2} {3}'.format(yprob[0], yprob[1], yprob[2], yprob[3]))
             elif prog == 'QLd':
                 workflow_prog.report('Processing Sample number {0}'.format(spectrum))
-                nd, xout, yout, eout, yfit, yprob = QLd.qldata(numb, Xv, Yv, Ev, reals, fitOp,
-                                                               Xdat, Xb, Yb, Eb, Wy, We,
-                                                               wrks, wrkr, lwrk)
                 logger.information(' Log(prob) : {0} {1} {2} {3}'.format(yprob[0], yprob[1], yprob[2], yprob[3]))
             elif prog == 'QSe':
                 workflow_prog.report('Processing Sample number {0} as Stretched Exp'.format(spectrum))
-                nd, xout, yout, eout, yfit, yprob = Qse.qlstexp(numb, Xv, Yv, Ev, reals, fitOp,
-                                                                Xdat, Xb, Yb, Wy, We, dtn, xsc,
-                                                                wrks, wrkr, lwrk)
-
-            dataX = xout[:nd]
-            dataX = np.append(dataX, 2 * xout[nd - 1] - xout[nd - 2])
-            yfit_list = np.split(yfit[:4 * nd], 4)
-            dataF1 = yfit_list[1]
-            workflow_prog.report('Processing data')
-            dataG = np.zeros(nd)
-            datX = dataX
-            datY = yout[:nd]
-            datE = eout[:nd]
-            datX = np.append(datX, dataX)
-            datY = np.append(datY, dataF1[:nd])
-            datE = np.append(datE, dataG)
-            res1 = dataF1[:nd] - yout[:nd]
-            datX = np.append(datX, dataX)
-            datY = np.append(datY, res1)
-            datE = np.append(datE, dataG)
-            nsp = 3
-            names = 'data,fit.1,diff.1'
-            res_plot = [0, 1, 2]
             if self._program == 'QL':
-                workflow_prog.report('Processing Lorentzian result data')
-                dataF2 = yfit_list[2]
-                datX = np.append(datX, dataX)
-                datY = np.append(datY, dataF2[:nd])
-                datE = np.append(datE, dataG)
-                res2 = dataF2[:nd] - yout[:nd]
-                datX = np.append(datX, dataX)
-                datY = np.append(datY, res2)
-                datE = np.append(datE, dataG)
-                nsp += 2
-                names += ',fit.2,diff.2'
-
-                dataF3 = yfit_list[3]
-                datX = np.append(datX, dataX)
-                datY = np.append(datY, dataF3[:nd])
-                datE = np.append(datE, dataG)
-                res3 = dataF3[:nd] - yout[:nd]
-                datX = np.append(datX, dataX)
-                datY = np.append(datY, res3)
-                datE = np.append(datE, dataG)
-                nsp += 2
-                names += ',fit.3,diff.3'
-
-                res_plot.append(4)
-                prob0.append(yprob[0])
-                prob1.append(yprob[1])
-                prob2.append(yprob[2])
-                prob3.append(yprob[3])
+                probabilities.append(yprob[:4])
 
             # create result workspace
-            fitWS = fname + '_Workspaces'
             fout = fname + '_Workspace_' + str(spectrum)
-
             workflow_prog.report('Creating OutputWorkspace')
-            s_api.CreateWorkspace(OutputWorkspace=fout, DataX=datX, DataY=datY, DataE=datE,
-                                  Nspec=nsp, UnitX='DeltaE', VerticalAxisUnit='Text', VerticalAxisValues=names,
-                                  EnableLogging=False)
+            self._create_fit_workspace(fout, fit)
 
             # append workspace to list of results
-            group += fout + ','
+            group.append(fout)
 
         comp_prog = Progress(self, start=0.7, end=0.8, nreports=2)
         comp_prog.report('Creating Group Workspace')
-        s_api.GroupWorkspaces(InputWorkspaces=group, OutputWorkspace=fitWS)
+        s_api.GroupWorkspaces(InputWorkspaces=','.join(group), OutputWorkspace=fitWS)
 
         if self._program == 'QL':
             comp_prog.report('Processing Lorentzian probability data')
-            yPr0 = np.array([prob0[0]])
-            yPr1 = np.array([prob1[0]])
-            yPr2 = np.array([prob2[0]])
-            yPr3 = np.array([prob3[0]])
-            for m in range(1, nsam):
-                yPr0 = np.append(yPr0, prob0[m])
-                yPr1 = np.append(yPr1, prob1[m])
-                yPr2 = np.append(yPr2, prob2[m])
-                yPr3 = np.append(yPr3, prob3[m])
-            yProb = yPr0
-            yProb = np.append(yProb, yPr1)
-            yProb = np.append(yProb, yPr2)
-            yProb = np.append(yProb, yPr3)
+            # one spectrum for each number of peaks
+            yProb = np.asarray(probabilities, dtype=float).T.ravel()
 
             prob_axis_names = '0 Peak, 1 Peak, 2 Peak, 3 Peak'
             s_api.CreateWorkspace(OutputWorkspace=probWS, DataX=xProb, DataY=yProb, DataE=eProb,
                                   Nspec=4, UnitX='MomentumTransfer', VerticalAxisUnit='Text',
                                   VerticalAxisValues=prob_axis_names, EnableLogging=False)
-            outWS = self.C2Fw(fname)
+            if self._number_of_processes > 1:
+                outWS = self._create_ql_result(fname, merge_parameters(parameters))
+            else:
+                outWS = self.C2Fw(fname)
         elif self._program == 'QSe':
             comp_prog.report('Running C2Se')
-            outWS = self.C2Se(fname)
+            if self._number_of_processes > 1:
+                outWS = self._create_qse_result(fname, merge_parameters(parameters))
+            else:
+                outWS = self.C2Se(fname)
 
         # Sort x axis
         s_api.SortXAxis(InputWorkspace=outWS, OutputWorkspace=outWS, EnableLogging=False)
@@ -390,6 +329,45 @@ class BayesQuasi(PythonAlgorithm):
             s_api.SortXAxis(InputWorkspace=probWS, OutputWorkspace=probWS, EnableLogging=False)
             self.setProperty('OutputWorkspaceProb', probWS)
 
+    def _fit_spectra(self, prog, spectra_args, wrks, wrkr, lwrk):
+        """
+        Run the Fortran fit of each spectrum
+
+        @return: iterator over the fit and the parameters of each spectrum, in order. The parameters are None
+                 when they are only written to the Fortran output files
+        """
+        from IndirectBayesSpectra import map_spectra, run_quasi, run_quasi_spectrum
+
+        if self._number_of_processes > 1:
+            # each spectrum is fitted on its own, and returns its parameters with the fit
+            arguments = [(prog, spectrum) + args + (self._samWS[:-4], wrkr) for (spectrum, args) in enumerate(spectra_args)]
+            return map_spectra(run_quasi_spectrum, arguments, self._number_of_processes)
+        # the parameters of all of the spectra are written to the Fortran output files
+        arguments = [(prog,) + args + (wrks, wrkr, lwrk) for args in spectra_args]
+        return ((fit, None) for fit in map_spectra(run_quasi, arguments))
+
+    def _create_fit_workspace(self, fout, fit):
+        """
+        Create the workspace of the data, and the fit and difference for each number of peaks
+        """
+        nd, xout, yout, eout, yfit, _ = fit
+        dataX = np.append(xout[:nd], 2 * xout[nd - 1] - xout[nd - 2])
+        yfit_list = np.split(yfit[:4 * nd], 4)
+        number_fits = 3 if self._program == 'QL' else 1
+
+        names = ['data']
+        datY = [yout[:nd]]
+        datE = [eout[:nd]]
+        for i in range(1, number_fits + 1):
+            fit_y = yfit_list[i][:nd]
+            names.extend(['fit.' + str(i), 'diff.' + str(i)])
+            datY.extend([fit_y, fit_y - yout[:nd]])
+            datE.extend([np.zeros(nd), np.zeros(nd)])
+
+        s_api.CreateWorkspace(OutputWorkspace=fout, DataX=np.tile(dataX, len(names)), DataY=np.concatenate(datY),
+                              DataE=np.concatenate(datE), Nspec=len(names), UnitX='DeltaE', VerticalAxisUnit='Text',
+                              VerticalAxisValues=','.join(names), EnableLogging=False)
+
     def check_platform_support(self):
         if not is_supported_f2py_platform():
             unsupported_msg = "This algorithm can only be run on valid platforms." \
@@ -438,31 +416,17 @@ class BayesQuasi(PythonAlgorithm):
         log_alg.execute()
 
     def C2Se(self, sname):
+        from IndirectBayesSpectra import read_qse_file
+        return self._create_qse_result(sname, read_qse_file(self._save_path(sname + '.qse')))
+
+    def _create_qse_result(self, sname, qse_data):
         outWS = sname + '_Result'
-        asc = self._read_ascii_file(sname + '.qse')
-        var = asc[3].split()  # split line on spaces
-        nspec = var[0]
-        var = ExtractInt(asc[6])
-        first = 7
-        Xout = []
-        Yf, Yi, Yb = [], [], []
-        Ef, Ei, Eb = [], [], []
-        ns = int(nspec)
+        Xout, (Yi, Ei), (Yf, Ef), (Yb, Eb) = qse_data
 
         dataX = np.array([])
         dataY = np.array([])
         dataE = np.array([])
         data = np.array([dataX, dataY, dataE])
-
-        for _ in range(0, ns):
-            first, Q, _, fw, it, be = self.SeBlock(asc, first)
-            Xout.append(Q)
-            Yf.append(fw[0])
-            Ef.append(fw[1])
-            Yi.append(it[0])
-            Ei.append(it[1])
-            Yb.append(be[0])
-            Eb.append(be[1])
         Vaxis = []
 
         dataX, dataY, dataE, data = self._add_xye_data(data, Xout, Yi, Ei)
@@ -494,45 +458,8 @@ class BayesQuasi(PythonAlgorithm):
 
         return dX, dY, dE, data
 
-    def _read_ascii_file(self, file_name):
-        workdir = config['defaultsave.directory']
-        file_path = os.path.join(workdir, file_name)
-        asc = []
-        with open(file_path, 'U') as handle:
-            for line in handle:
-                line = line.rstrip()
-                asc.append(line)
-        return asc
-
-    def SeBlock(self, a, index):  # read Ascii block of Integers
-        index += 1
-        val = ExtractFloat(a[index])  # Q,AMAX,HWHM
-        Q = val[0]
-        AMAX = val[1]
-        HWHM = val[2]
-        index += 1
-        val = ExtractFloat(a[index])  # A0
-        int0 = [AMAX * val[0]]
-        index += 1
-        val = ExtractFloat(a[index])  # AI,FWHM index peak
-        fw = [2. * HWHM * val[1]]
-        integer = [AMAX * val[0]]
-        index += 1
-        val = ExtractFloat(a[index])  # SIG0
-        int0.append(val[0])
-        index += 1
-        val = ExtractFloat(a[index])  # SIG3K
-        integer.append(AMAX * math.sqrt(math.fabs(val[0]) + 1.0e-20))
-        index += 1
-        val = ExtractFloat(a[index])  # SIG1K
-        fw.append(2.0 * HWHM * math.sqrt(math.fabs(val[0]) + 1.0e-20))
-        index += 1
-        be = ExtractFloat(a[index])  # EXPBET
-        index += 1
-        val = ExtractFloat(a[index])  # SIG2K
-        be.append(math.sqrt(math.fabs(val[0]) + 1.0e-20))
-        index += 1
-        return index, Q, int0, fw, integer, be  # values as list
+    def _save_path(self, file_name):
+        return os.path.join(config['defaultsave.directory'], file_name)
 
     def _get_res_norm(self, resnormWS, ngrp):
         if ngrp == 0:  # read values from WS
@@ -605,6 +532,12 @@ class BayesQuasi(PythonAlgorithm):
         return widthY, widthE
 
     def C2Fw(self, sname):
+        from IndirectBayesSpectra import read_ql_file
+        # read data from files output by fortran code
+        ql_data = tuple(read_ql_file(self._save_path(sname + '.ql' + str(nl)), nl) for nl in range(1, 4))
+        return self._create_ql_result(sname, ql_data)
+
+    def _create_ql_result(self, sname, ql_data):
         output_workspace = sname + '_Result'
         num_spectra = 0
         axis_names = []
@@ -616,9 +549,7 @@ class BayesQuasi(PythonAlgorithm):
             amplitude_data, width_data = [], []
             amplitude_error, width_error = [], []
 
-            # read data from file output by fortran code
-            file_name = sname + '.ql' + str(nl)
-            x_data, peak_data, peak_error = self._read_ql_file(file_name, nl)
+            x_data, peak_data, peak_error = ql_data[nl - 1]
             x_data = np.asarray(x_data)
 
             amplitude_data, width_data, height_data = peak_data
@@ -670,85 +601,6 @@ class BayesQuasi(PythonAlgorithm):
 
         return output_workspace
 
-    def _yield_floats(self, block):
-        # yield a list of floats from a list of lines of text
-        # encapsulates the iteration over a block of lines
-        for line in block:
-            yield ExtractFloat(line)
-
-    def _read_ql_file(self, file_name, nl):
-        # offset to ignore header
-        header_offset = 8
-        block_size = 4 + nl * 3
-
-        asc = self._read_ascii_file(file_name)
-        # extract number of blocks from the file header
-        num_blocks = int(ExtractFloat(asc[3])[0])
-
-        q_data = []
-        amp_data, FWHM_data, height_data = [], [], []
-        amp_error, FWHM_error, height_error = [], [], []
-
-        # iterate over each block of fit parameters in the file
-        # each block corresponds to a single column in the final workspace
-        for block_num in range(num_blocks):
-            lower_index = header_offset + (block_size * block_num)
-            upper_index = lower_index + block_size
-
-            # create iterator for each line in the block
-            line_pointer = self._yield_floats(asc[lower_index:upper_index])
-
-            # Q,AMAX,HWHM,BSCL,GSCL
-            line = next(line_pointer)
-            Q, AMAX, HWHM, _, _ = line
-            q_data.append(Q)
-
-            # A0,A1,A2,A4
-            line = next(line_pointer)
-            block_height = AMAX * line[0]
-
-            # parse peak data from block
-            block_FWHM = []
-            block_amplitude = []
-            for _ in range(nl):
-                # Amplitude,FWHM for each peak
-                line = next(line_pointer)
-                amp = AMAX * line[0]
-                FWHM = 2. * HWHM * line[1]
-                block_amplitude.append(amp)
-                block_FWHM.append(FWHM)
-
-            # next parse error data from block
-            # SIG0
-            line = next(line_pointer)
-            block_height_e = line[0]
-
-            block_FWHM_e = []
-            block_amplitude_e = []
-            for _ in range(nl):
-                # Amplitude error,FWHM error for each peak
-                # SIGIK
-                line = next(line_pointer)
-                amp = AMAX * math.sqrt(math.fabs(line[0]) + 1.0e-20)
-                block_amplitude_e.append(amp)
-
-                # SIGFK
-                line = next(line_pointer)
-                FWHM = 2.0 * HWHM * math.sqrt(math.fabs(line[0]) + 1.0e-20)
-                block_FWHM_e.append(FWHM)
-
-            # append data from block
-            amp_data.append(block_amplitude)
-            FWHM_data.append(block_FWHM)
-            height_data.append(block_height)
-
-            # append error values from block
-            amp_error.append(block_amplitude_e)
-            FWHM_error.append(block_FWHM_e)
-            height_error.append(block_height_e)
-
-        return q_data, (amp_data, FWHM_data, height_data), (amp_error, FWHM_error, height_error)
-
 
 # Register algorithm with Mantid
 AlgorithmFactory.subscribe(BayesQuasi)
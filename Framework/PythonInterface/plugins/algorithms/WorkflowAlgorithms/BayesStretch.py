@@ -9,15 +9,12 @@ from IndirectImport import *
 
 from mantid.api import (PythonAlgorithm, AlgorithmFactory, MatrixWorkspaceProperty,
                         WorkspaceGroupProperty, Progress)
-from mantid.kernel import StringListValidator, Direction
+from mantid.kernel import IntBoundedValidator, StringListValidator, Direction
 import mantid.simpleapi as s_api
 from mantid import config, logger
 import os
 import numpy as np
 
-if is_supported_f2py_platform():
-    Que = import_f2py("Quest")
-
 
 class BayesStretch(PythonAlgorithm):
     _sam_name = None
@@ -31,6 +28,7 @@ class BayesStretch(PythonAlgorithm):
     _nbet = None
     _nsig = None
     _loop = None
+    _number_of_processes = 1
 
     _erange = None
     _nbins = None
@@ -74,6 +72,11 @@ class BayesStretch(PythonAlgorithm):
 
         self.declareProperty(name='Loop', defaultValue=True, doc='Switch Sequential fit On/Off')
 
+        self.declareProperty(name='NumberOfProcesses', defaultValue=1, validator=IntBoundedValidator(1),
+                             doc='Number of processes to fit the spectra in. With more than one, each spectrum is '
+                                 'fitted on its own and the Fortran output files are not written to the save '
+                                 'directory')
+
         self.declareProperty(WorkspaceGroupProperty('OutputWorkspaceFit', '',
                                                     direction=Direction.Output),
                              doc='The name of the fit output workspaces')
@@ -145,17 +148,11 @@ class BayesStretch(PythonAlgorithm):
         wrks.ljust(140, ' ')
         wrkr = self._res_name
         wrkr.ljust(140, ' ')
-        eBet0 = np.zeros(self._nbet)  # set errors to zero
-        eSig0 = np.zeros(self._nsig)  # set errors to zero
         rscl = 1.0
-        Qaxis = ''
 
         workflow_prog = Progress(self, start=0.3, end=0.7, nreports=nsam * 3)
 
-        # Empty arrays to hold Sigma and Bet x,y,e values
-        xSig, ySig, eSig = [], [], []
-        xBet, yBet, eBet = [], [], []
-
+        spectra_args = []
         for m in range(nsam):
             logger.information('Group %i at angle %f' % (m, theta[m]))
             nsp = m + 1
@@ -170,57 +167,44 @@ class BayesStretch(PythonAlgorithm):
             numb = [nsam, nsp, ntc, Ndat, self._nbins[0], Imin,
                     Imax, Nb, self._nbins[1], self._nbet, self._nsig]
             reals = [efix, theta[m], rscl, bnorm]
+            spectra_args.append((numb, Xv, Yv, Ev, reals, fitOp, Xdat, Xb, Yb))
 
-            workflow_prog.report('Processing spectrum number %i' % m)
-            xsout, ysout, xbout, ybout, zpout = Que.quest(numb, Xv, Yv, Ev, reals, fitOp,
-                                                          Xdat, Xb, Yb, wrks, wrkr, lwrk)
-            dataXs = xsout[:self._nsig]  # reduce from fixed FORTRAN array
-            dataYs = ysout[:self._nsig]
-            dataXb = xbout[:self._nbet]
-            dataYb = ybout[:self._nbet]
-            zpWS = fname + '_Zp' + str(m)
-            if m > 0:
-                Qaxis += ','
-            Qaxis += str(Q[m])
-
-            dataXz = []
-            dataYz = []
-            dataEz = []
-
-            for n in range(self._nsig):
-                yfit_list = np.split(zpout[:self._nsig * self._nbet], self._nsig)
-                dataYzp = yfit_list[n]
+        # Lists to hold the Sigma and Beta x,y values of each spectrum
+        xSig, ySig = [], []
+        xBet, yBet = [], []
+        groupZ = []
 
-                dataXz = np.append(dataXz, xbout[:self._nbet])
-                dataYz = np.append(dataYz, dataYzp[:self._nbet])
-                dataEz = np.append(dataEz, eBet0)
+        fits = self._fit_spectra(spectra_args, wrks, wrkr, lwrk)
+        for (m, (dataXs, dataYs, dataXb, dataYb, zpout)) in enumerate(fits):
+            workflow_prog.report('Processing spectrum number %i' % m)
 
+            # the contour has a spectrum of the beta values for each sigma value
+            dataXz = np.tile(dataXb, self._nsig)
+            dataEz = np.zeros(self._nsig * self._nbet)  # set errors to zero
             zpWS = fname + '_Zp' + str(m)
-            self._create_workspace(zpWS, [dataXz, dataYz, dataEz], self._nsig, dataXs, True)
+            self._create_workspace(zpWS, [dataXz, zpout, dataEz], self._nsig, dataXs, True)
 
-            xSig = np.append(xSig, dataXs)
-            ySig = np.append(ySig, dataYs)
-            eSig = np.append(eSig, eSig0)
-            xBet = np.append(xBet, dataXb)
-            yBet = np.append(yBet, dataYb)
-            eBet = np.append(eBet, eBet0)
+            xSig.append(dataXs)
+            ySig.append(dataYs)
+            xBet.append(dataXb)
+            yBet.append(dataYb)
+            groupZ.append(zpWS)
 
-            if m == 0:
-                groupZ = zpWS
-            else:
-                groupZ = groupZ + ',' + zpWS
+        Qaxis = ','.join(str(Q[m]) for m in range(nsam))
 
         # create workspaces for sigma and beta
         workflow_prog.report('Creating OutputWorkspace')
-        self._create_workspace(fname + '_Sigma', [xSig, ySig, eSig], nsam, Qaxis)
-        self._create_workspace(fname + '_Beta', [xBet, yBet, eBet], nsam, Qaxis)
+        self._create_workspace(fname + '_Sigma', [np.concatenate(xSig), np.concatenate(ySig), np.zeros(nsam * self._nsig)],
+                               nsam, Qaxis)
+        self._create_workspace(fname + '_Beta', [np.concatenate(xBet), np.concatenate(yBet), np.zeros(nsam * self._nbet)],
+                               nsam, Qaxis)
 
         group = fname + '_Sigma,' + fname + '_Beta'
         fit_ws = fname + '_Fit'
         s_api.GroupWorkspaces(InputWorkspaces=group,
                               OutputWorkspace=fit_ws)
         contour_ws = fname + '_Contour'
-        s_api.GroupWorkspaces(InputWorkspaces=groupZ,
+        s_api.GroupWorkspaces(InputWorkspaces=','.join(groupZ),
                               OutputWorkspace=contour_ws)
 
         # Add some sample logs to the output workspaces
@@ -253,6 +237,21 @@ class BayesStretch(PythonAlgorithm):
 
     # ----------------------------- Helper functions -----------------------------
 
+    def _fit_spectra(self, spectra_args, wrks, wrkr, lwrk):
+        """
+        Run the Quest fit of each spectrum
+        @param spectra_args :: List of the Fortran inputs of each spectrum
+        @return iterator over the sigma and beta values and the contour of each spectrum, in order
+        """
+        from IndirectBayesSpectra import map_spectra, run_stretch, run_stretch_spectrum
+
+        if self._number_of_processes > 1:
+            # each spectrum is fitted on its own in a temporary directory
+            arguments = [args + (self._sam_name[:-4], wrkr, self._nbet, self._nsig) for args in spectra_args]
+            return map_spectra(run_stretch_spectrum, arguments, self._number_of_processes)
+        arguments = [args + (wrks, wrkr, lwrk, self._nbet, self._nsig) for args in spectra_args]
+        return map_spectra(run_stretch, arguments)
+
     def _encode_fit_ops(self, elastic, background):
         """
         Encode the fit options are boolean values for use in FORTRAN
@@ -345,6 +344,7 @@ class BayesStretch(PythonAlgorithm):
         self._nbet = self.getProperty('NumberBeta').value
         self._nsig = self.getProperty('NumberSigma').value
         self._loop = self.getProperty('Loop').value
+        self._number_of_processes = self.getProperty('NumberOfProcesses').value
 
         self._erange = [self._e_min, self._e_max]
         # [sample_bins, resNorm_bins=1]
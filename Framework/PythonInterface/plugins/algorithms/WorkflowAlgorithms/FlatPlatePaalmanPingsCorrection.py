@@ -240,15 +240,9 @@ class FlatPlatePaalmanPingsCorrection(PythonAlgorithm):
                                                    self._can_density,
                                                    self._can_number_density_unit)
 
-        # Holders for the corrected data
-        data_ass = []
-        data_assc = []
-        data_acsc = []
-        data_acc = []
-
         self._get_angles()
         num_angles = len(self._angles)
-        workflow_prog = Progress(self, start=0.2, end=0.8, nreports=num_angles * 2)
+        workflow_prog = Progress(self, start=0.2, end=0.8, nreports=2)
 
         # Check sample input
         sam_material = mtd[self._sample_ws_name].sample().getMaterial()
@@ -278,17 +272,16 @@ class FlatPlatePaalmanPingsCorrection(PythonAlgorithm):
                     "A can workspace was given but the can back thickness was not given. Continuing but no absorption for can back"
                     " will be computed.")
 
-        for angle_idx in range(num_angles):
-            workflow_prog.report('Running flat correction for angle %s' % angle_idx)
-            angle = self._angles[angle_idx]
-            (ass, assc, acsc, acc) = self._flat_abs(angle)
+        workflow_prog.report('Running flat correction for %d angles' % num_angles)
+        # each factor has shape (angles, wavelengths), which is the spectrum by spectrum order of the output
+        (ass, assc, acsc, acc) = self._flat_abs(np.array(self._angles))
+        logger.information('Angles : %d successful' % num_angles)
 
-            logger.information('Angle %d: %f successful' % (angle_idx + 1, self._angles[angle_idx]))
-            workflow_prog.report('Appending data for angle %s' % angle_idx)
-            data_ass = np.append(data_ass, ass)
-            data_assc = np.append(data_assc, assc)
-            data_acsc = np.append(data_acsc, acsc)
-            data_acc = np.append(data_acc, acc)
+        workflow_prog.report('Flattening data')
+        data_ass = ass.ravel()
+        data_assc = assc.ravel()
+        data_acsc = acsc.ravel()
+        data_acc = acc.ravel()
 
         log_prog = Progress(self, start=0.8, end=1.0, nreports=8)
 
@@ -554,9 +547,9 @@ class FlatPlatePaalmanPingsCorrection(PythonAlgorithm):
 
     # ------------------------------------------------------------------------------
 
-    def _flat_abs(self, angle):
+    def _flat_abs(self, angles):
         """
-        FlatAbs - calculate flat plate absorption factors
+        FlatAbs - calculate flat plate absorption factors for all of the detector angles at once
 
         For more information See:
           - MODES User Guide: http://www.isis.stfc.ac.uk/instruments/iris/data-analysis/modes-v3-user-guide-6962.pdf
@@ -567,7 +560,8 @@ class FlatPlatePaalmanPingsCorrection(PythonAlgorithm):
             Open-Source Implementation libabsco, and Why it Should be Used with Caution',
             http://apps.jcns.fz-juelich.de/doku/sc/_media/abs00.pdf
 
-        @return: A tuple containing the attenuations;
+        @param angles: array of the detector angles in degrees
+        @return: A tuple containing the attenuations, each with shape (number of angles, number of wavelengths);
             1) scattering and absorption in sample,
             2) scattering in sample and absorption in sample and container
             3) scattering in container and absorption in sample and container,
@@ -578,24 +572,23 @@ class FlatPlatePaalmanPingsCorrection(PythonAlgorithm):
         # self._sample_angle = 0 means that the sample is perpendicular
         # to the incident beam
         alpha = (90.0 + self._sample_angle) * self.PICONV
-        theta = angle * self.PICONV
+        # a column of angles, so that the factors broadcast to (angle, wavelength)
+        theta = np.reshape(angles, (-1, 1)) * self.PICONV
         salpha = np.sin(alpha)
-        if theta > (alpha + np.pi):
-            stha = np.sin(abs(theta-alpha-np.pi))
-        else:
-            stha = np.sin(abs(theta-alpha))
+        stha = np.where(theta > (alpha + np.pi), np.sin(abs(theta-alpha-np.pi)), np.sin(abs(theta-alpha)))
 
-        nlam = len(self._wavelengths)
+        shape = (theta.size, len(self._wavelengths))
 
-        ass = np.ones(nlam)
-        assc = np.ones(nlam)
-        acsc = np.ones(nlam)
-        acc = np.ones(nlam)
+        ass = np.ones(shape)
+        assc = np.ones(shape)
+        acsc = np.ones(shape)
+        acc = np.ones(shape)
 
         # Scattering in direction of slab --> calculation is not reliable
         # Default to 1 for everything
         # Tolerance is 0.001 rad ~ 0.06 deg
-        if abs(theta-alpha) < 0.001:
+        in_slab = np.abs(theta-alpha)[:, 0] < 0.001
+        if np.all(in_slab):
             return ass, assc, acsc, acc
 
         sample = mtd[self._sample_ws_name].sample()
@@ -604,18 +597,27 @@ class FlatPlatePaalmanPingsCorrection(PythonAlgorithm):
         # List of wavelengths
         waveslengths = np.array(self._wavelengths)
 
-        sst = np.vectorize(self._self_shielding_transmission)
-        ssr = np.vectorize(self._self_shielding_reflection)
+        sst = self._self_shielding_transmission
+        ssr = self._self_shielding_reflection
 
-        ki_s, kf_s = 0, 0
-        if self._has_sample_in:
-            ki_s, kf_s, ass = self._sample_cross_section_calc(sam_material, waveslengths, theta, alpha, stha, salpha, sst, ssr)
+        # the angles in the direction of the slab give infinite path lengths, which are replaced by 1 below
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            ki_s, kf_s = 0, 0
+            if self._has_sample_in:
+                ki_s, kf_s, ass = self._sample_cross_section_calc(sam_material, waveslengths, theta, alpha, stha, salpha, sst,
+                                                                  ssr)
 
-        # Container --> Acc, Assc, Acsc
-        if self._use_can:
-            ass, assc, acsc, acc = self._can_cross_section_calc(waveslengths, theta, alpha, stha, salpha, ki_s, kf_s, ass, acc, sst, ssr)
+            # Container --> Acc, Assc, Acsc
+            if self._use_can:
+                ass, assc, acsc, acc = self._can_cross_section_calc(waveslengths, theta, alpha, stha, salpha, ki_s, kf_s, ass,
+                                                                    acc, sst, ssr)
 
-        return ass, assc, acsc, acc
+        factors = []
+        for factor in (ass, assc, acsc, acc):
+            factor = np.array(np.broadcast_to(factor, shape))
+            factor[in_slab] = 1.0
+            factors.append(factor)
+        return tuple(factors)
 
     # ------------------------------------------------------------------------------
 
@@ -638,12 +640,8 @@ class FlatPlatePaalmanPingsCorrection(PythonAlgorithm):
             ki_s, kf_s = self._calc_ki_kf(waves, self._sample_thickness, salpha, stha,
                                           sample_x_section, sample_x_section_efixed)
 
-        if theta < alpha or theta > (alpha + np.pi):
-            # transmission case
-            ass = sst(ki_s, kf_s)
-        else:
-            # reflection case
-            ass = ssr(ki_s, kf_s)
+        # transmission case, otherwise reflection case
+        ass = np.where(self._is_transmission(theta, alpha), sst(ki_s, kf_s), ssr(ki_s, kf_s))
 
         return ki_s, kf_s, ass
 
@@ -676,10 +674,12 @@ class FlatPlatePaalmanPingsCorrection(PythonAlgorithm):
                                                           theta, alpha, stha, salpha, ssr, sst)
 
         # Attenuation due to passage by other layers (sample or container)
-        if theta < alpha or theta > (alpha + np.pi):  # transmission case
-            assc, acsc, acc = self._container_transmission_calc(acc, acc1, acc2, ki_s, kf_s, ki_c1, kf_c2, ass)
-        else:  # reflection case
-            assc, acsc, acc = self._container_reflection_calc(acc, acc1, acc2, ki_s, kf_s, ki_c1, kf_c1, ass)
+        transmission = self._is_transmission(theta, alpha)
+        trans_assc, trans_acsc, trans_acc = self._container_transmission_calc(acc, acc1, acc2, ki_s, kf_s, ki_c1, kf_c2, ass)
+        refl_assc, refl_acsc, refl_acc = self._container_reflection_calc(acc, acc1, acc2, ki_s, kf_s, ki_c1, kf_c1, ass)
+        assc = np.where(transmission, trans_assc, refl_assc)
+        acsc = np.where(transmission, trans_acsc, refl_acsc)
+        acc = np.where(transmission, trans_acc, refl_acc)
 
         return ass, assc, acsc, acc
 
@@ -692,12 +692,8 @@ class FlatPlatePaalmanPingsCorrection(PythonAlgorithm):
         else:
             ki, kf = self._calc_ki_kf(wavelengths, can_thickness, salpha, stha, can_x_section, can_x_section_efixed)
 
-        if theta < alpha or theta > (alpha + np.pi):
-            # transmission case
-            acc = sst(ki, kf)
-        else:
-            # reflection case
-            acc = ssr(ki, kf)
+        # transmission case, otherwise reflection case
+        acc = np.where(self._is_transmission(theta, alpha), sst(ki, kf), ssr(ki, kf))
 
         return ki, kf, acc
 
@@ -774,11 +770,17 @@ class FlatPlatePaalmanPingsCorrection(PythonAlgorithm):
 
     # ------------------------------------------------------------------------------
 
+    def _is_transmission(self, theta, alpha):
+        return (theta < alpha) | (theta > (alpha + np.pi))
+
+    # ------------------------------------------------------------------------------
+
     def _self_shielding_transmission(self, ki, kf):
-        if abs(ki-kf) < 1.0e-3:
-            return np.exp(-ki) * ( 1.0 - 0.5*(kf-ki) + (kf-ki)**2/12.0 )
-        else:
-            return (np.exp(-kf)-np.exp(-ki)) / (ki-kf)
+        # the series avoids the cancellation in the exact form when ki is close to kf
+        with np.errstate(divide='ignore', invalid='ignore'):
+            exact = (np.exp(-kf)-np.exp(-ki)) / (ki-kf)
+        series = np.exp(-ki) * ( 1.0 - 0.5*(kf-ki) + (kf-ki)**2/12.0 )
+        return np.where(np.abs(ki-kf) < 1.0e-3, series, exact)
 
     # ------------------------------------------------------------------------------
 
@@ -799,8 +801,9 @@ class FlatPlatePaalmanPingsCorrection(PythonAlgorithm):
         elif self._emode == 'Indirect':
             ki = np.copy(x_section)
             kf *= x_section_efixed
-        ki *= (thickness / sinangle1)
-        kf *= (thickness / sinangle2)
+        # not in place, as sinangle2 may be a column of angles
+        ki = ki * (thickness / sinangle1)
+        kf = kf * (thickness / sinangle2)
         return ki, kf
 
     # ------------------------------------------------------------------------------
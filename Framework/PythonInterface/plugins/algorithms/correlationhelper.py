@@ -0,0 +1,208 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+from scipy.fftpack import next_fast_len
+from scipy.sparse import csr_matrix
+import numpy as np
+
+'''
+This file contains functions which calculate correlation functions of MMTK
+trajectories stored in nMOLDYN (.nc) files, for algorithms such as
+VelocityAutoCorrelations, VelocityCrossCorrelations and
+AngularAutoCorrelationsTwoAxes.
+
+The trajectory is read from the file in blocks of timesteps and the
+correlations are calculated with FFTs, summing the spectra of many particles
+before a single inverse transform. The correlations are those of
+numpy.correlate in "same" mode, divided by the number of overlapping points
+at each lag, or by velocity_normalisation for the velocity correlations.
+'''
+
+# Upper limit on the size of the temporary arrays of a block, in bytes
+MEMORY_LIMIT = 512 * 1024 * 1024
+
+
+def blocks(n_items, bytes_per_item):
+    '''
+    Splits a range of items into blocks which fit into MEMORY_LIMIT.
+    Yields the start and stop index of each block.
+    '''
+    size = int(max(1, min(n_items, MEMORY_LIMIT // max(1, bytes_per_item))))
+    for start in range(0, n_items, size):
+        yield start, min(start + size, n_items)
+
+
+def box_tensors(trajectory, start, stop):
+    '''
+    Returns the simulation box of the timesteps start to stop as 3x3 tensors.
+    '''
+    return np.asarray(trajectory.variables["box_size"][start:stop], dtype=float).reshape((-1, 3, 3))
+
+
+def cartesian_coordinates(trajectory, start, stop, scale=1.0):
+    '''
+    Transforms the configuration of the timesteps start to stop with the
+    (scaled) box tensors. Shape: (# of particles) x (# of timesteps) x 3.
+    '''
+    configuration = np.asarray(trajectory.variables["configuration"][start:stop], dtype=float)
+    return np.einsum('tij,tpj->pti', scale * box_tensors(trajectory, start, stop), configuration)
+
+
+def velocities(trajectory, first_particle, last_particle):
+    '''
+    Calculates the velocities of the particles first_particle to last_particle
+    by central differences of the unwrapped scaled coordinates, transformed
+    back with the box tensors. Shape: (# of particles) x (# of timesteps - 1) x 3,
+    where the velocity of the last timestep is zero.
+    '''
+    configuration = trajectory.variables["configuration"]
+    n_timesteps = int(configuration.shape[0])
+    n_particles = last_particle - first_particle
+    result = np.zeros((n_particles, n_timesteps - 1, 3))
+
+    # Each block needs the coordinates of the two timesteps following it
+    for start, stop in blocks(n_timesteps - 2, 4 * 3 * 8 * n_particles):
+        boxes = box_tensors(trajectory, start, stop + 2)
+        coordinates = np.asarray(configuration[start:stop + 2, first_particle:last_particle], dtype=float)
+        scaled_coords = coordinates / np.diagonal(boxes, axis1=1, axis2=2)[:, np.newaxis, :]
+        # Unwrapping coordinates
+        steps = np.diff(scaled_coords, axis=0)
+        steps -= np.round(steps)
+        result[:, start:stop] = np.einsum('tij,tpj->pti', boxes[1:-1], (steps[:-1] + steps[1:]) / 2.0)
+    return result
+
+
+def averaging_matrix(groups, n_particles):
+    '''
+    Returns a sparse matrix which averages the positions of the particles in
+    each group. Shape: (# of groups) x (# of particles).
+    '''
+    sizes = [len(group) for group in groups]
+    rows = np.repeat(np.arange(len(groups)), sizes)
+    columns = np.concatenate([np.asarray(group, dtype=int) for group in groups]) if groups else []
+    weights = np.repeat(1.0 / np.maximum(sizes, 1), sizes)
+    return csr_matrix((weights, (rows, columns)), shape=(len(groups), n_particles))
+
+
+def average_positions(matrix, coordinates):
+    '''
+    Applies an averaging matrix to coordinates of shape
+    (# of particles) x (# of timesteps) x 3.
+    '''
+    n_particles, n_timesteps, n_dimensions = coordinates.shape
+    averages = matrix.dot(coordinates.reshape((n_particles, n_timesteps * n_dimensions)))
+    return np.asarray(averages).reshape((matrix.shape[0], n_timesteps, n_dimensions))
+
+
+def minimum_image_unit_vectors(vectors, boxes):
+    '''
+    Wraps vectors of shape (# of molecules) x (# of timesteps) x 3 into the
+    (orthorhombic) simulation box and normalises them.
+    '''
+    box_sizes = np.diagonal(boxes, axis1=1, axis2=2)
+    scaled = vectors / box_sizes
+    wrapped = (scaled - np.round(scaled)) * box_sizes
+    return wrapped / np.sqrt(np.sum(wrapped * wrapped, axis=2))[:, :, np.newaxis]
+
+
+def fft_length(n_timesteps):
+    '''
+    Returns the FFT length which avoids circular overlap of the correlations.
+    '''
+    return next_fast_len(2 * n_timesteps - 1)
+
+
+def velocity_normalisation(n_timesteps):
+    '''
+    Returns the divisors of the velocity correlations at each lag of
+    numpy.correlate in "same" mode. These are the numbers of overlapping
+    points, except at the positive lags of an odd number of timesteps, which
+    are divided by the number of overlapping points + 0.5, as VelocityAutoCorrelations
+    and VelocityCrossCorrelations always have.
+    '''
+    return np.append(np.arange(np.ceil(n_timesteps / 2.0), n_timesteps + 1),
+                     np.arange(n_timesteps / 2.0 + 1, n_timesteps)[::-1])
+
+
+def correlation_from_spectrum(spectrum, n_timesteps, n_fft, norm=None):
+    '''
+    Transforms a (summed) correlation spectrum back to the lags of
+    numpy.correlate in "same" mode and divides by norm, by default the number
+    of overlapping points at each lag.
+    '''
+    correlation = np.fft.irfft(spectrum, n=n_fft)
+    lags = np.arange(n_timesteps) - n_timesteps // 2
+    if norm is None:
+        norm = n_timesteps - np.abs(lags)
+    return correlation[lags] / norm
+
+
+def auto_correlation_sum(vectors):
+    '''
+    Returns the sum of the auto-correlations of the vectors, which have shape
+    (# of vectors) x (# of timesteps) x (# of dimensions).
+    '''
+    n_vectors, n_timesteps, n_dimensions = vectors.shape
+    n_fft = fft_length(n_timesteps)
+    power = np.zeros(n_fft // 2 + 1)
+    for start, stop in blocks(n_vectors, 2 * 16 * n_dimensions * (n_fft // 2 + 1)):
+        spectra = np.fft.rfft(vectors[start:stop], n=n_fft, axis=1)
+        power += np.sum(spectra.real**2 + spectra.imag**2, axis=(0, 2))
+    return correlation_from_spectrum(power, n_timesteps, n_fft)
+
+
+def velocity_correlation_sums(trajectory, species, n_species, cross_correlations=False):
+    '''
+    Calculates the velocity correlations of all particles in one pass over
+    the trajectory, summed by atomic species.
+
+    Without cross_correlations, element [k,k] is the sum of the
+    auto-correlations of the particles of species k. With cross_correlations,
+    element [k,l] (k < l) is the sum of the cross-correlations of the particles
+    of species k with those of species l, and element [k,k] the sum of the
+    cross-correlations of the pairs i < j of particles of species k.
+
+    :param trajectory: the netcdf trajectory
+    :param species: the index of the species of each particle
+    :param n_species: the number of species
+    :param cross_correlations: sum cross-correlations rather than auto-correlations
+    :return: array of shape (# of species) x (# of species) x (# of timesteps - 1)
+    '''
+    species = np.asarray(species)
+    n_steps = int(trajectory.variables["configuration"].shape[0]) - 1
+    n_fft = fft_length(n_steps)
+    n_frequencies = n_fft // 2 + 1
+
+    # Summed spectra of the velocities of each species and of the preceding particles of the same species
+    species_spectra = np.zeros((n_species, n_frequencies, 3), dtype=complex)
+    correlation_spectra = np.zeros((n_species, n_frequencies), dtype=complex)
+
+    for first, last in blocks(len(species), 8 * 3 * n_steps + 3 * 16 * 3 * n_frequencies):
+        spectra = np.fft.rfft(velocities(trajectory, first, last), n=n_fft, axis=1)
+        block_species = species[first:last]
+        for k in range(n_species):
+            species_block = spectra[block_species == k]
+            if len(species_block) == 0:
+                continue
+            if cross_correlations:
+                preceding = np.empty_like(species_block)
+                preceding[0] = 0.0
+                np.cumsum(species_block[:-1], axis=0, out=preceding[1:])
+                preceding += species_spectra[k]
+                correlation_spectra[k] += np.sum(preceding * species_block.conj(), axis=(0, 2))
+            else:
+                correlation_spectra[k] += np.sum(species_block.real**2 + species_block.imag**2, axis=(0, 2))
+            species_spectra[k] += np.sum(species_block, axis=0)
+
+    norm = velocity_normalisation(n_steps)
+    correlations = np.zeros((n_species, n_species, n_steps))
+    for k in range(n_species):
+        correlations[k, k] = correlation_from_spectrum(correlation_spectra[k], n_steps, n_fft, norm)
+        if cross_correlations:
+            for l in range(k + 1, n_species):
+                spectrum = np.sum(species_spectra[k] * species_spectra[l].conj(), axis=1)
+                correlations[k, l] = correlation_from_spectrum(spectrum, n_steps, n_fft, norm)
+    return correlations
@@ -5,7 +5,10 @@
 #   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
 # SPDX - License - Identifier: GPL - 3.0 +
 import inspect
+import os
+import tempfile
 import unittest
+from unittest import mock
 
 from mantid.api import (AlgorithmFactory, IAlgorithm, IEventWorkspace, ITableWorkspace,
                         PythonAlgorithm, MatrixWorkspace, mtd)
@@ -470,5 +473,31 @@ class SimpleAPITest(unittest.TestCase):
         mtd.remove('ws')
         self.assertTrue(ws)
 
+    def test_getattr_raises_attribute_error_without_lazy_index(self):
+        with self.assertRaises(AttributeError):
+            simpleapi.__getattr__("NotAnAlgorithm")
+
+    def test_lazy_index_creates_algorithm_function_and_alias_on_access(self):
+        index = {"algorithms": {"CreateSampleWorkspace": {"version": 1, "aliases": ["LazySampleWorkspace"],
+                                                          "python": False}},
+                 "aliases": {"LazySampleWorkspace": "CreateSampleWorkspace"}, "functions": {}}
+        with mock.patch.object(simpleapi, "_lazy_index", index):
+            wrapper = simpleapi.__getattr__("LazySampleWorkspace")
+        self.addCleanup(delattr, simpleapi, "LazySampleWorkspace")
+        self.assertEqual(wrapper.__name__, "CreateSampleWorkspace")
+        self.assertTrue(simpleapi.LazySampleWorkspace is simpleapi.CreateSampleWorkspace)
+
+        out = simpleapi.LazySampleWorkspace(StoreInADS=False)
+        self.assertTrue(out)
+
+    def test_lazy_index_is_only_read_with_matching_key(self):
+        index_file = os.path.join(tempfile.mkdtemp(), "index.json")
+        with mock.patch.object(simpleapi, "_get_lazy_index_path", return_value=index_file):
+            simpleapi._write_lazy_index({"key": "key", "algorithms": {}})
+
+            self.assertEqual(simpleapi._read_lazy_index("key"), {"key": "key", "algorithms": {}})
+            self.assertEqual(simpleapi._read_lazy_index("other_key"), None)
+        os.remove(index_file)
+
 if __name__ == '__main__':
     unittest.main()
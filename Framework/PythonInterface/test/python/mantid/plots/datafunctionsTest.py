@@ -493,6 +493,28 @@ class DataFunctionsTest(unittest.TestCase):
         # 12th spectra is high counting but will skipped if we don't use maxpooling
         np.testing.assert_allclose(z[0], self.ws2d_high_counting_detector.readY(0))
 
+    def test_get_matrix_2d_ragged_uses_nearest_points_within_each_spectrum(self):
+        ws = CreateWorkspace(DataX=[1, 2, 3, 4, 2, 4, 6, 8], DataY=[1, 2, 3, 4, 5, 6, 7, 8], NSpec=2,
+                             OutputWorkspace='ws2d_point_rag_nearest')
+        x, y, z = funcs.get_matrix_2d_ragged(ws, False, histogram2D=True, extent=[0, 8, 0.5, 2.5], xbins=8, ybins=2)
+
+        np.testing.assert_allclose(z.filled(np.nan),
+                                   np.array([[np.nan, 1, 2, 3, np.nan, np.nan, np.nan, np.nan],
+                                             [np.nan, np.nan, 5, 6, 6, 7, 7, 8]]))
+        DeleteWorkspace(ws)
+
+    def test_get_matrix_2d_ragged_extracts_the_data_again_when_the_workspace_is_replaced(self):
+        CreateWorkspace(DataX=[1, 2, 3, 4, 2, 4, 6, 8], DataY=[2] * 8, NSpec=2, OutputWorkspace='ws2d_point_rag_replaced')
+        _, _, z = funcs.get_matrix_2d_ragged(mantid.mtd['ws2d_point_rag_replaced'], False, extent=[1, 8, 1, 2],
+                                             xbins=7, ybins=2)
+        np.testing.assert_allclose(z.compressed(), 2)
+
+        CreateWorkspace(DataX=[1, 2, 3, 4, 2, 4, 6, 8], DataY=[3] * 8, NSpec=2, OutputWorkspace='ws2d_point_rag_replaced')
+        _, _, z = funcs.get_matrix_2d_ragged(mantid.mtd['ws2d_point_rag_replaced'], False, extent=[1, 8, 1, 2],
+                                             xbins=7, ybins=2)
+        np.testing.assert_allclose(z.compressed(), 3)
+        DeleteWorkspace('ws2d_point_rag_replaced')
+
     def test_get_uneven_data(self):
         # even points
         x, y, z = funcs.get_uneven_data(self.ws2d_point_rag, True)
@@ -0,0 +1,125 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+import os
+import tempfile
+import time
+import unittest
+
+from mantid.utils import reductioncache
+from mantid.utils.reductioncache import ReductionCache, TIER_FOCUSED, TIER_UNFOCUSED, TIER_VANADIUM
+
+
+def _save(nbytes):
+    def save(filename):
+        with open(filename, 'wb') as handle:
+            handle.write(b'\0' * nbytes)
+    return save
+
+
+class ReductionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.cache_dir = self._directory.name
+        self.cache = ReductionCache(self.cache_dir)
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _filename(self, name):
+        return os.path.join(self.cache_dir, name + '.nxs')
+
+    def test_write_adds_file_to_index(self):
+        filename = self._filename('PG3_1_focused')
+
+        self.cache.write(filename, TIER_FOCUSED, _save(10), properties='Params=1,2,3')
+
+        self.assertEqual(os.listdir(self.cache_dir).count('PG3_1_focused.nxs'), 1)
+        entry, = self.cache.entries()
+        self.assertEqual((entry.filename, entry.tier, entry.size, entry.properties),
+                         ('PG3_1_focused.nxs', TIER_FOCUSED, 10, 'Params=1,2,3'))
+
+    def test_failed_write_leaves_no_file(self):
+        filename = self._filename('PG3_1_focused')
+
+        def save(tempname):
+            _save(10)(tempname)
+            raise RuntimeError('disk full')
+
+        self.assertRaises(RuntimeError, self.cache.write, filename, TIER_FOCUSED, save)
+        self.assertEqual(os.listdir(self.cache_dir), [reductioncache.INDEX_FILENAME])
+        self.assertEqual(self.cache.entries(), [])
+
+    def test_lookup_counts_hits_and_misses(self):
+        filename = self._filename('PG3_1_focused')
+        self.assertFalse(self.cache.lookup(filename, TIER_FOCUSED))
+        self.cache.write(filename, TIER_FOCUSED, _save(10))
+
+        self.assertTrue(self.cache.lookup(filename, TIER_FOCUSED))
+        self.assertTrue(self.cache.lookup(filename, TIER_FOCUSED))
+        self.cache.record_hits(TIER_VANADIUM, 2)
+
+        rates = self.cache.hit_rates()
+        self.assertAlmostEqual(rates[TIER_FOCUSED], 2. / 3.)
+        self.assertEqual(rates[TIER_VANADIUM], 1.)
+        self.assertIsNone(rates[TIER_UNFOCUSED])
+        self.assertEqual(self.cache.statistics()[TIER_FOCUSED], (2, 1, 1, 10))
+
+    def test_lookup_adds_files_written_before_the_index(self):
+        filename = self._filename('PG3_1_focused')
+        _save(10)(filename)
+
+        self.assertTrue(self.cache.lookup(filename, TIER_FOCUSED, record=False))
+
+        self.assertEqual(len(self.cache.entries(TIER_FOCUSED)), 1)
+        self.assertIsNone(self.cache.hit_rates()[TIER_FOCUSED])
+
+    def test_lowest_tier_and_least_recently_used_are_evicted_over_size_limit(self):
+        self.cache.size_limit = 25
+        for (name, tier) in [('van', TIER_VANADIUM), ('old', TIER_FOCUSED), ('new', TIER_FOCUSED)]:
+            self.cache.write(self._filename(name), tier, _save(10))
+            time.sleep(0.01)
+
+        self.assertFalse(os.path.exists(self._filename('old')))
+        self.assertEqual(sorted(entry.filename for entry in self.cache.entries()), ['new.nxs', 'van.nxs'])
+
+    def test_files_not_used_within_age_limit_are_evicted(self):
+        filename = self._filename('PG3_1_focused')
+        self.cache.write(filename, TIER_FOCUSED, _save(10))
+        self.cache.age_limit = 1.
+
+        self.assertEqual(self.cache.evict(), [])
+        self.cache.age_limit = 1e-9
+        time.sleep(0.01)
+
+        self.assertEqual(self.cache.evict(), [filename])
+        self.assertFalse(os.path.exists(filename))
+
+    def test_clear_removes_files_and_statistics(self):
+        filename = self._filename('PG3_1_focused')
+        self.cache.write(filename, TIER_FOCUSED, _save(10))
+        self.cache.lookup(filename, TIER_FOCUSED)
+
+        self.cache.clear()
+
+        self.assertFalse(os.path.exists(filename))
+        self.assertEqual(self.cache.statistics()[TIER_FOCUSED], (0, 0, 0, 0))
+
+    def test_index_is_shared_between_instances(self):
+        filename = self._filename('PG3_1_focused')
+        self.cache.write(filename, TIER_FOCUSED, _save(10))
+
+        other = ReductionCache(self.cache_dir)
+
+        self.assertTrue(other.lookup(filename, TIER_FOCUSED))
+        self.assertEqual(self.cache.hit_rates()[TIER_FOCUSED], 1.)
+
+    def test_unknown_tier_raises(self):
+        self.assertRaises(ValueError, self.cache.lookup, self._filename('PG3_1'), 'summed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+import unittest
+from unittest import mock
+import numpy as np
+import numpy.testing as npt
+
+import correlationhelper
+
+
+class CorrelationHelperTest(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(10)
+        self.n_particles = 7
+        self.species = np.array([0, 1, 0, 2, 1, 0, 2])
+        self._set_trajectory(41)
+
+    def _set_trajectory(self, n_timesteps):
+        self.n_timesteps = n_timesteps
+        box_size = np.zeros((self.n_timesteps, 9))
+        box_size[:, [0, 4, 8]] = 2.0 + 0.1 * np.random.random((self.n_timesteps, 3))
+        configuration = 3.0 * np.random.random((self.n_timesteps, self.n_particles, 3)) - 1.5
+        self.trajectory = mock.Mock(variables={"box_size": box_size, "configuration": configuration})
+
+    @staticmethod
+    def _correlation(u, v):
+        n = np.shape(u)[0]
+        norm = n - np.abs(np.arange(n) - n // 2)
+        return sum(np.correlate(u[:, k], v[:, k], "same") / norm for k in range(3))
+
+    @staticmethod
+    def _velocity_correlation(u, v):
+        # As calculated by VelocityAutoCorrelations and VelocityCrossCorrelations before the FFTs
+        n = np.shape(u)[0]
+        norm = np.arange(np.ceil(n / 2.0), n + 1)
+        norm = np.append(norm, (np.arange(n / 2 + 1, n)[::-1]))
+        return sum(np.correlate(u[:, k], v[:, k], "same") / norm for k in range(3))
+
+    def _reference_velocities(self):
+        box_size = self.trajectory.variables["box_size"].reshape((-1, 3, 3))
+        configuration = self.trajectory.variables["configuration"]
+        velocities = np.zeros((self.n_particles, self.n_timesteps - 1, 3))
+        for i in range(self.n_particles):
+            for j in range(self.n_timesteps - 2):
+                scaled = [configuration[j + m, i] / np.diag(box_size[j + m]) for m in range(3)]
+                v_temp1 = scaled[1] - scaled[0] - np.round(scaled[1] - scaled[0])
+                v_temp2 = scaled[2] - scaled[1] - np.round(scaled[2] - scaled[1])
+                velocities[i, j] = np.dot(box_size[j + 1], (v_temp1 + v_temp2) / 2.0)
+        return velocities
+
+    def test_velocities_match_finite_differences(self):
+        with mock.patch.object(correlationhelper, "MEMORY_LIMIT", 4 * 3 * 8 * self.n_particles * 5):
+            velocities = correlationhelper.velocities(self.trajectory, 0, self.n_particles)
+
+        npt.assert_allclose(velocities, self._reference_velocities())
+
+    def test_auto_correlation_sums_match_direct_correlation(self):
+        # An even and an odd number of velocities
+        for n_timesteps in (41, 42):
+            with self.subTest(n_timesteps=n_timesteps):
+                self._set_trajectory(n_timesteps)
+                velocities = self._reference_velocities()
+
+                correlations = correlationhelper.velocity_correlation_sums(self.trajectory, self.species, 3)
+
+                for k in range(3):
+                    expected = sum(self._velocity_correlation(velocities[i], velocities[i])
+                                   for i in np.flatnonzero(self.species == k))
+                    npt.assert_allclose(correlations[k, k], expected, atol=1e-12)
+
+    def test_cross_correlation_sums_match_direct_correlation(self):
+        for n_timesteps in (41, 42):
+            with self.subTest(n_timesteps=n_timesteps):
+                self._set_trajectory(n_timesteps)
+                velocities = self._reference_velocities()
+                n_steps = n_timesteps - 1
+                n_frequencies = correlationhelper.fft_length(n_steps) // 2 + 1
+
+                # Blocks of three particles, such that pairs of particles span blocks
+                with mock.patch.object(correlationhelper, "MEMORY_LIMIT",
+                                       3 * (8 * 3 * n_steps + 3 * 16 * 3 * n_frequencies)):
+                    correlations = correlationhelper.velocity_correlation_sums(self.trajectory, self.species, 3,
+                                                                               cross_correlations=True)
+
+                expected = np.zeros_like(correlations)
+                for i in range(self.n_particles):
+                    for j in range(i + 1, self.n_particles):
+                        k, l = self.species[i], self.species[j]
+                        if k <= l:
+                            expected[k, l] += self._velocity_correlation(velocities[i], velocities[j])
+                        else:
+                            expected[l, k] += self._velocity_correlation(velocities[j], velocities[i])
+                npt.assert_allclose(correlations, expected, atol=1e-12)
+
+    def test_auto_correlation_sum_of_even_length(self):
+        vectors = np.random.random((5, 40, 3))
+
+        expected = sum(self._correlation(vector, vector) for vector in vectors)
+        npt.assert_allclose(correlationhelper.auto_correlation_sum(vectors), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -155,6 +155,20 @@ class CylinderPaalmanPingsCorrection2Test(unittest.TestCase):
 
         self._verify_workspaces_for_can()
 
+    def test_sampleAndCan_multipleProcesses(self):
+        """
+        Test run with sample and can workspace sharing the angles between processes.
+        """
+
+        CylinderPaalmanPingsCorrection(OutputWorkspace=self._corrections_ws_name,
+                                       SampleWorkspace=self._sample_ws,
+                                       SampleChemicalFormula='H2-O',
+                                       CanWorkspace=self._can_ws,
+                                       CanChemicalFormula='V',
+                                       NumberOfProcesses=2)
+
+        self._verify_workspaces_for_can()
+
     def test_sampleAndCanDefaults(self):
         """
         Test simple run with sample and can workspace using the default values.
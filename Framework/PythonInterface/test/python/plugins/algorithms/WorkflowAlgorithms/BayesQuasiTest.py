@@ -82,6 +82,37 @@ if platform.system() == "Windows":
             self._validate_QSe_shape(result, fit_group)
             self._validate_QSe_value(result, fit_group)
 
+        def test_QLr_Run_with_multiple_processes(self):
+            """
+            Test Lorentzian fit for BayesQuasi with the spectra fitted in worker processes
+            """
+            fit_group, result, prob = BayesQuasi(Program='QL',
+                                                 SampleWorkspace=self._sample_ws,
+                                                 ResolutionWorkspace=self._res_ws,
+                                                 MinRange=-0.547607,
+                                                 MaxRange=0.543216,
+                                                 Elastic=False,
+                                                 Background='Sloping',
+                                                 FixedWidth=False,
+                                                 NumberOfProcesses=2)
+            self._validate_QLr_shape(result, prob, fit_group)
+            self._validate_matches_sequential_fit('QL', [fit_group, result, prob])
+
+        def test_QSe_Run_with_multiple_processes(self):
+            """
+            Test Stretched Exponential fit for BayesQuasi with the spectra fitted in worker processes
+            """
+            fit_group, result = BayesQuasi(Program='QSe',
+                                           SampleWorkspace=self._sample_ws,
+                                           ResolutionWorkspace=self._res_ws,
+                                           MinRange=-0.547607,
+                                           MaxRange=0.543216,
+                                           Elastic=False,
+                                           Background='Sloping',
+                                           FixedWidth=False,
+                                           NumberOfProcesses=2)
+            self._validate_QSe_shape(result, fit_group)
+            self._validate_matches_sequential_fit('QSe', [fit_group, result])
 
         def test_run_with_resNorm_file(self):
             """
@@ -268,6 +299,29 @@ if platform.system() == "Windows":
             self.assertEqual(round(sub_ws.dataY(1)[0], 5), 0.01632)
             self.assertEqual(round(sub_ws.dataY(2)[0], 5), -0.00908)
 
+        def _validate_matches_sequential_fit(self, program, outputs):
+            """
+            Validates that the output workspaces of a fit in worker processes match those of
+            the same fit run with a single process
+
+            @param program Program used for the fit
+            @param outputs Output workspaces of the fit in worker processes
+            """
+            outputs = [CloneWorkspace(InputWorkspace=workspace, OutputWorkspace='__parallel_' + workspace.name())
+                       for workspace in outputs]
+            sequential_outputs = BayesQuasi(Program=program,
+                                            SampleWorkspace=self._sample_ws,
+                                            ResolutionWorkspace=self._res_ws,
+                                            MinRange=-0.547607,
+                                            MaxRange=0.543216,
+                                            Elastic=False,
+                                            Background='Sloping',
+                                            FixedWidth=False,
+                                            NumberOfProcesses=1)
+            for sequential, parallel in zip(sequential_outputs, outputs):
+                match, messages = CompareWorkspaces(Workspace1=sequential, Workspace2=parallel, Tolerance=1e-8)
+                self.assertTrue(match, 'Output of {} differs from the sequential fit'.format(sequential.name()))
+
 #--------------------------------Helper functions--------------------------------------
 
         def _create_sample_with_trailing_zero(self):
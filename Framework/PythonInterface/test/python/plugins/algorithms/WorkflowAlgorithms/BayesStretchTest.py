@@ -45,6 +45,24 @@ if platform.system() == "Windows":
             self._validate_shape(contour, fit_group)
             self._validate_value(contour, fit_group)
 
+        def test_run_with_multiple_processes(self):
+            """
+            Test BayesStretch with the spectra fitted in worker processes
+            """
+            fit_group, contour = BayesStretch(SampleWorkspace=self._sample_ws,
+                                              ResolutionWorkspace=self._res_ws,
+                                              NumberOfProcesses=2)
+            self._validate_shape(contour, fit_group)
+
+            # each spectrum is fitted on its own in both cases, so the results are the same
+            outputs = [CloneWorkspace(InputWorkspace=workspace, OutputWorkspace='__parallel_' + workspace.name())
+                       for workspace in (fit_group, contour)]
+            sequential_outputs = BayesStretch(SampleWorkspace=self._sample_ws,
+                                              ResolutionWorkspace=self._res_ws,
+                                              NumberOfProcesses=1)
+            for sequential, parallel in zip(sequential_outputs, outputs):
+                match, messages = CompareWorkspaces(Workspace1=sequential, Workspace2=parallel, Tolerance=1e-8)
+                self.assertTrue(match, 'Output of {} differs from the sequential fit'.format(sequential.name()))
 
 #-------------------------------- Failure cases ------------------------------------------
 
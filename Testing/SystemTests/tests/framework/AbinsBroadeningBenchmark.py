@@ -0,0 +1,52 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2020 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+import time
+
+import numpy as np
+import systemtesting
+from mantid.kernel import logger
+
+import abins
+from abins.instruments import broadening
+
+
+class AbinsBroadeningBenchmarkTOSCA(systemtesting.MantidSystemTest):
+    """
+    Compares the time taken to broaden many binned spectra for TOSCA one at a time (as Abins did for every atom,
+    quantum order and k-point) with a single batched call using cached kernels.
+    """
+    _num_spectra = 500
+
+    def runTest(self):
+        instrument = abins.instruments.get_instrument("TOSCA")
+        bins = np.arange(start=abins.parameters.sampling['min_wavenumber'],
+                         stop=abins.parameters.sampling['max_wavenumber'] + 1.0,
+                         step=1.0)
+        freq_points = (bins[1:] + bins[:-1]) / 2
+        sigma = instrument.get_sigma(freq_points)
+
+        np.random.seed(0)
+        s_hist = np.random.random((self._num_spectra, freq_points.size))
+
+        start = time.perf_counter()
+        per_call = np.array([broadening.broaden_spectrum(freq_points, bins, row, sigma, scheme='interpolate')[1]
+                             for row in s_hist])
+        per_call_time = time.perf_counter() - start
+
+        broadening.clear_kernel_cache()
+        start = time.perf_counter()
+        _, batched = instrument.convolve_histograms_with_resolution_function(
+            bins=bins, s_hist=s_hist, scheme='interpolate')
+        batched_time = time.perf_counter() - start
+
+        logger.notice("TOSCA broadening of {} spectra: {:.3f} s per call, {:.3f} s batched "
+                      "(including kernel construction)".format(self._num_spectra, per_call_time, batched_time))
+
+        self.assertTrue(np.allclose(per_call, batched))
+
+    def validate(self):
+        return True
@@ -0,0 +1,71 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+import time
+
+import numpy as np
+import systemtesting
+from mantid.kernel import logger
+
+import abins
+from abins.constants import FUNDAMENTALS, S_LAST_INDEX
+
+
+class RereadingSPowderCalculator(abins.SPowderSemiEmpiricalCalculator):
+    """
+    Calculator which re-reads the powder tensors and k-point weights from the HDF file for every k-point, as Abins did
+    before they were kept in memory.
+    """
+
+    def _prepare_data(self, k_point=None):
+        clerk = abins.IO(input_filename=self._input_filename,
+                         group_name=abins.parameters.hdf_groups['powder_data'])
+        self._powder_data = abins.PowderData.from_extracted(clerk.load(list_of_datasets=["powder_data"]
+                                                                       )["datasets"]["powder_data"])
+        clerk = abins.IO(input_filename=self._input_filename,
+                         group_name=abins.parameters.hdf_groups['ab_initio_data'])
+        self._weights = clerk.load(list_of_datasets=["frequencies", "weights"])["datasets"]["weights"]
+        super(RereadingSPowderCalculator, self)._prepare_data(k_point=k_point)
+
+
+class AbinsPowderDataBenchmark(systemtesting.MantidSystemTest):
+    """
+    Compares the time taken to calculate S for TOSCA from a phonon dispersion, with many k-points, when the powder
+    tensors are re-read from the HDF file for every k-point and when they are kept in memory.
+    """
+    _system_name = "Mapi"
+    _quantum_order_num = 2
+
+    def runTest(self):
+        filename = abins.test_helpers.find_file(filename=self._system_name + ".phonon")
+        abins_data = abins.AbinsData.from_calculation_data(filename, "CASTEP")
+        num_k = len(abins_data.get_kpoints_data())
+        calculator_args = dict(filename=filename, temperature=10, abins_data=abins_data,
+                               instrument=abins.instruments.get_instrument("TOSCA"),
+                               quantum_order_num=self._quantum_order_num)
+
+        times = []
+        results = []
+        for calculator_type in (RereadingSPowderCalculator, abins.SPowderSemiEmpiricalCalculator):
+            calculator = calculator_type(**calculator_args)
+            start = time.perf_counter()
+            results.append(calculator.calculate_data().extract())
+            times.append(time.perf_counter() - start)
+
+        logger.notice("S for {} with {} k-points: {:.3f} s re-reading tensors for each k-point, {:.3f} s with tensors "
+                      "in memory".format(self._system_name, num_k, times[0], times[1]))
+
+        reread, in_memory = results
+        for atom in range(len(abins_data.get_atoms_data())):
+            for order in range(FUNDAMENTALS, self._quantum_order_num + S_LAST_INDEX):
+                self.assertTrue(np.allclose(reread["atom_%s" % atom]["s"]["order_%s" % order],
+                                            in_memory["atom_%s" % atom]["s"]["order_%s" % order]))
+
+    def cleanup(self):
+        abins.test_helpers.remove_output_files(list_of_names=[self._system_name])
+
+    def validate(self):
+        return True
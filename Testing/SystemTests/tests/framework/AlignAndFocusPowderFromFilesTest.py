@@ -8,6 +8,7 @@
 import systemtesting
 from mantid.simpleapi import *
 from mantid.api import WorkspaceFactory
+from mantid.utils import reductioncache
 import numpy as np
 import os
 import time
@@ -112,10 +113,33 @@ class ChunkingCompare(systemtesting.MantidSystemTest):
         return ('with_chunks', 'no_chunks')
 
 
+class PipelinedCompare(systemtesting.MantidSystemTest):
+    def requiredMemoryMB(self):
+        return 24*1024  # GiB
+
+    def runTest(self):
+        # 11MB file
+        kwargs = {'Filename':'SNAP_45874',
+                  'Params':(.5,-.004,7),
+                  'MaxChunkSize':.01}
+
+        # load the next chunks in the background while focusing
+        AlignAndFocusPowderFromFiles(OutputWorkspace='pipelined', MaxChunksInFlight=3, **kwargs)
+        # load and focus one chunk at a time
+        AlignAndFocusPowderFromFiles(OutputWorkspace='sequential', MaxChunksInFlight=1, **kwargs)
+
+    def validateMethod(self):
+        return "ValidateWorkspaceToWorkspace"
+
+    def validate(self):
+        return ('pipelined', 'sequential')
+
+
 class UseCache(systemtesting.MantidSystemTest):
     cal_file  = "PG3_FERNS_d4832_2011_08_24.cal"
     char_file = "PG3_characterization_2012_02_23-HR-ILL.txt"
     data_file = 'PG3_9829_event.nxs'
+    max_chunks_in_flight = 1
 
     def cleanup(self):
         return do_cleanup(self.cacheDir)
@@ -147,7 +171,7 @@ class UseCache(systemtesting.MantidSystemTest):
         for name in (self.wksp_make, self.wksp_use):
             time_start = time.time()
             AlignAndFocusPowderFromFiles(Filename=self.data_file, OutputWorkspace=name,
-                                         CacheDir=self.cacheDir,
+                                         CacheDir=self.cacheDir, MaxChunksInFlight=self.max_chunks_in_flight,
                                          GroupingWorkspace='PG3_group', CalibrationWorkspace='PG3_cal',
                                          MaskWorkspace='PG3_mask',
                                          Params=-.0002, CompressTolerance=0.01,
@@ -161,6 +185,10 @@ class UseCache(systemtesting.MantidSystemTest):
         self.assertLessThan(duration[self.wksp_use], duration[self.wksp_make],
                             'Should have been faster with cache {} > {}'.format(duration[self.wksp_use], duration[self.wksp_make]))
 
+        # the first pass missed the cache and the second found it
+        statistics = reductioncache.ReductionCache(self.cacheDir).statistics()[reductioncache.TIER_FOCUSED]
+        self.assertEqual((statistics.hits, statistics.misses), (1, 1))
+
     def validateMethod(self):
         self.tolerance = 1.0e-2
         return "ValidateWorkspaceToWorkspace"
@@ -169,6 +197,11 @@ class UseCache(systemtesting.MantidSystemTest):
         return (self.wksp_make, self.wksp_use)
 
 
+class PipelinedUseCache(UseCache):
+    """UseCache with the chunks loaded in the background, which plans the use of the cache up front"""
+    max_chunks_in_flight = 3
+
+
 class DifferentGrouping(systemtesting.MantidSystemTest):
     cal_file  = "PG3_FERNS_d4832_2011_08_24.cal"
     char_file = "PG3_characterization_2012_02_23-HR-ILL.txt"
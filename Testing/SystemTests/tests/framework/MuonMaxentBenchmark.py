@@ -0,0 +1,87 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+import time
+
+import numpy as np
+import systemtesting
+from mantid.kernel import logger
+from mantid.simpleapi import Load, MuonMaxent
+
+from Muon.MaxentTools.fftworkspace import FFTWorkspace
+from Muon.MaxentTools.opus import OPUS
+from Muon.MaxentTools.tropus import TROPUS
+
+
+class MuonMaxentKernelBenchmark(systemtesting.MantidSystemTest):
+    """
+    Compares the transforms of one MaxEnt iteration done one search direction at a time with freshly allocated
+    buffers (as MAXENT used to) with the batched transforms on a preallocated FFTWorkspace, for 2**16 point spectra.
+    """
+    _npts = 2**16
+    _ngroups = 64
+    _iterations = 5
+
+    def runTest(self):
+        savetime_i2 = 2 * self._npts
+        maxpage_n = self._npts // 4
+        np.random.seed(0)
+        convol = np.random.random(maxpage_n) + 1.j * np.random.random(maxpage_n)
+        detect_a = np.random.random(self._ngroups)
+        detect_b = np.random.random(self._ngroups)
+        detect_e = np.exp(-np.arange(self._npts) / 2000.)
+        xi = np.random.random((maxpage_n, 3))
+        weights = np.random.random((self._npts, self._ngroups))
+
+        start = time.perf_counter()
+        for _ in range(self._iterations):
+            eta_per_direction = np.stack([OPUS(xi[:, k], savetime_i2, convol, detect_a, detect_b, detect_e)
+                                          for k in range(3)], axis=2)
+            grad_per_direction = TROPUS(eta_per_direction[:, :, 1] * weights, savetime_i2, convol, detect_a,
+                                        detect_b, detect_e)
+        per_direction_time = time.perf_counter() - start
+
+        fft_workspace = FFTWorkspace(savetime_i2)
+        start = time.perf_counter()
+        for _ in range(self._iterations):
+            eta_batched = np.empty((self._npts, self._ngroups, 3))
+            eta_batched[:, :, :2] = OPUS(xi[:, :2], savetime_i2, convol, detect_a, detect_b, detect_e, fft_workspace)
+            eta_batched[:, :, 2] = OPUS(xi[:, 2], savetime_i2, convol, detect_a, detect_b, detect_e, fft_workspace)
+            grad_batched = TROPUS(eta_batched[:, :, 1] * weights, savetime_i2, convol, detect_a, detect_b, detect_e,
+                                  fft_workspace)
+        batched_time = time.perf_counter() - start
+
+        logger.notice("MaxEnt transforms for {} points and {} groups: {:.3f} iterations/s one direction at a time, "
+                      "{:.3f} iterations/s batched".format(self._npts, self._ngroups,
+                                                           self._iterations / per_direction_time,
+                                                           self._iterations / batched_time))
+
+        self.assertTrue(np.allclose(eta_per_direction, eta_batched))
+        self.assertTrue(np.allclose(grad_per_direction, grad_batched))
+
+    def validate(self):
+        return True
+
+
+class MuonMaxentThroughputBenchmark(systemtesting.MantidSystemTest):
+    """
+    Reports the number of runs per second which MuonMaxent processes for 2**16 point spectra.
+    """
+    _runs = 3
+
+    def runTest(self):
+        Load(Filename='MUSR00022725.nxs', OutputWorkspace='MUSR00022725')
+
+        start = time.perf_counter()
+        for _ in range(self._runs):
+            MuonMaxent(InputWorkspace='MUSR00022725', Npts=2**16, FitDeadTime=False, OuterIterations=2,
+                       InnerIterations=5, OutputWorkspace='freq')
+        elapsed = time.perf_counter() - start
+
+        logger.notice("MuonMaxent with 2**16 points: {:.3f} runs/s".format(self._runs / elapsed))
+
+    def validate(self):
+        return True
@@ -0,0 +1,76 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+import time
+
+import systemtesting
+from mantid.kernel import logger
+from mantid.simpleapi import (CompareWorkspaces, ConvertUnits, CylinderPaalmanPingsCorrection,
+                              FlatPlatePaalmanPingsCorrection, Load, mtd)
+
+
+class PaalmanPingsBenchmarkMixin(object):
+    """
+    Times the Paalman & Pings corrections for every detector angle of an indirect geometry instrument,
+    with the cylinder integration run in one process and shared between several, and checks that the
+    results do not depend on the number of processes.
+    """
+    _instrument = None
+    _filename = None
+    _efixed = None
+    _number_of_processes = 4
+
+    def runTest(self):
+        Load(Filename=self._filename, OutputWorkspace='sample')
+        ConvertUnits(InputWorkspace='sample', OutputWorkspace='sample', Target='Wavelength', EMode='Indirect',
+                     EFixed=self._efixed)
+        number_angles = mtd['sample'].getNumberHistograms()
+
+        cylinder_args = dict(SampleWorkspace='sample', SampleChemicalFormula='H2-O', SampleDensity=1.0,
+                             SampleInnerRadius=0.05, SampleOuterRadius=0.1, CanWorkspace='sample',
+                             CanChemicalFormula='V', CanDensity=6.0, CanOuterRadius=0.15, StepSize=0.002,
+                             NumberWavelengths=50, Emode='Indirect', Efixed=self._efixed, Interpolate=False)
+        times = []
+        for (number_of_processes, output) in [(1, 'serial'), (self._number_of_processes, 'parallel')]:
+            start = time.perf_counter()
+            CylinderPaalmanPingsCorrection(OutputWorkspace=output, NumberOfProcesses=number_of_processes,
+                                           **cylinder_args)
+            times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        FlatPlatePaalmanPingsCorrection(SampleWorkspace='sample', SampleChemicalFormula='H2-O', SampleDensity=1.0,
+                                        SampleThickness=0.1, SampleAngle=0.0, CanWorkspace='sample',
+                                        CanChemicalFormula='V', CanDensity=6.0, CanFrontThickness=0.02,
+                                        CanBackThickness=0.02, NumberWavelengths=50, Emode='Indirect',
+                                        Efixed=self._efixed, Interpolate=False, OutputWorkspace='flat_plate')
+        flat_plate_time = time.perf_counter() - start
+
+        logger.notice("{} Paalman & Pings corrections for {} angles: cylinder {:.3f} s in 1 process, {:.3f} s in {} "
+                      "processes, flat plate {:.3f} s".format(self._instrument, number_angles, times[0], times[1],
+                                                              self._number_of_processes, flat_plate_time))
+
+        for suffix in ['_ass', '_assc', '_acsc', '_acc']:
+            result = CompareWorkspaces(Workspace1='serial' + suffix, Workspace2='parallel' + suffix, Tolerance=1e-12,
+                                       CheckInstrument=False)
+            self.assertTrue(result[0], 'Mismatch in ' + suffix)
+
+    def cleanup(self):
+        mtd.clear()
+
+    def validate(self):
+        return True
+
+
+class PaalmanPingsBenchmarkIRIS(PaalmanPingsBenchmarkMixin, systemtesting.MantidSystemTest):
+    _instrument = 'IRIS'
+    _filename = 'irs26176_graphite002_red.nxs'
+    _efixed = 1.845
+
+
+class PaalmanPingsBenchmarkOSIRIS(PaalmanPingsBenchmarkMixin, systemtesting.MantidSystemTest):
+    _instrument = 'OSIRIS'
+    _filename = 'osi97935_graphite002_red.nxs'
+    _efixed = 1.8463
@@ -392,6 +392,23 @@ class SpectraBySpectraForwardSpectraNoBackground(systemtesting.MantidSystemTest)
 # ====================================================================================
 
 
+class SpectraBySpectraForwardSpectraInParallel(SpectraBySpectraForwardSpectraNoBackground):
+    """
+    Fits the spectra on separate threads, which should give the results of fitting them one after another
+    """
+
+    def runTest(self):
+        flags = _create_test_flags(background=False)
+        flags['fit_mode'] = 'spectra'
+        flags['spectra'] = '143-144'
+        flags['fit_threads'] = 2
+        runs = "15039-15045"
+        self._fit_results = fit_tof(runs, flags)
+
+
+# ====================================================================================
+
+
 class PassPreLoadedWorkspaceToFitTOF(systemtesting.MantidSystemTest):
     _fit_results = None
 
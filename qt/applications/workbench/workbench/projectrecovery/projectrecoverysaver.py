@@ -9,11 +9,14 @@
 
 import datetime
 import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from threading import Timer
 
 from mantid.api import AnalysisDataService as ADS, WorkspaceGroup, AlgorithmManager
-from mantid.kernel import logger, UsageService
+from mantid.kernel import ConfigService, logger, UsageService
 from mantidqt.project.projectsaver import ProjectSaver
+from mantidqt.project.workspacechangetracker import WorkspaceChangeTracker
 from workbench.utils.windowfinder import find_all_windows_that_are_savable
 
 
@@ -47,6 +50,7 @@ class ProjectRecoverySaver(object):
         self.pr = project_recovery
         self.gfm = global_figure_manager
         self._timer_thread = Timer(self.pr.time_between_saves, self.recovery_save)
+        self._change_tracker = WorkspaceChangeTracker()
 
     def recovery_save(self):
         """
@@ -107,7 +111,8 @@ class ProjectRecoverySaver(object):
 
     def _save_workspaces(self, directory):
         """
-        Save all workspaces present in the ADS to the given directory
+        Save all workspaces present in the ADS to the given directory. The scripts of workspaces which have not changed
+        since the last checkpoint are copied from it, the others are generated concurrently on a thread pool.
         :param directory: String; Path to where to save the workspaces
         """
         # Get all present workspaces
@@ -118,28 +123,75 @@ class ProjectRecoverySaver(object):
 
         start_time = UsageService.getStartTime().toISO8601String()
 
+        futures = []
+        with ThreadPoolExecutor(max_workers=self._number_of_save_threads()) as executor:
+            for index, ws_name in enumerate(ws_list):
+                try:
+                    ws = ADS.retrieve(ws_name)
+                except KeyError:
+                    # The workspace was removed since the list was made
+                    continue
+                if self._empty_group_workspace(ws):
+                    continue
+
+                filename = str(index) + ".py"
+                filename = os.path.join(directory, filename)
+
+                if not self._change_tracker.is_changed(ws_name, ws) and \
+                        self._copy_previous_script(ws_name, ws, filename):
+                    continue
+                futures.append(executor.submit(self._generate_script, ws_name, ws, filename, start_time))
+
+        for future in futures:
+            future.result()
+
+    @staticmethod
+    def _number_of_save_threads():
+        """
+        :return: Int; The number of threads to save workspaces with
+        """
+        max_cores = ConfigService.getString("MultiThreaded.MaxCores")
+        return int(max_cores) if max_cores and int(max_cores) > 0 else os.cpu_count()
+
+    def _copy_previous_script(self, ws_name, ws, filename):
+        """
+        Copy the script of a workspace from the checkpoint it was last saved to
+        :param ws_name: String; The name of the workspace
+        :param ws: Workspace; The workspace
+        :param filename: String; The file to copy the script to
+        :return: True if the script was copied
+        """
+        try:
+            shutil.copyfile(self._change_tracker.saved_file_name(ws_name), filename)
+        except (IOError, OSError, TypeError):
+            return False
+        self._change_tracker.mark_saved(ws_name, ws, filename)
+        return True
+
+    def _generate_script(self, ws_name, ws, filename, start_time):
+        """
+        Generate the script which recreates a workspace from its history
+        :param ws_name: String; The name of the workspace
+        :param ws: Workspace; The workspace
+        :param filename: String; The file to save the script to
+        :param start_time: String; ISO8601 time from which on the history of the workspace is saved
+        """
         alg_name = "GeneratePythonScript"
         alg = AlgorithmManager.createUnmanaged(alg_name, 1)
         alg.setChild(True)
         alg.setLogging(False)
 
-        for index, ws in enumerate(ws_list):
-            if self._empty_group_workspace(ws):
-                continue
-
-            filename = str(index) + ".py"
-            filename = os.path.join(directory, filename)
-
-            alg.initialize()
-            alg.setProperty("AppendTimestamp", True)
-            alg.setProperty("AppendExecCount", True)
-            alg.setProperty("InputWorkspace", ws)
-            alg.setPropertyValue("Filename", filename)
-            alg.setPropertyValue("StartTimestamp", start_time)
-            alg.setProperty("IgnoreTheseAlgs", ALGS_TO_IGNORE)
-            alg.setProperty("IgnoreTheseAlgProperties", ALG_PROPERTIES_TO_IGNORE)
-
-            alg.execute()
+        alg.initialize()
+        alg.setProperty("AppendTimestamp", True)
+        alg.setProperty("AppendExecCount", True)
+        alg.setProperty("InputWorkspace", ws)
+        alg.setPropertyValue("Filename", filename)
+        alg.setPropertyValue("StartTimestamp", start_time)
+        alg.setProperty("IgnoreTheseAlgs", ALGS_TO_IGNORE)
+        alg.setProperty("IgnoreTheseAlgProperties", ALG_PROPERTIES_TO_IGNORE)
+
+        alg.execute()
+        self._change_tracker.mark_saved(ws_name, ws, filename)
 
     @staticmethod
     def _empty_group_workspace(ws):
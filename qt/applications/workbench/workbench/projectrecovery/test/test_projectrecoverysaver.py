@@ -121,6 +121,21 @@ class ProjectRecoverySaverTest(unittest.TestCase):
         self.assertTrue(os.path.exists(os.path.join(self.working_directory, "0.py")))
         self.assertTrue(os.path.exists(os.path.join(self.working_directory, "1.py")))
 
+    def test_save_workspaces_copies_scripts_of_unchanged_workspaces(self):
+        CreateSampleWorkspace(OutputWorkspace="ws1")
+        CreateSampleWorkspace(OutputWorkspace="ws2")
+        self.pr_saver._save_workspaces(self.working_directory)
+        CreateSampleWorkspace(OutputWorkspace="ws2")
+        next_checkpoint = os.path.join(self.working_directory, "next")
+        os.makedirs(next_checkpoint)
+
+        with mock.patch.object(self.pr_saver, '_generate_script', wraps=self.pr_saver._generate_script) as generate:
+            self.pr_saver._save_workspaces(next_checkpoint)
+
+        generate.assert_called_once_with("ws2", mock.ANY, os.path.join(next_checkpoint, "1.py"), mock.ANY)
+        self.assertTrue(os.path.exists(os.path.join(next_checkpoint, "0.py")))
+        self.assertTrue(os.path.exists(os.path.join(next_checkpoint, "1.py")))
+
     def test_save_project(self):
         self.pr_saver.gfm = mock.MagicMock()
         self.pr_saver.gfm.figs = {}
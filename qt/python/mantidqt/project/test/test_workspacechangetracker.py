@@ -0,0 +1,83 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+#  This file is part of the mantidqt package
+#
+import os
+import tempfile
+import unittest
+
+from mantid.api import AnalysisDataService as ADS
+from mantid.simpleapi import CreateSampleWorkspace, RenameWorkspace, Scale
+from mantidqt.project.workspacechangetracker import WorkspaceChangeTracker
+
+
+class WorkspaceChangeTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.tracker = WorkspaceChangeTracker()
+        file_handle, self.file_name = tempfile.mkstemp(suffix=".nxs")
+        os.close(file_handle)
+
+    def tearDown(self):
+        self.tracker.unsubscribe()
+        ADS.clear()
+        if os.path.exists(self.file_name):
+            os.remove(self.file_name)
+
+    def _saved_workspace(self, name="ws"):
+        ws = CreateSampleWorkspace(OutputWorkspace=name)
+        self.tracker.mark_saved(name, ws, self.file_name)
+        return ws
+
+    def test_workspace_that_was_never_saved_is_changed(self):
+        ws = CreateSampleWorkspace(OutputWorkspace="ws")
+
+        self.assertTrue(self.tracker.is_changed("ws", ws))
+
+    def test_workspace_is_unchanged_after_it_is_saved(self):
+        ws = self._saved_workspace()
+
+        self.assertFalse(self.tracker.is_changed("ws", ws))
+        self.assertFalse(self.tracker.is_changed("ws", ws, self.file_name))
+        self.assertEqual(self.tracker.saved_file_name("ws"), self.file_name)
+
+    def test_workspace_is_changed_when_saved_to_another_file(self):
+        ws = self._saved_workspace()
+
+        self.assertTrue(self.tracker.is_changed("ws", ws, self.file_name + ".other"))
+
+    def test_workspace_is_changed_when_it_is_replaced_in_the_ADS(self):
+        self._saved_workspace()
+
+        ws = Scale(InputWorkspace="ws", OutputWorkspace="ws", Factor=2.0)
+
+        self.assertTrue(self.tracker.is_changed("ws", ws))
+
+    def test_workspace_is_changed_when_its_history_grows(self):
+        self._saved_workspace()
+        self.tracker.observeReplace(False)
+
+        Scale(InputWorkspace="ws", OutputWorkspace="ws", Factor=2.0)
+
+        self.assertTrue(self.tracker.is_changed("ws", ADS.retrieve("ws")))
+
+    def test_workspace_is_changed_when_its_file_is_removed(self):
+        ws = self._saved_workspace()
+
+        os.remove(self.file_name)
+
+        self.assertTrue(self.tracker.is_changed("ws", ws))
+
+    def test_renamed_workspace_is_changed(self):
+        self._saved_workspace()
+
+        ws = RenameWorkspace(InputWorkspace="ws", OutputWorkspace="renamed")
+
+        self.assertTrue(self.tracker.is_changed("renamed", ws))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,8 +18,8 @@ from mantid.api import AnalysisDataService as ADS, IMDEventWorkspace  # noqa
 from mantid.dataobjects import MDHistoWorkspace, MaskWorkspace  # noqa
 from mantidqt.project import workspacesaver
 from unittest import mock
-from mantid.simpleapi import (CreateSampleWorkspace, CreateMDHistoWorkspace, LoadMD, LoadMask, MaskDetectors,  # noqa
-                              ExtractMask, GroupWorkspaces)  # noqa
+from mantid.simpleapi import (CreateSampleWorkspace, CreateMDHistoWorkspace, Load, LoadMD, LoadMask,  # noqa
+                              MaskDetectors, ExtractMask, GroupWorkspaces)  # noqa
 
 
 class WorkspaceSaverTest(unittest.TestCase):
@@ -91,6 +91,29 @@ class WorkspaceSaverTest(unittest.TestCase):
         logger.warning.assert_called_with(u'Couldn\'t save workspace in project: "group2" because SaveNexusProcessed: '
                                           u'NeXus files do not support nested groups of groups')
 
+    def test_workspace_edited_in_place_is_saved_again(self):
+        ws = CreateSampleWorkspace(OutputWorkspace="ws1")
+        workspacesaver.WorkspaceSaver(self.working_directory).save_workspaces(["ws1"])
+
+        # In place edits raise no ADS notifications and add no history
+        ws.dataY(0)[:] = 42.0
+        workspacesaver.WorkspaceSaver(self.working_directory).save_workspaces(["ws1"])
+
+        saved = Load(Filename=self.working_directory + '/ws1.nxs', OutputWorkspace="saved")
+        self.assertTrue((saved.readY(0) == 42.0).all())
+
+    @mock.patch("mantid.simpleapi.SaveNexusProcessed")
+    def test_replaced_workspace_is_saved_again(self, save_nexus_processed):
+        CreateSampleWorkspace(OutputWorkspace="ws1")
+        ws_saver = workspacesaver.WorkspaceSaver(self.working_directory)
+        ws_saver.save_workspaces(["ws1"])
+        open(self.working_directory + '/ws1.nxs', 'a').close()
+
+        CreateSampleWorkspace(OutputWorkspace="ws1")
+        workspacesaver.WorkspaceSaver(self.working_directory).save_workspaces(["ws1"])
+
+        self.assertEqual(save_nexus_processed.call_count, 2)
+
     def _load_MDWorkspace_and_test_it(self, save_name):
         filename = self.working_directory + '/' + save_name + ".nxs"
         ws = LoadMD(Filename=filename)
@@ -0,0 +1,117 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+#  This file is part of the mantidqt package
+#
+import os.path
+from threading import Lock
+
+from mantid.api import AnalysisDataServiceObserver, WorkspaceGroup
+
+
+class WorkspaceChangeTracker(AnalysisDataServiceObserver):
+    def __init__(self):
+        """
+        Records the file each workspace was last saved to, and the length of its history at that time, such that
+        workspaces which have not changed since do not need to be saved again. A workspace is changed when it is
+        added, replaced, renamed or regrouped in the ADS, or when its history has grown. Edits made in place, e.g.
+        with setY, are not seen, so this is only used for project recovery and never when a project is saved.
+        """
+        super(WorkspaceChangeTracker, self).__init__()
+        self._lock = Lock()
+        self._changed = set()
+        self._saved = {}
+
+        self.observeAdd(True)
+        self.observeReplace(True)
+        self.observeDelete(True)
+        self.observeRename(True)
+        self.observeClear(True)
+        self.observeGroup(True)
+        self.observeUnGroup(True)
+        self.observeGroupUpdate(True)
+
+    def unsubscribe(self):
+        self.observeAll(False)
+
+    def is_changed(self, workspace_name, workspace, file_name=None):
+        """
+        Check if a workspace has to be saved
+        :param workspace_name: String; The name of the workspace in the ADS
+        :param workspace: Workspace; The workspace
+        :param file_name: String; If given, the workspace also has to be saved if it was last saved to another file
+        :return: True if the workspace has changed since it was last saved, or the file it was saved to is gone
+        """
+        with self._lock:
+            if workspace_name in self._changed or workspace_name not in self._saved:
+                return True
+            history_length, saved_file_name = self._saved[workspace_name]
+        if file_name is not None and file_name != saved_file_name:
+            return True
+        return history_length is None or history_length != self._history_length(workspace) or \
+            not os.path.exists(saved_file_name)
+
+    def saved_file_name(self, workspace_name):
+        """
+        :param workspace_name: String; The name of the workspace in the ADS
+        :return: String; The file the workspace was last saved to, or None
+        """
+        with self._lock:
+            return self._saved[workspace_name][1] if workspace_name in self._saved else None
+
+    def mark_saved(self, workspace_name, workspace, file_name):
+        """
+        Record that a workspace has been saved, after which it is unchanged until the ADS notifies a change
+        :param workspace_name: String; The name of the workspace in the ADS
+        :param workspace: Workspace; The workspace that was saved
+        :param file_name: String; The file the workspace was saved to
+        """
+        history_length = self._history_length(workspace)
+        with self._lock:
+            self._changed.discard(workspace_name)
+            self._saved[workspace_name] = (history_length, file_name)
+
+    @staticmethod
+    def _history_length(workspace):
+        try:
+            if isinstance(workspace, WorkspaceGroup):
+                return tuple((name, workspace.getItem(index).getHistory().size())
+                             for index, name in enumerate(workspace.getNames()))
+            return workspace.getHistory().size()
+        except (AttributeError, RuntimeError):
+            return None
+
+    def _mark_changed(self, *workspace_names):
+        with self._lock:
+            self._changed.update(workspace_names)
+
+    def addHandle(self, workspace_name, workspace):
+        self._mark_changed(workspace_name)
+
+    def replaceHandle(self, workspace_name, workspace):
+        self._mark_changed(workspace_name)
+
+    def deleteHandle(self, workspace_name, workspace):
+        with self._lock:
+            self._changed.discard(workspace_name)
+            self._saved.pop(workspace_name, None)
+
+    def renameHandle(self, old_name, new_name):
+        self._mark_changed(old_name, new_name)
+
+    def clearHandle(self):
+        with self._lock:
+            self._changed.clear()
+            self._saved.clear()
+
+    def groupHandle(self, workspace_name, workspace):
+        self._mark_changed(workspace_name)
+
+    def unGroupHandle(self, workspace_name, workspace):
+        self._mark_changed(workspace_name)
+
+    def groupUpdateHandle(self, workspace_name, workspace):
+        self._mark_changed(workspace_name)
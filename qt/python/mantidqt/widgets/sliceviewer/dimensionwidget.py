@@ -123,6 +123,22 @@ class DimensionWidget(QWidget):
             (d.spinbox.minimum(), d.spinbox.maximum()) for d in self.dims
         ]
 
+    def get_neighbouring_slicepoints(self):
+        """
+        :return: A list of the slicepoints one bin either side of the current slicepoint along each
+        slice dimension, in the same form as returned from get_slicepoint
+        """
+        slicepoint = self.get_slicepoint()
+        neighbours = []
+        for index, d in enumerate(self.dims):
+            if d.get_state() != State.NONE:
+                continue
+            for value in d.get_neighbouring_values():
+                neighbour = list(slicepoint)
+                neighbour[index] = value
+                neighbours.append(neighbour)
+        return neighbours
+
     def get_bin_params(self):
         try:
             return [
@@ -273,6 +289,13 @@ class Dimension(QWidget):
     def get_bin_center(self, n):
         return (n + 0.5) * self.width + self.minimum
 
+    def get_neighbouring_values(self):
+        """
+        :return: A list of the centres of the bins after and before the bin of the current value
+        """
+        current = self.slider.value()
+        return [self.get_bin_center(n) for n in (current + 1, current - 1) if 0 <= n < self.nbins]
+
     def update_slider(self):
         i = (self.value - self.minimum) / self.width
         self.slider.setValue(int(min(max(i, 0), self.nbins - 1)))
@@ -15,6 +15,7 @@ from mantid.simpleapi import BinMD, IntegrateMDHistoWorkspace, TransposeMD
 import numpy as np
 
 from .roi import extract_cuts_matrix, extract_roi_matrix
+from .slicecache import SliceCache
 from .sliceinfo import SliceInfo
 from .transform import NonOrthogonalTransform
 
@@ -61,9 +62,11 @@ class SliceViewerModel:
         if ws_type == WS_TYPE.MDE:
             self.get_ws = self.get_ws_MDE
             self.get_data = self.get_data_MDE
+            self._slice_cache = SliceCache(self._bin_slice)
         else:
             self.get_ws = self._get_ws
             self.get_data = self.get_data_MDH
+            self._slice_cache = None
 
         if self.get_ws_type() == WS_TYPE.MDE:
             self.export_roi_to_workspace = self.export_roi_to_workspace_mdevent
@@ -154,9 +157,15 @@ class SliceViewerModel:
                        not provided the full extent of each dimension is used
         """
         workspace = self._get_ws()
+        cache_limits = self._snap_to_slice_cache(workspace, slicepoint, bin_params, limits)
+        if cache_limits is not None:
+            limits = cache_limits
         params, _, __ = _roi_binmd_parameters(workspace, slicepoint, bin_params, limits)
         params['EnableLogging'] = LOG_GET_WS_MDE_ALGORITHM_CALLS
-        return BinMD(InputWorkspace=workspace, OutputWorkspace=self._rebinned_name, **params)
+        binned = BinMD(InputWorkspace=workspace, OutputWorkspace=self._rebinned_name, **params)
+        if cache_limits is not None:
+            self._slice_cache.seed(slicepoint, bin_params, cache_limits, binned.getSignalArray())
+        return binned
 
     def get_data_MDH(self, slicepoint, transpose=False):
         indices, _ = get_indices(self.get_ws(), slicepoint=slicepoint)
@@ -175,12 +184,35 @@ class SliceViewerModel:
                        should be provided in the order of the workspace not the display
         :param transpose: If true then transpose the data before returning
         """
+        signal = None
+        cache_limits = self._snap_to_slice_cache(self._get_ws(), slicepoint, bin_params, limits)
+        if cache_limits is not None:
+            signal = self._slice_cache.get(slicepoint, bin_params, cache_limits)
+        if signal is None:
+            signal = self.get_ws_MDE(slicepoint, bin_params, limits).getSignalArray()
         if transpose:
-            return np.ma.masked_invalid(
-                self.get_ws_MDE(slicepoint, bin_params, limits).getSignalArray().squeeze()).T
+            return np.ma.masked_invalid(signal.squeeze()).T
         else:
-            return np.ma.masked_invalid(
-                self.get_ws_MDE(slicepoint, bin_params, limits).getSignalArray().squeeze())
+            return np.ma.masked_invalid(signal.squeeze())
+
+    def prefetch_data_MDE(self, slicepoints, bin_params, limits=None):
+        """
+        Bin slices of an MDEventWorkspace on a background thread, such that get_data_MDE returns
+        them from the slice cache when they are requested. Slices still waiting from a previous call
+        are dropped.
+        :param slicepoints: A list of ND sequences of either None or float, one for each slice
+        :param bin_params: ND sequence containing the number of bins for each dimension
+        :param limits: An optional ND sequence containing limits for plotting dimensions, as for get_data_MDE
+        """
+        if self._slice_cache is None:
+            return
+        workspace = self._get_ws()
+        views = []
+        for slicepoint in slicepoints:
+            cache_limits = self._snap_to_slice_cache(workspace, slicepoint, bin_params, limits)
+            if cache_limits is not None:
+                views.append((slicepoint, bin_params, cache_limits))
+        self._slice_cache.prefetch(views)
 
     def get_dim_limits(self, slicepoint, transpose):
         """
@@ -493,6 +525,36 @@ class SliceViewerModel:
         return str(self._get_ws()) == ws_name
 
     # private api
+    def _snap_to_slice_cache(self, workspace, slicepoint, bin_params, limits):
+        """
+        Return the limits of the display dimensions moved onto the bins of the slice cache
+        or None if the view can not be cached
+        :param workspace: MDEventWorkspace that is to be binned
+        :param slicepoint: ND sequence of either None or float. A float defines the point
+                           in that dimension for the slice.
+        :param bin_params: ND sequence containing the number of bins for each dimension or None
+        :param limits: An optional 2-tuple sequence containing limits for plotting dimensions
+        """
+        if self._slice_cache is None or bin_params is None:
+            return None
+        xindex, yindex = _display_indices(slicepoint)
+        dim_limits = _dimension_limits(workspace, slicepoint, limits)
+        display_limits = dim_limits[xindex], dim_limits[yindex]
+        if any(dim_max - dim_min < MIN_WIDTH for dim_min, dim_max in display_limits):
+            return None
+        return self._slice_cache.snap_limits(slicepoint, bin_params, display_limits)
+
+    def _bin_slice(self, slicepoint, bin_params, limits):
+        """
+        Bin a region of a slice without storing the result in the ADS. Used by the slice cache.
+        :return: The signal as a 2D array indexed by the bins of the display dimensions
+        """
+        workspace = self._get_ws()
+        params, xindex, yindex = _roi_binmd_parameters(workspace, slicepoint, bin_params, limits)
+        params['EnableLogging'] = LOG_GET_WS_MDE_ALGORITHM_CALLS
+        binned = BinMD(InputWorkspace=workspace, StoreInADS=False, **params)
+        return np.array(binned.getSignalArray()).reshape(bin_params[xindex], bin_params[yindex])
+
     def _get_ws(self):
         return self._ws
 
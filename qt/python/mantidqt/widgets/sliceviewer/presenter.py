@@ -107,11 +107,13 @@ class SliceViewer(ObservingPresenter):
             else:
                 limits = xlim, ylim
 
+        bin_params = data_view.dimensions.get_bin_params()
         data_view.plot_MDH(
             self.model.get_ws_MDE(slicepoint=self.get_slicepoint(),
-                                  bin_params=data_view.dimensions.get_bin_params(),
+                                  bin_params=bin_params,
                                   limits=limits))
         self._call_peaks_presenter_if_created("notify", PeaksViewerPresenter.Event.OverlayPeaks)
+        self._prefetch_neighbouring_slices(bin_params, data_view.get_axes_limits())
 
     def new_plot_matrix(self):
         """Tell the view to display a new plot of an MatrixWorkspace"""
@@ -130,11 +132,14 @@ class SliceViewer(ObservingPresenter):
         Update the view to display an updated MDEventWorkspace slice/cut
         """
         data_view = self.view.data_view
+        bin_params = data_view.dimensions.get_bin_params()
+        limits = data_view.get_axes_limits()
         data_view.update_plot_data(
             self.model.get_data(self.get_slicepoint(),
-                                bin_params=data_view.dimensions.get_bin_params(),
-                                limits=data_view.get_axes_limits(),
+                                bin_params=bin_params,
+                                limits=limits,
                                 transpose=self.view.data_view.dimensions.transpose))
+        self._prefetch_neighbouring_slices(bin_params, limits)
 
     def update_plot_data_matrix(self):
         # should never be called, since this workspace type is only 2D the plot dimensions never change
@@ -425,6 +430,17 @@ class SliceViewer(ObservingPresenter):
         if self._peaks_presenter is not None:
             getattr(self._peaks_presenter, attr)(*args, **kwargs)
 
+    def _prefetch_neighbouring_slices(self, bin_params, limits):
+        """
+        Ask the model to bin the slices either side of the current slice in the background,
+        such that stepping through the slices does not wait for them to be binned
+        :param bin_params: The binning parameters of the current slice
+        :param limits: The limits of the current view as passed to get_data
+        """
+        self.model.prefetch_data_MDE(self.view.data_view.dimensions.get_neighbouring_slicepoints(),
+                                     bin_params=bin_params,
+                                     limits=limits)
+
     def _show_status_message(self, message: str):
         """
         Show a temporary message in the status of the view
@@ -0,0 +1,390 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+#  This file is part of the mantid workbench.
+#
+from collections import OrderedDict
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Constants
+# default limit on the memory used by the cached tiles in bytes
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+# the view, which anchors a lattice of bins, is split into this many tiles along each display dimension
+TILES_PER_VIEW = 4
+# tolerance, as a fraction of a bin, for limits to be considered on the lattice of bins
+LATTICE_TOLERANCE = 1e-6
+
+
+class SliceCache:
+    """
+    Cache of the 2D slices binned from an MDEventWorkspace, kept in tiles of bins.
+
+    The bins of all views with the same display dimensions and bin widths lie on a common lattice, which
+    is anchored at the first of these views. A tile is keyed by its lattice, the position and thickness of
+    the slice in the integrated dimensions and its index on the lattice, such that the tiles binned for one
+    view are reused by any overlapping view of the same slice, e.g. while panning. The least recently used
+    tiles are removed when the tiles exceed the memory budget. Slices can be binned ahead of time on a
+    background thread with prefetch.
+    """
+
+    def __init__(self, bin_region: Callable, memory_budget: int = DEFAULT_MEMORY_BUDGET):
+        """
+        :param bin_region: Callable bin_region(slicepoint, bin_params, limits), which bins the region within
+                           the limits of the display dimensions. It returns the signal as a 2D array indexed
+                           by the (x, y) bin. It is called from the background thread too.
+        :param memory_budget: The maximum number of bytes used by the cached tiles
+        """
+        self._bin_region = bin_region
+        self._memory_budget = memory_budget
+        self._lock = threading.Lock()
+        self._tiles = OrderedDict()
+        self._nbytes = 0
+        self._lattices = {}
+        # tiles being binned at the moment, keyed to an event which is set when they are done
+        self._binning = {}
+        self._pending = []
+        self._prefetch_thread = None
+
+    @property
+    def memory_budget(self) -> int:
+        return self._memory_budget
+
+    @memory_budget.setter
+    def memory_budget(self, value: int):
+        with self._lock:
+            self._memory_budget = value
+            self._evict()
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes used by the cached tiles"""
+        return self._nbytes
+
+    def clear(self):
+        """Remove all tiles and lattices and drop any slices waiting to be prefetched"""
+        with self._lock:
+            self._pending = []
+            self._tiles.clear()
+            self._nbytes = 0
+            self._lattices.clear()
+
+    def snap_limits(self, slicepoint: Sequence[Optional[float]], bin_params: Sequence[float],
+                    limits: tuple) -> Optional[tuple]:
+        """
+        Move the limits onto the lattice of bins, by less than half a bin and keeping the number of bins.
+        The first limits with the given bin widths anchor the lattice and are returned unchanged.
+        :param slicepoint: ND sequence of either None or float. A float defines the point
+                           in that dimension for the slice.
+        :param bin_params: ND sequence containing the number of bins for each display dimension
+                           and the thickness for each slice dimension
+        :param limits: 2-tuple of (min, max) limits of the display dimensions in the order of the workspace
+        :return: The limits on the lattice or None if the view can not be cached
+        """
+        lattice = self._lattice(slicepoint, bin_params, limits)
+        if lattice is None:
+            return None
+        return lattice.snap(limits)
+
+    def get(self, slicepoint: Sequence[Optional[float]], bin_params: Sequence[float],
+            limits: tuple) -> Optional[np.ndarray]:
+        """
+        Return the signal of a view of a slice, binning any tiles which are not cached
+        :param slicepoint: ND sequence of either None or float. A float defines the point
+                           in that dimension for the slice.
+        :param bin_params: ND sequence containing the number of bins for each display dimension
+                           and the thickness for each slice dimension
+        :param limits: 2-tuple of (min, max) limits of the display dimensions in the order of the workspace
+        :return: The signal as a 2D array indexed by the (x, y) bin or None if the limits are not on the lattice
+        """
+        lattice = self._lattice(slicepoint, bin_params, limits)
+        bins = lattice.bin_indices(limits) if lattice is not None else None
+        if bins is None:
+            return None
+        slice_key = _slice_key(slicepoint, bin_params)
+        tiles = self._get_tiles(lattice, slice_key, slicepoint, bin_params, lattice.tile_indices(bins))
+
+        (xstart, xstop), (ystart, ystop) = bins
+        signal = np.empty((xstop - xstart, ystop - ystart))
+        for (xtile, ytile), tile in tiles.items():
+            xtile_start, ytile_start = xtile * lattice.tile_shape[0], ytile * lattice.tile_shape[1]
+            xmin, xmax = max(xstart, xtile_start), min(xstop, xtile_start + lattice.tile_shape[0])
+            ymin, ymax = max(ystart, ytile_start), min(ystop, ytile_start + lattice.tile_shape[1])
+            signal[xmin - xstart:xmax - xstart, ymin - ystart:ymax - ystart] = \
+                tile[xmin - xtile_start:xmax - xtile_start, ymin - ytile_start:ymax - ytile_start]
+        return signal
+
+    def seed(self, slicepoint: Sequence[Optional[float]], bin_params: Sequence[float], limits: tuple,
+             signal: np.ndarray):
+        """
+        Keep the tiles covered completely by a view, which has been binned already
+        :param slicepoint: ND sequence of either None or float. A float defines the point
+                           in that dimension for the slice.
+        :param bin_params: ND sequence containing the number of bins for each display dimension
+                           and the thickness for each slice dimension
+        :param limits: 2-tuple of (min, max) limits of the display dimensions in the order of the workspace
+        :param signal: The signal of the view. Integrated dimensions of length 1 are ignored
+        """
+        lattice = self._lattice(slicepoint, bin_params, limits)
+        bins = lattice.bin_indices(limits) if lattice is not None else None
+        if bins is None:
+            return
+        (xstart, xstop), (ystart, ystop) = bins
+        signal = np.asarray(signal)
+        if signal.size != (xstop - xstart) * (ystop - ystart):
+            return
+        signal = signal.reshape(xstop - xstart, ystop - ystart)
+        slice_key = _slice_key(slicepoint, bin_params)
+        xtile_shape, ytile_shape = lattice.tile_shape
+        for xtile in range(-(-xstart // xtile_shape), xstop // xtile_shape):
+            for ytile in range(-(-ystart // ytile_shape), ystop // ytile_shape):
+                xmin, ymin = xtile * xtile_shape - xstart, ytile * ytile_shape - ystart
+                self._store((lattice.key, slice_key, (xtile, ytile)),
+                            signal[xmin:xmin + xtile_shape, ymin:ymin + ytile_shape])
+
+    def prefetch(self, views: List[tuple]):
+        """
+        Bin the tiles of the given views on a background thread. Views still waiting from a previous
+        call are dropped, such that only the latest request is worked on when scrolling quickly.
+        :param views: A list of (slicepoint, bin_params, limits) tuples as for get. The limits
+                      should have been snapped onto the lattice
+        """
+        with self._lock:
+            self._pending = list(views)
+            if self._pending and self._prefetch_thread is None:
+                # the thread exits once nothing is pending, such that it never keeps the
+                # cache, and through it the workspace, alive
+                self._prefetch_thread = threading.Thread(target=self._prefetch_pending, daemon=True)
+                self._prefetch_thread.start()
+
+    def wait_for_prefetch(self, timeout: Optional[float] = None):
+        """Wait until all views requested with prefetch are binned"""
+        thread = self._prefetch_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    # private api
+    def _lattice(self, slicepoint, bin_params, limits) -> Optional['_Lattice']:
+        """
+        Return the lattice of bins for the view, creating one anchored at the view if there is
+        no lattice with its bin widths yet
+        """
+        display_indices = tuple(index for index, value in enumerate(slicepoint) if value is None)
+        if len(display_indices) != 2:
+            return None
+        nbins = tuple(int(bin_params[index]) for index in display_indices)
+        if min(nbins) < 1:
+            return None
+        widths = tuple((dim_max - dim_min) / n for (dim_min, dim_max), n in zip(limits, nbins))
+        if not all(np.isfinite(width) and width > 0 for width in widths):
+            return None
+
+        key = (display_indices, ) + tuple(float(f'{width:.12g}') for width in widths)
+        with self._lock:
+            lattice = self._lattices.get(key)
+            if lattice is None:
+                lattice = _Lattice(key, origin=(limits[0][0], limits[1][0]), widths=widths,
+                                   tile_shape=tuple(-(-n // TILES_PER_VIEW) for n in nbins))
+                self._lattices[key] = lattice
+        return lattice
+
+    def _get_tiles(self, lattice, slice_key, slicepoint, bin_params, tile_indices) -> Dict[tuple, np.ndarray]:
+        """
+        Return the tiles with the given indices of a slice. Tiles being prefetched are waited for, all
+        other missing tiles are binned.
+        """
+        tiles, waiting = {}, {}
+        with self._lock:
+            for index in tile_indices:
+                key = (lattice.key, slice_key, index)
+                tile = self._tiles.get(key)
+                if tile is not None:
+                    self._tiles.move_to_end(key)
+                    tiles[index] = tile
+                elif key in self._binning:
+                    waiting[index] = self._binning[key]
+        missing = [index for index in tile_indices if index not in tiles and index not in waiting]
+        tiles.update(self._bin_tiles(lattice, slice_key, slicepoint, bin_params, missing))
+
+        for done in waiting.values():
+            done.wait()
+        with self._lock:
+            for index in waiting:
+                tile = self._tiles.get((lattice.key, slice_key, index))
+                if tile is not None:
+                    tiles[index] = tile
+        # tiles which failed in the background or have been removed already
+        missing = [index for index in waiting if index not in tiles]
+        tiles.update(self._bin_tiles(lattice, slice_key, slicepoint, bin_params, missing))
+        return tiles
+
+    def _bin_tiles(self, lattice, slice_key, slicepoint, bin_params, tile_indices) -> Dict[tuple, np.ndarray]:
+        """Bin the tiles with the given indices of a slice, merging neighbouring tiles into rectangles"""
+        tiles = {}
+        if not tile_indices:
+            return tiles
+        done = threading.Event()
+        keys = [(lattice.key, slice_key, index) for index in tile_indices]
+        with self._lock:
+            for key in keys:
+                self._binning[key] = done
+        try:
+            display_indices = lattice.key[0]
+            xtile_shape, ytile_shape = lattice.tile_shape
+            for xfirst, xlast, yfirst, ylast in _rectangles(tile_indices):
+                region_bin_params = list(bin_params)
+                region_bin_params[display_indices[0]] = (xlast - xfirst + 1) * xtile_shape
+                region_bin_params[display_indices[1]] = (ylast - yfirst + 1) * ytile_shape
+                signal = self._bin_region(slicepoint, region_bin_params,
+                                          lattice.limits(((xfirst * xtile_shape, (xlast + 1) * xtile_shape),
+                                                          (yfirst * ytile_shape, (ylast + 1) * ytile_shape))))
+                for xtile in range(xfirst, xlast + 1):
+                    for ytile in range(yfirst, ylast + 1):
+                        xmin, ymin = (xtile - xfirst) * xtile_shape, (ytile - yfirst) * ytile_shape
+                        tiles[(xtile, ytile)] = self._store(
+                            (lattice.key, slice_key, (xtile, ytile)),
+                            signal[xmin:xmin + xtile_shape, ymin:ymin + ytile_shape])
+        finally:
+            with self._lock:
+                for key in keys:
+                    if self._binning.get(key) is done:
+                        del self._binning[key]
+            done.set()
+        return tiles
+
+    def _store(self, key, tile: np.ndarray) -> np.ndarray:
+        tile = np.array(tile, dtype=np.float64)
+        tile.setflags(write=False)
+        with self._lock:
+            previous = self._tiles.pop(key, None)
+            if previous is not None:
+                self._nbytes -= previous.nbytes
+            self._tiles[key] = tile
+            self._nbytes += tile.nbytes
+            self._evict()
+        return tile
+
+    def _evict(self):
+        """Remove the least recently used tiles until the tiles fit in the memory budget. Call with the lock held"""
+        while self._tiles and self._nbytes > self._memory_budget:
+            _, tile = self._tiles.popitem(last=False)
+            self._nbytes -= tile.nbytes
+
+    def _prefetch_pending(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._prefetch_thread = None
+                    return
+                slicepoint, bin_params, limits = self._pending.pop(0)
+            try:
+                self._prefetch(slicepoint, bin_params, limits)
+            except Exception:  # noqa
+                # prefetching only saves time later, so a slice which can not be binned
+                # now is binned, and reports its error, when it is requested
+                pass
+
+    def _prefetch(self, slicepoint, bin_params, limits):
+        lattice = self._lattice(slicepoint, bin_params, limits)
+        bins = lattice.bin_indices(limits) if lattice is not None else None
+        if bins is None:
+            return
+        slice_key = _slice_key(slicepoint, bin_params)
+        with self._lock:
+            missing = [
+                index for index in lattice.tile_indices(bins)
+                if (lattice.key, slice_key, index) not in self._tiles
+                and (lattice.key, slice_key, index) not in self._binning
+            ]
+        self._bin_tiles(lattice, slice_key, slicepoint, bin_params, missing)
+
+
+class _Lattice:
+    """Regular lattice of bins in the two display dimensions, split into tiles"""
+
+    def __init__(self, key: tuple, origin: Tuple[float, float], widths: Tuple[float, float],
+                 tile_shape: Tuple[int, int]):
+        """
+        :param key: The key of the lattice in the cache
+        :param origin: The lower edge of the bin with index 0 in each display dimension
+        :param widths: The width of the bins in each display dimension
+        :param tile_shape: The number of bins of a tile in each display dimension
+        """
+        self.key = key
+        self.origin = origin
+        self.widths = widths
+        self.tile_shape = tile_shape
+
+    def snap(self, limits: tuple) -> tuple:
+        """Return the limits moved onto the nearest bin edges, keeping the number of bins"""
+        snapped = []
+        for (dim_min, dim_max), origin, width in zip(limits, self.origin, self.widths):
+            start = (dim_min - origin) / width
+            if abs(start - round(start)) < LATTICE_TOLERANCE:
+                snapped.append((dim_min, dim_max))
+            else:
+                nbins = round((dim_max - dim_min) / width)
+                snapped.append((origin + round(start) * width, origin + (round(start) + nbins) * width))
+        return tuple(snapped)
+
+    def bin_indices(self, limits: tuple) -> Optional[tuple]:
+        """Return the (start, stop) bin indices of the limits or None if they are not on the lattice"""
+        indices = []
+        for (dim_min, dim_max), origin, width in zip(limits, self.origin, self.widths):
+            start, stop = (dim_min - origin) / width, (dim_max - origin) / width
+            if abs(start - round(start)) > LATTICE_TOLERANCE or abs(stop - round(stop)) > LATTICE_TOLERANCE:
+                return None
+            indices.append((int(round(start)), int(round(stop))))
+        return tuple(indices)
+
+    def tile_indices(self, bins: tuple) -> List[Tuple[int, int]]:
+        """Return the indices of the tiles overlapping the (start, stop) bin indices"""
+        (xstart, xstop), (ystart, ystop) = bins
+        xtile_shape, ytile_shape = self.tile_shape
+        return [(xtile, ytile) for xtile in range(xstart // xtile_shape, (xstop - 1) // xtile_shape + 1)
+                for ytile in range(ystart // ytile_shape, (ystop - 1) // ytile_shape + 1)]
+
+    def limits(self, bins: tuple) -> tuple:
+        """Return the limits of the (start, stop) bin indices"""
+        return tuple((origin + start * width, origin + stop * width)
+                     for (start, stop), origin, width in zip(bins, self.origin, self.widths))
+
+
+def _slice_key(slicepoint: Sequence[Optional[float]], bin_params: Sequence[float]) -> tuple:
+    """Return the position and thickness of the slice in the integrated dimensions"""
+    return tuple((value, bin_params[index]) for index, value in enumerate(slicepoint) if value is not None)
+
+
+def _rectangles(tile_indices: Sequence[Tuple[int, int]]) -> List[Tuple[int, int, int, int]]:
+    """
+    Group tiles into rectangles, which can each be binned at once
+    :param tile_indices: A sequence of (x, y) tile indices
+    :return: A list of (xfirst, xlast, yfirst, ylast) inclusive ranges of tile indices
+    """
+    rows = {}
+    for xtile, ytile in tile_indices:
+        rows.setdefault(ytile, []).append(xtile)
+    # runs of neighbouring tiles along x in each row
+    runs = []
+    for ytile, xtiles in rows.items():
+        xtiles = sorted(set(xtiles))
+        first = previous = xtiles[0]
+        for xtile in xtiles[1:]:
+            if xtile != previous + 1:
+                runs.append((first, previous, ytile))
+                first = xtile
+            previous = xtile
+        runs.append((first, previous, ytile))
+    # join equal runs of neighbouring rows
+    rectangles = []
+    for xfirst, xlast, ytile in sorted(runs):
+        if rectangles and rectangles[-1][:2] == (xfirst, xlast) and rectangles[-1][3] == ytile - 1:
+            rectangles[-1] = (xfirst, xlast, rectangles[-1][2], ytile)
+        else:
+            rectangles.append((xfirst, xlast, ytile, ytile))
+    return rectangles
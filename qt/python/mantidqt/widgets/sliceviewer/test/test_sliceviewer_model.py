@@ -338,8 +338,19 @@ class SliceViewerModelTest(unittest.TestCase):
         mock_binmd.assert_called_once_with(**call_params)
         mock_binmd.reset_mock()
 
-        model.get_data((None, None, 0), (1, 2, 4), ((-2, 2), (-1, 1)))
-        mock_binmd.assert_called_once_with(**call_params)
+        # get_data bins the tiles of the view for the slice cache without storing them in the ADS
+        mock_binmd.return_value = MagicMock()
+        mock_binmd.return_value.getSignalArray.return_value = np.array([[[1.], [2.]]])
+        data = model.get_data((None, None, 0), (1, 2, 4), ((-2, 2), (-1, 1)))
+        del call_params['OutputWorkspace']
+        mock_binmd.assert_called_once_with(StoreInADS=False, **call_params)
+        assert_equal(data, [1., 2.])
+        mock_binmd.reset_mock()
+
+        # the same view is returned from the cache
+        data = model.get_data((None, None, 0), (1, 2, 4), ((-2, 2), (-1, 1)))
+        mock_binmd.assert_not_called()
+        assert_equal(data, [1., 2.])
 
     @patch('mantidqt.widgets.sliceviewer.model.BinMD')
     def test_get_ws_mde_sets_minimum_width_on_data_limits(self, mock_binmd):
@@ -363,6 +374,21 @@ class SliceViewerModelTest(unittest.TestCase):
         mock_binmd.assert_called_once_with(**call_params)
         mock_binmd.reset_mock()
 
+    @patch('mantidqt.widgets.sliceviewer.model.BinMD')
+    def test_prefetch_data_MDE_bins_slices_in_background(self, mock_binmd):
+        model = SliceViewerModel(self.ws_MDE_3D)
+        mock_binmd.return_value = MagicMock()
+        mock_binmd.return_value.getSignalArray.return_value = np.array([[[1.], [2.]]])
+
+        model.prefetch_data_MDE([(None, None, -1), (None, None, 1)], (1, 2, 4), ((-2, 2), (-1, 1)))
+        model._slice_cache.wait_for_prefetch(timeout=10)
+        self.assertEqual(mock_binmd.call_count, 2)
+        self.assertEqual(mock_binmd.call_args_list[1][1]['OutputExtents'], [-2, 2, -1, 1, -1.0, 3.0])
+        mock_binmd.reset_mock()
+
+        assert_equal(model.get_data((None, None, 1), (1, 2, 4), ((-2, 2), (-1, 1)), transpose=True), [1., 2.])
+        mock_binmd.assert_not_called()
+
     def test_model_matrix(self):
         model = SliceViewerModel(self.ws2d_histo)
 
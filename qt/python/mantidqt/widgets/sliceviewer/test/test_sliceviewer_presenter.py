@@ -154,6 +154,10 @@ class SliceViewerTest(unittest.TestCase):
         self.assertEqual(self.view.data_view.dimensions.get_slicepoint.call_count, 1)
         self.assertEqual(self.view.data_view.dimensions.get_bin_params.call_count, 1)
         self.assertEqual(self.view.data_view.update_plot_data.call_count, 1)
+        self.model.prefetch_data_MDE.assert_called_once_with(
+            self.view.data_view.dimensions.get_neighbouring_slicepoints.return_value,
+            bin_params=self.view.data_view.dimensions.get_bin_params.return_value,
+            limits=self.view.data_view.get_axes_limits.return_value)
 
     @patch("sip.isdeleted", return_value=False)
     def test_sliceviewer_matrix(self, _):
@@ -0,0 +1,142 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+#  This file is part of the mantid workbench.
+#
+#
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from mantidqt.widgets.sliceviewer.slicecache import SliceCache
+
+
+def _bin_region(slicepoint, bin_params, limits):
+    """
+    Bin a slice of a fake workspace with a signal of x + 10*y + 100*z at each point
+    """
+    (xmin, xmax), (ymin, ymax) = limits
+    xwidth, ywidth = (xmax - xmin) / bin_params[0], (ymax - ymin) / bin_params[1]
+    x = xmin + (np.arange(bin_params[0]) + 0.5) * xwidth
+    y = ymin + (np.arange(bin_params[1]) + 0.5) * ywidth
+    return x[:, np.newaxis] + 10 * y[np.newaxis, :] + 100 * slicepoint[2]
+
+
+class SliceCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.bin_region = MagicMock(side_effect=_bin_region)
+        self.cache = SliceCache(self.bin_region)
+
+    def test_first_view_anchors_lattice_and_is_unchanged(self):
+        limits = ((-2.0, 2.0), (-1.5, 3.0))
+        self.assertEqual(self.cache.snap_limits([None, None, 0.5], [8, 9, 0.1], limits), limits)
+
+    def test_get_returns_signal_of_view(self):
+        slicepoint, bin_params, limits = [None, None, 0.5], [8, 9, 0.1], ((-2.0, 2.0), (-1.5, 3.0))
+
+        signal = self.cache.get(slicepoint, bin_params, limits)
+
+        np.testing.assert_allclose(signal, _bin_region(slicepoint, bin_params, limits))
+
+    def test_get_returns_cached_tiles_for_same_view(self):
+        slicepoint, bin_params, limits = [None, None, 0.5], [8, 8, 0.1], ((0.0, 8.0), (0.0, 8.0))
+        self.cache.get(slicepoint, bin_params, limits)
+        self.bin_region.reset_mock()
+
+        signal = self.cache.get(slicepoint, bin_params, limits)
+
+        self.bin_region.assert_not_called()
+        np.testing.assert_allclose(signal, _bin_region(slicepoint, bin_params, limits))
+
+    def test_panning_bins_only_new_tiles(self):
+        slicepoint, bin_params = [None, None, 0.5], [8, 8, 0.1]
+        self.cache.get(slicepoint, bin_params, ((0.0, 8.0), (0.0, 8.0)))
+        self.bin_region.reset_mock()
+
+        # pan right by just under a bin, which is snapped to a pan by one bin
+        limits = self.cache.snap_limits(slicepoint, bin_params, ((0.9, 8.9), (0.0, 8.0)))
+        self.assertEqual(limits, ((1.0, 9.0), (0.0, 8.0)))
+        signal = self.cache.get(slicepoint, bin_params, limits)
+
+        # tiles are 2x2 bins, so one column of tiles is new
+        self.bin_region.assert_called_once()
+        _, region_bin_params, region_limits = self.bin_region.call_args[0]
+        self.assertEqual(region_bin_params[:2], [2, 8])
+        self.assertEqual(region_limits, ((8.0, 10.0), (0.0, 8.0)))
+        np.testing.assert_allclose(signal, _bin_region(slicepoint, bin_params, limits))
+
+    def test_slices_are_cached_separately(self):
+        bin_params, limits = [8, 8, 0.1], ((0.0, 8.0), (0.0, 8.0))
+        self.cache.get([None, None, 0.5], bin_params, limits)
+
+        signal = self.cache.get([None, None, 1.5], bin_params, limits)
+
+        self.assertEqual(self.bin_region.call_count, 2)
+        np.testing.assert_allclose(signal, _bin_region([None, None, 1.5], bin_params, limits))
+
+    def test_seed_keeps_tiles_of_binned_view(self):
+        slicepoint, bin_params, limits = [None, None, 0.5], [8, 8, 0.1], ((0.0, 8.0), (0.0, 8.0))
+        expected = _bin_region(slicepoint, bin_params, limits)
+        self.cache.seed(slicepoint, bin_params, limits, expected[:, :, np.newaxis])
+
+        signal = self.cache.get(slicepoint, bin_params, limits)
+
+        self.bin_region.assert_not_called()
+        np.testing.assert_allclose(signal, expected)
+
+    def test_least_recently_used_tiles_are_removed_beyond_memory_budget(self):
+        slicepoint, bin_params, limits = [None, None, 0.5], [8, 8, 0.1], ((0.0, 8.0), (0.0, 8.0))
+        # room for half of the 16 tiles of 2x2 bins
+        self.cache.memory_budget = 8 * 4 * 8
+        signal = self.cache.get(slicepoint, bin_params, limits)
+
+        self.assertLessEqual(self.cache.nbytes, self.cache.memory_budget)
+        np.testing.assert_allclose(signal, _bin_region(slicepoint, bin_params, limits))
+        self.cache.memory_budget = 0
+        self.assertEqual(self.cache.nbytes, 0)
+
+    def test_prefetch_bins_slices_in_background(self):
+        bin_params, limits = [8, 8, 0.1], ((0.0, 8.0), (0.0, 8.0))
+        self.cache.get([None, None, 0.5], bin_params, limits)
+        self.bin_region.reset_mock()
+
+        self.cache.prefetch([([None, None, 0.4], bin_params, limits), ([None, None, 0.6], bin_params, limits)])
+        self.cache.wait_for_prefetch(timeout=10)
+        self.assertEqual(self.bin_region.call_count, 2)
+        self.bin_region.reset_mock()
+
+        signal = self.cache.get([None, None, 0.6], bin_params, limits)
+
+        self.bin_region.assert_not_called()
+        np.testing.assert_allclose(signal, _bin_region([None, None, 0.6], bin_params, limits))
+
+    def test_get_waits_for_tiles_being_prefetched(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_bin_region(*args):
+            started.set()
+            release.wait(10)
+            return _bin_region(*args)
+
+        self.bin_region.side_effect = slow_bin_region
+        slicepoint, bin_params, limits = [None, None, 0.5], [8, 8, 0.1], ((0.0, 8.0), (0.0, 8.0))
+        self.cache.prefetch([(slicepoint, bin_params, limits)])
+        self.assertTrue(started.wait(10))
+        release.set()
+
+        signal = self.cache.get(slicepoint, bin_params, limits)
+
+        self.bin_region.assert_called_once()
+        np.testing.assert_allclose(signal, _bin_region(slicepoint, bin_params, limits))
+
+    def test_view_with_zero_width_is_not_cached(self):
+        self.assertIsNone(self.cache.snap_limits([None, None, 0.5], [8, 8, 0.1], ((1.0, 1.0), (0.0, 8.0))))
+
+
+if __name__ == '__main__':
+    unittest.main()
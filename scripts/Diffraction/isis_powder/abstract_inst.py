@@ -5,7 +5,7 @@
 #   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
 # SPDX - License - Identifier: GPL - 3.0 +
 import os
-from isis_powder.routines import calibrate, focus, common, common_enums, common_output
+from isis_powder.routines import calibrate, focus, common, common_enums, common_output, product_cache
 from mantid.kernel import config, logger
 # This class provides common hooks for instruments to override
 # if they want to define the behaviour of the hook. Otherwise it
@@ -105,6 +105,22 @@ class AbstractInst(object):
         else:
             self._beam_parameters = {'height': height, 'width': width}
 
+    def _get_product_cache(self):
+        """
+        Returns the cache of intermediate products, such as summed empty runs and vanadium splines, made with the
+        current settings. By default the products are kept in the product_cache folder of the calibration directory.
+        :return: A ProductCache object, which is disabled if the product_cache_size_limit is set to 0
+        """
+        cache_dir = getattr(self._inst_settings, "product_cache_dir", None)
+        if not cache_dir:
+            cache_dir = os.path.join(os.path.expanduser(self._inst_settings.calibration_dir), "product_cache")
+        size_limit = getattr(self._inst_settings, "product_cache_size_limit", None)
+        if size_limit is None:
+            size_limit = product_cache.DEFAULT_SIZE_LIMIT_MB
+        settings = product_cache.get_relevant_settings(self._inst_settings)
+        settings["instrument"] = self._inst_prefix
+        return product_cache.ProductCache(cache_dir=cache_dir, size_limit_mb=size_limit, settings=settings)
+
     def should_subtract_empty_inst(self):
         """
         :return: Whether the empty run should be subtracted from a run being focused
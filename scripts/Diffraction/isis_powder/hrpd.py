@@ -104,7 +104,9 @@ class HRPD(AbstractInst):
         name = "sac" + common.generate_splined_name(vanadium, [])
         path = run_details.van_paths
         try:
-            solid_angle = mantid.Load(Filename=os.path.join(path,name))
+            # the next run may be loading in the background while this one is focused
+            with common.FILE_IO_LOCK:
+                solid_angle = mantid.Load(Filename=os.path.join(path,name))
             return solid_angle
         except ValueError:
             raise RuntimeError("Could not find " + os.path.join(path, name)+" please run create_vanadium with "
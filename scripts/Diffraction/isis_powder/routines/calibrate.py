@@ -4,21 +4,92 @@
 #   NScD Oak Ridge National Laboratory, European Spallation Source,
 #   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
 # SPDX - License - Identifier: GPL - 3.0 +
+import os
+
 import mantid.simpleapi as mantid
 
 import isis_powder.routines.common as common
+from isis_powder.routines import product_cache
 from isis_powder.routines.common_enums import INPUT_BATCHING
 
 
 def create_van(instrument, run_details, absorb):
     """
     Creates a splined vanadium run for the following instrument. Requires the run_details for the
-    vanadium workspace we will process and whether to apply absorption corrections.
+    vanadium workspace we will process and whether to apply absorption corrections. The corrected and
+    focused vanadium and the splines are taken from the product cache of the instrument where they have
+    been made before from the same files with the same settings.
     :param instrument: The instrument object that will be used to supply various instrument specific methods
     :param run_details: The run details associated with this vanadium run
     :param absorb: Boolean flag whether to apply absorption corrections
     :return: Processed workspace group in dSpacing (but not splined)
     """
+    cache = instrument._get_product_cache()
+    corrected_key, focused_key, splines_key = _generate_vanadium_product_keys(cache, instrument, run_details, absorb)
+
+    focused_vanadium = cache.load("focused_vanadium", focused_key, output_workspace="focused_vanadium")
+    if focused_vanadium is None:
+        corrected_van_ws = cache.load("corrected_vanadium", corrected_key, output_workspace="corrected_van_ws")
+        if corrected_van_ws is None:
+            corrected_van_ws = _correct_vanadium(instrument, run_details, absorb, cache)
+            cache.save("corrected_vanadium", corrected_key, corrected_van_ws)
+        focused_vanadium = _focus_vanadium(corrected_van_ws, instrument, run_details)
+        cache.save("focused_vanadium", focused_key, focused_vanadium)
+
+    focused_spectra = common.extract_ws_spectra(focused_vanadium)
+    focused_spectra = instrument._crop_van_to_expected_tof_range(focused_spectra)
+
+    d_spacing_group, tof_group = instrument._output_focused_ws(processed_spectra=focused_spectra,
+                                                               run_details=run_details)
+
+    if cache.restore_file("vanadium_splines", splines_key, run_details.splined_vanadium_file_path):
+        mantid.LoadNexus(Filename=run_details.splined_vanadium_file_path,
+                         OutputWorkspace=_get_spline_group_name(instrument))
+    else:
+        _create_vanadium_splines(focused_spectra, instrument, run_details)
+        cache.store_file("vanadium_splines", splines_key, run_details.splined_vanadium_file_path)
+
+    common.keep_single_ws_unit(d_spacing_group=d_spacing_group, tof_group=tof_group,
+                               unit_to_keep=instrument._get_unit_to_keep())
+
+    common.remove_intermediate_workspace(focused_vanadium)
+    common.remove_intermediate_workspace(focused_spectra)
+
+    return d_spacing_group
+
+
+def _generate_vanadium_product_keys(cache, instrument, run_details, absorb):
+    """
+    Generates the keys of the corrected vanadium, focused vanadium and vanadium splines in the product cache
+    :return: A tuple of the keys, which are None if the cache is disabled
+    """
+    if not cache.enabled:
+        return None, None, None
+    corrected_inputs = product_cache.find_run_files(run_details.vanadium_run_numbers, instrument,
+                                                    run_details.file_extension)
+    if run_details.empty_runs is not None:
+        corrected_inputs += product_cache.find_run_files(run_details.empty_runs, instrument,
+                                                         run_details.file_extension)
+    if run_details.vanadium_absorption_path:
+        corrected_inputs.append(run_details.vanadium_absorption_path)
+    focused_inputs = corrected_inputs + [run_details.offset_file_path, run_details.grouping_file_path]
+    splines_inputs = list(focused_inputs)
+    masking_file_name = getattr(instrument._inst_settings, "masking_file_name", None)
+    if masking_file_name:
+        splines_inputs.append(os.path.join(instrument.calibration_dir, masking_file_name))
+
+    corrected_key = cache.generate_key("corrected_vanadium", corrected_inputs, absorb=absorb)
+    focused_key = cache.generate_key("focused_vanadium", focused_inputs, absorb=absorb)
+    splines_key = cache.generate_key("vanadium_splines", splines_inputs, absorb=absorb,
+                                     tt_mode=instrument._get_current_tt_mode())
+    return corrected_key, focused_key, splines_key
+
+
+def _correct_vanadium(instrument, run_details, absorb, cache):
+    """
+    Loads and sums the vanadium runs, subtracts the empty runs and applies absorption corrections
+    :return: The corrected vanadium workspace
+    """
     van = run_details.vanadium_run_numbers
     # Always sum a range of inputs as its a vanadium run over multiple captures
     input_van_ws_list = common.load_current_normalised_ws_list(run_number_string=van, instrument=instrument,
@@ -28,8 +99,9 @@ def create_van(instrument, run_details, absorb):
     instrument.create_solid_angle_corrections(input_van_ws, run_details)
 
     if not (run_details.empty_runs is None):
-        summed_empty = common.generate_summed_runs(empty_sample_ws_string=run_details.empty_runs,
-                                                   instrument=instrument)
+        summed_empty = product_cache.generate_summed_runs(product_cache=cache,
+                                                          empty_sample_ws_string=run_details.empty_runs,
+                                                          instrument=instrument)
         mantid.SaveNexus(Filename=run_details.summed_empty_file_path, InputWorkspace=summed_empty)
         corrected_van_ws = common.subtract_summed_runs(ws_to_correct=input_van_ws, empty_sample=summed_empty)
 
@@ -42,7 +114,14 @@ def create_van(instrument, run_details, absorb):
     else:
         # Assume that create_van only uses Vanadium runs
         mantid.SetSampleMaterial(InputWorkspace=corrected_van_ws, ChemicalFormula='V')
+    return corrected_van_ws
+
 
+def _focus_vanadium(corrected_van_ws, instrument, run_details):
+    """
+    Aligns and focuses the corrected vanadium workspace into banks
+    :return: The focused vanadium workspace
+    """
     aligned_ws = mantid.AlignDetectors(InputWorkspace=corrected_van_ws,
                                        CalibrationFile=run_details.offset_file_path)
     solid_angle = instrument.get_solid_angle_corrections(run_details.run_number, run_details)
@@ -52,23 +131,17 @@ def create_van(instrument, run_details, absorb):
     focused_vanadium = mantid.DiffractionFocussing(InputWorkspace=aligned_ws,
                                                    GroupingFileName=run_details.grouping_file_path)
 
-    focused_spectra = common.extract_ws_spectra(focused_vanadium)
-    focused_spectra = instrument._crop_van_to_expected_tof_range(focused_spectra)
-
-    d_spacing_group, tof_group = instrument._output_focused_ws(processed_spectra=focused_spectra,
-                                                               run_details=run_details)
-
-    _create_vanadium_splines(focused_spectra, instrument, run_details)
-
-    common.keep_single_ws_unit(d_spacing_group=d_spacing_group, tof_group=tof_group,
-                               unit_to_keep=instrument._get_unit_to_keep())
-
     common.remove_intermediate_workspace(corrected_van_ws)
     common.remove_intermediate_workspace(aligned_ws)
-    common.remove_intermediate_workspace(focused_vanadium)
-    common.remove_intermediate_workspace(focused_spectra)
+    return focused_vanadium
 
-    return d_spacing_group
+
+def _get_spline_group_name(instrument):
+    group_name = "Van_spline_data"
+    tt_mode = instrument._get_current_tt_mode()
+    if tt_mode:
+        group_name = group_name + '_' + tt_mode
+    return group_name
 
 
 def _create_vanadium_splines(focused_spectra, instrument, run_details):
@@ -79,9 +152,4 @@ def _create_vanadium_splines(focused_spectra, instrument, run_details):
         mantid.SaveNexus(Filename=out_spline_van_file_path, InputWorkspace=ws, Append=append)
         append = True
     # Group for user convenience
-    group_name = "Van_spline_data"
-    tt_mode = instrument._get_current_tt_mode()
-    if tt_mode:
-        group_name = group_name + '_' + tt_mode
-
-    mantid.GroupWorkspaces(InputWorkspaces=splined_ws_list, OutputWorkspace=group_name)
+    mantid.GroupWorkspaces(InputWorkspaces=splined_ws_list, OutputWorkspace=_get_spline_group_name(instrument))
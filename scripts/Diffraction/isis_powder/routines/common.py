@@ -6,6 +6,7 @@
 # SPDX - License - Identifier: GPL - 3.0 +
 import collections
 import copy
+import threading
 import warnings
 
 import mantid.kernel as kernel
@@ -20,6 +21,8 @@ PARAM_MAPPING = [
     ParamMapEntry(ext_name="dat_files_directory", int_name="dat_files_directory"),
     ParamMapEntry(ext_name="tof_xye_filename", int_name="tof_xye_filename"),
     ParamMapEntry(ext_name="dspacing_xye_filename", int_name="dspacing_xye_filename"),
+    ParamMapEntry(ext_name="product_cache_directory", int_name="product_cache_dir", optional=True),
+    ParamMapEntry(ext_name="product_cache_size_limit", int_name="product_cache_size_limit", optional=True),
 ]
 
 # Set of defaults for the advanced config settings
@@ -31,6 +34,11 @@ ADVANCED_CONFIG = {
     "dspacing_xye_filename": "{fileext}{instshort}{runno}{suffix}-b_{{bankno}}-d.dat"
 }
 
+# HDF5, used to read and write NeXus files, is not built thread safe on all platforms. File IO which may
+# run at the same time as file IO on another thread (e.g. loading the next run in the background while the
+# current run is focused) has to hold this lock
+FILE_IO_LOCK = threading.RLock()
+
 
 def apply_bragg_peaks_masking(workspaces_to_mask, mask_list):
     """
@@ -324,7 +332,7 @@ def keep_single_ws_unit(d_spacing_group, tof_group, unit_to_keep):
         raise ValueError("The user specified unit to keep is unknown")
 
 
-def load_current_normalised_ws_list(run_number_string, instrument, input_batching=None):
+def load_current_normalised_ws_list(run_number_string, instrument, input_batching=None, raw_ws_list=None):
     """
     Loads a workspace using Mantid and then performs current normalisation on it. Additionally it will either
     load a range of runs individually or summed depending on the user specified behaviour queried from the instrument.
@@ -334,14 +342,17 @@ def load_current_normalised_ws_list(run_number_string, instrument, input_batchin
     :param run_number_string: The run number string to turn into a list of run(s) to load
     :param instrument: The instrument to query for the behaviour regarding summing workspaces
     :param input_batching: (Optional) Used to override the user specified choice where a specific batching is required
+    :param raw_ws_list: (Optional) The workspaces of these runs if they have already been loaded, e.g. in the
+    background by load_files
     :return: The normalised workspace(s) as a list.
     """
     if not input_batching:
         input_batching = instrument._get_input_batching_mode()
 
     run_information = instrument._get_run_details(run_number_string=run_number_string)
-    file_ext = run_information.file_extension
-    raw_ws_list = _load_raw_files(run_number_string=run_number_string, instrument=instrument, file_ext=file_ext)
+    if raw_ws_list is None:
+        file_ext = run_information.file_extension
+        raw_ws_list = _load_raw_files(run_number_string=run_number_string, instrument=instrument, file_ext=file_ext)
 
     if input_batching == INPUT_BATCHING.Summed and len(raw_ws_list) > 1:
         summed_ws = _sum_ws_range(ws_list=raw_ws_list)
@@ -619,39 +630,49 @@ def _check_load_range(list_of_runs_to_load):
                          " Found " + str(len(list_of_runs_to_load)) + " Aborting.")
 
 
-def _load_raw_files(run_number_string, instrument, file_ext=None):
+def generate_input_file_names(run_number_string, instrument, file_ext=None):
     """
-    Uses the run number string to generate a list of run numbers to load in
+    Generates the names of the files, Load uses to find the runs in the run number string. If the number
+    of runs is greater than the maximum range it will raise an exception see _check_load_range for more details
     :param run_number_string: The run number string to generate
     :param instrument: The instrument to generate the prefix filename for these runs
-    :return: A list of loaded workspaces
+    :param file_ext: (Optional) The file extension to force a particular format
+    :return: A list of file names
     """
     run_number_list = generate_run_numbers(run_number_string=run_number_string)
     file_ext = "" if file_ext is None else file_ext
-    load_raw_ws = _load_list_of_files(run_number_list, instrument, file_ext=file_ext)
-    return load_raw_ws
+    _check_load_range(list_of_runs_to_load=run_number_list)
+    return [instrument._generate_input_file_name(run_number=run_number, file_ext=file_ext)
+            for run_number in run_number_list]
 
 
-def _load_list_of_files(run_numbers_list, instrument, file_ext=None):
+def load_files(file_names):
     """
-    Loads files based on the list passed to it. If the list is
-    greater than the maximum range it will raise an exception
-    see _check_load_range for more details
-    :param run_numbers_list: The list of runs to load
-    :param instrument: The instrument to generate the prefix for
+    Loads the files passed into workspaces named after the files. This only calls Load, so
+    it is safe to call from a background thread.
+    :param file_names: The list of the names of the files to load
     :return: The loaded workspaces as a list
     """
     read_ws_list = []
-    _check_load_range(list_of_runs_to_load=run_numbers_list)
-
-    for run_number in run_numbers_list:
-        file_name = instrument._generate_input_file_name(run_number=run_number, file_ext=file_ext)
-        read_ws = mantid.Load(Filename=file_name)
-        read_ws_list.append(mantid.RenameWorkspace(InputWorkspace=read_ws, OutputWorkspace=file_name))
+    for file_name in file_names:
+        with FILE_IO_LOCK:
+            read_ws_list.append(mantid.Load(Filename=file_name, OutputWorkspace=file_name))
 
     return read_ws_list
 
 
+def _load_raw_files(run_number_string, instrument, file_ext=None):
+    """
+    Uses the run number string to generate a list of run numbers to load in
+    :param run_number_string: The run number string to generate
+    :param instrument: The instrument to generate the prefix filename for these runs
+    :return: A list of loaded workspaces
+    """
+    file_names = generate_input_file_names(run_number_string=run_number_string, instrument=instrument,
+                                           file_ext=file_ext)
+    return load_files(file_names)
+
+
 def _sum_ws_range(ws_list):
     """
     Sums a list of workspaces into a single workspace. This will take the name
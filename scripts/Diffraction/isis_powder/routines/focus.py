@@ -4,11 +4,14 @@
 #   NScD Oak Ridge National Laboratory, European Spallation Source,
 #   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
 # SPDX - License - Identifier: GPL - 3.0 +
+from concurrent.futures import ThreadPoolExecutor
+
 from mantid.api import WorkspaceGroup
 import mantid.simpleapi as mantid
 from mantid.kernel import logger
 
 import isis_powder.routines.common as common
+from isis_powder.routines import product_cache
 from isis_powder.routines.common_enums import INPUT_BATCHING
 import numpy
 import os
@@ -27,7 +30,7 @@ def focus(run_number_string, instrument, perform_vanadium_norm, absorb, sample_d
 
 
 def _focus_one_ws(input_workspace, run_number, instrument, perform_vanadium_norm, absorb, sample_details,
-                  vanadium_path):
+                  vanadium_path, calibration_cache=None):
     run_details = instrument._get_run_details(run_number_string=run_number)
     if perform_vanadium_norm:
         _test_splined_vanadium_exists(instrument, run_details)
@@ -39,15 +42,18 @@ def _focus_one_ws(input_workspace, run_number, instrument, perform_vanadium_norm
     if not is_run_empty and instrument.should_subtract_empty_inst() and not run_details.sample_empty:
         if os.path.isfile(run_details.summed_empty_file_path):
             logger.warning('Pre-summed empty instrument workspace found at ' + run_details.summed_empty_file_path)
-            summed_empty = mantid.LoadNexus(Filename=run_details.summed_empty_file_path)
+            with common.FILE_IO_LOCK:
+                summed_empty = mantid.LoadNexus(Filename=run_details.summed_empty_file_path)
         else:
-            summed_empty = common.generate_summed_runs(empty_sample_ws_string=run_details.empty_runs,
-                                                       instrument=instrument)
+            summed_empty = product_cache.generate_summed_runs(product_cache=instrument._get_product_cache(),
+                                                              empty_sample_ws_string=run_details.empty_runs,
+                                                              instrument=instrument)
     elif run_details.sample_empty:
         # Subtract a sample empty if specified
-        summed_empty = common.generate_summed_runs(empty_sample_ws_string=run_details.sample_empty,
-                                                   instrument=instrument,
-                                                   scale_factor=instrument._inst_settings.sample_empty_scale)
+        summed_empty = product_cache.generate_summed_runs(product_cache=instrument._get_product_cache(),
+                                                          empty_sample_ws_string=run_details.sample_empty,
+                                                          instrument=instrument,
+                                                          scale_factor=instrument._inst_settings.sample_empty_scale)
     if summed_empty is not None:
         input_workspace = common.subtract_summed_runs(ws_to_correct=input_workspace,
                                                       empty_sample=summed_empty)
@@ -57,7 +63,9 @@ def _focus_one_ws(input_workspace, run_number, instrument, perform_vanadium_norm
 
     # Correct for absorption / multiple scattering if required
     if absorb:
-        input_workspace = instrument._apply_absorb_corrections(run_details=run_details, ws_to_correct=input_workspace)
+        with common.FILE_IO_LOCK:
+            input_workspace = instrument._apply_absorb_corrections(run_details=run_details,
+                                                                   ws_to_correct=input_workspace)
     else:
         # Set sample material if specified by the user
         if sample_details is not None:
@@ -65,8 +73,12 @@ def _focus_one_ws(input_workspace, run_number, instrument, perform_vanadium_norm
                              Geometry=common.generate_sample_geometry(sample_details),
                              Material=common.generate_sample_material(sample_details))
     # Align
-    aligned_ws = mantid.AlignDetectors(InputWorkspace=input_workspace,
-                                       CalibrationFile=run_details.offset_file_path)
+    calibration = _get_calibration_workspace(input_workspace, run_details, calibration_cache)
+    if calibration is None:
+        aligned_ws = mantid.AlignDetectors(InputWorkspace=input_workspace,
+                                           CalibrationFile=run_details.offset_file_path)
+    else:
+        aligned_ws = mantid.AlignDetectors(InputWorkspace=input_workspace, CalibrationWorkspace=calibration)
 
     solid_angle = instrument.get_solid_angle_corrections(run_details.vanadium_run_numbers, run_details)
     if solid_angle:
@@ -91,7 +103,8 @@ def _focus_one_ws(input_workspace, run_number, instrument, perform_vanadium_norm
                                                      bin_width_list=bin_widths)
 
     # Output
-    d_spacing_group, tof_group = instrument._output_focused_ws(output_spectra, run_details=run_details)
+    with common.FILE_IO_LOCK:
+        d_spacing_group, tof_group = instrument._output_focused_ws(output_spectra, run_details=run_details)
 
     common.keep_single_ws_unit(d_spacing_group=d_spacing_group, tof_group=tof_group,
                                unit_to_keep=instrument._get_unit_to_keep())
@@ -105,6 +118,29 @@ def _focus_one_ws(input_workspace, run_number, instrument, perform_vanadium_norm
     return d_spacing_group
 
 
+def _get_calibration_workspace(input_workspace, run_details, calibration_cache):
+    """
+    Returns the name of the calibration workspace for the offset file of this run, loading it on first use,
+    such that runs sharing an offset file are aligned without reading it again.
+    :param input_workspace: The workspace to align, providing the instrument for the calibration
+    :param run_details: The run details associated with this run
+    :param calibration_cache: Dictionary of calibration workspaces already loaded, or None to not share them
+    :return: The name of the calibration workspace, or None if calibration is not shared
+    """
+    if calibration_cache is None:
+        return None
+    instrument = input_workspace.getInstrument()
+    # the calibration depends on the geometry of the instrument, which may change during a long scan
+    key = (run_details.offset_file_path, instrument.getName(), str(instrument.getValidFromDate()))
+    if key not in calibration_cache:
+        workspace_name = "isis_powder_calibration_{}".format(len(calibration_cache))
+        with common.FILE_IO_LOCK:
+            mantid.LoadDiffCal(Filename=run_details.offset_file_path, InputWorkspace=input_workspace,
+                               MakeGroupingWorkspace=False, MakeMaskWorkspace=False, WorkspaceName=workspace_name)
+        calibration_cache[key] = workspace_name + "_cal"
+    return calibration_cache[key]
+
+
 def _apply_vanadium_corrections(instrument, input_workspace, perform_vanadium_norm, vanadium_splines):
     input_workspace = mantid.ConvertUnits(InputWorkspace=input_workspace, OutputWorkspace=input_workspace, Target="TOF")
     split_data_spectra = common.extract_ws_spectra(input_workspace)
@@ -190,14 +226,38 @@ def _individual_run_focusing(instrument, perform_vanadium_norm, run_number, abso
             vanadium_splines = mantid.mtd[van]
 
     output = None
-    for run in run_numbers:
-        ws = common.load_current_normalised_ws_list(run_number_string=run, instrument=instrument)
-        output = _focus_one_ws(input_workspace=ws[0], run_number=run, instrument=instrument, absorb=absorb,
-                               perform_vanadium_norm=perform_vanadium_norm, sample_details=sample_details,
-                               vanadium_path=vanadium_splines)
+    calibration_cache = {}
+    # Load the next run in the background while the current one is focused. Focusing itself stays on this
+    # thread, as the algorithms it runs are multi-threaded and intermediate workspaces are shared by name.
+    with ThreadPoolExecutor(max_workers=1) as loader:
+        next_run = _load_run_in_background(loader, run_numbers[0], instrument)
+        for index, run in enumerate(run_numbers):
+            raw_ws_list = next_run.result()
+            if index + 1 < len(run_numbers):
+                next_run = _load_run_in_background(loader, run_numbers[index + 1], instrument)
+            ws = common.load_current_normalised_ws_list(run_number_string=run, instrument=instrument,
+                                                        raw_ws_list=raw_ws_list)
+            output = _focus_one_ws(input_workspace=ws[0], run_number=run, instrument=instrument, absorb=absorb,
+                                   perform_vanadium_norm=perform_vanadium_norm, sample_details=sample_details,
+                                   vanadium_path=vanadium_splines, calibration_cache=calibration_cache)
+    common.remove_intermediate_workspace(list(calibration_cache.values()))
     return output
 
 
+def _load_run_in_background(loader, run_number, instrument):
+    """
+    Submits loading the raw workspaces of a run to the loader
+    :param loader: The executor to load the run with
+    :param run_number: The run to load
+    :param instrument: The instrument the run belongs to
+    :return: A future of the list of loaded workspaces
+    """
+    run_details = instrument._get_run_details(run_number_string=run_number)
+    file_names = common.generate_input_file_names(run_number_string=run_number, instrument=instrument,
+                                                  file_ext=run_details.file_extension)
+    return loader.submit(common.load_files, file_names)
+
+
 def _test_splined_vanadium_exists(instrument, run_details):
     # Check the necessary splined vanadium file has been created
     if not os.path.isfile(run_details.splined_vanadium_file_path):
@@ -0,0 +1,272 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+import hashlib
+import json
+import os
+import shutil
+import stat
+import uuid
+
+import mantid.simpleapi as mantid
+from mantid.api import FileFinder
+from mantid.kernel import logger
+
+from isis_powder.routines import common
+
+# The cache holds at most this many megabytes of products unless configured otherwise
+DEFAULT_SIZE_LIMIT_MB = 10 * 1024
+
+# Files up to this size (e.g. calibration, grouping and absorption files) are fingerprinted by their contents.
+# Larger files (e.g. raw run files, which are never modified once written) by their size and modification time.
+_MAX_HASHED_FILE_SIZE = 16 * 1024 * 1024
+
+# Settings which only affect the focusing of sample runs or where and how the output is written, so that
+# changing them does not invalidate cached vanadium and empty products
+SETTINGS_NOT_AFFECTING_PRODUCTS = frozenset([
+    "calibration_dir", "cal_mapping_path", "config_file", "debug", "delta_q", "delta_r", "do_van_normalisation",
+    "dspacing_xye_filename", "dat_files_directory", "focused_bin_widths", "focused_cropping_values", "freq_params",
+    "gss_filename", "input_mode", "lorch_filter", "merge_banks", "nxs_filename", "output_dir", "pdf_type",
+    "product_cache_dir", "product_cache_size_limit", "q_lims", "run_in_range", "run_number", "sample_empty",
+    "sample_empty_scale", "suffix", "tof_xye_filename", "unit_to_keep", "user_name"
+])
+
+
+class ProductCache(object):
+    """
+    Cache of the intermediate products of a reduction (e.g. summed empty runs or splined vanadium) saved as NeXus
+    files. Each product is stored under a key, which is a hash of the files it was made from and the settings used
+    to make it. Products are therefore reused whenever the same files are processed with the same settings, however
+    the runs were specified, and are made again when either changes. The least recently used products are removed
+    when the cache grows beyond its size limit.
+    """
+
+    def __init__(self, cache_dir, size_limit_mb=DEFAULT_SIZE_LIMIT_MB, settings=None):
+        """
+        :param cache_dir: The directory to store the products in
+        :param size_limit_mb: The maximum size of all products in megabytes. 0 disables the cache
+        :param settings: Dictionary of the instrument settings the products are made with
+        """
+        self._cache_dir = cache_dir
+        self._size_limit = int(float(size_limit_mb) * 1024 * 1024)
+        self._settings = settings if settings else {}
+
+    @property
+    def enabled(self):
+        return bool(self._cache_dir) and self._size_limit > 0
+
+    def generate_key(self, product_name, input_files, **extra_settings):
+        """
+        Generates the key of a product from the files and settings it is made from
+        :param product_name: The name of the product
+        :param input_files: The paths of the files the product is made from
+        :param extra_settings: Settings, other than the instrument settings, the product depends on
+        :return: The key as a hex string, or None if the cache is disabled
+        """
+        if not self.enabled:
+            return None
+        hasher = hashlib.sha1(product_name.encode())
+        for file_path in input_files:
+            hasher.update(_fingerprint_file(file_path))
+        settings = dict(self._settings)
+        settings.update(extra_settings)
+        hasher.update(json.dumps(_normalise_setting(settings), sort_keys=True).encode())
+        return hasher.hexdigest()
+
+    def get_file_path(self, product_name, key):
+        return os.path.join(self._cache_dir, "{}_{}.nxs".format(product_name, key))
+
+    def load(self, product_name, key, output_workspace):
+        """
+        Loads a product from the cache
+        :param product_name: The name of the product
+        :param key: The key of the product from generate_key
+        :param output_workspace: The name of the workspace to load the product into
+        :return: The product workspace, or None if the product is not in the cache
+        """
+        file_path = self._find(product_name, key)
+        if file_path is None:
+            return None
+        with common.FILE_IO_LOCK:
+            return mantid.LoadNexus(Filename=file_path, OutputWorkspace=output_workspace)
+
+    def save(self, product_name, key, workspace):
+        """
+        Saves a product workspace into the cache
+        :param product_name: The name of the product
+        :param key: The key of the product from generate_key
+        :param workspace: The workspace to save
+        """
+        if key is None:
+            return
+
+        def save_to(temp_path):
+            with common.FILE_IO_LOCK:
+                mantid.SaveNexus(InputWorkspace=workspace, Filename=temp_path)
+        self._write(product_name, key, save_to)
+
+    def restore_file(self, product_name, key, destination):
+        """
+        Copies a product file from the cache
+        :param product_name: The name of the product
+        :param key: The key of the product from generate_key
+        :param destination: The path to copy the product to
+        :return: True if the product was in the cache and has been copied
+        """
+        file_path = self._find(product_name, key)
+        if file_path is None:
+            return False
+        shutil.copyfile(file_path, destination)
+        return True
+
+    def store_file(self, product_name, key, source):
+        """
+        Copies a product file into the cache
+        :param product_name: The name of the product
+        :param key: The key of the product from generate_key
+        :param source: The path of the product file
+        """
+        if key is None:
+            return
+        self._write(product_name, key, lambda temp_path: shutil.copyfile(source, temp_path))
+
+    def _find(self, product_name, key):
+        if key is None:
+            return None
+        file_path = self.get_file_path(product_name, key)
+        if not os.path.isfile(file_path):
+            return None
+        # Mark as recently used. The product can still be used if it cannot be touched, e.g. in a shared directory
+        try:
+            os.utime(file_path, None)
+        except FileNotFoundError:
+            # Removed by another reduction sharing the cache
+            return None
+        except OSError as error:
+            logger.debug("Could not mark {} as recently used: {}".format(file_path, error))
+        logger.notice("Using cached {} from {}".format(product_name, file_path))
+        return file_path
+
+    def _write(self, product_name, key, write):
+        # Write to a temporary file first, such that a failed or concurrent write never leaves a partial product
+        file_path = self.get_file_path(product_name, key)
+        temp_path = os.path.join(self._cache_dir, "tmp_{}.nxs".format(uuid.uuid4().hex))
+        try:
+            if not os.path.isdir(self._cache_dir):
+                os.makedirs(self._cache_dir)
+            write(temp_path)
+            os.replace(temp_path, file_path)
+        except (OSError, RuntimeError, ValueError) as error:
+            # The cache is an optimisation only, so the reduction carries on without it
+            logger.warning("Could not save {} to the product cache: {}".format(product_name, error))
+            if os.path.isfile(temp_path):
+                os.remove(temp_path)
+            return
+        self._remove_least_recently_used(keep=file_path)
+
+    def _remove_least_recently_used(self, keep):
+        products = []
+        for file_name in os.listdir(self._cache_dir):
+            file_path = os.path.join(self._cache_dir, file_name)
+            if file_name.startswith("tmp_") or not file_name.endswith(".nxs"):
+                continue
+            try:
+                file_stat = os.stat(file_path)
+            except OSError:
+                # Removed by another reduction sharing the cache
+                continue
+            if not stat.S_ISREG(file_stat.st_mode):
+                continue
+            products.append((file_stat.st_mtime, file_stat.st_size, file_path))
+
+        total_size = sum(size for _, size, _ in products)
+        for _, size, file_path in sorted(products):
+            if total_size <= self._size_limit:
+                break
+            if file_path == keep:
+                continue
+            try:
+                os.remove(file_path)
+            except OSError:
+                continue
+            total_size -= size
+
+
+def get_relevant_settings(inst_settings):
+    """
+    Returns the instrument settings which may affect the intermediate products of a reduction
+    :param inst_settings: The InstrumentSettings object
+    :return: A dictionary of setting name to value
+    """
+    return {name: value for name, value in vars(inst_settings).items()
+            if not name.startswith('_') and name not in SETTINGS_NOT_AFFECTING_PRODUCTS}
+
+
+def find_run_files(run_number_string, instrument, file_ext=None):
+    """
+    Finds the files of the runs in the run number string
+    :param run_number_string: The run number string to find the files for
+    :param instrument: The instrument the runs belong to
+    :param file_ext: (Optional) The file extension to force a particular format
+    :return: A list of paths. Runs which can not be found are listed by their file name
+    """
+    file_paths = []
+    for file_name in common.generate_input_file_names(run_number_string=run_number_string, instrument=instrument,
+                                                      file_ext=file_ext):
+        try:
+            file_paths.extend(FileFinder.findRuns(file_name))
+        except (RuntimeError, ValueError):
+            file_paths.append(file_name)
+    return file_paths
+
+
+def generate_summed_runs(product_cache, empty_sample_ws_string, instrument, scale_factor=None):
+    """
+    Loads and sums the empty runs, as common.generate_summed_runs, unless they have been summed before
+    :param product_cache: The ProductCache to keep the summed runs in
+    :param empty_sample_ws_string: The empty run numbers to sum
+    :param instrument: The instrument object these runs belong to
+    :param scale_factor: The percentage to scale the loaded runs by
+    :return: The summed and normalised empty runs
+    """
+    key = None
+    if product_cache.enabled:
+        file_ext = instrument._get_run_details(run_number_string=empty_sample_ws_string).file_extension
+        input_files = find_run_files(empty_sample_ws_string, instrument, file_ext)
+        key = product_cache.generate_key("summed_empty", input_files, scale_factor=scale_factor)
+    summed_empty = product_cache.load("summed_empty", key, output_workspace="summed_empty")
+    if summed_empty is None:
+        summed_empty = common.generate_summed_runs(empty_sample_ws_string=empty_sample_ws_string,
+                                                   instrument=instrument, scale_factor=scale_factor)
+        product_cache.save("summed_empty", key, summed_empty)
+    return summed_empty
+
+
+def _fingerprint_file(file_path):
+    try:
+        file_stat = os.stat(file_path)
+    except OSError:
+        return "missing:{}".format(file_path).encode()
+    if file_stat.st_size > _MAX_HASHED_FILE_SIZE:
+        return "{}:{}:{}".format(os.path.basename(file_path), file_stat.st_size, file_stat.st_mtime).encode()
+    hasher = hashlib.sha1()
+    with open(file_path, 'rb') as input_file:
+        for block in iter(lambda: input_file.read(1024 * 1024), b''):
+            hasher.update(block)
+    return hasher.digest()
+
+
+def _normalise_setting(value):
+    # Such that e.g. 1 and 1.0 or a list and a tuple of the same values give the same key
+    if isinstance(value, dict):
+        return {str(name): _normalise_setting(item) for name, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalise_setting(item) for item in value]
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    return str(value)
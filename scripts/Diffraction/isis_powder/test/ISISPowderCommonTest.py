@@ -6,6 +6,7 @@
 # SPDX - License - Identifier: GPL - 3.0 +
 import mantid.simpleapi as mantid  # Have to import Mantid to setup paths
 import unittest
+from unittest import mock
 
 from isis_powder.routines import common, common_enums, SampleDetails
 
@@ -387,6 +388,25 @@ class ISISPowderCommonTest(unittest.TestCase):
         self.assertAlmostEqual(result_ws_two, result_ext_two)
         self.assertNotAlmostEqual(result_ext_one, result_ext_two)
 
+    def test_load_current_normalised_ws_uses_loaded_workspaces(self):
+        bin_index = 8
+        second_run_bin_value = 1.48682782
+
+        file_names = common.generate_input_file_names(run_number_string="100-101", instrument=ISISPowderMockInst())
+        self.assertEqual(file_names, ["POL100", "POL101"])
+        raw_ws_list = common.load_files(file_names)
+        self.assertEqual([ws.name() for ws in raw_ws_list], file_names)
+
+        with mock.patch.object(common, "_load_raw_files") as mock_load_raw_files:
+            normalised_ws_list = common.load_current_normalised_ws_list(
+                run_number_string="100-101", instrument=ISISPowderMockInst(), raw_ws_list=raw_ws_list)
+
+        mock_load_raw_files.assert_not_called()
+        self.assertEqual(len(normalised_ws_list), 2)
+        self.assertAlmostEqual(normalised_ws_list[1].readY(0)[bin_index], second_run_bin_value)
+        for ws in normalised_ws_list:
+            mantid.DeleteWorkspace(ws)
+
     def test_rebin_bin_boundary_defaults(self):
         ws = mantid.CreateSampleWorkspace(OutputWorkspace='test_rebin_bin_boundary_default',
                                           Function='Flat background', NumBanks=1, BankPixelWidth=1, XMax=10, BinWidth=1)
@@ -0,0 +1,120 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+import threading
+import unittest
+from unittest import mock
+
+from isis_powder.routines import focus
+
+
+class ISISPowderFocusTest(unittest.TestCase):
+
+    @staticmethod
+    def _get_instrument():
+        instrument = mock.Mock()
+        instrument._get_run_details.return_value = mock.Mock(file_extension=None)
+        instrument._generate_input_file_name.side_effect = \
+            lambda run_number, file_ext: "INST{}{}".format(run_number, file_ext)
+        return instrument
+
+    @staticmethod
+    def _get_input_workspace(instrument_name="INST", valid_from="2021-01-01"):
+        input_workspace = mock.Mock()
+        input_workspace.getInstrument.return_value = mock.Mock(**{"getName.return_value": instrument_name,
+                                                                  "getValidFromDate.return_value": valid_from})
+        return input_workspace
+
+    def test_next_run_is_loaded_while_the_current_one_is_focused(self):
+        run_loaded = {run: threading.Event() for run in (10, 11, 12)}
+        main_thread = threading.current_thread()
+        loading_threads = []
+        next_run_loaded_during_focus = []
+
+        def load_files(file_names):
+            loading_threads.append(threading.current_thread())
+            run_loaded[int(file_names[0][len("INST"):])].set()
+            return ["raw_" + file_name for file_name in file_names]
+
+        def focus_one_ws(input_workspace, run_number, **_):
+            if run_number + 1 in run_loaded:
+                next_run_loaded_during_focus.append(run_loaded[run_number + 1].wait(timeout=30))
+            return "focused_{}".format(run_number)
+
+        with mock.patch.object(focus.common, "load_files", side_effect=load_files), \
+                mock.patch.object(focus.common, "load_current_normalised_ws_list",
+                                  side_effect=lambda raw_ws_list, **_: raw_ws_list) as normalise, \
+                mock.patch.object(focus, "_focus_one_ws", side_effect=focus_one_ws) as focus_one_ws_mock, \
+                mock.patch.object(focus.common, "remove_intermediate_workspace"):
+            output = focus._individual_run_focusing(instrument=self._get_instrument(), perform_vanadium_norm=False,
+                                                    run_number="10-12", absorb=False, sample_details=None)
+
+        self.assertEqual(output, "focused_12")
+        self.assertEqual(next_run_loaded_during_focus, [True, True])
+        self.assertNotIn(main_thread, loading_threads)
+        self.assertEqual([call[1]["raw_ws_list"] for call in normalise.call_args_list],
+                         [["raw_INST10"], ["raw_INST11"], ["raw_INST12"]])
+        self.assertEqual([(call[1]["input_workspace"], call[1]["run_number"])
+                          for call in focus_one_ws_mock.call_args_list],
+                         [("raw_INST10", 10), ("raw_INST11", 11), ("raw_INST12", 12)])
+
+    def test_calibration_file_is_used_without_a_calibration_cache(self):
+        run_details = mock.Mock(offset_file_path="offsets.cal")
+
+        with mock.patch.object(focus.mantid, "LoadDiffCal", create=True) as load_diff_cal:
+            calibration = focus._get_calibration_workspace(self._get_input_workspace(), run_details, None)
+
+        self.assertEqual(calibration, None)
+        load_diff_cal.assert_not_called()
+
+    def test_calibration_workspace_is_loaded_once_per_offset_file_and_instrument(self):
+        calibration_cache = {}
+        run_details = mock.Mock(offset_file_path="offsets.cal")
+
+        with mock.patch.object(focus.mantid, "LoadDiffCal", create=True) as load_diff_cal:
+            first = focus._get_calibration_workspace(self._get_input_workspace(), run_details, calibration_cache)
+            second = focus._get_calibration_workspace(self._get_input_workspace(), run_details, calibration_cache)
+            other_file = focus._get_calibration_workspace(self._get_input_workspace(),
+                                                          mock.Mock(offset_file_path="other_offsets.cal"),
+                                                          calibration_cache)
+            other_geometry = focus._get_calibration_workspace(self._get_input_workspace(valid_from="2021-06-01"),
+                                                              run_details, calibration_cache)
+
+        self.assertEqual(first, "isis_powder_calibration_0_cal")
+        self.assertEqual(second, first)
+        self.assertEqual(other_file, "isis_powder_calibration_1_cal")
+        self.assertEqual(other_geometry, "isis_powder_calibration_2_cal")
+        self.assertEqual(load_diff_cal.call_count, 3)
+        self.assertEqual(load_diff_cal.call_args_list[0][1]["Filename"], "offsets.cal")
+        self.assertEqual(load_diff_cal.call_args_list[0][1]["WorkspaceName"], "isis_powder_calibration_0")
+
+    def test_focus_aligns_with_calibration_file_or_cached_calibration_workspace(self):
+        instrument = self._get_instrument()
+        instrument.get_solid_angle_corrections.return_value = None
+        instrument._get_instrument_bin_widths.return_value = None
+        instrument._output_focused_ws.return_value = (mock.Mock(), mock.Mock())
+        run_details = mock.Mock(offset_file_path="offsets.cal", sample_empty=None)
+        instrument._get_run_details.return_value = run_details
+        calibration_cache = {}
+
+        with mock.patch.object(focus, "mantid") as mantid, mock.patch.object(focus, "common") as common:
+            common.runs_overlap.return_value = True
+            for cache in (None, calibration_cache, calibration_cache):
+                focus._focus_one_ws(input_workspace=self._get_input_workspace(), run_number=10, instrument=instrument,
+                                    perform_vanadium_norm=False, absorb=False, sample_details=None,
+                                    vanadium_path=None, calibration_cache=cache)
+
+        align_calls = mantid.AlignDetectors.call_args_list
+        self.assertEqual(align_calls[0][1]["CalibrationFile"], "offsets.cal")
+        self.assertNotIn("CalibrationWorkspace", align_calls[0][1])
+        for call in align_calls[1:]:
+            self.assertEqual(call[1]["CalibrationWorkspace"], "isis_powder_calibration_0_cal")
+            self.assertNotIn("CalibrationFile", call[1])
+        mantid.LoadDiffCal.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
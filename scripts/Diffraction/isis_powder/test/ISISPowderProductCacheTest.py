@@ -0,0 +1,117 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+import mantid.simpleapi as mantid  # noqa # Have to import Mantid to setup paths
+import os
+import tempfile
+import shutil
+import unittest
+from unittest import mock
+
+from isis_powder.routines.product_cache import ProductCache
+
+
+class ISISPowderProductCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp()
+        self._cache_dir = os.path.join(self._temp_dir, "cache")
+        self._input_file = self._write_file("offsets.cal", "1 2 3")
+
+    def tearDown(self):
+        shutil.rmtree(self._temp_dir)
+
+    def _write_file(self, file_name, contents):
+        file_path = os.path.join(self._temp_dir, file_name)
+        with open(file_path, 'w') as output_file:
+            output_file.write(contents)
+        return file_path
+
+    def test_key_depends_on_file_contents_not_names(self):
+        cache = ProductCache(self._cache_dir)
+        key = cache.generate_key("product", [self._input_file])
+        copied_file = self._write_file("copy.cal", "1 2 3")
+        self.assertEqual(key, cache.generate_key("product", [copied_file]))
+
+        self._write_file("offsets.cal", "1 2 4")
+        self.assertNotEqual(key, cache.generate_key("product", [self._input_file]))
+
+    def test_key_depends_on_settings_but_not_their_formatting(self):
+        key = ProductCache(self._cache_dir, settings={"spline_coeff": 60, "crop": [1, 2]}).generate_key(
+            "product", [self._input_file])
+        self.assertEqual(key, ProductCache(self._cache_dir, settings={"spline_coeff": 60.0, "crop": (1, 2.0)})
+                         .generate_key("product", [self._input_file]))
+        self.assertNotEqual(key, ProductCache(self._cache_dir, settings={"spline_coeff": 70, "crop": [1, 2]})
+                            .generate_key("product", [self._input_file]))
+        self.assertNotEqual(key, ProductCache(self._cache_dir, settings={"spline_coeff": 60, "crop": [1, 2]})
+                            .generate_key("product", [self._input_file], absorb=True))
+
+    def test_stored_file_is_restored(self):
+        cache = ProductCache(self._cache_dir)
+        key = cache.generate_key("splines", [self._input_file])
+        destination = os.path.join(self._temp_dir, "restored.nxs")
+        self.assertFalse(cache.restore_file("splines", key, destination))
+
+        product = self._write_file("splines.nxs", "splines")
+        cache.store_file("splines", key, product)
+
+        self.assertTrue(cache.restore_file("splines", key, destination))
+        with open(destination) as restored_file:
+            self.assertEqual(restored_file.read(), "splines")
+        self.assertEqual(os.listdir(self._cache_dir), [os.path.basename(cache.get_file_path("splines", key))])
+
+    def test_least_recently_used_products_are_removed_beyond_size_limit(self):
+        # Limit of 3.5 products of 100 kB
+        cache = ProductCache(self._cache_dir, size_limit_mb=350 / 1024.)
+        product = self._write_file("product.nxs", "x" * 100 * 1024)
+        for index in range(3):
+            cache.store_file("product", str(index), product)
+            os.utime(cache.get_file_path("product", str(index)), (index, index))
+        # Restoring product 0 makes product 1 the least recently used
+        self.assertTrue(cache.restore_file("product", "0", os.path.join(self._temp_dir, "restored.nxs")))
+
+        cache.store_file("product", "3", product)
+
+        self.assertEqual(sorted(os.listdir(self._cache_dir)), ["product_0.nxs", "product_2.nxs", "product_3.nxs"])
+
+    def test_product_which_cannot_be_marked_as_used_is_restored(self):
+        cache = ProductCache(self._cache_dir)
+        cache.store_file("splines", "key", self._write_file("splines.nxs", "splines"))
+        destination = os.path.join(self._temp_dir, "restored.nxs")
+
+        with mock.patch("isis_powder.routines.product_cache.os.utime", side_effect=PermissionError):
+            self.assertTrue(cache.restore_file("splines", "key", destination))
+        self.assertTrue(os.path.isfile(destination))
+
+    def test_products_removed_by_another_reduction_are_skipped(self):
+        cache = ProductCache(self._cache_dir, size_limit_mb=150 / 1024.)
+        product = self._write_file("product.nxs", "x" * 100 * 1024)
+        cache.store_file("product", "0", product)
+        removed_path = cache.get_file_path("product", "0")
+        stat = os.stat
+
+        def stat_removed_product(path, *args, **kwargs):
+            # Another reduction removes product 0 once it has been listed
+            if path == removed_path:
+                raise FileNotFoundError(path)
+            return stat(path, *args, **kwargs)
+
+        with mock.patch("isis_powder.routines.product_cache.os.stat", side_effect=stat_removed_product):
+            cache.store_file("product", "1", product)
+
+        self.assertEqual(sorted(os.listdir(self._cache_dir)), ["product_0.nxs", "product_1.nxs"])
+
+    def test_cache_with_no_size_limit_is_disabled(self):
+        cache = ProductCache(self._cache_dir, size_limit_mb=0)
+        self.assertFalse(cache.enabled)
+        self.assertIsNone(cache.generate_key("product", [self._input_file]))
+
+        cache.store_file("product", None, self._input_file)
+        self.assertFalse(os.path.exists(self._cache_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
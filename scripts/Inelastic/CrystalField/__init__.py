@@ -8,5 +8,6 @@ from .fitting import CrystalField, CrystalFieldFit
 from .function import PeaksFunction, Background, Function, ResolutionModel, PhysicalProperties
 from .pointcharge import PointCharge
 from .CrystalFieldMultiSite import CrystalFieldMultiSite
-__all__ = ['CrystalField', 'CrystalFieldFit', 'CrystalFieldMultiSite', 'PeaksFunction',
+from .batch import CrystalFieldBatch
+__all__ = ['CrystalField', 'CrystalFieldFit', 'CrystalFieldMultiSite', 'CrystalFieldBatch', 'PeaksFunction',
            'Background', 'Function', 'ResolutionModel', 'PhysicalProperties', 'PointCharge']
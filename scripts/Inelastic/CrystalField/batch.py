@@ -0,0 +1,491 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Evaluates a crystal field model for many sets of field parameters at once.
+
+The crystal field Hamiltonian is linear in the field parameters, so it is a weighted sum of the Hamiltonians
+calculated with each parameter set to one. These are calculated once with the CrystalFieldEnergies algorithm,
+after which the Hamiltonians of any number of parameter sets are diagonalised together with numpy, and the
+spectra and physical properties are calculated from the eigensystems for whole grids of temperatures.
+The formulae and constants are those of the CrystalField fit functions in the CurveFitting library.
+"""
+import collections
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .fitting import CrystalField, ionname2Nre, islistlike
+
+# Boltzmann constant in meV/K, as PhysicalConstants::BoltzmannConstant
+BOLTZMANN_CONSTANT = 8.6173324e-02
+# Converts the heat capacity from meV/K/ion to J/K/mol (N_A * meV)
+HEAT_CAPACITY_FACTOR = 6.02214179e23 * 1.602176487e-22
+# Converts the susceptibility to the units of the CrystalFieldSusceptibility function
+SUSCEPTIBILITY_FACTORS = {'bohr': 0.057883818, 'si': 4.062426e-7, 'cgs': 0.03232776}
+# Energies in meV are converted to Kelvin with this factor in the intensity calculation (10 * e / k_B)
+MEV_TO_KELVIN = 10 * 1.6021773349 / 1.38062
+# Classical electron radius in 10^-12 cm
+ELECTRON_RADIUS = -1.91 * 1.6021773349 ** 2 / 9.109389754
+
+# The number of parameter sets diagonalised together, to limit the memory used
+MAX_SETS_PER_CHUNK = 1024
+
+# The basis Hamiltonians for each (nre, parameter name)
+_basis_hamiltonians = {}
+
+# The data of a spectrum in a parameter search
+_SearchSpectrum = collections.namedtuple('_SearchSpectrum', ['x', 'y', 'weights', 'baseline', 'temperature',
+                                                             'fwhm', 'resolution', 'intensity_scaling',
+                                                             'peak_shape', 'tolerance_energy',
+                                                             'tolerance_intensity'])
+
+
+def _get_basis_hamiltonian(nre, parameter_name):
+    """Get the Hamiltonian with one field parameter set to one and all others to zero"""
+    key = (nre, parameter_name)
+    if key not in _basis_hamiltonians:
+        from mantid.simpleapi import CrystalFieldEnergies
+        eigenvalues, _, packed = CrystalFieldEnergies(nre, **{parameter_name: 1.0})
+        dim = len(eigenvalues)
+        packed = np.asarray(packed)
+        _basis_hamiltonians[key] = (packed[0::2] + 1j * packed[1::2]).reshape((dim, dim))
+    return _basis_hamiltonians[key]
+
+
+def _angular_momentum_operators(dim):
+    """Get the Jx, Jy and Jz matrices in the |J,m> basis with m in ascending order"""
+    j = 0.5 * (dim - 1)
+    m = np.arange(dim) - j
+    j_plus = np.diag(np.sqrt(j * (j + 1) - m[:-1] * (m[:-1] + 1)), -1).astype(complex)
+    j_minus = j_plus.T.copy()
+    return np.array([0.5 * (j_plus + j_minus), 0.5j * (j_minus - j_plus), np.diag(m).astype(complex)])
+
+
+def _chunks(n_sets, chunk_size=MAX_SETS_PER_CHUNK):
+    for start in range(0, n_sets, chunk_size):
+        yield slice(start, min(start + chunk_size, n_sets))
+
+
+class CrystalFieldBatch(object):
+    """
+    Calculates the eigensystems, spectra and physical properties of a crystal field for many sets of field
+    parameters at once. For example:
+
+        batch = CrystalFieldBatch('Ce', ['B20', 'B40'], FixedParameters={'B22': 3.97})
+        params = batch.makeGrid(np.linspace(-1, 1, 100), np.linspace(-0.1, 0.1, 100))
+        heat_capacity = batch.getHeatCapacity(params, np.linspace(1, 300, 300))  # shape (10000, 300)
+    """
+
+    def __init__(self, Ion, ParameterNames, FixedParameters=None):
+        """
+        Constructor.
+
+        @param Ion: A rare earth ion, as for CrystalField, e.g. Ce, Pr, ... or S<n>, J<n>
+        @param ParameterNames: The names of the field parameters which vary between the parameter sets
+        @param FixedParameters: A dict of the values of the other field parameters, which are the same for all
+                                sets. The values of the names in ParameterNames are used if no sets are given.
+        """
+        fixed = FixedParameters if FixedParameters is not None else {}
+        for name in list(ParameterNames) + list(fixed.keys()):
+            if name not in CrystalField.field_parameter_names:
+                raise RuntimeError('Unknown field parameter %s' % name)
+        self._nre = ionname2Nre(Ion)
+        self._names = list(ParameterNames)
+        self._default_values = np.array([float(fixed.get(name, 0.0)) for name in self._names])
+        # The basis Hamiltonians are calculated once per ion and parameter, the fixed parameters are summed up once
+        dim = _get_basis_hamiltonian(self._nre, 'BextZ').shape[0]
+        self._basis = np.array([_get_basis_hamiltonian(self._nre, name) for name in self._names]).reshape(
+            (len(self._names), dim, dim))
+        self._fixed_hamiltonian = np.zeros((dim, dim), dtype=complex)
+        for name, value in fixed.items():
+            if name not in self._names and value != 0.0:
+                self._fixed_hamiltonian += value * _get_basis_hamiltonian(self._nre, name)
+        self._gj = 2. if self._nre < 1 else CrystalField.lande_g[self._nre - 1]
+        self._j_operators = _angular_momentum_operators(dim)
+
+    @property
+    def ParameterNames(self):
+        return list(self._names)
+
+    @staticmethod
+    def makeGrid(*values):
+        """
+        Make the parameter sets of a grid, e.g. makeGrid(b20_values, b40_values) for a batch varying B20 and B40
+
+        @param values: An array of the values for each of the parameter names
+        @return: A 2D array with a parameter set in each row. The last parameter varies fastest.
+        """
+        mesh = np.meshgrid(*[np.asarray(v, dtype=float) for v in values], indexing='ij')
+        return np.stack([axis.ravel() for axis in mesh], axis=-1)
+
+    def getHamiltonians(self, Parameters=None):
+        """
+        Get the Hamiltonians of the parameter sets
+
+        @param Parameters: A 2D array with a set of values of the ParameterNames in each row, or a 1D array
+                           for a single set. If not given the values of the FixedParameters are used.
+        @return: An array of shape (number of sets, 2J+1, 2J+1)
+        """
+        parameters = self._get_parameter_sets(Parameters)
+        return self._fixed_hamiltonian + np.tensordot(parameters, self._basis, axes=1)
+
+    def getEigensystems(self, Parameters=None):
+        """
+        Get the eigenvalues and eigenvectors of the parameter sets
+
+        @param Parameters: The parameter sets, as for getHamiltonians
+        @return: A tuple of the eigenvalues, starting at 0 in ascending order, with shape (sets, 2J+1),
+                 and the eigenvectors in the columns of an array of shape (sets, 2J+1, 2J+1)
+        """
+        eigenvalues, eigenvectors = np.linalg.eigh(self.getHamiltonians(Parameters))
+        eigenvalues -= eigenvalues[:, :1]
+        return eigenvalues, eigenvectors
+
+    def getPeakLists(self, Parameters=None, Temperature=1.0, ToleranceEnergy=1.0e-10, ToleranceIntensity=0.1):
+        """
+        Get the energies and intensities of all transitions between the levels of each parameter set.
+        The intensities are in mb/sr as those of CrystalField.getPeakList.
+
+        @param Parameters: The parameter sets, as for getHamiltonians
+        @param Temperature: The temperature in Kelvin
+        @param ToleranceEnergy: Transitions with energies closer than this are treated as one peak
+        @param ToleranceIntensity: The intensities of peaks weaker than this are set to zero
+        @return: A tuple of the energies and intensities, each an array of shape (sets, (2J+1)^2)
+                 sorted in ascending order of energy
+        """
+        energies, intensities = [], []
+        parameters = self._get_parameter_sets(Parameters)
+        for chunk in _chunks(len(parameters)):
+            eigenvalues, eigenvectors = self.getEigensystems(parameters[chunk])
+            chunk_energies, chunk_intensities = self._calculate_transitions(eigenvalues, eigenvectors, Temperature)
+            chunk_energies, chunk_intensities = _merge_transitions(chunk_energies, chunk_intensities,
+                                                                   ToleranceEnergy, ToleranceIntensity)
+            energies.append(chunk_energies)
+            intensities.append(chunk_intensities)
+        return np.concatenate(energies), np.concatenate(intensities)
+
+    def getSpectra(self, Parameters, x, Temperature, FWHM=None, ResolutionModel=None, IntensityScaling=1.0,
+                   PeakShape=CrystalField.default_peakShape, ToleranceEnergy=1.0e-10, ToleranceIntensity=0.1):
+        """
+        Calculate the inelastic spectra of the parameter sets, without any background
+
+        @param Parameters: The parameter sets, as for getHamiltonians
+        @param x: The energy transfers to calculate the spectra at
+        @param Temperature: The temperature in Kelvin
+        @param FWHM: The width of all peaks
+        @param ResolutionModel: A tuple of the x- and y-values of a tabulated peak width as a function of
+                                energy, used instead of FWHM. Peaks outside of its range are ignored.
+        @param IntensityScaling: A factor to scale the intensities by
+        @param PeakShape: Either 'Gaussian' or 'Lorentzian'
+        @param ToleranceEnergy: Transitions with energies closer than this are treated as one peak
+        @param ToleranceIntensity: Peaks weaker than this are ignored
+        @return: An array of shape (sets, len(x))
+        """
+        if PeakShape not in ('Gaussian', 'Lorentzian'):
+            raise RuntimeError('Peak shape %s is not supported, use Gaussian or Lorentzian' % PeakShape)
+        if FWHM is None and ResolutionModel is None:
+            raise RuntimeError('Either FWHM or ResolutionModel must be given')
+        x = np.asarray(x, dtype=float)
+        parameters = self._get_parameter_sets(Parameters)
+        spectra = np.zeros((len(parameters), len(x)))
+        for chunk in _chunks(len(parameters)):
+            energies, intensities = self.getPeakLists(parameters[chunk], Temperature, ToleranceEnergy,
+                                                      ToleranceIntensity)
+            intensities *= IntensityScaling
+            if ResolutionModel is not None:
+                widths = np.interp(energies, ResolutionModel[0], ResolutionModel[1], left=-1., right=-1.)
+                intensities[widths <= 0.0] = 0.0
+            else:
+                widths = np.full_like(energies, float(FWHM))
+            chunk_spectra = spectra[chunk]
+            for peak in range(energies.shape[1]):
+                strong = intensities[:, peak] > 0.0
+                if not np.any(strong):
+                    continue
+                centre = energies[strong, peak][:, np.newaxis]
+                width = widths[strong, peak][:, np.newaxis]
+                intensity = intensities[strong, peak][:, np.newaxis]
+                if PeakShape == 'Gaussian':
+                    sigma = width / (2. * np.sqrt(2. * np.log(2.)))
+                    chunk_spectra[strong] += intensity / (sigma * np.sqrt(2. * np.pi)) * \
+                        np.exp(-0.5 * ((x - centre) / sigma) ** 2)
+                else:
+                    half_width = 0.5 * width
+                    chunk_spectra[strong] += intensity / np.pi * half_width / ((x - centre) ** 2 + half_width ** 2)
+        return spectra
+
+    def getHeatCapacity(self, Parameters, Temperature):
+        """
+        Calculate the heat capacity of the parameter sets in J/mol/K
+
+        @param Parameters: The parameter sets, as for getHamiltonians
+        @param Temperature: An array of temperatures in Kelvin
+        @return: An array of shape (sets, len(Temperature))
+        """
+        temperature = np.asarray(Temperature, dtype=float)
+        beta = 1. / (BOLTZMANN_CONSTANT * temperature)
+        parameters = self._get_parameter_sets(Parameters)
+        heat_capacity = np.empty((len(parameters), len(temperature)))
+        for chunk in _chunks(len(parameters)):
+            eigenvalues, _ = self.getEigensystems(parameters[chunk])
+            energies = eigenvalues[:, np.newaxis, :]
+            boltzmann = np.exp(-beta[np.newaxis, :, np.newaxis] * energies)
+            z = np.sum(boltzmann, axis=2)
+            u = np.sum(energies * boltzmann, axis=2) / z
+            u2 = np.sum(energies ** 2 * boltzmann, axis=2) / z
+            heat_capacity[chunk] = (u2 - u ** 2) / (BOLTZMANN_CONSTANT * temperature ** 2) * HEAT_CAPACITY_FACTOR
+        return heat_capacity
+
+    def getSusceptibility(self, Parameters, Temperature, Hdir=(0., 0., 1.), Unit='cgs', Inverse=False):
+        """
+        Calculate the magnetic susceptibility of the parameter sets with Van Vleck's formula
+
+        @param Parameters: The parameter sets, as for getHamiltonians
+        @param Temperature: An array of temperatures in Kelvin
+        @param Hdir: The direction of the magnetic field, or 'powder' for the powder average
+        @param Unit: One of 'bohr', 'SI' or 'cgs', as for CrystalField.getSusceptibility
+        @param Inverse: If True calculate the inverse susceptibility instead
+        @return: An array of shape (sets, len(Temperature))
+        """
+        if Unit.lower() not in SUSCEPTIBILITY_FACTORS:
+            raise RuntimeError('Unit must be one of bohr, SI or cgs, found %s' % Unit)
+        if isinstance(Hdir, str):
+            if Hdir.lower() != 'powder':
+                raise RuntimeError('Hdir must be a vector or powder, found %s' % Hdir)
+            directions = np.identity(3)
+        else:
+            directions = np.array([Hdir], dtype=float)
+            norm = np.linalg.norm(directions)
+            if norm > 1.e-6:
+                directions /= norm
+        temperature = np.asarray(Temperature, dtype=float)
+        beta = 1. / (BOLTZMANN_CONSTANT * temperature)
+        parameters = self._get_parameter_sets(Parameters)
+        susceptibility = np.empty((len(parameters), len(temperature)))
+        for chunk in _chunks(len(parameters)):
+            eigenvalues, eigenvectors = self.getEigensystems(parameters[chunk])
+            difference = eigenvalues[:, :, np.newaxis] - eigenvalues[:, np.newaxis, :]
+            degenerate = np.abs(difference) < 1.e-6
+            difference[degenerate] = 1.0
+            first_order = np.zeros_like(eigenvalues)
+            second_order = np.zeros_like(eigenvalues)
+            for direction in directions:
+                moment = self._gj * np.tensordot(direction, self._j_operators, axes=1)
+                elements = np.abs(_in_eigenbasis(moment, eigenvectors)) ** 2
+                first_order += np.sum(np.where(degenerate, elements, 0.0), axis=2)
+                second_order += np.sum(np.where(degenerate, 0.0, elements / difference), axis=2)
+            factor = SUSCEPTIBILITY_FACTORS[Unit.lower()] / len(directions)
+            boltzmann = np.exp(-beta[np.newaxis, :, np.newaxis] * eigenvalues[:, np.newaxis, :])
+            terms = first_order[:, np.newaxis, :] * beta[np.newaxis, :, np.newaxis] - 2 * second_order[:, np.newaxis, :]
+            susceptibility[chunk] = factor * np.sum(terms * boltzmann, axis=2) / np.sum(boltzmann, axis=2)
+        return 1. / susceptibility if Inverse else susceptibility
+
+    def _get_parameter_sets(self, parameters):
+        if parameters is None:
+            return self._default_values[np.newaxis, :]
+        parameters = np.asarray(parameters, dtype=float)
+        if parameters.ndim == 1 and len(self._names) > 0:
+            parameters = parameters[np.newaxis, :]
+        if parameters.ndim != 2 or parameters.shape[1] != len(self._names):
+            raise RuntimeError('Expected parameter sets of %s values (%s), found an array of shape %s' %
+                               (len(self._names), ', '.join(self._names), str(parameters.shape)))
+        return parameters
+
+    def _calculate_transitions(self, eigenvalues, eigenvectors, temperature):
+        """Get the energies and intensities of the transitions i->k as CrystalElectricField's calculateIntensities"""
+        n_sets, dim = eigenvalues.shape
+        if temperature == 0.0:
+            temperature = 1.0
+        occupation = np.exp(-eigenvalues * MEV_TO_KELVIN / temperature)
+        occupation /= np.sum(occupation, axis=1)[:, np.newaxis]
+        matrix_elements = sum(np.abs(_in_eigenbasis(operator, eigenvectors)) ** 2 for operator in self._j_operators)
+        constant = (0.5 * ELECTRON_RADIUS * self._gj) ** 2 * 1000. * 2. / 3.
+        intensities = constant * occupation[:, :, np.newaxis] * matrix_elements
+        energies = eigenvalues[:, np.newaxis, :] - eigenvalues[:, :, np.newaxis]
+        return energies.reshape((n_sets, dim * dim)), intensities.reshape((n_sets, dim * dim))
+
+
+def _in_eigenbasis(operator, eigenvectors):
+    """Get the matrix elements <i|operator|k> between the eigenvectors of each set"""
+    return np.matmul(np.conj(np.swapaxes(eigenvectors, 1, 2)), np.matmul(operator, eigenvectors))
+
+
+def _merge_transitions(energies, intensities, tolerance_energy, tolerance_intensity):
+    """
+    Sort the transitions by energy and remove the intensities of the peaks weaker than tolerance_intensity, where
+    transitions closer than tolerance_energy add up to one peak, as CrystalElectricField's calculateExcitations
+    """
+    n_sets, n_transitions = energies.shape
+    order = np.argsort(energies, axis=1, kind='stable')
+    energies = np.take_along_axis(energies, order, axis=1)
+    intensities = np.take_along_axis(intensities, order, axis=1)
+    if n_transitions == 1:
+        return energies, intensities
+    new_peak = np.ones(energies.shape, dtype=bool)
+    new_peak[:, 1:] = np.diff(energies, axis=1) >= tolerance_energy
+    peak_index = np.cumsum(new_peak, axis=1) - 1 + n_transitions * np.arange(n_sets)[:, np.newaxis]
+    peak_intensities = np.bincount(peak_index.ravel(), weights=intensities.ravel(), minlength=n_sets * n_transitions)
+    intensities[peak_intensities[peak_index] < tolerance_intensity] = 0.0
+    return energies, intensities
+
+
+#----------------------------------------------------------------------------------------
+# Parameter search
+#----------------------------------------------------------------------------------------
+_search_worker_state = {}
+
+
+def _initialise_search_worker(batch, spectra):
+    _search_worker_state['batch'] = batch
+    _search_worker_state['spectra'] = spectra
+
+
+def _calculate_costs_in_worker(parameters):
+    return _calculate_costs(_search_worker_state['batch'], _search_worker_state['spectra'], parameters)
+
+
+def _calculate_costs(batch, spectra, parameters):
+    """Calculate the sum of the weighted squared residuals of all spectra for each parameter set"""
+    costs = np.zeros(len(parameters))
+    for spectrum in spectra:
+        calculated = batch.getSpectra(parameters, spectrum.x, spectrum.temperature, FWHM=spectrum.fwhm,
+                                      ResolutionModel=spectrum.resolution,
+                                      IntensityScaling=spectrum.intensity_scaling, PeakShape=spectrum.peak_shape,
+                                      ToleranceEnergy=spectrum.tolerance_energy,
+                                      ToleranceIntensity=spectrum.tolerance_intensity)
+        costs += np.sum((spectrum.weights * (calculated + spectrum.baseline - spectrum.y)) ** 2, axis=1)
+    costs[~np.isfinite(costs)] = np.inf
+    return costs
+
+
+def _get_sampled_ranges(model):
+    """Get the ranges of the field parameters with boundary constraints"""
+    number = r'\s*([-+]?[0-9.]+(?:[eE][-+]?[0-9]+)?)\s*'
+    ranges = collections.OrderedDict()
+    for constraint in model._getFieldConstraints().split(','):
+        match = re.match(number + r'<\s*(\w+)\s*<' + number + '$', constraint)
+        if match and match.group(2) in CrystalField.field_parameter_names:
+            ranges[match.group(2)] = (float(match.group(1)), float(match.group(3)))
+    return ranges
+
+
+def _get_field_ties(model):
+    """Get a list of the (name, expression) of the ties of the field parameters"""
+    ties = []
+    for tie in model._getFieldTies().split(','):
+        if '=' not in tie:
+            continue
+        name, expression = (part.strip() for part in tie.split('=', 1))
+        if name in CrystalField.field_parameter_names:
+            ties.append((name, expression.replace('^', '**')))
+    return ties
+
+
+def _evaluate_ties(ties, values):
+    functions = {name: getattr(np, name) for name in ('sqrt', 'exp', 'log', 'sin', 'cos', 'tan', 'abs')}
+    for name, expression in ties:
+        namespace = dict(functions)
+        namespace.update(values)
+        values[name] = np.broadcast_to(eval(expression, {'__builtins__': {}}, namespace),
+                                       values[name].shape).astype(float)
+
+
+def _get_search_spectra(model, workspaces, batch, current_values):
+    from mantid.api import mtd
+    spectra = []
+    resolution = model.ResolutionModel
+    scaling = model.IntensityScaling
+    for index, workspace in enumerate(workspaces):
+        workspace = mtd[workspace] if isinstance(workspace, str) else workspace
+        x, y, e = np.array(workspace.readX(0)), np.array(workspace.readY(0)), np.array(workspace.readE(0))
+        if len(x) == len(y) + 1:
+            x = 0.5 * (x[1:] + x[:-1])
+        # As the weights of the Fit algorithm
+        weights = np.ones_like(y)
+        weights[e > 0] = 1. / e[e > 0]
+        invalid = ~np.isfinite(y) | ~np.isfinite(e)
+        weights[invalid] = 0.0
+        y[invalid] = 0.0
+        spectrum = _SearchSpectrum(x=x, y=y, weights=weights, baseline=0.0, temperature=model._getTemperature(index),
+                                   fwhm=None if resolution is not None else model._getFWHM(index),
+                                   resolution=None if resolution is None else
+                                   (resolution.model[index] if resolution.multi else resolution.model),
+                                   intensity_scaling=scaling[index] if islistlike(scaling) else scaling,
+                                   peak_shape=model.PeakShape, tolerance_energy=model.ToleranceEnergy,
+                                   tolerance_intensity=model.ToleranceIntensity)
+        if model.background is not None:
+            # The background does not depend on the field parameters, so is evaluated once as the difference
+            # between the whole model and its crystal field peaks
+            _, calculated = model.getSpectrum(index, workspace, 0)
+            field_only = batch.getSpectra(current_values, x, spectrum.temperature, FWHM=spectrum.fwhm,
+                                          ResolutionModel=spectrum.resolution,
+                                          IntensityScaling=spectrum.intensity_scaling,
+                                          PeakShape=spectrum.peak_shape,
+                                          ToleranceEnergy=spectrum.tolerance_energy,
+                                          ToleranceIntensity=spectrum.tolerance_intensity)[0]
+            spectrum = spectrum._replace(baseline=np.asarray(calculated) - field_only)
+        spectra.append(spectrum)
+    return spectra
+
+
+def estimate_field_parameters(model, workspaces, NSamples=100, NOutputs=10, Seed=0, NumberOfProcesses=None):
+    """
+    Monte Carlo search for the field parameters of a model, which best describe its spectra, as the
+    EstimateFitParameters algorithm. Sets of the field parameters with boundary constraints are drawn uniformly
+    from their ranges and the spectra of all sets are calculated in batches, which are shared out between
+    NumberOfProcesses worker processes. The peak widths, intensity scaling and the background of the model
+    are kept at their current values.
+
+    @param model: A CrystalField object with boundary constraints on the field parameters to estimate
+    @param workspaces: A list of the workspaces (or their names) with the spectra of the model
+    @param NSamples: The number of parameter sets to try
+    @param NOutputs: The number of best parameter sets to return
+    @param Seed: A seed for the random number generator, 0 for a random seed
+    @param NumberOfProcesses: The number of worker processes, defaults to the number of CPUs
+    @return: A tuple of the names of the estimated parameters and an array of the best sets of their values,
+             in order of increasing cost
+    """
+    if model.PhysicalProperty is not None:
+        raise RuntimeError('The batched parameter search fits inelastic spectra only.')
+    ranges = _get_sampled_ranges(model)
+    if not ranges:
+        raise RuntimeError('No parameters are given for which to estimate initial values. '
+                           'Set boundary constraints to parameters that need to be estimated.')
+    ties = [(name, expression) for name, expression in _get_field_ties(model) if name not in ranges]
+    current = model._getFieldParameters()
+    names = list(ranges.keys()) + [name for name, _ in ties]
+    batch = CrystalFieldBatch(model.Ion, names, FixedParameters=current)
+
+    random_state = np.random.RandomState(Seed if Seed else None)
+    values = {name: np.full(NSamples, float(current.get(name, 0.0))) for name in CrystalField.field_parameter_names}
+    for name, (lower, upper) in ranges.items():
+        values[name] = random_state.uniform(lower, upper, NSamples)
+    _evaluate_ties(ties, values)
+    samples = np.stack([values[name] for name in names], axis=-1)
+
+    current_values = np.array([[float(current.get(name, 0.0)) for name in names]])
+    spectra = _get_search_spectra(model, workspaces, batch, current_values)
+
+    number_of_processes = NumberOfProcesses if NumberOfProcesses and NumberOfProcesses > 0 else os.cpu_count()
+    # Several chunks per process, such that the processes finish at about the same time
+    chunk_size = max(1, min(MAX_SETS_PER_CHUNK, NSamples // (4 * number_of_processes)))
+    chunks = [samples[chunk] for chunk in _chunks(NSamples, chunk_size)]
+    if number_of_processes > 1 and len(chunks) > 1:
+        # Spawn rather than fork, since the parent process may be running Qt and framework threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=number_of_processes, mp_context=context,
+                                 initializer=_initialise_search_worker, initargs=(batch, spectra)) as executor:
+            costs = np.concatenate(list(executor.map(_calculate_costs_in_worker, chunks)))
+    else:
+        costs = np.concatenate([_calculate_costs(batch, spectra, chunk) for chunk in chunks])
+
+    best = np.argsort(costs, kind='stable')[:max(1, NOutputs)]
+    n_sampled = len(ranges)
+    return names[:n_sampled], samples[best, :n_sampled]
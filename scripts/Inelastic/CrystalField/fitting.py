@@ -916,6 +916,23 @@ class CrystalField(object):
 
         return self._getPhysProp(PhysicalProperties(pptype, *args, **kwargs), workspace, ws_index)
 
+    def makeBatch(self, *ParameterNames):
+        """
+        Make a CrystalFieldBatch, which calculates the eigensystems, spectra and physical properties of this
+        crystal field for many values of the given field parameters at once. The other field parameters keep
+        their current values.
+
+        Examples:
+
+            batch = cf.makeBatch('B20', 'B40')
+            params = batch.makeGrid(np.linspace(-1, 1, 50), np.linspace(-0.1, 0.1, 50))
+            cv = batch.getHeatCapacity(params, np.linspace(1, 300, 300))  # 2500 heat capacity curves
+
+        @param ParameterNames: The names of the field parameters to vary.
+        """
+        from CrystalField.batch import CrystalFieldBatch
+        return CrystalFieldBatch(self.Ion, ParameterNames, FixedParameters=self._getFieldParameters())
+
     def getDipoleMatrix(self):
         """Returns the dipole transition matrix as a numpy array"""
         from scipy.constants import physical_constants
@@ -1256,7 +1273,9 @@ class CrystalFieldFit(object):
     def monte_carlo(self, **kwargs):
         fix_all_peaks = self.model.FixAllPeaks
         self.model.FixAllPeaks = True
-        if isinstance(self._input_workspace, list):
+        if 'NumberOfProcesses' in kwargs:
+            self._monte_carlo_batched(**kwargs)
+        elif isinstance(self._input_workspace, list):
             self._monte_carlo_multi(**kwargs)
         else:
             self._monte_carlo_single(**kwargs)
@@ -1363,6 +1382,38 @@ class CrystalFieldFit(object):
         self.model.update(function)
         self._function = function
 
+    def _monte_carlo_batched(self, NumberOfProcesses=None, NSamples=100, NOutputs=10, Seed=0, OutputWorkspace='',
+                             Type='Monte Carlo', **kwargs):
+        """
+        Estimate the field parameters with batched spectrum calculations spread over NumberOfProcesses processes
+        instead of the EstimateFitParameters algorithm.
+        Args:
+            NumberOfProcesses: The number of worker processes, None or 0 to use all CPUs.
+            NSamples, NOutputs, Seed, OutputWorkspace: As for EstimateFitParameters.
+        """
+        from mantid.api import AnalysisDataService, WorkspaceFactory
+        from CrystalField.batch import estimate_field_parameters
+        from CrystalField.CrystalFieldMultiSite import CrystalFieldMultiSite
+        if isinstance(self.model, CrystalFieldMultiSite):
+            raise RuntimeError('The batched parameter search supports single site models only.')
+        if Type != 'Monte Carlo' or len(kwargs) > 0:
+            unsupported = list(kwargs.keys()) + ([] if Type == 'Monte Carlo' else ['Type=%s' % Type])
+            raise RuntimeError('The batched parameter search does not support %s' % ', '.join(unsupported))
+        workspaces = self._input_workspace if isinstance(self._input_workspace, list) else [self._input_workspace]
+        names, estimates = estimate_field_parameters(self.model, workspaces, NSamples=NSamples, NOutputs=NOutputs,
+                                                     Seed=Seed, NumberOfProcesses=NumberOfProcesses)
+        for name, value in zip(names, estimates[0]):
+            self.model[name] = value
+        self._function = None
+        if OutputWorkspace.strip() != '':
+            table = WorkspaceFactory.createTable()
+            table.addColumn('str', 'Name')
+            for i in range(len(estimates)):
+                table.addColumn('double', str(i + 1))
+            for i, name in enumerate(names):
+                table.addRow([name] + [float(value) for value in estimates[:, i]])
+            AnalysisDataService.addOrReplace(OutputWorkspace, table)
+
     def _fit_single(self):
         """
         Fit when the model has a single spectrum.
@@ -5,6 +5,7 @@
 #   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
 # SPDX - License - Identifier: GPL - 3.0 +
 import sys
+import threading
 
 # See https://www.python.org/dev/peps/pep-0479/#abstract and
 # https://stackoverflow.com/a/51701040
@@ -13,6 +14,11 @@ if sys.version_info >= (3,7):
 else:
     NEW_STYLE_GENERATOR = False
 
+# HDF5 is not built thread safe on all platforms, so the reduction and the background saving
+# of the results (see DirectEnergyConversion.save_multirep_in_background) take this lock
+# around their NeXus file operations
+FILE_IO_LOCK = threading.RLock()
+
 
 class switch(object):
     """ Helper class providing nice switch statement"""
@@ -17,6 +17,7 @@ import math
 import time
 import numpy as np
 import collections
+from concurrent.futures import ThreadPoolExecutor
 import Direct.CommonFunctions  as common
 import Direct.diagnostics      as diagnostics
 from Direct.PropertyManager  import PropertyManager
@@ -493,87 +494,118 @@ class DirectEnergyConversion(object):
         #  -- code below uses current energy state from PropertyManager.incident_energy
         AllEn = PropertyManager.incident_energy.getAllEiList()
         num_ei_cuts = len(AllEn)
-        for ind,ei_guess in enumerate(AllEn):
-            PropertyManager.incident_energy.set_current_ind(ind)
+        # The chunks share the run descriptors and workspace names, so they are reduced one after
+        # another, but the results of a chunk can be written while the next chunk is reduced.
+        if self._multirep_mode and self.save_multirep_in_background and num_ei_cuts > 1:
+            results_saver = ThreadPoolExecutor(max_workers=1)
+        else:
+            results_saver = None
+        saved_results = []
+        renamed_results = []
+        try:
+            for ind,ei_guess in enumerate(AllEn):
+                PropertyManager.incident_energy.set_current_ind(ind)
 
-            cut_ind =ind + 1 # nice printing convention (1 of 1 rather them 0 of 1)
-            #---------------
-            if self._multirep_mode:
-                tof_range = self.find_tof_range_for_multirep(ws_base)
-                ws_base = PropertyManager.sample_run.chop_ws_part(ws_base,tof_range,self._do_early_rebinning,
-                                                                  cut_ind,num_ei_cuts)
-                prop_man.log("*** Processing multirep chunk: #{0}/{1} for provisional energy: {2} meV".
-                             format(cut_ind,num_ei_cuts,ei_guess),'notice')
-                # do bleed corrections for chunk if necessary
-                bleed_mask = self._do_bleed_corrections(PropertyManager.sample_run,cut_ind)
-                if bleed_mask is not None:
-                    mask_ws_name =  PropertyManager.sample_run.get_workspace().name()+'_bleed_mask'
-                    RenameWorkspace(bleed_mask,OutputWorkspace=mask_ws_name)
-                    self._old_runs_list.append(mask_ws_name)
-            else:
-                # single energy uses single workspace and all TOF are used
-                tof_range = None
+                cut_ind =ind + 1 # nice printing convention (1 of 1 rather them 0 of 1)
+                #---------------
+                if self._multirep_mode:
+                    tof_range = self.find_tof_range_for_multirep(ws_base)
+                    ws_base = PropertyManager.sample_run.chop_ws_part(ws_base,tof_range,self._do_early_rebinning,
+                                                                      cut_ind,num_ei_cuts)
+                    prop_man.log("*** Processing multirep chunk: #{0}/{1} for provisional energy: {2} meV".
+                                 format(cut_ind,num_ei_cuts,ei_guess),'notice')
+                    # do bleed corrections for chunk if necessary
+                    bleed_mask = self._do_bleed_corrections(PropertyManager.sample_run,cut_ind)
+                    if bleed_mask is not None:
+                        mask_ws_name =  PropertyManager.sample_run.get_workspace().name()+'_bleed_mask'
+                        RenameWorkspace(bleed_mask,OutputWorkspace=mask_ws_name)
+                        self._old_runs_list.append(mask_ws_name)
+                else:
+                    # single energy uses single workspace and all TOF are used
+                    tof_range = None
 
-            # Do custom preprocessing if such operation is defined
-            try:
-                ws_to_preprocess = PropertyManager.sample_run.get_workspace()
-                ws_to_preprocess = self.do_preprocessing(ws_to_preprocess)
-                PropertyManager.sample_run.synchronize_ws(ws_to_preprocess)
-            except AttributeError:
-                pass
-            #---------------
-            #
-            #Run the conversion first on the sample
-            deltaE_ws_sample = self.mono_sample(PropertyManager.sample_run,ei_guess,PropertyManager.wb_run,
-                                                self.map_file,masking)
-            #
-
-            ei = (deltaE_ws_sample.getRun().getLogData("Ei").value)
-            # PropertyManager.incident_energy.set_current(ei) let's not do it --
-            # this makes subsequent calls to this method depend on previous calls
-            prop_man.log("*** Incident energy found for sample run: {0} meV".format(ei),'notice')
-            #
-            # calculate absolute units integral and apply it to the workspace
-            # or use previously cashed value
-            cashed_mono_int = PropertyManager.mono_correction_factor.get_val_from_cash(prop_man)
-            if mono_van_cache_num is not None or self.mono_correction_factor or cashed_mono_int:
-                deltaE_ws_sample,mono_ws_base = self._do_abs_corrections(deltaE_ws_sample,cashed_mono_int,
-                                                                         ei_guess,mono_ws_base,tof_range, cut_ind,num_ei_cuts)
-            else:
-                pass # no absolute units corrections
-            # ensure that the sample_run name is intact with the sample workspace
-            PropertyManager.sample_run.synchronize_ws(deltaE_ws_sample)
-            if prop_man.correct_absorption_on is not None:
-                abs_shape = prop_man.correct_absorption_on
-                deltaE_ws_sample = abs_shape.correct_absorption(deltaE_ws_sample,prop_man.abs_corr_info)
-            #
-            #
-            # Do custom post-processing if such operation is defined
-            try:
-                deltaE_ws_sample = self.do_postprocessing(deltaE_ws_sample)
-                PropertyManager.sample_run.synchronize_ws(deltaE_ws_sample)
-            except AttributeError:
-                pass
-            self.save_results(deltaE_ws_sample)
+                # Do custom preprocessing if such operation is defined
+                try:
+                    ws_to_preprocess = PropertyManager.sample_run.get_workspace()
+                    ws_to_preprocess = self.do_preprocessing(ws_to_preprocess)
+                    PropertyManager.sample_run.synchronize_ws(ws_to_preprocess)
+                except AttributeError:
+                    pass
+                #---------------
+                #
+                #Run the conversion first on the sample
+                deltaE_ws_sample = self.mono_sample(PropertyManager.sample_run,ei_guess,PropertyManager.wb_run,
+                                                    self.map_file,masking)
+                #
 
-            # prepare output workspace
-            results_name = deltaE_ws_sample.name()
-            if out_ws_name:
-                if self._multirep_mode:
-                    result.append(deltaE_ws_sample)
+                ei = (deltaE_ws_sample.getRun().getLogData("Ei").value)
+                # PropertyManager.incident_energy.set_current(ei) let's not do it --
+                # this makes subsequent calls to this method depend on previous calls
+                prop_man.log("*** Incident energy found for sample run: {0} meV".format(ei),'notice')
+                #
+                # calculate absolute units integral and apply it to the workspace
+                # or use previously cashed value
+                cashed_mono_int = PropertyManager.mono_correction_factor.get_val_from_cash(prop_man)
+                if mono_van_cache_num is not None or self.mono_correction_factor or cashed_mono_int:
+                    deltaE_ws_sample,mono_ws_base = self._do_abs_corrections(deltaE_ws_sample,cashed_mono_int,
+                                                                             ei_guess,mono_ws_base,tof_range, cut_ind,num_ei_cuts)
+                else:
+                    pass # no absolute units corrections
+                # ensure that the sample_run name is intact with the sample workspace
+                PropertyManager.sample_run.synchronize_ws(deltaE_ws_sample)
+                if prop_man.correct_absorption_on is not None:
+                    abs_shape = prop_man.correct_absorption_on
+                    deltaE_ws_sample = abs_shape.correct_absorption(deltaE_ws_sample,prop_man.abs_corr_info)
+                #
+                #
+                # Do custom post-processing if such operation is defined
+                try:
+                    deltaE_ws_sample = self.do_postprocessing(deltaE_ws_sample)
+                    PropertyManager.sample_run.synchronize_ws(deltaE_ws_sample)
+                except AttributeError:
+                    pass
+                # prepare output workspace
+                results_name = deltaE_ws_sample.name()
+
+                if results_saver is None:
+                    self.save_results(deltaE_ws_sample)
                 else:
-                    if results_name != out_ws_name: # This actually returns deltaE_ws_sample.name()
-                        # to the state, defined in ADS. Intentionally skip renaming here.
-                        result = PropertyManager.sample_run.synchronize_ws(deltaE_ws_sample)
+                    save_file,formats = self._get_save_target(deltaE_ws_sample)
+                    if save_file is not None:
+                        # The saving thread must not modify the ADS, so give the workspace the name nxspe
+                        # supports here and restore the name once all results are saved
+                        if 'nxspe' in formats:
+                            name_supported = self._get_nxspe_name(results_name)
+                            if name_supported != results_name:
+                                RenameWorkspace(InputWorkspace=results_name,OutputWorkspace=name_supported)
+                                renamed_results.append((name_supported,results_name))
+                        saved_results.append(results_saver.submit(self._write_results,deltaE_ws_sample,save_file,formats,
+                                                                  prop_man.apply_kikf_correction,prop_man.psi))
+                if out_ws_name:
+                    if self._multirep_mode:
+                        result.append(deltaE_ws_sample)
                     else:
-                        result = deltaE_ws_sample
-            else: # delete workspace if no output is requested
-                result = None
-            self._old_runs_list.append(results_name)
-        #end_for
+                        if results_name != out_ws_name: # This actually returns deltaE_ws_sample.name()
+                            # to the state, defined in ADS. Intentionally skip renaming here.
+                            result = PropertyManager.sample_run.synchronize_ws(deltaE_ws_sample)
+                        else:
+                            result = deltaE_ws_sample
+                else: # delete workspace if no output is requested
+                    result = None
+                self._old_runs_list.append(results_name)
+            #end_for
+        finally:
+            # wait for the results being saved and restore their names, also if a chunk has failed
+            if results_saver is not None:
+                results_saver.shutdown(wait=True)
+                for name_supported,results_name in renamed_results:
+                    RenameWorkspace(InputWorkspace=name_supported,OutputWorkspace=results_name)
 #------------------------------------------------------------------------------------------
 # END Main loop over incident energies
 #------------------------------------------------------------------------------------------
+        # re-raise errors of saving, if any
+        for saved in saved_results:
+            saved.result()
 
         self.clean_up_convert_to_energy(start_time)
         return result
@@ -1245,6 +1277,17 @@ class DirectEnergyConversion(object):
         Save the result workspace to the specified filename using the list of formats specified in
         formats. If formats is None then the default list is used
         """
+        save_file,formats = self._get_save_target(workspace,save_file,formats)
+        if save_file is None:
+            return
+        self._write_results(workspace,save_file,formats,self.prop_man.apply_kikf_correction,self.prop_man.psi)
+
+    def _get_save_target(self, workspace, save_file=None, formats=None):
+        """ Resolve the file name (without extension) and the set of formats to save
+            the result workspace with. The default file name depends on the current incident
+            energy, so it has to be resolved before the next energy is processed.
+            Returns None instead of the file name if there is nothing to save.
+        """
         if formats:
            # clear up existing save formats as one is defined in parameters
             self.prop_man.save_format = None
@@ -1263,7 +1306,7 @@ class DirectEnergyConversion(object):
             if workspace is None:
                 self.prop_man.log("DirectEnergyConversion:save_results: Nothing to save",
                                   'warning')
-                return
+                return (None,formats)
             else:
                 save_file = workspace.name()
         elif os.path.isdir(save_file):
@@ -1272,34 +1315,45 @@ class DirectEnergyConversion(object):
             raise ValueError('Empty filename is not allowed for saving')
         else:
             pass
+        return (save_file,copy.copy(formats))
 
+    def _write_results(self, workspace, save_file, formats, kikf_scaling, psi):
+        """ Write the result workspace to the files with the name save_file and
+            the extensions of the requested formats
+        """
         prop_man = self.prop_man
         name_orig = workspace.name()
-        for file_format  in formats:
-            for case in common.switch(file_format):
-                if case('nxspe'):
-                    filename = save_file + '.nxspe'
-                   # nxspe can not write workspace with / in the name
-                   # (something to do with folder names inside nxspe)
-                    name_supported = name_orig.replace('/','of')
-                    if name_supported != name_orig:
-                        RenameWorkspace(InputWorkspace=name_orig,OutputWorkspace=name_supported)
-                    SaveNXSPE(InputWorkspace=name_supported,Filename= filename,
-                              KiOverKfScaling=prop_man.apply_kikf_correction,psi=prop_man.psi)
-                    if name_supported != name_orig:
-                        RenameWorkspace(InputWorkspace=name_supported,OutputWorkspace=name_orig)
-                    break
-                if case('spe'):
-                    filename = save_file + '.spe'
-                    SaveSPE(InputWorkspace=workspace,Filename= filename)
-                    break
-                if case('nxs'):
-                    filename = save_file + '.nxs'
-                    SaveNexus(InputWorkspace=workspace,Filename= filename)
-                    break
-                if case(): # default, could also just omit condition or 'if True'
-                    prop_man.log("Unknown file format {0} requested to save results. No saving performed this format".
-                                 format(file_format))
+        with common.FILE_IO_LOCK:
+            for file_format  in formats:
+                for case in common.switch(file_format):
+                    if case('nxspe'):
+                        filename = save_file + '.nxspe'
+                        name_supported = self._get_nxspe_name(name_orig)
+                        if name_supported != name_orig:
+                            RenameWorkspace(InputWorkspace=name_orig,OutputWorkspace=name_supported)
+                        SaveNXSPE(InputWorkspace=name_supported,Filename= filename,
+                                  KiOverKfScaling=kikf_scaling,psi=psi)
+                        if name_supported != name_orig:
+                            RenameWorkspace(InputWorkspace=name_supported,OutputWorkspace=name_orig)
+                        break
+                    if case('spe'):
+                        filename = save_file + '.spe'
+                        SaveSPE(InputWorkspace=workspace,Filename= filename)
+                        break
+                    if case('nxs'):
+                        filename = save_file + '.nxs'
+                        SaveNexus(InputWorkspace=workspace,Filename= filename)
+                        break
+                    if case(): # default, could also just omit condition or 'if True'
+                        prop_man.log("Unknown file format {0} requested to save results. No saving performed this format".
+                                     format(file_format))
+
+    @staticmethod
+    def _get_nxspe_name(ws_name):
+        """ nxspe can not write workspace with / in the name
+            (something to do with folder names inside nxspe)
+        """
+        return ws_name.replace('/','of')
     #########
 
     @property
@@ -1316,6 +1370,21 @@ class DirectEnergyConversion(object):
             raise KeyError("Property manager can be initialized by an instance of ProperyManager only")
     #########
 
+    @property
+    def save_multirep_in_background(self):
+        """ If True, the results of each incident energy of a multirep run are saved
+            on a background thread, while the next incident energy is reduced.
+            The results are returned in the order of the incident energies.
+            Only the writing of the results overlaps with the reduction, and it waits
+            for the NeXus loads of the reduction, so at most the time to write the
+            results is saved."""
+        return self._save_multirep_in_background
+
+    @save_multirep_in_background.setter
+    def save_multirep_in_background(self,value):
+        self._save_multirep_in_background = bool(value)
+    #########
+
     @property
     def spectra_masks(self):
         """ The property keeps a workspace with masks workspace name,
@@ -1570,6 +1639,8 @@ class DirectEnergyConversion(object):
         object.__setattr__(self,'_multirep_mode',False)
         # list of workspace names, processed earlier
         object.__setattr__(self,'_old_runs_list',[])
+        # save results of multirep chunks while the next chunk is reduced
+        object.__setattr__(self,'_save_multirep_in_background',False)
 
         all_methods = dir(self)
         # define list of all existing properties, which have descriptors
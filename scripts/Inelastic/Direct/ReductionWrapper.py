@@ -10,8 +10,10 @@ from mantid import config, api
 from mantid.kernel import funcinspect
 
 from Direct.PropertyManager import PropertyManager
+from Direct.RunDescriptor import build_run_file_name
 # this import is used by children
 from Direct.DirectEnergyConversion import DirectEnergyConversion
+from Direct.RunFileWatcher import RunFileWatcher
 from types import MethodType  # noqa
 import os
 import re
@@ -79,6 +81,9 @@ class ReductionWrapper(object):
         # used during debugging "wait for files" workflow
         # instead of Pause algorithm
         self._debug_wait_for_files_operation = None
+        # watcher of the data search directories, waking up the reduction
+        # waiting for files as soon as an expected file is written
+        self._run_file_watcher = None
         # tolerance to change in some tests if default is not working well
         self._tolerr = None
 
@@ -446,6 +451,34 @@ class ReductionWrapper(object):
         else:
             Pause(timeToWait)
 
+    def _get_run_file_watcher(self):
+        """ Return the watcher of the data search directories, creating it on first use"""
+        if self._run_file_watcher is None:
+            self._run_file_watcher = RunFileWatcher(config.getDataSearchDirs())
+            log_file = self.reducer.prop_man.archive_upload_log_file
+            if len(log_file) > 0:
+                # new records in archive progress log should wake up the reduction too
+                self._run_file_watcher.watch_file(log_file)
+        return self._run_file_watcher
+
+    def _wait_for_runs(self, runs, timeToWait=0, fext=None):
+        """ Wait for the files of the runs provided to be written to the data search path.
+
+            Returns as soon as a file of any of the runs has been closed by its writer,
+            the archive progress log has changed, or after timeToWait seconds, whatever comes first.
+            Directories on network file systems are only checked for the run files after timeToWait seconds.
+        """
+        if self._debug_wait_for_files_operation is not None:
+            self._run_pause(timeToWait)
+            return
+        prop_man = self.reducer.prop_man
+        if not fext:
+            fext = prop_man.data_file_ext
+        file_names = [build_run_file_name(int(run), prop_man.short_instr_name, None, fext) for run in runs]
+        watcher = self._get_run_file_watcher()
+        watcher.expect(runs, file_names)
+        watcher.wait_for_runs(timeToWait)
+
     #
     def _check_progress_log_run_completed(self,run_number_requested):
         """ Method to verify experiment progress log file and check if the file to reduce
@@ -510,24 +543,25 @@ class ReductionWrapper(object):
                     '*** Can not verify if file is accessible. Install h5py to be able to check file access in waiting mode',
                     'notice')
             return
-        ic = 0
         # ok = os.access(input_file,os.R_OK) # does not work in this case
         try:
             f = h5py.File(input_file, 'r')
             ok = True
         except IOError:
             ok = False
+            watcher = self._get_run_file_watcher()
+            deadline = time.time() + 240
             while not ok:
                 self.reducer.prop_man.log \
                     ('*** File found but access can not be gained. Waiting for 10 sec', 'notice')
-                time.sleep(10)
-                ic = ic + 1
+                # returns earlier if the file is closed by its writer
+                watcher.wait_for_file(input_file, 10)
                 try:
                     f = h5py.File(input_file, 'r')
                     ok = True
                 except IOError:
                     ok = False
-                    if ic > 24:
+                    if time.time() > deadline:
                         raise IOError \
                             ("Can not get read access to input file: " + input_file + " after 4 min of trying")
         if ok:
@@ -566,7 +600,7 @@ class ReductionWrapper(object):
                 self.reducer.prop_man.log("*** Waiting {0} sec for file {1} to appear on the data search path"
                                           .format(timeToWait, file_hint), 'notice')
 
-                self._run_pause(timeToWait)
+                self._wait_for_runs([run_number_requsted], timeToWait, fext_requested)
                 available,_,_ = self._check_progress_log_run_completed(run_number_requsted)
                 if available:
                     Found, input_file = PropertyManager.sample_run.find_file(
@@ -625,7 +659,7 @@ class ReductionWrapper(object):
 
                 self.reducer.prop_man.log("*** Waiting {0} sec for runs {1} to appear on the data search path"
                                           .format(timeToWait, str(missing)), 'notice')
-                self._run_pause(timeToWait)
+                self._wait_for_runs(missing, timeToWait)
                 ok, missing, found = self.reducer.prop_man.find_files_to_sum()
                 n_found = len(found)
             # end not(ok)
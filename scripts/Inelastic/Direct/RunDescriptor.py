@@ -12,6 +12,7 @@
 from mantid.simpleapi import *
 from mantid.kernel import funcinspect
 from Direct.PropertiesDescriptors import *
+import Direct.CommonFunctions as common
 import re
 import collections
 
@@ -1112,12 +1113,13 @@ class RunDescriptor(PropDescriptor):
         else:
             mon_load_option = 'Separate'
         #
-        try:#LoadEventNexus does not understand Separate and throws.
-            # And event loader always loads monitors separately, so this issue used to
-            # call appropritate load command
-            Load(Filename=data_file, OutputWorkspace=ws_name,LoadMonitors = mon_load_option)
-        except ValueError: # if loader thrown, its probably event file rejected "separate" options
-            Load(Filename=data_file, OutputWorkspace=ws_name,LoadMonitors = True, MonitorsLoadOnly='Histogram')
+        with common.FILE_IO_LOCK:
+            try:#LoadEventNexus does not understand Separate and throws.
+                # And event loader always loads monitors separately, so this issue used to
+                # call appropritate load command
+                Load(Filename=data_file, OutputWorkspace=ws_name,LoadMonitors = mon_load_option)
+            except ValueError: # if loader thrown, its probably event file rejected "separate" options
+                Load(Filename=data_file, OutputWorkspace=ws_name,LoadMonitors = True, MonitorsLoadOnly='Histogram')
         RunDescriptor._logger("Loaded {0}".format(data_file),'information')
 
         loaded_ws = mtd[ws_name]
@@ -1192,7 +1194,8 @@ class RunDescriptor(PropDescriptor):
         if isinstance(ws_calibration, str) : # It can be only a file (got it from calibration property)
             RunDescriptor._logger('load_data: Moving detectors to positions specified in cal file {0}'.format(ws_calibration),'debug')
             # Pull in pressures, thicknesses & update from cal file
-            LoadDetectorInfo(Workspace=loaded_ws, DataFilename=ws_calibration, RelocateDets=True)
+            with common.FILE_IO_LOCK:
+                LoadDetectorInfo(Workspace=loaded_ws, DataFilename=ws_calibration, RelocateDets=True)
             AddSampleLog(Workspace=loaded_ws,LogName="calibrated",LogText=str(ws_calibration))
         elif isinstance(ws_calibration, api.Workspace):
             RunDescriptor._logger('load_data: Copying detectors positions from workspace {0}: '.format(ws_calibration.name()),'debug')
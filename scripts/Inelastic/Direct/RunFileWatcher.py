@@ -0,0 +1,303 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+# pylint: disable=invalid-name
+""" Watcher, which wakes up the waiting reduction as soon as an expected run file
+    has been written to one of the data search directories.
+
+    On Linux local directories are watched with inotify, which reports a file
+    the moment its writer closes it. inotify does not see files written by other hosts to
+    network file systems (NFS, CIFS etc.), so directories on these, as well as all directories
+    where inotify is not available, are polled instead: at the end of each waiting interval
+    the watcher checks if the expected files exist there.
+"""
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import struct
+import sys
+import time
+
+# inotify event masks (see man inotify)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+# a file is complete when its writer closed it or when it was moved into place
+COMPLETE_MASK = IN_CLOSE_WRITE | IN_MOVED_TO
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+# types of the file systems, changes on which made by other hosts are not reported by inotify
+NETWORK_FILE_SYSTEMS = frozenset(['nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'ncpfs', 'afs', 'ceph', 'glusterfs',
+                                  'lustre', 'gpfs', '9p', 'davfs', 'fuse.sshfs'])
+
+
+def _load_inotify():
+    """ Return the C library, providing inotify functions, or None if inotify is not available"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def _read_mounts():
+    """ Return the list of (mount point, file system type) of the mounted file systems"""
+    try:
+        with open('/proc/self/mounts') as mounts_file:
+            lines = mounts_file.readlines()
+    except (IOError, OSError):
+        return []
+    mounts = []
+    for line in lines:
+        fields = line.split()
+        if len(fields) > 2:
+            # spaces etc. in the mount points are octal escaped, e.g. \040
+            mount_point = re.sub(r'\\([0-7]{3})', lambda match: chr(int(match.group(1), 8)), fields[1])
+            mounts.append((mount_point, fields[2]))
+    return mounts
+
+
+def is_on_network_file_system(directory, mounts):
+    """ True if the directory is on one of the network file systems among the mounts provided"""
+    path = os.path.realpath(directory)
+    mount_point, fs_type = '', None
+    for point, point_type in mounts:
+        if (path == point or path.startswith(point.rstrip('/') + '/')) and len(point) >= len(mount_point):
+            mount_point, fs_type = point, point_type
+    return fs_type in NETWORK_FILE_SYSTEMS
+
+
+def run_numbers_in_file_name(file_name):
+    """ Return the set of numbers, which may be the run number of a run file, e.g.
+        MAR00012345.nxs or LET12345_monitors.nxs
+    """
+    base_name = os.path.basename(file_name)
+    return set(int(number) for number in re.findall(r'\d+', base_name))
+
+
+class RunFileWatcher(object):
+    """ Watches data directories for arriving run files and keeps the queue of the runs, the reduction expects.
+
+        Usage:
+        watcher = RunFileWatcher(config.getDataSearchDirs())
+        watcher.expect([12345,12346], ['MAR12345.nxs', 'MAR12346.nxs'])
+        arrived = watcher.wait_for_runs(60)  # returns as soon as any expected run is written
+    """
+
+    def __init__(self, directories, use_inotify=True):
+        """ Start watching the directories provided. Directories, which do not exist, are ignored.
+
+            use_inotify -- if False, all directories are polled even where inotify is available
+        """
+        self._directories = [os.path.abspath(directory) for directory in directories
+                             if directory and os.path.isdir(directory)]
+        # expected run numbers in the order they have been requested
+        self._expected = []
+        # names of the files of the expected runs, checked for in the polled directories
+        self._expected_files = set()
+        # files, any change of which should wake up the waiting reduction (e.g. archive progress logs)
+        # with their modification times, checked for the files in the polled directories
+        self._trigger_files = {}
+        self._libc = _load_inotify() if use_inotify else None
+        self._mounts = _read_mounts() if self._libc is not None else []
+        self._fd = None
+        self._watches = {}
+        if self._libc is not None:
+            self._start_inotify()
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        """ Stop watching the directories"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._watches = {}
+
+    @property
+    def uses_inotify(self):
+        """ True if any of the directories is watched with inotify rather than polled"""
+        return self._fd is not None
+
+    @property
+    def directories(self):
+        """ The list of the directories watched"""
+        return list(self._directories)
+
+    @property
+    def polled_directories(self):
+        """ The list of the directories, which are polled for the expected files as inotify can not watch them"""
+        watched = set(self._watches.values())
+        return [directory for directory in self._directories if directory not in watched]
+
+    def expect(self, runs, file_names=()):
+        """ Add the run numbers provided to the queue of expected runs
+
+            file_names -- the names (without path) of the files of these runs, which are checked for
+                          in the directories, which can not be watched with inotify
+        """
+        for run in runs:
+            run = int(run)
+            if run not in self._expected:
+                self._expected.append(run)
+        self._expected_files.update(os.path.basename(file_name) for file_name in file_names)
+
+    @property
+    def expected_runs(self):
+        """ The run numbers expected, in the order they have been requested"""
+        return list(self._expected)
+
+    def watch_file(self, file_name):
+        """ Wake up waiting when the file provided changes.  The directory of the file is watched too."""
+        file_name = os.path.abspath(file_name)
+        self._trigger_files[file_name] = self._modification_time(file_name)
+        directory = os.path.dirname(file_name)
+        if directory not in self._directories and os.path.isdir(directory):
+            self._directories.append(directory)
+            if self._fd is not None:
+                self._add_watch(directory)
+
+    def wait_for_runs(self, timeout):
+        """ Wait until a file of one of the expected runs has been written, a watched file changed,
+            or the timeout (in seconds) expired.
+
+            Returns the list of expected run numbers which files have arrived. These runs are
+            removed from the queue of expected runs.
+        """
+        deadline = time.time() + timeout
+        while True:
+            arrived, triggered = self._arrived_runs(self._wait_for_events(deadline))
+            if arrived or triggered or time.time() >= deadline:
+                self._expected = [run for run in self._expected if run not in arrived]
+                self._expected_files = set(file_name for file_name in self._expected_files
+                                           if run_numbers_in_file_name(file_name).intersection(self._expected))
+                return arrived
+
+    def wait_for_file(self, file_name, timeout):
+        """ Wait until the file provided has been closed by its writer or the timeout expired.
+
+            Returns True if the file has been closed. In a polled directory the whole timeout
+            is waited and False is returned.
+        """
+        file_name = os.path.abspath(file_name)
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if file_name in self._wait_for_events(deadline):
+                return True
+        return False
+
+    def _arrived_runs(self, file_names):
+        """ Return the expected runs which files are among the files provided, and if a watched file has changed"""
+        arrived = []
+        triggered = False
+        for file_name in file_names:
+            if file_name in self._trigger_files:
+                triggered = True
+                continue
+            numbers = run_numbers_in_file_name(file_name)
+            for run in self._expected:
+                if run in numbers and run not in arrived:
+                    arrived.append(run)
+        return arrived, triggered
+
+    def _wait_for_events(self, deadline):
+        """ Wait for the next changes in the watched directories, but not beyond the deadline.
+            The polled directories are checked once the deadline has been reached.
+
+            Returns the set of full names of the files, which have been completed.
+        """
+        remaining = max(deadline - time.time(), 0.)
+        if self._fd is None:
+            time.sleep(remaining)
+            return self._poll_files()
+        completed = self._read_inotify_events(remaining)
+        if time.time() >= deadline:
+            completed.update(self._poll_files())
+        return completed
+
+    #----------------------------------------------------------------------------------------
+    # inotify
+    #----------------------------------------------------------------------------------------
+    def _start_inotify(self):
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return
+        self._fd = fd
+        for directory in self._directories:
+            self._add_watch(directory)
+        if not self._watches:
+            # nothing can be watched, e.g. all directories are on network file systems
+            self.close()
+
+    def _add_watch(self, directory):
+        if is_on_network_file_system(directory, self._mounts):
+            # the watch would be established, but never report the files written by other hosts
+            return
+        wd = self._libc.inotify_add_watch(self._fd, directory.encode(sys.getfilesystemencoding()), WATCH_MASK)
+        if wd >= 0:
+            self._watches[wd] = directory
+
+    def _read_inotify_events(self, timeout):
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        completed = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, name_length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + name_length].rstrip(b'\0').decode(sys.getfilesystemencoding(), 'replace')
+            offset += name_length
+            if wd not in self._watches or not name:
+                continue
+            file_name = os.path.join(self._watches[wd], name)
+            if mask & COMPLETE_MASK or file_name in self._trigger_files:
+                completed.add(file_name)
+        return completed
+
+    #----------------------------------------------------------------------------------------
+    # polling
+    #----------------------------------------------------------------------------------------
+    @staticmethod
+    def _modification_time(file_name):
+        try:
+            return os.path.getmtime(file_name)
+        except OSError:
+            return None
+
+    def _poll_files(self):
+        """ Return the expected files, which exist in the polled directories,
+            and the watched files there, which modification time has changed
+        """
+        polled_directories = self.polled_directories
+        changed = set()
+        for directory in polled_directories:
+            changed.update(os.path.join(directory, file_name) for file_name in self._expected_files
+                           if os.path.exists(os.path.join(directory, file_name)))
+        for file_name, last_modification_time in self._trigger_files.items():
+            if os.path.dirname(file_name) not in polled_directories:
+                continue
+            modification_time = self._modification_time(file_name)
+            if last_modification_time != modification_time:
+                changed.add(file_name)
+                self._trigger_files[file_name] = modification_time
+        return changed
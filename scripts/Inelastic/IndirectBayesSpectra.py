@@ -0,0 +1,290 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+#pylint: disable=invalid-name,too-many-arguments,too-many-locals
+"""
+Spectrum by spectrum calls of the Fortran Bayes programs used by BayesQuasi and BayesStretch.
+
+The Fortran programs only return the fitted curves, and write the fitted parameters to ASCII files
+that are appended to for each spectrum. To fit spectra in parallel, each spectrum is fitted on its
+own as a single spectrum run in a temporary directory. The worker reads its parameters back and
+returns them as arrays with the fit, so the algorithm assembles its output workspaces in memory.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from IndirectImport import import_f2py
+from IndirectCommon import ExtractFloat, PadArray
+
+# length of the arrays of values for each group in the Fortran programs
+GROUP_ARRAY_LENGTH = 51
+
+_FORTRAN_MODULES = {}
+
+
+def _fortran(lib_base_name):
+    if lib_base_name not in _FORTRAN_MODULES:
+        _FORTRAN_MODULES[lib_base_name] = import_f2py(lib_base_name)
+    return _FORTRAN_MODULES[lib_base_name]
+
+
+def map_spectra(function, arguments, number_of_processes=1):
+    """
+    Call a function with the arguments for each spectrum, sharing the spectra between worker
+    processes if there is more than one
+
+    @param function: module level function to call
+    @param arguments: list of tuples of the arguments for each spectrum
+    @param number_of_processes: number of worker processes
+    @return: iterator over the results in the order of the spectra
+    """
+    if number_of_processes > 1 and len(arguments) > 1:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(number_of_processes, len(arguments)), mp_context=context) as executor:
+            for result in executor.map(function, *zip(*arguments)):
+                yield result
+    else:
+        for args in arguments:
+            yield function(*args)
+
+
+def run_quasi(prog, numb, Xv, Yv, Ev, reals, fitOp, Xdat, Xb, Yb, Eb, Wy, We, dtn, xsc, wrks, wrkr, lwrk):
+    """
+    Fit a spectrum with one of the QLres, QLdata or QLse programs
+
+    @param prog: QLr, QLd or QSe
+    @return: the fit, trimmed to the number of points: (nd, xout, yout, eout, yfit, yprob)
+    """
+    if prog == 'QLr':
+        fit = _fortran("QLres").qlres(numb, Xv, Yv, Ev, reals, fitOp, Xdat, Xb, Yb, Wy, We, dtn, xsc,
+                                      wrks, wrkr, lwrk)
+    elif prog == 'QLd':
+        fit = _fortran("QLdata").qldata(numb, Xv, Yv, Ev, reals, fitOp, Xdat, Xb, Yb, Eb, Wy, We,
+                                        wrks, wrkr, lwrk)
+    elif prog == 'QSe':
+        fit = _fortran("QLse").qlstexp(numb, Xv, Yv, Ev, reals, fitOp, Xdat, Xb, Yb, Wy, We, dtn, xsc,
+                                       wrks, wrkr, lwrk)
+    else:
+        raise ValueError('Unknown program ' + prog)
+    nd, xout, yout, eout, yfit, yprob = fit
+    return nd, xout[:nd], yout[:nd], eout[:nd], yfit[:4 * nd], yprob[:4]
+
+
+def run_quasi_spectrum(prog, spectrum, numb, Xv, Yv, Ev, reals, fitOp, Xdat, Xb, Yb, Eb, Wy, We, dtn, xsc, name,
+                       wrkr):
+    """
+    Fit a single spectrum of a sample in a temporary directory and read back its parameters
+
+    @param spectrum: index of the spectrum in the sample, used to select its width and ResNorm values
+    @param name: name of the sample, used to name the Fortran output files
+    @return: the fit, as returned by run_quasi, and the parameters, as returned by read_qse_file for QSe,
+             or a tuple of read_ql_file for each number of peaks for QLr and QLd
+    """
+    numb = _single_spectrum(numb)
+    Wy, We, dtn, xsc = [PadArray([values[spectrum]], GROUP_ARRAY_LENGTH) for values in (Wy, We, dtn, xsc)]
+    directory = tempfile.mkdtemp()
+    try:
+        wrks = os.path.join(directory, name)
+        fit = run_quasi(prog, numb, Xv, Yv, Ev, reals, fitOp, Xdat, Xb, Yb, Eb, Wy, We, dtn, xsc, wrks, wrkr,
+                        len(wrks))
+        prefix = wrks + '_' + prog
+        if prog == 'QSe':
+            parameters = read_qse_file(prefix + '.qse')
+        else:
+            parameters = tuple(read_ql_file(prefix + '.ql' + str(nl), nl) for nl in range(1, 4))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return fit, parameters
+
+
+def run_stretch(numb, Xv, Yv, Ev, reals, fitOp, Xdat, Xb, Yb, wrks, wrkr, lwrk, nbet, nsig):
+    """
+    Fit a spectrum with the Quest program
+
+    @return: sigma and beta values, and the contour, trimmed to nsig and nbet: (xsout, ysout, xbout, ybout, zpout)
+    """
+    quest = _fortran("Quest").quest
+    xsout, ysout, xbout, ybout, zpout = quest(numb, Xv, Yv, Ev, reals, fitOp, Xdat, Xb, Yb, wrks, wrkr, lwrk)
+    return xsout[:nsig], ysout[:nsig], xbout[:nbet], ybout[:nbet], zpout[:nsig * nbet]
+
+
+def run_stretch_spectrum(numb, Xv, Yv, Ev, reals, fitOp, Xdat, Xb, Yb, name, wrkr, nbet, nsig):
+    """
+    Fit a single spectrum of a sample with the Quest program in a temporary directory
+
+    @return: as run_stretch
+    """
+    directory = tempfile.mkdtemp()
+    try:
+        wrks = os.path.join(directory, name)
+        return run_stretch(_single_spectrum(numb), Xv, Yv, Ev, reals, fitOp, Xdat, Xb, Yb, wrks, wrkr, len(wrks),
+                           nbet, nsig)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _single_spectrum(numb):
+    """Set the number of spectra and the spectrum number for the Fortran programs to a run of one spectrum"""
+    numb = list(numb)
+    numb[0] = 1
+    numb[1] = 1
+    return numb
+
+
+def merge_parameters(parameters):
+    """
+    Join the parameters read for single spectra into the form read from the file for all of the spectra
+
+    @param parameters: list of the parameters of each spectrum, as tuples of lists with one value per spectrum
+    """
+    first = parameters[0]
+    if isinstance(first, tuple):
+        return tuple(merge_parameters([spectrum[i] for spectrum in parameters]) for i in range(len(first)))
+    return [value for spectrum in parameters for value in spectrum]
+
+
+def _read_ascii_file(file_path):
+    with open(file_path, 'r') as handle:
+        return [line.rstrip() for line in handle]
+
+
+def read_ql_file(file_path, nl):
+    """
+    Read the parameters from a file written by QLres or QLdata
+
+    @param nl: number of Lorentzian peaks the file is for
+    @return: Q values, the (amplitude, FWHM, height) values and their errors, each a list with one entry per spectrum
+    """
+    # offset to ignore header
+    header_offset = 8
+    block_size = 4 + nl * 3
+
+    asc = _read_ascii_file(file_path)
+    # extract number of blocks from the file header
+    num_blocks = int(ExtractFloat(asc[3])[0])
+
+    q_data = []
+    amp_data, FWHM_data, height_data = [], [], []
+    amp_error, FWHM_error, height_error = [], [], []
+
+    # iterate over each block of fit parameters in the file
+    # each block corresponds to a single column in the final workspace
+    for block_num in range(num_blocks):
+        lower_index = header_offset + (block_size * block_num)
+        upper_index = lower_index + block_size
+
+        # create iterator for each line in the block
+        line_pointer = (ExtractFloat(line) for line in asc[lower_index:upper_index])
+
+        # Q,AMAX,HWHM,BSCL,GSCL
+        line = next(line_pointer)
+        Q, AMAX, HWHM, _, _ = line
+        q_data.append(Q)
+
+        # A0,A1,A2,A4
+        line = next(line_pointer)
+        block_height = AMAX * line[0]
+
+        # parse peak data from block
+        block_FWHM = []
+        block_amplitude = []
+        for _ in range(nl):
+            # Amplitude,FWHM for each peak
+            line = next(line_pointer)
+            amp = AMAX * line[0]
+            FWHM = 2. * HWHM * line[1]
+            block_amplitude.append(amp)
+            block_FWHM.append(FWHM)
+
+        # next parse error data from block
+        # SIG0
+        line = next(line_pointer)
+        block_height_e = line[0]
+
+        block_FWHM_e = []
+        block_amplitude_e = []
+        for _ in range(nl):
+            # Amplitude error,FWHM error for each peak
+            # SIGIK
+            line = next(line_pointer)
+            amp = AMAX * math.sqrt(math.fabs(line[0]) + 1.0e-20)
+            block_amplitude_e.append(amp)
+
+            # SIGFK
+            line = next(line_pointer)
+            FWHM = 2.0 * HWHM * math.sqrt(math.fabs(line[0]) + 1.0e-20)
+            block_FWHM_e.append(FWHM)
+
+        # append data from block
+        amp_data.append(block_amplitude)
+        FWHM_data.append(block_FWHM)
+        height_data.append(block_height)
+
+        # append error values from block
+        amp_error.append(block_amplitude_e)
+        FWHM_error.append(block_FWHM_e)
+        height_error.append(block_height_e)
+
+    return q_data, (amp_data, FWHM_data, height_data), (amp_error, FWHM_error, height_error)
+
+
+def read_qse_file(file_path):
+    """
+    Read the parameters from a file written by QLse
+
+    @return: Q values, and the (values, errors) of the amplitude, FWHM and beta, each a list with one entry per spectrum
+    """
+    asc = _read_ascii_file(file_path)
+    ns = int(asc[3].split()[0])
+    first = 7
+    Xout = []
+    Yf, Yi, Yb = [], [], []
+    Ef, Ei, Eb = [], [], []
+    for _ in range(0, ns):
+        first, Q, _, fw, it, be = _se_block(asc, first)
+        Xout.append(Q)
+        Yf.append(fw[0])
+        Ef.append(fw[1])
+        Yi.append(it[0])
+        Ei.append(it[1])
+        Yb.append(be[0])
+        Eb.append(be[1])
+    return Xout, (Yi, Ei), (Yf, Ef), (Yb, Eb)
+
+
+def _se_block(a, index):  # read Ascii block of Integers
+    index += 1
+    val = ExtractFloat(a[index])  # Q,AMAX,HWHM
+    Q = val[0]
+    AMAX = val[1]
+    HWHM = val[2]
+    index += 1
+    val = ExtractFloat(a[index])  # A0
+    int0 = [AMAX * val[0]]
+    index += 1
+    val = ExtractFloat(a[index])  # AI,FWHM index peak
+    fw = [2. * HWHM * val[1]]
+    integer = [AMAX * val[0]]
+    index += 1
+    val = ExtractFloat(a[index])  # SIG0
+    int0.append(val[0])
+    index += 1
+    val = ExtractFloat(a[index])  # SIG3K
+    integer.append(AMAX * math.sqrt(math.fabs(val[0]) + 1.0e-20))
+    index += 1
+    val = ExtractFloat(a[index])  # SIG1K
+    fw.append(2.0 * HWHM * math.sqrt(math.fabs(val[0]) + 1.0e-20))
+    index += 1
+    be = ExtractFloat(a[index])  # EXPBET
+    index += 1
+    val = ExtractFloat(a[index])  # SIG2K
+    be.append(math.sqrt(math.fabs(val[0]) + 1.0e-20))
+    index += 1
+    return index, Q, int0, fw, integer, be  # values as list
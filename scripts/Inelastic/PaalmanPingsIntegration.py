@@ -0,0 +1,167 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+"""
+Numerical integration of the Paalman & Pings absorption factors of a cylindrical
+sample in an optional annular can, as used by CylinderPaalmanPingsCorrection.
+
+The factors for all of the wavelengths and detector angles are evaluated together
+as array operations. The points of the integration over the cross-section of the
+sample only depend on the geometry, so they are found once and shared by every
+wavelength and angle.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import math
+import multiprocessing
+
+import numpy as np
+
+
+def cylinder_absorption(radii, amu_scat, amu_tot_i, amu_tot_s, angles, beam_half_width, number_steps=1,
+                        number_of_processes=1):
+    """
+    Calculate the Paalman & Pings absorption factors of a cylindrical or annular sample and an optional annular can
+
+    @param radii: inner and outer radius of the sample, followed by the outer radius of the can if there is one
+    @param amu_scat: scattering coefficient of the sample, and the can
+    @param amu_tot_i: total attenuation coefficients of the incident path, shape (number of wavelengths, number of annuli)
+    @param amu_tot_s: total attenuation coefficients of the scattered path, shape (number of wavelengths, number of annuli)
+    @param angles: detector angles in degrees
+    @param beam_half_width: half of the width of the beam
+    @param number_steps: number of radial integration steps across the sample
+    @param number_of_processes: number of worker processes to share the angles between
+    @return: Ass, Assc, Acsc and Acc, each with shape (number of angles, number of wavelengths).
+             Assc, Acsc and Acc are zero without a can
+    """
+    angles = np.asarray(angles, dtype=float)
+    if number_of_processes > 1 and angles.size > 1:
+        blocks = np.array_split(angles, min(number_of_processes, angles.size))
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(blocks), mp_context=context) as executor:
+            results = list(executor.map(cylinder_absorption, repeat(radii), repeat(amu_scat), repeat(amu_tot_i),
+                                        repeat(amu_tot_s), blocks, repeat(beam_half_width), repeat(number_steps)))
+        return tuple(np.concatenate([result[i] for result in results]) for i in range(4))
+
+    radii = np.asarray(radii, dtype=float)
+    amu_scat = np.asarray(amu_scat, dtype=float)
+    amu_tot_i = np.asarray(amu_tot_i, dtype=float)
+    amu_tot_s = np.asarray(amu_tot_s, dtype=float)
+    theta = angles * math.pi / 180.
+    args = (radii, theta, amu_scat, amu_tot_i, amu_tot_s)
+
+    number_annuli = len(radii) - 1
+    shape = (theta.size, amu_tot_i.shape[0])
+    ass = np.zeros(shape)
+    assc = np.zeros(shape)
+    acsc = np.zeros(shape)
+    acc = np.zeros(shape)
+    a = beam_half_width
+    if number_annuli < 2:
+        # number of steps are chosen so that the step width is the same for all annuli
+        sum_a, _, area_a = _sum_rom(0, 0, a, radii[0], radii[1], number_steps, *args)
+        sum_b, _, area_b = _sum_rom(0, 0, -a, radii[0], radii[1], number_steps, *args)
+        ass = (sum_a + sum_b) / (area_a + area_b)
+    else:
+        area_s = 0.
+        for i in range(0, number_annuli - 1):
+            ms = _annulus_steps(radii, i, number_steps)
+            sum_1a, sum_2a, area_a = _sum_rom(i, 0, a, radii[i], radii[i + 1], ms, *args)
+            sum_1b, sum_2b, area_b = _sum_rom(i, 0, -a, radii[i], radii[i + 1], ms, *args)
+            area_s += area_a + area_b
+            ass += sum_1a + sum_1b
+            assc += sum_2a + sum_2b
+        ass /= area_s
+        assc /= area_s
+        ms = _annulus_steps(radii, number_annuli - 1, number_steps)
+        sum_1a, sum_2a, area_a = _sum_rom(number_annuli - 1, 1, a, radii[-2], radii[-1], ms, *args)
+        sum_1b, sum_2b, area_b = _sum_rom(number_annuli - 1, 1, -a, radii[-2], radii[-1], ms, *args)
+        area_c = area_a + area_b
+        acsc = (sum_1a + sum_1b) / area_c
+        acc = (sum_2a + sum_2b) / area_c
+    return ass, assc, acsc, acc
+
+
+def _annulus_steps(radii, index, number_steps):
+    """Number of radial steps across an annulus with the same step width as the sample"""
+    steps = int(number_steps * (radii[index + 1] - radii[index]) / (radii[1] - radii[0]))
+    return max(steps, 1)
+
+
+def _sum_rom(n_scat, n_abs, a, r1, r2, ms, radii, theta, amu_scat, amu_tot_i, amu_tot_s):
+    """
+    Sum the attenuation of neutrons scattered in annulus n_scat over the points of the last radial step
+
+    @param n_scat: annulus the neutrons are scattered in
+    @param n_abs: 0 for the attenuation through the sample, and through the sample and can,
+                  1 for the attenuation through the sample and can, and through the can
+    @param a: signed half width of the beam, negative for the half of the annulus with omega in [pi, 2 pi)
+    @return: the two sums, with shape (number of angles, number of wavelengths), and the area they are taken over
+    """
+    r_step = (r2 - r1) / ms
+    # only the last radial step contributes to the sums
+    r = ms * r_step - 0.5 * r_step + r1
+    omega, omega_ster = _integration_points(r, r_step, a)
+    area_y = r * r_step * omega_ster * amu_scat[n_scat]
+
+    # distance the incident and scattered neutrons pass through each annulus: (annulus, [angle,] point)
+    scattered = omega[np.newaxis, :] + (math.pi - theta[:, np.newaxis])
+    number_annuli = len(radii) - 1
+    path_i = np.array([_distance(r, radii[j + 1], omega) - _distance(r, radii[j], omega)
+                       for j in range(number_annuli)])
+    path_s = np.array([_distance(r, radii[j + 1], scattered) - _distance(r, radii[j], scattered)
+                       for j in range(number_annuli)])
+
+    # attenuation for the path through the sample, through all annuli and through the can: (angle, wavelength, point)
+    def attenuation(annulus):
+        return (amu_tot_i[np.newaxis, :, annulus, np.newaxis] * path_i[annulus][np.newaxis, np.newaxis, :]
+                + amu_tot_s[np.newaxis, :, annulus, np.newaxis] * path_s[annulus][:, np.newaxis, :])
+
+    path = [attenuation(0)]
+    if number_annuli == 2:
+        can = attenuation(1)
+        path.extend([path[0] + can, can])
+    else:
+        path.extend([np.zeros_like(path[0]), np.zeros_like(path[0])])
+
+    sum_1 = np.sum(np.exp(-path[n_abs]), axis=-1) * area_y
+    sum_2 = np.sum(np.exp(-path[n_abs + 1]), axis=-1) * area_y
+    return sum_1, sum_2, omega.size * area_y
+
+
+def _integration_points(r, r_step, a):
+    """
+    Find the angles around the ring at radius r that lie within the beam. Stepping through the
+    angles jumps to the mirrored angle after each point outside of the beam
+
+    @return: array of the angles, which may repeat, and the angular step
+    """
+    number_omega = int(math.pi * r / r_step)
+    omega_ster = math.pi / number_omega
+    omega_add = math.pi if a < 0. else 0.
+    omega_deg = -0.5 * omega_ster + omega_add
+    omega = []
+    index = 1
+    for _ in range(number_omega):
+        angle = index * omega_ster + omega_deg
+        if abs(r * math.sin(angle)) <= a:
+            omega.append(angle)
+            index += 1
+        else:
+            index = number_omega - index + 2
+    return np.array(omega), omega_ster
+
+
+def _distance(r, radius, omega):
+    """Distance from a point at radius r to a circle of the given radius along the directions omega"""
+    b = r * np.sin(omega)
+    t = r * np.cos(omega)
+    d = np.sqrt(np.maximum(radius * radius - b * b, 0.))
+    if r <= radius:
+        distance = t + d
+    else:
+        distance = d * (1.0 + np.copysign(1.0, t))
+    return np.where(np.abs(b) < radius, distance, 0.)
@@ -11,6 +11,7 @@ The main entry point that most users should care about is fit_tof().
 """
 import re
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from functools import reduce
 
 from mantid import mtd
@@ -64,7 +65,8 @@ def fit_tof(runs, flags, iterations=1, convergence_threshold=None):
     fit_namer = VesuvioFitNamer.from_vesuvio_input(vesuvio_input, flags['fit_mode'])
 
     vesuvio_fit_routine = VesuvioTOFFitRoutine(ms_helper, fit_helper, corrections_helper,
-                                               mass_profile_collection, fit_namer)
+                                               mass_profile_collection, fit_namer,
+                                               _extract_positive_int_from_flags('fit_threads', flags))
     vesuvio_output, result, exit_iteration = vesuvio_fit_routine(vesuvio_input, iterations, convergence_threshold,
                                                                  _extract_bool_from_flags('output_verbose_corrections',
                                                                                           flags, False),
@@ -88,14 +90,17 @@ class VesuvioTOFFitRoutine(object):
         _mass_profile_collection     An object for storing and manipulating mass values
                                      and profiles.
         _fit_mode                    The fit mode to use in the fitting routine.
+        _number_of_threads           The number of spectra to fit at the same time.
     """
 
-    def __init__(self, ms_helper, fit_helper, corrections_helper, mass_profile_collection, fit_namer):
+    def __init__(self, ms_helper, fit_helper, corrections_helper, mass_profile_collection, fit_namer,
+                 number_of_threads=1):
         self._ms_helper = ms_helper
         self._fit_helper = fit_helper
         self._corrections_helper = corrections_helper
         self._mass_profile_collection = mass_profile_collection
         self._fit_namer = fit_namer
+        self._number_of_threads = number_of_threads
 
     def __call__(self, vesuvio_input, iterations, convergence_threshold, verbose_output=False, compute_caad=False):
         if iterations < 1:
@@ -104,7 +109,7 @@ class VesuvioTOFFitRoutine(object):
         # Creation of a fit routine iteration
         tof_iteration = VesuvioTOFFitRoutineIteration(self._ms_helper, self._fit_helper,
                                                       self._corrections_helper, self._fit_namer,
-                                                      self._mass_profile_collection)
+                                                      self._mass_profile_collection, self._number_of_threads)
 
         update_filter = ignore_hydrogen_filter if vesuvio_input.using_back_scattering_spectra else None
         exit_iteration = 0
@@ -164,14 +169,19 @@ class VesuvioTOFFitRoutineIteration(object):
         _mass_profile_collection     An object for storing and manipulating mass values
                                      and profiles.
         _fit_mode                    The fit mode to use in the fitting routine.
+        _number_of_threads           The number of spectra to fit at the same time. Each spectrum
+                                     is fitted with its own copy of the fit namer, so the workspaces
+                                     of different spectra do not share names.
     """
 
-    def __init__(self, ms_helper, fit_helper, corrections_helper, fit_namer, mass_profile_collection):
+    def __init__(self, ms_helper, fit_helper, corrections_helper, fit_namer, mass_profile_collection,
+                 number_of_threads=1):
         self._ms_corrections_args = ms_helper.to_dict()
         self._fit_helper = fit_helper
         self._fit_namer = fit_namer
         self._corrections_helper = corrections_helper
         self._mass_profile_collection = mass_profile_collection
+        self._number_of_threads = number_of_threads
 
     def __call__(self, vesuvio_input, iteration, verbose_output=False):
         vesuvio_output = VesuvioTOFFitOutput(lambda index:
@@ -185,19 +195,21 @@ class VesuvioTOFFitRoutineIteration(object):
         all_mass_values = self._mass_profile_collection.masses
         fit_mass_values = fit_profile_collection.masses
 
-        for index in range(vesuvio_input.spectra_number):
-            self._fit_namer.set_index(index)
+        def fit_spectrum(index):
             all_profiles = ";".join(self._mass_profile_collection.functions(index))
             fit_profiles = ";".join(fit_profile_collection.functions(index))
+            return self._fit_spectrum(vesuvio_input, index, all_mass_values, all_profiles, fit_mass_values,
+                                      fit_profiles, verbose_output)
+
+        number_of_threads = min(self._number_of_threads, vesuvio_input.spectra_number)
+        if number_of_threads > 1:
+            # The algorithms release the GIL while they execute, the results are merged in order below
+            with ThreadPoolExecutor(max_workers=number_of_threads) as executor:
+                spectra_results = list(executor.map(fit_spectrum, range(vesuvio_input.spectra_number)))
+        else:
+            spectra_results = map(fit_spectrum, range(vesuvio_input.spectra_number))
 
-            # Calculate pre-fit to retrieve parameter approximations for corrections
-            prefit_result = self._prefit(vesuvio_input.sample_data, index, fit_mass_values, fit_profiles)
-
-            # Calculate corrections
-            corrections_result = self._corrections(vesuvio_input.sample_data, vesuvio_input.container_data, index,
-                                                   all_mass_values, all_profiles, prefit_result[1], verbose_output)
-            # Calculate final fit
-            fit_result = self._final_fit(corrections_result[-1], fit_mass_values, fit_profiles)
+        for prefit_result, corrections_result, fit_result in spectra_results:
             # Update output with results from fit
             _update_output(vesuvio_output, prefit_result, corrections_result, fit_result)
 
@@ -210,48 +222,65 @@ class VesuvioTOFFitRoutineIteration(object):
 
         return vesuvio_output
 
-    def _prefit(self, sample_data, index, masses, profiles):
+    def _fit_spectrum(self, vesuvio_input, index, all_mass_values, all_profiles, fit_mass_values, fit_profiles,
+                      verbose_output):
+        fit_namer = self._fit_namer.copy()
+        fit_namer.set_index(index)
+
+        # Calculate pre-fit to retrieve parameter approximations for corrections
+        prefit_result = self._prefit(vesuvio_input.sample_data, index, fit_mass_values, fit_profiles, fit_namer)
+
+        # Calculate corrections
+        corrections_result = self._corrections(vesuvio_input.sample_data, vesuvio_input.container_data, index,
+                                               all_mass_values, all_profiles, prefit_result[1], verbose_output,
+                                               fit_namer)
+        # Calculate final fit
+        fit_result = self._final_fit(corrections_result[-1], fit_mass_values, fit_profiles, fit_namer)
+        return prefit_result, corrections_result, fit_result
+
+    def _prefit(self, sample_data, index, masses, profiles, fit_namer):
         return self._fit_helper(InputWorkspace=sample_data,
                                 WorkspaceIndex=index,
                                 Masses=masses,
                                 MassProfiles=profiles,
                                 OutputWorkspace="__prefit",
-                                FitParameters=self._fit_namer.prefit_parameters_name,
+                                FitParameters=fit_namer.prefit_parameters_name,
                                 StoreInADS=False)
 
-    def _corrections(self, sample_data, container_data, index, masses, profiles, prefit_parameters, verbose_output):
-        correction_args = self._corrections_arguments(container_data, prefit_parameters, verbose_output)
+    def _corrections(self, sample_data, container_data, index, masses, profiles, prefit_parameters, verbose_output,
+                     fit_namer):
+        correction_args = self._corrections_arguments(container_data, prefit_parameters, verbose_output, fit_namer)
         return self._corrections_helper(InputWorkspace=sample_data,
                                         WorkspaceIndex=index,
                                         Masses=masses,
                                         MassProfiles=profiles,
                                         MassIndexToSymbolMap=self._mass_profile_collection.index_to_symbol_map,
-                                        OutputWorkspace=self._fit_namer.corrected_data_name,
-                                        LinearFitResult=self._fit_namer.corrections_parameters_name,
+                                        OutputWorkspace=fit_namer.corrected_data_name,
+                                        LinearFitResult=fit_namer.corrections_parameters_name,
                                         **correction_args)
 
-    def _corrections_arguments(self, container_data, prefit_parameters, verbose_output):
+    def _corrections_arguments(self, container_data, prefit_parameters, verbose_output, fit_namer):
         correction_args = {'FitParameters': prefit_parameters}
 
         if container_data is not None:
             correction_args['ContainerWorkspace'] = container_data
         if verbose_output:
-            correction_args['CorrectionWorkspaces'] = self._fit_namer.corrections_group_name
-            correction_args['CorrectedWorkspaces'] = self._fit_namer.corrected_group_name
+            correction_args['CorrectionWorkspaces'] = fit_namer.corrections_group_name
+            correction_args['CorrectedWorkspaces'] = fit_namer.corrected_group_name
 
         correction_args.update(self._ms_corrections_args)
         return correction_args
 
-    def _final_fit(self, corrected_data, masses, profiles):
+    def _final_fit(self, corrected_data, masses, profiles, fit_namer):
         fit_result = self._fit_helper(InputWorkspace=corrected_data,
                                       WorkspaceIndex=0,
                                       Masses=masses,
                                       MassProfiles=profiles,
                                       OutputWorkspace="__fit_output",
-                                      FitParameters=self._fit_namer.fit_parameters_name,
+                                      FitParameters=fit_namer.fit_parameters_name,
                                       StoreInADS=False)
         DeleteWorkspace(corrected_data)
-        mtd.addOrReplace(self._fit_namer.fit_output_name, fit_result[0])
+        mtd.addOrReplace(fit_namer.fit_output_name, fit_result[0])
         return fit_result
 
 
@@ -625,9 +654,8 @@ class VesuvioFitNamer(object):
         return self._sample_runs + "_CAAD_normalised_iteration_" + str(self._iteration)
 
     def copy(self):
-        return VesuvioFitNamer(self._sample_runs, self._suffix_prefix, self._index_to_string, self._iteration,
-                               self._index, self._index_to_spectrum, self._iteration_string, self._index_string,
-                               self._suffix)
+        return VesuvioFitNamer(self._sample_runs, self._suffix_prefix, self._index_to_spectrum, self._index_to_string,
+                               self._iteration, self._index, self._iteration_string, self._index_string, self._suffix)
 
 
 # -----------------------------------------------------------------------------------------
@@ -1000,6 +1028,15 @@ def _extract_bool_from_flags(key, flags, default=True):
         raise RuntimeError("Expected boolean for '" + key + "', " + str(type(key)) + " found.")
 
 
+def _extract_positive_int_from_flags(key, flags, default=1):
+    value = flags.get(key, default)
+
+    if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+        return value
+    else:
+        raise RuntimeError("Expected positive integer for '" + key + "', " + str(value) + " found.")
+
+
 def _parse_hydrogen_constraint(constraint):
     symbol = constraint.pop("symbol", None)
 
@@ -4,6 +4,8 @@
 #   NScD Oak Ridge National Laboratory, European Spallation Source,
 #   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
 # SPDX - License - Identifier: GPL - 3.0 +
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import NamedTuple, List
 
 from Muon.GUI.Common.contexts.fitting_context import FitInformation
@@ -13,15 +15,33 @@ from Muon.GUI.Common.ADSHandler.muon_workspace_wrapper import MuonWorkspaceWrapp
 from mantid.simpleapi import (RenameWorkspace, ConvertFitFunctionForMuonTFAsymmetry, CalculateMuonAsymmetry,
                               CopyLogs, EvaluateFunction)
 from mantid.api import AnalysisDataService
+from mantid.kernel import ConfigService
 from Muon.GUI.Common.contexts.frequency_domain_analysis_context import FrequencyDomainAnalysisContext
 from Muon.GUI.Common.utilities.run_string_utils import run_list_to_string
 import mantid
 import math
+import os
 
 MUON_ANALYSIS_SUFFIX = ' MA'
 FREQUENCY_DOMAIN_ANALYSIS_SUFFIX = ' FD'
 MUON_ANALYSIS_GUESS_WS = '__muon_analysis_fitting_guess'
 FREQUENCY_DOMAIN_ANALYSIS_GUESS_WS = '__frequency_domain_analysis_fitting_guess'
+# ConfigService key which sets the number of fits run at once in a sequential fit
+SEQUENTIAL_FIT_WORKERS_KEY = "muon.sequential_fit.number_of_workers"
+# the number of fits run at once if the key is not set is the number of cores, but no more than this
+MAX_DEFAULT_SEQUENTIAL_FIT_WORKERS = 4
+
+
+def get_sequential_fit_workers():
+    """
+    Gets the number of fits which are run at once in a sequential fit which starts every fit from the initial values.
+    :return: the number set via the ConfigService, or if that is missing or invalid the number of cores up to
+             MAX_DEFAULT_SEQUENTIAL_FIT_WORKERS.
+    """
+    try:
+        return max(int(ConfigService.getString(SEQUENTIAL_FIT_WORKERS_KEY)), 1)
+    except ValueError:
+        return min(os.cpu_count() or 1, MAX_DEFAULT_SEQUENTIAL_FIT_WORKERS)
 
 
 class FitPlotInformation(NamedTuple):
@@ -37,6 +57,8 @@ class FittingTabModel(object):
         # fitting options from view
         self.fitting_options = {}
         self.ws_fit_function_map = {}
+        # the number of fits run at once in a sequential fit which starts every fit from the initial values
+        self.sequential_fit_workers = get_sequential_fit_workers()
 
     @property
     def fit_function(self):
@@ -161,8 +183,12 @@ class FittingTabModel(object):
         return function_object, output_status, output_chi_squared
 
     def do_single_fit(self, parameter_dict):
+        fit_output = self.do_single_fit_and_return_workspace_parameters_and_fit_function(parameter_dict)
+        return self._handle_single_fit_output(parameter_dict, fit_output)
+
+    def _handle_single_fit_output(self, parameter_dict, fit_output):
         output_workspace, fitting_parameters_table, function_object, output_status, output_chi_squared, covariance_matrix = \
-            self.do_single_fit_and_return_workspace_parameters_and_fit_function(parameter_dict)
+            fit_output
 
         self._handle_single_fit_results(parameter_dict['InputWorkspace'], function_object, fitting_parameters_table,
                                         output_workspace, covariance_matrix)
@@ -170,11 +196,21 @@ class FittingTabModel(object):
         return function_object, output_status, output_chi_squared
 
     def do_single_tf_fit(self, parameter_dict):
+        fit_output = self.do_single_tf_fit_and_return_workspace_parameters_and_fit_function(parameter_dict)
+        return self._handle_single_tf_fit_output(parameter_dict, fit_output)
+
+    def do_single_tf_fit_and_return_workspace_parameters_and_fit_function(self, parameter_dict):
         alg = mantid.AlgorithmManager.create("CalculateMuonAsymmetry")
         output_workspace, fitting_parameters_table, function_object, output_status, output_chi_squared, covariance_matrix = \
             run_CalculateMuonAsymmetry(parameter_dict, alg)
         CopyLogs(InputWorkspace=parameter_dict['ReNormalizedWorkspaceList'], OutputWorkspace=output_workspace,
                  StoreInADS=False)
+        return output_workspace, fitting_parameters_table, function_object, output_status, output_chi_squared, \
+            covariance_matrix
+
+    def _handle_single_tf_fit_output(self, parameter_dict, fit_output):
+        output_workspace, fitting_parameters_table, function_object, output_status, output_chi_squared, covariance_matrix = \
+            fit_output
         self._handle_single_fit_results(parameter_dict['ReNormalizedWorkspaceList'], function_object,
                                         fitting_parameters_table, output_workspace, covariance_matrix)
 
@@ -218,8 +254,12 @@ class FittingTabModel(object):
                                 input_workspace, [workspace_name])
 
     def do_simultaneous_fit(self, parameter_dict, global_parameters):
+        fit_output = self.do_simultaneous_fit_and_return_workspace_parameters_and_fit_function(parameter_dict)
+        return self._handle_simultaneous_fit_output(parameter_dict, fit_output, global_parameters)
+
+    def _handle_simultaneous_fit_output(self, parameter_dict, fit_output, global_parameters):
         output_workspace, fitting_parameters_table, function_object, output_status, output_chi_squared, covariance_matrix = \
-            self.do_simultaneous_fit_and_return_workspace_parameters_and_fit_function(parameter_dict)
+            fit_output
         self._handle_simultaneous_fit_results(parameter_dict['InputWorkspace'], function_object,
                                               fitting_parameters_table, output_workspace, global_parameters,
                                               covariance_matrix)
@@ -245,6 +285,10 @@ class FittingTabModel(object):
         return output_workspace, output_parameters, function_object, output_status, output_chi, covariance_matrix
 
     def do_simultaneous_tf_fit(self, parameter_dict, global_parameters):
+        fit_output = self.do_simultaneous_tf_fit_and_return_workspace_parameters_and_fit_function(parameter_dict)
+        return self._handle_simultaneous_tf_fit_output(parameter_dict, fit_output, global_parameters)
+
+    def do_simultaneous_tf_fit_and_return_workspace_parameters_and_fit_function(self, parameter_dict):
         alg = mantid.AlgorithmManager.create("CalculateMuonAsymmetry")
         output_workspace, fitting_parameters_table, function_object, output_status, output_chi_squared, covariance_matrix = \
             run_CalculateMuonAsymmetry(parameter_dict, alg)
@@ -255,7 +299,12 @@ class FittingTabModel(object):
         else:
             CopyLogs(InputWorkspace=parameter_dict['ReNormalizedWorkspaceList'][0], OutputWorkspace=output_workspace,
                      StoreInADS=False)
+        return output_workspace, fitting_parameters_table, function_object, output_status, output_chi_squared, \
+            covariance_matrix
 
+    def _handle_simultaneous_tf_fit_output(self, parameter_dict, fit_output, global_parameters):
+        output_workspace, fitting_parameters_table, function_object, output_status, output_chi_squared, covariance_matrix = \
+            fit_output
         self._handle_simultaneous_fit_results(parameter_dict['ReNormalizedWorkspaceList'], function_object,
                                               fitting_parameters_table, output_workspace, global_parameters,
                                               covariance_matrix)
@@ -316,6 +365,12 @@ class FittingTabModel(object):
         return function_object, output_status, output_chi_squared
 
     def do_sequential_fit(self, workspace_list, use_initial_values=False):
+        if self._can_run_sequential_fits_in_parallel(workspace_list, use_initial_values):
+            return self._do_sequential_fits_in_parallel(
+                [self.get_parameters_for_single_fit(input_workspace) for input_workspace in workspace_list],
+                self.do_single_fit_and_return_workspace_parameters_and_fit_function,
+                self._handle_single_fit_output)
+
         function_object_list = []
         output_status_list = []
         output_chi_squared_list = []
@@ -337,6 +392,13 @@ class FittingTabModel(object):
         return function_object_list, output_status_list, output_chi_squared_list
 
     def do_sequential_simultaneous_fit(self, workspaces, use_initial_values=False):
+        if self._can_run_sequential_fits_in_parallel(workspaces, use_initial_values):
+            return self._do_sequential_fits_in_parallel(
+                [self.get_parameters_for_simultaneous_fit(workspace_list) for workspace_list in workspaces],
+                self.do_simultaneous_fit_and_return_workspace_parameters_and_fit_function,
+                partial(self._handle_simultaneous_fit_output,
+                        global_parameters=self.fitting_options["global_parameters"]))
+
         function_object_list = []
         output_status_list = []
         output_chi_squared_list = []
@@ -358,6 +420,12 @@ class FittingTabModel(object):
         return function_object_list, output_status_list, output_chi_squared_list
 
     def do_sequential_tf_fit(self, workspace_list, use_initial_values=False):
+        if self._can_run_sequential_fits_in_parallel(workspace_list, use_initial_values):
+            return self._do_sequential_fits_in_parallel(
+                [self.get_parameters_for_single_tf_fit(input_workspace) for input_workspace in workspace_list],
+                self.do_single_tf_fit_and_return_workspace_parameters_and_fit_function,
+                self._handle_single_tf_fit_output)
+
         function_object_list = []
         output_status_list = []
         output_chi_squared_list = []
@@ -379,6 +447,13 @@ class FittingTabModel(object):
         return function_object_list, output_status_list, output_chi_squared_list
 
     def do_sequential_simultaneous_tf_fit(self, workspaces, use_initial_values=False):
+        if self._can_run_sequential_fits_in_parallel(workspaces, use_initial_values):
+            return self._do_sequential_fits_in_parallel(
+                [self.get_parameters_for_simultaneous_tf_fit(workspace_list) for workspace_list in workspaces],
+                self.do_simultaneous_tf_fit_and_return_workspace_parameters_and_fit_function,
+                partial(self._handle_simultaneous_tf_fit_output,
+                        global_parameters=self.fitting_options["global_parameters"]))
+
         function_object_list = []
         output_status_list = []
         output_chi_squared_list = []
@@ -400,6 +475,36 @@ class FittingTabModel(object):
 
         return function_object_list, output_status_list, output_chi_squared_list
 
+    def _can_run_sequential_fits_in_parallel(self, workspaces, use_initial_values):
+        # when the fits are chained each fit needs the result of the previous one as its starting values
+        return use_initial_values and self.sequential_fit_workers > 1 and len(workspaces) > 1
+
+    def _do_sequential_fits_in_parallel(self, parameter_dict_list, run_fit, handle_fit_output):
+        """
+        Runs independent fits on a pool of worker threads. The fitting algorithms release the GIL while they
+        execute. The outputs are handled in the order of the fits on the calling thread, since renaming the output
+        workspaces and updating the fitting context is not thread safe.
+        :param parameter_dict_list: a list of the parameters of each fit
+        :param run_fit: a function which runs a fit and returns its output workspaces, function, status and chi squared
+        :param handle_fit_output: a function which adds the output of a fit to the ADS and the fitting context
+        :return: the lists of fitted functions, fit statuses and chi squared values
+        """
+        function_object_list = []
+        output_status_list = []
+        output_chi_squared_list = []
+
+        number_of_workers = min(self.sequential_fit_workers, len(parameter_dict_list))
+        with ThreadPoolExecutor(max_workers=number_of_workers) as executor:
+            fit_outputs = list(executor.map(run_fit, parameter_dict_list))
+
+        for parameter_dict, fit_output in zip(parameter_dict_list, fit_outputs):
+            function_object, output_status, output_chi_squared = handle_fit_output(parameter_dict, fit_output)
+            function_object_list.append(function_object)
+            output_status_list.append(output_status)
+            output_chi_squared_list.append(output_chi_squared)
+
+        return function_object_list, output_status_list, output_chi_squared_list
+
     # workspace operations
     def rename_members_of_fitted_workspace_group(self, group_workspace, inputworkspace_list, function):
         self.context.ads_observer.observeRename(False)
@@ -14,10 +14,11 @@ from Muon.MaxentTools.zft import ZFT
 
 def DEADFIT(
             datum, sigma, datt, DETECT_a, DETECT_b, DETECT_d, DETECT_e, RUNDATA_res, RUNDATA_frames, RUNDATA_fnorm, RUNDATA_hists,
-            MAXPAGE_n, MAXPAGE_f, PULSESHAPE_convol, SAVETIME_I2, mylog):
+            MAXPAGE_n, MAXPAGE_f, PULSESHAPE_convol, SAVETIME_I2, mylog, zft=None):
+    # zft: optional (zr, zi) already calculated by ZFT for MAXPAGE_f
     (npts, ngroups) = datt.shape
 
-    zr, zi = ZFT(MAXPAGE_f, PULSESHAPE_convol, DETECT_e, SAVETIME_I2)
+    zr, zi = zft if zft is not None else ZFT(MAXPAGE_f, PULSESHAPE_convol, DETECT_e, SAVETIME_I2)
     # new numpy array code
     isig = sigma**-2
     wiggle = np.outer(zr, DETECT_a) + np.outer(zi, DETECT_b)
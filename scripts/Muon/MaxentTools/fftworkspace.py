@@ -0,0 +1,49 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+import numpy as np
+
+# Preallocated zero padded buffers for the transforms in OPUS, TROPUS and ZFT.
+# The buffers hold up to 3 spectra (the search directions in MAXENT) side by side,
+# only the leading rows are written so the padding stays zero between calls
+# (rows left over from a longer earlier call are cleared).
+
+
+class FFTWorkspace(object):
+
+    def __init__(self, SAVETIME_i2, nspectra=3):
+        self.SAVETIME_i2 = SAVETIME_i2
+        self._frequency = np.zeros([SAVETIME_i2, nspectra], dtype=np.complex_)
+        self._time = np.zeros([SAVETIME_i2, nspectra], dtype=np.complex_)
+        self._frequency_rows = 0
+        self._time_rows = 0
+
+    def inverse(self, x, PULSESHAPE_convol, npts):
+        # x is (n,) or (n, k); returns the first npts points of the unscaled inverse FFT
+        n = x.shape[0]
+        if x.ndim == 1:
+            y = self._frequency[:, 0]
+            y[:n] = x * PULSESHAPE_convol
+        else:
+            y = self._frequency[:, :x.shape[1]]
+            y[:n] = x * PULSESHAPE_convol[:, np.newaxis]
+        if n < self._frequency_rows:
+            self._frequency[n:self._frequency_rows] = 0.0
+        self._frequency_rows = n
+        return np.fft.ifft(y, axis=0)[:npts] * self.SAVETIME_i2  # SN=+1, inverse FFT without the 1/N
+
+    def forward(self, y_npts):
+        # y_npts is (npts,) or (npts, k) complex; returns the forward FFT of the zero padded data
+        npts = y_npts.shape[0]
+        if y_npts.ndim == 1:
+            y = self._time[:, 0]
+        else:
+            y = self._time[:, :y_npts.shape[1]]
+        y[:npts] = y_npts
+        if npts < self._time_rows:
+            self._time[npts:self._time_rows] = 0.0
+        self._time_rows = npts
+        return np.fft.fft(y, axis=0)  # SN=-1 meaning forward fft, scale is OK
@@ -10,6 +10,7 @@ from Muon.MaxentTools.opus import OPUS
 from Muon.MaxentTools.tropus import TROPUS
 from Muon.MaxentTools.project import PROJECT
 from Muon.MaxentTools.move import MOVE
+from Muon.MaxentTools.fftworkspace import FFTWorkspace
 
 # translated from MAXENT.for
 """
@@ -25,8 +26,10 @@ def warningMsg(values,name,mylog):
 
 
 def MAXENT(datum, sigma, flat, base, itermax, sumfix, SAVETIME_ngo, MAXPAGE_n, MAXPAGE_f, PULSESHAPE_convol,
-           DETECT_a, DETECT_b, DETECT_e, FAC_factor, FAC_facfake, SAVETIME_i2, mylog, prog):
+           DETECT_a, DETECT_b, DETECT_e, FAC_factor, FAC_facfake, SAVETIME_i2, mylog, prog, fft_workspace=None):
     npts, ngroups = datum.shape
+    if fft_workspace is None:
+        fft_workspace = FFTWorkspace(SAVETIME_i2)
     p = npts*ngroups
     xi = np.zeros([MAXPAGE_n, 3])
     eta = np.zeros([npts, ngroups, 3])
@@ -52,13 +55,14 @@ def MAXENT(datum, sigma, flat, base, itermax, sumfix, SAVETIME_ngo, MAXPAGE_n, M
     while( HERITAGE_iter <= itermax and (HERITAGE_iter <= 1 or not (test < 0.02 and abs(SPACE_chisq/SPACE_chizer-1) < 0.01) ) ): # label 6
         mylog.debug("start loop, iter={} ngo={} test={} chisq={}".format(HERITAGE_iter, SAVETIME_ngo, test, SPACE_chisq/SPACE_chizer))
         mylog.debug("entering loop with spectrum from {0} to {1}".format(np.amin(MAXPAGE_f), np.amax(MAXPAGE_f)))
-        ox = OPUS(MAXPAGE_f, SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e)
+        ox = OPUS(MAXPAGE_f, SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e, fft_workspace)
         warningMsg(ox,'ox',mylog)
         mylog.debug("ox from {0} to {1}".format(np.amin(ox), np.amax(ox)))
+        isigsq = sigma**-2  # sigma may have been loosened by MOVE
         a = ox-datum
-        SPACE_chisq = np.sum(a**2/sigma**2)
-        ox = 2*a/(sigma**2)
-        cgrad = TROPUS(ox, SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e)
+        SPACE_chisq = np.sum(a**2*isigsq)
+        ox = 2*a*isigsq
+        cgrad = TROPUS(ox, SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e, fft_workspace)
         warningMsg(cgrad,'cgrad',mylog)
         mylog.debug("cgrad from {0} to {1}".format(np.amin(cgrad), np.amax(cgrad)))
         SPACE_xsum = np.sum(MAXPAGE_f)
@@ -92,33 +96,26 @@ def MAXENT(datum, sigma, flat, base, itermax, sumfix, SAVETIME_ngo, MAXPAGE_n, M
         if(sumfix):
             PROJECT(0, MAXPAGE_n, xi)
             PROJECT(1, MAXPAGE_n, xi)
-        eta[:,:, 0] = OPUS(xi[:, 0], SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e)
-        eta[:,:, 1] = OPUS(xi[:, 1], SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e)
+        # both search directions in one batched transform
+        eta[:,:, :2] = OPUS(xi[:, :2], SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e, fft_workspace)
         warningMsg(eta[:,:, 0],"eta[,,0]",mylog)
         warningMsg(eta[:,:, 1],"eta[,,1]",mylog)
-        ox = eta[:,:, 1]/(sigma**2)
-        xi[:, 2] = TROPUS(ox, SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e)
+        ox = eta[:,:, 1]*isigsq
+        xi[:, 2] = TROPUS(ox, SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e, fft_workspace)
         warningMsg(xi[:, 2],"xi[,2]", mylog)
         a = 1./math.sqrt(np.sum(xi[:, 2]**2*MAXPAGE_f))
         xi[:, 2] = xi[:, 2]*MAXPAGE_f*a
         if(sumfix):
             PROJECT(2, MAXPAGE_n, xi)
-        eta[:,:, 2] = OPUS(xi[:, 2], SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e)
+        eta[:,:, 2] = OPUS(xi[:, 2], SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e, fft_workspace)
         warningMsg(eta[:,:, 2],"eta[,,2]",mylog)
         # loop DO 17, DO 18
         SPACE_s1 = np.dot(sgrad, xi)
         SPACE_c1 = np.dot(cgrad, xi)/SPACE_chisq
-        # loops DO 19,DO 20, DO 21 harder to completely remove
-        SPACE_s2 = np.zeros([3, 3])
-        SPACE_c2 = np.zeros([3, 3])
-        for L in range(m):
-            for k in range(m):
-                if(L <= k):
-                    SPACE_s2[k, L] = -np.sum(xi[:, k]*xi[:, L]/MAXPAGE_f)/SPACE_blank
-                    SPACE_c2[k, L] = np.sum(eta[:,:, k]*eta[:,:, L]/sigma**2)*2./SPACE_chisq
-                else: # make symmetric
-                    SPACE_s2[k, L] = SPACE_s2[L, k]
-                    SPACE_c2[k, L] = SPACE_c2[L, k]
+        # loops DO 19,DO 20, DO 21 as outer products over the m search directions
+        SPACE_s2 = -np.dot(xi.T, xi/MAXPAGE_f[:, np.newaxis])/SPACE_blank
+        weighted_eta = eta.reshape(p, m)*isigsq.reshape(p, 1)
+        SPACE_c2 = np.dot(eta.reshape(p, m).T, weighted_eta)*2./SPACE_chisq
         s = -np.sum(MAXPAGE_f*np.log(MAXPAGE_f/(base*math.e)))/(SPACE_blank*math.e) # spotted missing minus sign!
         a = s*SPACE_blank*math.e/SPACE_xsum
         mylog.notice("{:3}    {:10.4}  {:10.4}  {:10.4}  {:10.4}  {:10.4}".format(HERITAGE_iter,
@@ -21,24 +21,24 @@ def MODAB(
      PULSESHAPE_convol,
      DETECT_e,
      SAVETIME_I2,
-     mylog):
+     mylog,
+     zft=None):
+    # zft: optional (zr, zi) already calculated by ZFT for MAXPAGE_f
     npts, ngroups = datum.shape
-    zr, zi = ZFT(MAXPAGE_f, PULSESHAPE_convol, DETECT_e, SAVETIME_I2)
+    zr, zi = zft if zft is not None else ZFT(MAXPAGE_f, PULSESHAPE_convol, DETECT_e, SAVETIME_I2)
     DETECT_a = np.zeros([ngroups])
     DETECT_b = np.zeros([ngroups])
-    # SENSE_phi=np.zeros([ngroups])
-    # AMPS_amp=np.zeros([ngroups])
-    for j in range(ngroups):
-        if(hists[j] != 0):
-            x = zr / sigma[:, j]
-            y = zi / sigma[:, j]
-            s11 = np.sum(x**2)
-            s22 = np.sum(y**2)
-            s12 = np.sum(x * y)
-            sa = np.sum(datum[:, j] * x / sigma[:, j])
-            sb = np.sum(datum[:, j] * y / sigma[:, j])
-            DETECT_a[j] = (sa * s22 - sb * s12) / (s11 * s22 - s12 * s12)
-            DETECT_b[j] = (sb * s11 - sa * s12) / (s11 * s22 - s12 * s12)
+    # all groups at once, (npts, ngroups) arrays
+    used = np.asarray(hists) != 0
+    x = zr[:, np.newaxis] / sigma[:, used]
+    y = zi[:, np.newaxis] / sigma[:, used]
+    s11 = np.sum(x**2, axis=0)
+    s22 = np.sum(y**2, axis=0)
+    s12 = np.sum(x * y, axis=0)
+    sa = np.sum(datum[:, used] * x / sigma[:, used], axis=0)
+    sb = np.sum(datum[:, used] * y / sigma[:, used], axis=0)
+    DETECT_a[used] = (sa * s22 - sb * s12) / (s11 * s22 - s12 * s12)
+    DETECT_b[used] = (sb * s11 - sa * s12) / (s11 * s22 - s12 * s12)
     AMPS_amp = np.sqrt(DETECT_a**2 + DETECT_b**2)
     SENSE_phi = np.arctan2(DETECT_b, DETECT_a)  # *180.0/math.pi
     s = np.sum(AMPS_amp) / float(ngroups - MISSCHANNELS_mm)
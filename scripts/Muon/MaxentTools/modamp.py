@@ -21,9 +21,11 @@ def MODAMP(
      PULSESHAPE_convol,
      DETECT_e,
      SAVETIME_I2,
-     mylog):
+     mylog,
+     zft=None):
+    # zft: optional (zr, zi) already calculated by ZFT for MAXPAGE_f
     npts, ngroups = datum.shape
-    zr, zi = ZFT(MAXPAGE_f, PULSESHAPE_convol, DETECT_e, SAVETIME_I2)
+    zr, zi = zft if zft is not None else ZFT(MAXPAGE_f, PULSESHAPE_convol, DETECT_e, SAVETIME_I2)
     cs = np.cos(FASE_phase)
     sn = np.sin(FASE_phase)
     AMPS_amp = np.zeros([ngroups])
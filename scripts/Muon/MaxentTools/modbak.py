@@ -19,10 +19,12 @@ def MODBAK(
      MAXPAGE_f,
      PULSESHAPE_convol,
      SAVETIME_I2,
-     mylog):
+     mylog,
+     zft=None):
+    # zft: optional (zr, zi) already calculated by ZFT for MAXPAGE_f
     npts, ngroups = datum.shape
     DETECT_c = np.zeros([ngroups])
-    zr, zi = ZFT(MAXPAGE_f, PULSESHAPE_convol, DETECT_e, SAVETIME_I2)
+    zr, zi = zft if zft is not None else ZFT(MAXPAGE_f, PULSESHAPE_convol, DETECT_e, SAVETIME_I2)
     for j in range(ngroups):
         if(hists[j] != 0):
             isigsq = np.where(sigma[:, j] > 1.E3, 0.0, sigma[:, j]**-2)
@@ -15,6 +15,8 @@ from Muon.MaxentTools.modbak import MODBAK
 from Muon.MaxentTools.modamp import MODAMP
 from Muon.MaxentTools.modab import MODAB
 from Muon.MaxentTools.outspec import OUTSPEC
+from Muon.MaxentTools.zft import ZFT
+from Muon.MaxentTools.fftworkspace import FFTWorkspace
 
 
 def MULTIMAX(
@@ -35,29 +37,35 @@ def MULTIMAX(
         RUNDATA_hists, datum, sigma, DETECT_e, filePHASE, mylog)
     SAVETIME_ngo = -1
     MAXPAGE_f = None
+    # transform buffers shared by all iterations
+    fft_workspace = FFTWorkspace(SAVETIME_i2)
+    zft = None
     for j in range(OuterIter):  # outer "alpha chop" iterations?
         SAVETIME_ngo = SAVETIME_ngo + 1
         mylog.information("CYCLE NUMBER=" + str(SAVETIME_ngo))
         (sigma, base, HERITAGE_iter, MAXPAGE_f, FAC_factor, FAC_facfake) = MAXENT(
             datum, sigma, PULSES_def, base, InnerIter, False,
             SAVETIME_ngo, MAXPAGE_n, MAXPAGE_f, PULSESHAPE_convol, DETECT_a,
-            DETECT_b, DETECT_e, FAC_factor, FAC_facfake, SAVETIME_i2, mylog, prog)
+            DETECT_b, DETECT_e, FAC_factor, FAC_facfake, SAVETIME_i2, mylog, prog, fft_workspace)
+        # the spectrum is fixed for the rest of the cycle, so transform it once
+        zft = ZFT(MAXPAGE_f, PULSESHAPE_convol, DETECT_e, SAVETIME_i2, fft_workspace)
 
         if(FLAGS_fitdead):
             (datum, corr, DETECT_c, DETECT_d, SENSE_taud) = DEADFIT(
                 datum, sigma, datt, DETECT_a, DETECT_b, DETECT_d, DETECT_e, RUNDATA_res, RUNDATA_frames, RUNDATA_fnorm, RUNDATA_hists,
-                MAXPAGE_n, MAXPAGE_f, PULSESHAPE_convol, SAVETIME_i2, mylog)
+                MAXPAGE_n, MAXPAGE_f, PULSESHAPE_convol, SAVETIME_i2, mylog, zft)
         else:
             (DETECT_c, DETECT_d) = MODBAK(RUNDATA_hists, datum, sigma, DETECT_a, DETECT_b,
-                                          DETECT_e, DETECT_d, MAXPAGE_f, PULSESHAPE_convol, SAVETIME_i2, mylog)
+                                          DETECT_e, DETECT_d, MAXPAGE_f, PULSESHAPE_convol, SAVETIME_i2, mylog, zft)
 
         if(FLAGS_fixphase):
             (SENSE_phi, DETECT_a, DETECT_b, AMPS_amp) = MODAMP(RUNDATA_hists, datum, sigma,
                                                                MISSCHANNELS_mm, FASE_phase, MAXPAGE_f, PULSESHAPE_convol, DETECT_e,
-                                                               SAVETIME_i2, mylog)
+                                                               SAVETIME_i2, mylog, zft)
         else:
             (SENSE_phi, DETECT_a, DETECT_b, AMPS_amp) = MODAB(RUNDATA_hists, datum, sigma,
-                                                              MISSCHANNELS_mm, MAXPAGE_f, PULSESHAPE_convol, DETECT_e, SAVETIME_i2, mylog)
+                                                              MISSCHANNELS_mm, MAXPAGE_f, PULSESHAPE_convol, DETECT_e, SAVETIME_i2, mylog,
+                                                              zft)
         # output per-iteration debug info
         if(phaseconvWS):
             offset = 0
@@ -77,7 +85,7 @@ def MULTIMAX(
 
     (OUTSPEC_test, OUTSPEC_guess) = OUTSPEC(datum, MAXPAGE_f, sigma, datt, CHANNELS_itzero, CHANNELS_itotal,
                                             PULSESHAPE_convol, FAC_ratio, DETECT_a, DETECT_b, DETECT_d, DETECT_e, SAVETIME_i2,
-                                            RUNDATA_fnorm, mylog)
+                                            RUNDATA_fnorm, mylog, zft)
 
     return (
                             MISSCHANNELS_mm, RUNDATA_fnorm, RUNDATA_hists, MAXPAGE_f, FAC_factor, FAC_facfake, FAC_ratio,
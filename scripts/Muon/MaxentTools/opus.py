@@ -7,12 +7,25 @@
 import numpy as np
 
 
-def OPUS(x, SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e):
+def OPUS(x, SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e, fft_workspace=None):
+    # x is a spectrum (n,) or a batch of spectra (n, k), giving ox (npts, ngroups) or (npts, ngroups, k)
     npts = DETECT_e.shape[0]
     n = x.shape[0]
-    y = np.zeros([SAVETIME_i2], dtype=np.complex_)
-    y[:n] = x * PULSESHAPE_convol
-    y2 = np.fft.ifft(y) * SAVETIME_i2  # SN=+1, inverse FFT without the 1/N
-    ox = (np.outer(np.real(y2[:npts]), DETECT_a) + np.outer(
-        np.imag(y2[:npts]), DETECT_b)) * DETECT_e[:, np.newaxis]
+    if fft_workspace is not None:
+        y2 = fft_workspace.inverse(x, PULSESHAPE_convol, npts)
+    elif x.ndim == 1:
+        y = np.zeros([SAVETIME_i2], dtype=np.complex_)
+        y[:n] = x * PULSESHAPE_convol
+        y2 = np.fft.ifft(y) * SAVETIME_i2  # SN=+1, inverse FFT without the 1/N
+    else:
+        y = np.zeros([SAVETIME_i2, x.shape[1]], dtype=np.complex_)
+        y[:n] = x * PULSESHAPE_convol[:, np.newaxis]
+        y2 = np.fft.ifft(y, axis=0) * SAVETIME_i2
+    if x.ndim == 1:
+        ox = (np.outer(np.real(y2[:npts]), DETECT_a) + np.outer(
+            np.imag(y2[:npts]), DETECT_b)) * DETECT_e[:, np.newaxis]
+    else:
+        ox = (np.real(y2[:npts, np.newaxis, :]) * DETECT_a[np.newaxis, :, np.newaxis]
+              + np.imag(y2[:npts, np.newaxis, :]) * DETECT_b[np.newaxis, :, np.newaxis]) \
+            * DETECT_e[:, np.newaxis, np.newaxis]
     return ox
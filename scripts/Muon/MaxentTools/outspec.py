@@ -23,12 +23,14 @@ def OUTSPEC(
      DETECT_e,
      SAVETIME_I2,
      RUNDATA_fnorm,
-     mylog):
+     mylog,
+     zft=None):
+    # zft: optional (zr, zi) already calculated by ZFT for f
 
     npts, ngroups = datum.shape
     guess = np.zeros([npts, ngroups])
     chi = np.zeros([ngroups])
-    zr, zi = ZFT(f, PULSESHAPE_convol, DETECT_e, SAVETIME_I2)
+    zr, zi = zft if zft is not None else ZFT(f, PULSESHAPE_convol, DETECT_e, SAVETIME_I2)
     guess = np.outer(zr, DETECT_a) + np.outer(zi, DETECT_b)
     test0 = (datum - guess) / sigma
     test = test0 * FAC_ratio
@@ -7,16 +7,24 @@
 import numpy as np
 
 
-def TROPUS(ox, SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e):
-    npts, ngroups = ox.shape
+def TROPUS(ox, SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e, fft_workspace=None):
+    # ox is (npts, ngroups) or a batch (npts, ngroups, k), giving x (n,) or (n, k)
+    npts = ox.shape[0]
     n = PULSESHAPE_convol.shape[0]
-    y = np.zeros([SAVETIME_i2], dtype=np.complex_)
-    y[:npts] = np.dot(
-        ox,
-        DETECT_a) * DETECT_e + 1.j * np.dot(ox,
-                                            DETECT_b) * DETECT_e
-    y2 = np.fft.fft(y)  # SN=-1 meaning forward fft, scale is OK
-    x = np.real(y2)[:n] * np.real(PULSESHAPE_convol) + \
-        np.imag(y2)[:n] * np.imag(PULSESHAPE_convol)
+    if ox.ndim == 2:
+        y_npts = (np.dot(ox, DETECT_a) + 1.j * np.dot(ox, DETECT_b)) * DETECT_e
+        convol = PULSESHAPE_convol
+    else:
+        y_npts = (np.einsum('pgk,g->pk', ox, DETECT_a) + 1.j * np.einsum('pgk,g->pk', ox, DETECT_b)) \
+            * DETECT_e[:, np.newaxis]
+        convol = PULSESHAPE_convol[:, np.newaxis]
+    if fft_workspace is not None:
+        y2 = fft_workspace.forward(y_npts)
+    else:
+        y = np.zeros((SAVETIME_i2,) + y_npts.shape[1:], dtype=np.complex_)
+        y[:npts] = y_npts
+        y2 = np.fft.fft(y, axis=0)  # SN=-1 meaning forward fft, scale is OK
+    x = np.real(y2)[:n] * np.real(convol) + \
+        np.imag(y2)[:n] * np.imag(convol)
 
     return x
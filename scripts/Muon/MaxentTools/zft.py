@@ -13,11 +13,14 @@ import numpy as np
 # PULSESHAPE_convol is complex (convolR + i*convolI)
 
 
-def ZFT(f, PULSESHAPE_convol, DETECT_e, SAVETIME_i2):
+def ZFT(f, PULSESHAPE_convol, DETECT_e, SAVETIME_i2, fft_workspace=None):
     n = f.shape[0]
     npts = DETECT_e.shape[0]
-    y = np.zeros([SAVETIME_i2], dtype=np.complex_)
-    y[:n] = f * PULSESHAPE_convol
-    y2 = np.fft.ifft(y) * \
-        SAVETIME_i2  # SN=+1 meaning inverse FFT without the 1/N scale factor
+    if fft_workspace is not None:
+        y2 = fft_workspace.inverse(f, PULSESHAPE_convol, npts)
+    else:
+        y = np.zeros([SAVETIME_i2], dtype=np.complex_)
+        y[:n] = f * PULSESHAPE_convol
+        y2 = np.fft.ifft(y) * \
+            SAVETIME_i2  # SN=+1 meaning inverse FFT without the 1/N scale factor
     return np.real(y2[:npts]) * DETECT_e, np.imag(y2[:npts]) * DETECT_e
@@ -45,13 +45,14 @@ def tchop(freq, Ei, pslit, radius, rho):
     gamm = (2.00*(R**2)/p) * abs(1.00/rho - 2.00*w/veloc)
     # Find regime and calculate variance:
     if hasattr(gamm, '__len__'):
-        tausqr = np.zeros(len(gamm))
+        # No transmission (gamm >= 4) is flagged by NaN, as for a single energy
+        tausqr = np.full(np.shape(gamm), np.nan)
         pre = ((p/(2.00*R*w))**2/ 6.00)
         idx = np.where((gamm <= 1.0))
         tausqr[idx] = pre * (1.00-(gamm[idx]**2)**2 /10.00) / (1.00-(gamm[idx]**2)/6.00)
         idx = np.where((gamm > 1.0)*(gamm < 4.0))
         groot = np.sqrt(gamm[idx])
-        #area[idx] = pre * 0.60 * gamm[idx] * ((groot-2.00)**2) * (groot+8.00) / (groot+4.00)
+        tausqr[idx] = pre * 0.60 * gamm[idx] * ((groot-2.00)**2) * (groot+8.00) / (groot+4.00)
     else:
         if gamm >= 4.00:
             warnings.warn('PyChop: tchop(): No transmission at %5.3f meV at %3d Hz' % (Ei, freq))
@@ -86,7 +87,8 @@ def achop(Ei, freq, dslat, pslit, radius, rho):
     gamm = (2.00*(R1**2)/p1) * abs(1.00/rho1 - 2.00*w1/vela)
     # Find regime and calculate variance:
     if hasattr(gamm, '__len__'):
-        area = np.zeros(len(gamm))
+        # No transmission (gamm >= 4) is flagged by NaN, as for a single energy
+        area = np.full(np.shape(gamm), np.nan)
         pre = (p1**2) / (2.00*R1*w1)
         idx = np.where(gamm <= 1.0)
         area[idx] = pre * (1.-(gamm[idx]**2)/6.)
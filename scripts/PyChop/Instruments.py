@@ -13,6 +13,7 @@ import numpy as np
 import yaml
 import warnings
 import copy
+from collections import OrderedDict
 from . import Chop, MulpyRep
 from scipy.interpolate import interp1d
 from scipy.special import erf
@@ -24,6 +25,7 @@ SIGMA2FWHMSQ = SIGMA2FWHM ** 2
 E2V = np.sqrt((constants.e / 1000) * 2 / constants.neutron_mass) # v = E2V * sqrt(E)    veloc in m/s, E in meV
 E2L = 1.e23 * constants.h**2 / (2 * constants.m_n * constants.e) # lam = sqrt(E2L / E)  lam in Angst, E in meV
 E2K = constants.e * 2 * constants.m_n / constants.hbar**2 / 1e23 # k = sqrt(E2K * E)    k in 1/Angst, E in meV
+MAX_CACHED_CHOP_TIMES = 4096                                     # Number of chopper settings to keep opening times of
 
 
 def wrap_attributes(obj, inval, allowed_var_names):
@@ -118,6 +120,7 @@ class ChopperSystem(object):
         self.overlap_ei_frac = 0.9
         self.n_frame = 1
         self._ei = None
+        self._chop_times_cache = OrderedDict()
         # Parse input values (if any)
         wrap_attributes(self, inval, self.__allowed_var_names)
         self._parse_choppers()
@@ -327,9 +330,10 @@ class ChopperSystem(object):
         if self.isFermi:
             return self._ChopDriver(Ei_in, squared), None
         else:
-            chop_times = self._MulpyRepDriver(Ei_in, calc_res=False)[1]
-            # Output of MulpyRep is FWHM in us - want it in seconds for later calculations
-            wd = ((chop_times[1][1] - chop_times[1][0]) / 2. / 1.e6, (chop_times[0][1] - chop_times[0][0]) / 2. / 1.e6)
+            # The opening times do not depend on Ei, so there is no need to calculate when each chopper opens
+            t_full_op = MulpyRep.calcOpeningTimes(self._long_frequency, self._instpar)
+            # Output of MulpyRep is in us - want FWHM in seconds for later calculations
+            wd = (t_full_op[-1] / 2. / 1.e6, t_full_op[0] / 2. / 1.e6)
             return (wd[0]**2, wd[1]**2) if squared else wd
 
     def getDistances(self):
@@ -357,7 +361,7 @@ class ChopperSystem(object):
         self._instpar[9] = [self.source_rep, value]
 
     def _get_state(self, Ei_in=None):
-        return hash((self.variant, self.package, tuple(self.frequency), tuple(self.phase), Ei_in if Ei_in else self.ei, self.n_frame))
+        return (self.variant, self.package, tuple(self.frequency), tuple(self.phase), Ei_in if Ei_in else self.ei, self.n_frame)
 
     def _removeLowIntensityReps(self, Eis, lines, Ei=None):
         # Removes reps with Ei where there are no neutrons
@@ -375,12 +379,17 @@ class ChopperSystem(object):
     def _MulpyRepDriver(self, Ei_in=None, calc_res=True):
         """Private method to calculate resolution for given Ei from chopper opening times"""
         Ei = _check_input(self, Ei_in)
-        if '_saved_state' not in self.__dict__ or (self._saved_state[0] != self._get_state(Ei)):
+        # The opening times are kept for each setting, such that sweeping back and forth over settings is fast
+        state = self._get_state(Ei)
+        if state in self._chop_times_cache:
+            self._chop_times_cache.move_to_end(state)
+        else:
             Eis, all_times, chop_times, lastChopDist, lines = MulpyRep.calcChopTimes(Ei, self._long_frequency, self._instpar, self.phase)
             Eis, lines = self._removeLowIntensityReps(Eis, lines, Ei)
-            self._saved_state = [self._get_state(Ei), Eis, chop_times, lastChopDist, lines, all_times]
-        else:
-            Eis, chop_times, lastChopDist, lines, all_times = tuple(self._saved_state[1:])
+            self._chop_times_cache[state] = (Eis, chop_times, lastChopDist, lines, all_times)
+            if len(self._chop_times_cache) > MAX_CACHED_CHOP_TIMES:
+                self._chop_times_cache.popitem(last=False)
+        Eis, chop_times, lastChopDist, lines, all_times = self._chop_times_cache[state]
         if calc_res:
             res_el, percent, chop_width, mod_width = MulpyRep.calcRes(Eis, chop_times, lastChopDist, self.chop_sam,
                                                                       self.sam_det, self.guide_width[-1], self.slot_width[-1])
@@ -558,13 +567,17 @@ class Moderator(object):
     def getWidthSquared(self, Ei):
         """ Returns the squared time gaussian FWHM width due to the sample in s^2 """
         if hasattr(self, 'width_interp'):
-            wavelength = np.sqrt(E2L / (Ei if not hasattr(Ei, '__len__') else Ei[0]))
-            if wavelength >= self.wmn:
+            wavelength = np.sqrt(E2L / np.asarray(Ei, dtype=float))
+            measured = wavelength >= self.wmn
+            if np.any(measured):
                 # Data is obtained from measuring widths of powder Bragg peaks in backscattering
                 # At low wavelengths / high energies, the peaks are too close together to discern
                 # so there is no measurements, but the analytical expressions should still be good.
-                width = self.width_interp(min([wavelength, self.wmx]))**2 / 1e12
-                return (width * SIGMA2FWHMSQ) if self.measured_width['isSigma'] else width
+                width = self.width_interp(np.clip(wavelength, self.wmn, self.wmx))**2 / 1e12
+                width = (width * SIGMA2FWHMSQ) if self.measured_width['isSigma'] else width
+                if np.all(measured):
+                    return width
+                return np.where(measured, width, self.getAnalyticWidthsSquared(Ei))
         return self.getAnalyticWidthsSquared(Ei)
 
     def getWidth(self, Ei):
@@ -800,9 +813,16 @@ class Instrument(object):
         if frequency:
             oldfreq = self.frequency
             self.frequency = frequency
+        vsqvan, outdic, tsqmodchop = self._getVanVar(Ei, Etrans)
+        if frequency:
+            self.frequency = oldfreq
+        return vsqvan, outdic, np.array(tsqmodchop)
+
+    def _getVanVar(self, Ei, Etrans):
+        """ Calculates the Vanadium widths at the preset frequency. Ei and Etrans may be arrays which broadcast together """
         tsqmod = self.moderator.getWidthSquared(Ei)
         tsqchp = self.chopper_system.getWidthSquared(Ei)
-        tsqjit = self.tjit**2
+        tsqjit = self.chopper_system.tjit**2
         # Gets distances: x0=mod-final chopper, xa=aperture-final, x1=final-sample, x2=sample-det, xm=mod-first chopper
         x0, xa, x1, x2, xm = self.chopper_system.getDistances()
         # For Disk chopper spectrometers, the opening times of the first chopper can be the effective moderator time
@@ -810,31 +830,31 @@ class Instrument(object):
             frac_dist = 1 - (xm / x0)
             tsmeff = tsqmod * frac_dist**2   # Effective moderator time at first chopper
             x0 -= xm                         # Propagate from first chopper, not from moderator (after rescaling tmod)
-            tsqmod = tsmeff if (tsqchp[1] > tsmeff) else tsqchp[1]
+            tsqmod = np.where(tsqchp[1] > tsmeff, tsmeff, tsqchp[1])[()]
         tsqchp = tsqchp[0]
-        tsqmodchop = np.array([tsqmod, tsqchp, x0])
+        tsqmodchop = (tsqmod, tsqchp, x0)
         # Propagate the time widths to the sample position
-        omega = self.frequency[0] * 2 * np.pi
+        omega = self.chopper_system.frequency[0] * 2 * np.pi
         vi = E2V * np.sqrt(Ei)
         vf = E2V * np.sqrt(Ei - Etrans)
         vratio = (vi / vf)**3
         tanthm = np.tan(self.moderator.theta_m * np.pi / 180.)
-        g1, g2 = tuple(1. - ((omega * tanthm / vi) * np.array([xa + x1, x0 - xa])))
-        f1, f2 = tuple(1. + (x1 / x0) * np.array([g1, g2]))
-        g1, g2, f1, f2 = tuple(np.array([g1, g2, f1, f2]) / (omega * (xa + x1)))
+        g1, g2 = (1. - ((omega * tanthm / vi) * (xa + x1)), 1. - ((omega * tanthm / vi) * (x0 - xa)))
+        f1, f2 = (1. + (x1 / x0) * g1, 1. + (x1 / x0) * g2)
+        g1, g2, f1, f2 = tuple(val / (omega * (xa + x1)) for val in [g1, g2, f1, f2])
         modfac = (x1 + vratio * x2) / x0
         chpfac = 1. + modfac
         apefac = f1 + ((vratio * x2 / x0) * g1)
-        tsqmod *= modfac**2
-        tsqchp *= chpfac**2
-        tsqjit *= chpfac**2
+        tsqmod = tsqmod * modfac**2
+        tsqchp = tsqchp * chpfac**2
+        tsqjit = tsqjit * chpfac**2
         tsqape = apefac**2 * (self.aperture_width**2 / 12.) * SIGMA2FWHMSQ
         vsqvan = tsqmod + tsqchp + tsqjit + tsqape
         outdic = {'moderator': tsqmod, 'chopper': tsqchp, 'jitter': tsqjit, 'aperture': tsqape}
         if self.has_detector and hasattr(self.detector, 'idet'):
             phi = self.detector.phi_deg * np.pi / 180.
-            tsqdet = (1. / vf)**2 * np.array([self.detector.getWidthSquared(Ei, en) for en in Etrans])
-            vsqvan += tsqdet
+            tsqdet = (1. / vf)**2 * self._getDetectorWidthSquared(Ei - Etrans)
+            vsqvan = vsqvan + tsqdet
             outdic['detector'] = tsqdet
         else:
             phi = 0.
@@ -843,12 +863,104 @@ class Instrument(object):
             bb = (-np.sin(gam) / vi) + (np.sin(gam - phi) / vf) - (f2 * np.cos(gam))
             samfac = bb - ((vratio * x2 / x0) * g2 * np.cos(gam))
             tsqsam = samfac**2 * self.sample.getWidthSquared()
-            vsqvan += tsqsam
+            vsqvan = vsqvan + tsqsam
             outdic['sample'] = tsqsam
-        if frequency:
-            self.frequency = oldfreq
         return vsqvan, outdic, tsqmodchop
 
+    def _getDetectorWidthSquared(self, Ef):
+        """ Returns the squared detector time FWHM in s^2, calculating once for each distinct final energy """
+        Ef = np.asarray(Ef, dtype=float)
+        unique_ef, inverse = np.unique(Ef, return_inverse=True)
+        widths = np.array([self.detector.getWidthSquared(ef) for ef in unique_ef])
+        return widths[inverse].reshape(Ef.shape)
+
+    def getResFluxGrid(self, Ei, frequency=None, phase=None, Etrans=None):
+        """
+        Calculates the resolution and flux for all combinations of incident energies, frequencies and phases in one call
+
+        res, flux = getResFluxGrid(eis)
+        res, flux = getResFluxGrid(eis, [[240, 120], [280, 140]], [-20000, 10000])
+        res, flux = getResFluxGrid(eis, [200, 300], Etrans=np.linspace(0, 0.9, 10))
+
+        Inputs:
+            Ei - list or numpy array of (focused) incident energies in meV
+            frequency - list of chopper frequency settings, each as given to setFrequency [default: preset frequency]
+            phase - list of chopper phase settings, each as given to setFrequency [default: preset phase]
+            Etrans - energy transfer(s) as fractions of Ei, e.g. linspace(0,0.9,100) [default: elastic]
+
+        Output:
+            res - the incoherent (Vanadium) energy FWHM in meV, with shape (len(Ei), len(frequency), len(phase))
+                  followed by the shape of Etrans
+            flux - the monochromatic flux estimate in n/cm^2/s, with shape (len(Ei), len(frequency), len(phase))
+
+        The phases only determine which other reps reach the sample (see getAllowedEiGrid), so the
+        resolution and flux of the focused rep are the same for all phases.
+        """
+        eis = np.array(Ei, dtype=float).ravel()
+        chopper_system = self.chopper_system
+        frequencies = [chopper_system.frequency] if frequency is None else frequency
+        phases = [chopper_system.phase] if phase is None else phase
+        fractions = np.asarray(0. if Etrans is None else Etrans, dtype=float)
+        if np.any(fractions > 1):
+            warnings.warn('Cannot calculate for energy transfer greater than Ei (physically negative neutron energies!)')
+        res = np.zeros((len(eis), len(frequencies)) + fractions.shape)
+        flux = np.zeros((len(eis), len(frequencies)))
+        oldfreq = chopper_system.frequency
+        try:
+            for ifreq, freq in enumerate(frequencies):
+                chopper_system.frequency = freq
+                res[:, ifreq] = self._getResolutionArray(eis, fractions)
+                flux[:, ifreq] = self._getFluxArray(eis)
+        finally:
+            chopper_system.frequency = oldfreq
+        return np.repeat(res[:, :, np.newaxis], len(phases), axis=2), np.repeat(flux[:, :, np.newaxis], len(phases), axis=2)
+
+    def getAllowedEiGrid(self, Ei, frequency=None, phase=None):
+        """
+        Returns the incident energies of the reps reaching the sample for all combinations of focused
+        incident energies, frequencies and phases, as given by getAllowedEi for a single setting.
+
+        Inputs are as for getResFluxGrid. The output is an array of objects with shape (len(Ei), len(frequency),
+        len(phase)), each element being a sorted array of incident energies in meV. The chopper opening times
+        of each setting are kept, such that sweeping over the same settings again is fast.
+        """
+        eis = np.array(Ei, dtype=float).ravel()
+        chopper_system = self.chopper_system
+        frequencies = [chopper_system.frequency] if frequency is None else frequency
+        phases = [chopper_system.phase] if phase is None else phase
+        allowed = np.empty((len(eis), len(frequencies), len(phases)), dtype=object)
+        oldfreq, oldphase = chopper_system.frequency, chopper_system.phase
+        try:
+            for ifreq, freq in enumerate(frequencies):
+                chopper_system.frequency = freq
+                for iphase, ph in enumerate(phases):
+                    chopper_system.phase = ph
+                    for iei, ei in enumerate(eis):
+                        allowed[iei, ifreq, iphase] = np.array(sorted(chopper_system.getAllowedEi(ei)))
+        finally:
+            chopper_system.frequency = oldfreq
+            chopper_system.phase = oldphase
+        return allowed
+
+    def _getResolutionArray(self, Ei, fractions):
+        """ Returns the energy FWHM in meV at the preset frequency for each Ei, at energy transfers as fractions of Ei """
+        Ei = Ei.reshape(Ei.shape + (1,) * fractions.ndim)
+        Etrans = Ei * fractions
+        Etrans[np.where(Etrans >= Ei)] = np.nan
+        v_van, _, _ = self._getVanVar(Ei, Etrans)
+        return (2 * E2V * np.sqrt((Ei - Etrans)**3 * v_van)) / self.chopper_system.sam_det
+
+    def _getFluxArray(self, Ei):
+        """ Returns the monochromatic flux estimate in n/cm^2/s at the preset frequency for each Ei """
+        if self.isFermi:
+            transmission = self.chopper_system.getTransmission(Ei)
+        else:
+            # For disk choppers, the transmission depends on the resolution as in getFlux
+            isLores = (self._getResolutionArray(Ei, np.asarray(0.)) / Ei) > 0.02
+            transmission = np.where(isLores, self.chopper_system.getTransmission(Ei, hires=False),
+                                    self.chopper_system.getTransmission(Ei, hires=True))
+        return self.moderator.getFlux(Ei) * transmission
+
     @property
     def aperture_width(self):
         if hasattr(self.chopper_system, 'aperture_width') and self.chopper_system.aperture_width:
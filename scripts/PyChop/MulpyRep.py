@@ -13,7 +13,6 @@ spectrometer. Python implementation by D J Voneshen based on the original Matlab
 """
 
 import numpy as np
-import copy
 
 
 def findLine(chop_times, chopDist, moderator_limits):
@@ -101,10 +100,6 @@ def calcRes(ei, chop_times, lastChopDist, samDist, detDist, guide, slot):
     """
     # for each incident energy work out the moderator and chopper component of the resolution
     """
-    res = []
-    percent = []
-    chwid = []
-    modwid = []
     # IMPORTANT POINT
     # The chopper opening times are the full opening, for the resolution we want FWHM
     # consequently divide each by a factor of 2 here
@@ -120,25 +115,22 @@ def calcRes(ei, chop_times, lastChopDist, samDist, detDist, guide, slot):
         flat_time=(slot-guide)*totalOpen/slot
         triangleTime=guide*totalOpen/slot/2. #/2 for FWHM of the triangles
         chop_width=[(chop_times[0][1]-chop_times[0][0])/2.,(flat_time+triangleTime)]
-    for energy in ei:
-        lamba = np.sqrt(81.81/energy)
-        # this is the experimentally determined FWHM of moderator
-        mod_FWHM = -3.143*lamba**2 + 49.28*lamba + 0.535
-        # the effective width at chopper 1
-        mod_eff = 0.6666*mod_FWHM
-        # when running chopper 1 slowly the moderator is smaller than the chopper speed so use that
-        if chop_width[0] > mod_eff:
-            mod_width = mod_eff
-        else:
-            mod_width = chop_width[0]
-        t_mod_chop = 252.82*lastChopDist*lamba
-        chopRes = (2*chop_width[1]/t_mod_chop) * ((detDist+samDist+lastChopDist) / detDist)
-        modRes = (2*mod_width/t_mod_chop) * (1 + (samDist/detDist))
-        res.append(np.sqrt(chopRes**2 + modRes**2) * energy)
-        percent.append(np.sqrt(chopRes**2 + modRes**2))
-        chwid.append(chop_width[1])
-        modwid.append(mod_width)
-    return res, percent, chwid, modwid
+    # all incident energies are calculated at once
+    ei = np.asarray(ei, dtype=float)
+    lamba = np.sqrt(81.81/ei)
+    # this is the experimentally determined FWHM of moderator
+    mod_FWHM = -3.143*lamba**2 + 49.28*lamba + 0.535
+    # the effective width at chopper 1
+    mod_eff = 0.6666*mod_FWHM
+    # when running chopper 1 slowly the moderator is smaller than the chopper speed so use that
+    mod_width = np.where(chop_width[0] > mod_eff, mod_eff, chop_width[0])
+    t_mod_chop = 252.82*lastChopDist*lamba
+    chopRes = (2*chop_width[1]/t_mod_chop) * ((detDist+samDist+lastChopDist) / detDist)
+    modRes = (2*mod_width/t_mod_chop) * (1 + (samDist/detDist))
+    percent = np.sqrt(chopRes**2 + modRes**2)
+    res = percent * ei
+    chwid = np.full(np.shape(ei), chop_width[1])
+    return res, percent, chwid, mod_width
 
 
 def calcFlux(Ei, freq1, percent, slot):
@@ -164,18 +156,32 @@ def calcFlux(Ei, freq1, percent, slot):
                 0.066, 0.0637, 0.0614, 0.0593, 0.0571, 0.0551, 0.0532, 0.0512, 0.0494,
                 0.0477, 0.0461, 0.0445, 0.043, 0.0415, 0.0401, 0.0387]
     fluxLamba = np.linspace(0.5, 11.9, num=len(fluxProf))
-    flux = []
-    lamba = lamba if hasattr(lamba, '__len__') else [lamba]
-    for j in range(len(lamba)):
-        i = (abs(fluxLamba-lamba[j])).argmin()
-        intensity = fluxProf[i]
-        if percent[j] < 0.02:
-            flux.append(5.6e4*intensity/intRef*(slot/refSlot)*(freqRef/freq1)**2)
-        else:
-            flux.append(5.6e4*intensity/intRef*(slot/refSlot)*(freqRef/freq1))
+    lamba = np.atleast_1d(lamba)
+    # nearest tabulated wavelength for every incident energy at once
+    intensity = np.array(fluxProf)[np.abs(fluxLamba[np.newaxis, :] - lamba[:, np.newaxis]).argmin(axis=1)]
+    # transmission goes quadratic with frequency at high resolution, linear at low
+    freqdep = np.where(np.asarray(percent) < 0.02, (freqRef/freq1)**2, (freqRef/freq1))
+    flux = 5.6e4*intensity/intRef*(slot/refSlot)*freqdep
     return flux
 
 
+def calcOpeningTimes(freq, instrumentpars):
+    """
+    Calculates the full opening time of each chopper in microseconds.
+    This depends only on the chopper frequencies, not on the incident energy or phases.
+
+    freq: a list of the chopper frequencies
+    instrumentpars: a list of instrument parameters [see ISISDisk.py]
+    """
+    slot_width, guide_width, radius, numDisk = tuple(instrumentpars[3:7])
+    t_full_op = []
+    for i in range(len(freq)):
+        # effective chopper velocity (if 2 disks effective velocity is double)
+        chopVel = 2*np.pi*radius[i] * numDisk[i] * freq[i]
+        t_full_op.append(1e6 * (slot_width[i]+guide_width[i]) / chopVel)
+    return t_full_op
+
+
 def calcChopTimes(efocus, freq, instrumentpars, chop2Phase=5):
     """
     A method to calculate the various possible incident energies with a given chopper setup on LET.
@@ -218,26 +224,21 @@ def calcChopTimes(efocus, freq, instrumentpars, chop2Phase=5):
     source_rep, nframe = tuple(rep[:2]) if (hasattr(rep, '__len__') and len(rep) > 1) else (rep, 1)
     p_frames = source_rep / nframe
 
+    # full opening time of each chopper
+    t_full_op = calcOpeningTimes(freq, instrumentpars)
+
     # first we optimise on the main Ei
     for i in range(len(dist)):
         # loop over each chopper
         # checks whether this chopper should have an independently set phase / delay
         islt = int(phase[i]) if (ph_ind[i] and isinstance(phase[i], str)) else 0
         if ph_ind[i] and not isinstance(phase[i], str):
-            # effective chopper velocity (if 2 disks effective velocity is double)
-            chopVel = 2*np.pi*radius[i] * numDisk[i] * freq[i]
-            # full opening time
-            t_full_op = uSec * (slot_width[i]+guide_width[i]) / chopVel
-            realTimeOp = np.array([chop2Phase, chop2Phase+t_full_op])
+            realTimeOp = np.array([phase[i], phase[i]+t_full_op[i]])
         else:
             # the opening time of the chopper so that it is open for the focus wavelength
             t_open = lam2TOF * lam * dist[i]
-            # effective chopper velocity (if 2 disks effective velocity is double)
-            chopVel = 2*np.pi*radius[i] * numDisk[i] * freq[i]
-            # full opening time
-            t_full_op = uSec * (slot_width[i]+guide_width[i]) / chopVel
             # set the chopper phase to be as close to zero as possible
-            realTimeOp = np.array([(t_open-t_full_op/2.), (t_open+t_full_op/2.)])
+            realTimeOp = np.array([(t_open-t_full_op[i]/2.), (t_open+t_full_op[i]/2.)])
         chop_times.append([])
         if slots_ang_pos and nslot[i] > 1 and slots_ang_pos[i]:
             tslots = [(uSec * slots_ang_pos[i][j] / 360. / freq[i]) for j in range(nslot[i])]
@@ -246,7 +247,7 @@ def calcChopTimes(efocus, freq, instrumentpars, chop2Phase=5):
             islt = 0
             next_win_t = uSec/source_rep + (uSec / freq[i])
             while realTimeOp[0] < next_win_t:
-                chop_times[i].append(copy.deepcopy(realTimeOp[:]))
+                chop_times[i].append(realTimeOp.copy())
                 slt0 = islt % nslot[i]
                 slt1 = (islt + 1) % nslot[i]
                 angdiff = (slots_ang_pos[i][slt1] - slots_ang_pos[i][slt0])
@@ -259,7 +260,7 @@ def calcChopTimes(efocus, freq, instrumentpars, chop2Phase=5):
             next_win_t = uSec / (nslot[i]*freq[i])
             realTimeOp -= next_win_t * np.ceil(realTimeOp[0]/next_win_t)
             while realTimeOp[0] < (uSec/p_frames+next_win_t):
-                chop_times[i].append(copy.deepcopy(realTimeOp[:]))
+                chop_times[i].append(realTimeOp.copy())
                 realTimeOp += next_win_t
     # then we look for what else gets through
     # firstly calculate the bounding box for each window in final chopper
@@ -330,8 +330,6 @@ class PyChopGui(QMainWindow):
         mn = self.minE[inst]
         mx = (self.flxslder.val/100)*self.maxE[inst]
         eis = np.linspace(mn, mx, ne)
-        flux = eis*0
-        elres = eis*0
         if update:
             self.flxaxes1.clear()
             self.flxaxes2.clear()
@@ -339,20 +337,16 @@ class PyChopGui(QMainWindow):
                 self.flxaxes1.hold(True)
                 self.flxaxes2.hold(True)
             for ii, instrument in enumerate(tmpinst):
-                for ie, ei in enumerate(eis):
-                    with warnings.catch_warnings(record=True):
-                        warnings.simplefilter('always', UserWarning)
-                        flux[ie] = instrument.getFlux(ei)
-                        elres[ie] = instrument.getResolution(0., ei)[0]
-                self.flxaxes1.plot(eis, flux)
-                line, = self.flxaxes2.plot(eis, elres)
-                line.set_label(labels[ii])
-        else:
-            for ie, ei in enumerate(eis):
                 with warnings.catch_warnings(record=True):
                     warnings.simplefilter('always', UserWarning)
-                    flux[ie] = self.engine.getFlux(ei)
-                    elres[ie] = self.engine.getResolution(0., ei)[0]
+                    elres, flux = instrument.getResFluxGrid(eis)
+                self.flxaxes1.plot(eis, flux[:, 0, 0])
+                line, = self.flxaxes2.plot(eis, elres[:, 0, 0])
+                line.set_label(labels[ii])
+        else:
+            with warnings.catch_warnings(record=True):
+                warnings.simplefilter('always', UserWarning)
+                elres, flux = self.engine.getResFluxGrid(eis)
             if overplot:
                 if matplotlib.compare_versions('2.1.0',matplotlib.__version__):
                     self.flxaxes1.hold(True)
@@ -360,8 +354,8 @@ class PyChopGui(QMainWindow):
             else:
                 self.flxaxes1.clear()
                 self.flxaxes2.clear()
-            self.flxaxes1.plot(eis, flux)
-            line, = self.flxaxes2.plot(eis, elres)
+            self.flxaxes1.plot(eis, flux[:, 0, 0])
+            line, = self.flxaxes2.plot(eis, elres[:, 0, 0])
             line.set_label('%s "%s" %d Hz' % (inst, chop, freq))
         self.flxaxes1.set_xlim([mn, mx])
         self.flxaxes2.set_xlim([mn, mx])
@@ -409,17 +403,12 @@ class PyChopGui(QMainWindow):
         rep = self.engine.moderator.source_rep
         maxfreq = self.engine.chopper_system.max_frequencies
         freqs = range(rep, (maxfreq[0] if hasattr(maxfreq, '__len__') else maxfreq) + 1, rep)
-        flux = np.zeros(len(freqs))
-        elres = np.zeros(len(freqs))
-        for ie, freq in enumerate(freqs):
-            if hasattr(freq0, '__len__'):
-                self.setFreq(manual_freq=[freq] + freq0[1:])
-            else:
-                self.setFreq(manual_freq=freq)
-            with warnings.catch_warnings(record=True):
-                warnings.simplefilter('always', UserWarning)
-                flux[ie] = self.engine.getFlux(ei)
-                elres[ie] = self.engine.getResolution(0., ei)[0]
+        # Only the first (resolution) chopper frequency is scanned
+        settings = [[freq] + freq0[1:] for freq in freqs] if hasattr(freq0, '__len__') else freqs
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter('always', UserWarning)
+            elres, flux = self.engine.getResFluxGrid([ei], settings)
+        elres, flux = elres[0, :, 0], flux[0, :, 0]
         if overplot:
             if matplotlib.compare_versions('2.1.0',matplotlib.__version__):
                 self.frqaxes1.hold(True)
@@ -427,7 +416,6 @@ class PyChopGui(QMainWindow):
         else:
             self.frqaxes1.clear()
             self.frqaxes2.clear()
-        self.setFreq(manual_freq=freq0)
         self.frqaxes1.set_xlabel('Chopper Frequency (Hz)')
         self.frqaxes1.set_ylabel('Flux (n/cm$^2$/s)')
         line, = self.frqaxes1.plot(freqs, flux, 'o-')
@@ -19,6 +19,7 @@ from sans.common.constants import (TRANS_SUFFIX, SANS_SUFFIX, ALL_PERIODS,
                                    CAN_COUNT_AND_NORM_FOR_OPTIMIZATION,
                                    CAN_AND_SAMPLE_WORKSPACE)
 from sans.common.file_information import (get_extension_for_file_type, SANSFileInformationFactory)
+from sans.algorithm_detail.reduction_cache import get_reduced_workspace_cache
 from sans.gui_logic.plotting import get_plotting_module
 from sans.state.Serializer import Serializer
 from sans.state.StateObjects.StateData import StateData
@@ -107,6 +108,8 @@ def single_reduction_for_batch(state, use_optimizations, output_mode, plot_resul
     reduction_alg = create_managed_non_child_algorithm(single_reduction_name, version=alg_version,
                                                        **single_reduction_options)
     reduction_alg.setChild(False)
+    # The cache only holds the outputs of version 1, since version 2 produces workspace groups
+    reduction_cache = None if event_slice_optimisation else get_reduced_workspace_cache()
     # Perform the data reduction
     for reduction_package in reduction_packages:
         # -----------------------------------
@@ -117,9 +120,13 @@ def single_reduction_for_batch(state, use_optimizations, output_mode, plot_resul
                                                event_slice_optimisation=event_slice_optimisation)
 
         # -----------------------------------
-        #  Run the reduction
+        #  Run the reduction or restore it from the cache
         # -----------------------------------
-        reduction_alg.execute()
+        cache_key = reduction_cache.get_key(reduction_package, use_optimizations, save_can) \
+            if reduction_cache else None
+        cached_factors = reduction_cache.load(cache_key, reduction_alg) if cache_key else None
+        if cached_factors is None:
+            reduction_alg.execute()
 
         # -----------------------------------
         # Get the output of the algorithm
@@ -150,8 +157,13 @@ def single_reduction_for_batch(state, use_optimizations, output_mode, plot_resul
         reduction_package.reduced_lab_sample = get_workspace_from_algorithm(reduction_alg, "OutputWorkspaceLABSample")
         reduction_package.reduced_hab_sample = get_workspace_from_algorithm(reduction_alg, "OutputWorkspaceHABSample")
 
-        out_scale_factor, out_shift_factor = get_shift_and_scale_factors_from_algorithm(reduction_alg,
-                                                                                        event_slice_optimisation)
+        if cached_factors is None:
+            out_scale_factor, out_shift_factor = get_shift_and_scale_factors_from_algorithm(reduction_alg,
+                                                                                            event_slice_optimisation)
+            if cache_key:
+                reduction_cache.store(cache_key, reduction_alg, out_scale_factor, out_shift_factor)
+        else:
+            out_scale_factor, out_shift_factor = cached_factors
         reduction_package.out_scale_factor = out_scale_factor
         reduction_package.out_shift_factor = out_shift_factor
 
@@ -207,6 +219,24 @@ def single_reduction_for_batch(state, use_optimizations, output_mode, plot_resul
     return out_scale_factors, out_shift_factors
 
 
+def single_reduction_for_serialised_batch(serialised_state, use_optimizations, output_mode, save_can=False):
+    """
+    Runs a single reduction for a state which has been serialised with sans.state.Serializer.
+
+    This is the entry point for reductions running in worker processes: the state is sent as a JSON string and only
+    the shift and scale factors are sent back. Reduced workspaces are not available in the calling process, so they
+    have to be saved to file by the worker.
+    :param serialised_state: a SANSState object serialised to JSON
+    :param use_optimizations: if true then the optimizations of child algorithms are enabled.
+    :param output_mode: the output mode
+    :param save_can: bool. whether or not to save out can workspaces
+    :return: out_scale_factors, out_shift_factors for the reduction
+    """
+    state = Serializer.from_json(serialised_state)
+    return single_reduction_for_batch(state, use_optimizations, output_mode, plot_results=False, output_graph='',
+                                      save_can=save_can)
+
+
 def load_workspaces_from_states(state):
     workspace_to_name = {SANSDataType.SAMPLE_SCATTER: "SampleScatterWorkspace",
                          SANSDataType.SAMPLE_TRANSMISSION: "SampleTransmissionWorkspace",
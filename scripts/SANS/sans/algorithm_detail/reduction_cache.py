@@ -0,0 +1,247 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+""" An on-disk cache of the workspaces produced by SANSSingleReduction for a reduction package."""
+
+import copy
+import errno
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from mantid.api import AnalysisDataService, WorkspaceGroup
+from mantid.kernel import ConfigService, Logger
+from sans.common.file_information import (find_full_file_path, find_sans_file, get_file_checksum)
+from sans.common.general_functions import (create_managed_non_child_algorithm, create_unmanaged_algorithm)
+from sans.state.Serializer import Serializer
+
+# ConfigService keys which enable the cache
+REDUCTION_CACHE_DIRECTORY_KEY = "sans.reduction_cache.directory"
+REDUCTION_CACHE_SIZE_KEY = "sans.reduction_cache.max_size_mb"
+DEFAULT_REDUCTION_CACHE_SIZE_MB = 1024
+
+MANIFEST_FILE_NAME = "manifest.json"
+# Entries are written into directories with this prefix before they are moved to their key
+TEMPORARY_DIRECTORY_PREFIX = ".tmp."
+
+# The workspaces produced by version 1 of SANSSingleReduction
+OUTPUT_WORKSPACE_PROPERTIES = ["OutputWorkspaceLAB", "OutputWorkspaceHAB", "OutputWorkspaceMerged",
+                               "OutputWorkspaceLABCan", "OutputWorkspaceLABCanCount", "OutputWorkspaceLABCanNorm",
+                               "OutputWorkspaceHABCan", "OutputWorkspaceHABCanCount", "OutputWorkspaceHABCanNorm",
+                               "OutputWorkspaceCalculatedTransmission", "OutputWorkspaceUnfittedTransmission",
+                               "OutputWorkspaceCalculatedTransmissionCan", "OutputWorkspaceUnfittedTransmissionCan",
+                               "OutputWorkspaceLABSample", "OutputWorkspaceHABSample"]
+
+logger = Logger("SANS")
+
+
+class ReducedWorkspaceCache(object):
+    """
+    Stores the reduced workspaces of a reduction package in a content-addressed directory.
+
+    The key of an entry is a hash of the serialised state of the reduction package, with the save settings removed,
+    and of the checksums of all input files. The workspaces are stored under the algorithm property which produced
+    them, so they can be restored under the output names of the current state. When the cache grows beyond its
+    maximum size, the least recently used entries are removed.
+
+    Several processes may share a cache directory: entries are moved into place atomically, the first writer of a key
+    wins and a reader which finds an entry removed underneath it treats the lookup as a miss.
+    """
+    def __init__(self, cache_directory, maximum_size):
+        """
+        :param cache_directory: the directory in which the entries are stored.
+        :param maximum_size: the maximum size of the cache in bytes.
+        """
+        super(ReducedWorkspaceCache, self).__init__()
+        self._cache_directory = cache_directory
+        self._maximum_size = maximum_size
+
+    def get_key(self, reduction_package, use_optimizations, save_can):
+        """
+        Gets the key of a reduction package.
+
+        :param reduction_package: a reduction package object.
+        :param use_optimizations: if true then the optimizations of child algorithms are enabled.
+        :param save_can: bool. whether or not can workspaces are saved out.
+        :return: the key or None if an input file cannot be found.
+        """
+        # The save settings only affect the names and formats of the output, which are not part of a cache entry
+        state = copy.copy(reduction_package.state)
+        state.save = None
+        serialised_state = json.dumps(json.loads(Serializer.to_json(state)), sort_keys=True)
+
+        try:
+            checksums = [get_file_checksum(file_name) for file_name in get_input_files(reduction_package.state)]
+        except (RuntimeError, IOError) as error:
+            logger.debug("SANS reduction cache: Cannot get the checksum of the input files: {0}".format(str(error)))
+            return None
+
+        key = hashlib.sha256()
+        key.update(serialised_state.encode("utf-8"))
+        for checksum in checksums:
+            key.update(checksum.encode("utf-8"))
+        key.update(json.dumps([use_optimizations, save_can,
+                               reduction_package.is_part_of_multi_period_reduction,
+                               reduction_package.is_part_of_event_slice_reduction,
+                               reduction_package.is_part_of_wavelength_range_reduction]).encode("utf-8"))
+        return key.hexdigest()
+
+    def load(self, key, reduction_alg):
+        """
+        Restores the cached workspaces of an entry to the ADS under the output names set on the reduction algorithm.
+
+        :param key: the key of the entry.
+        :param reduction_alg: a handle to the reduction algorithm with the output names set.
+        :return: the out scale factors and the out shift factors or None if there is no entry for the key.
+        """
+        entry_directory = os.path.join(self._cache_directory, key)
+        manifest_file = os.path.join(entry_directory, MANIFEST_FILE_NAME)
+        try:
+            with open(manifest_file, "r") as f:
+                manifest = json.load(f)
+        except (IOError, ValueError):
+            return None
+
+        loaded_workspaces = []
+        try:
+            for property_name, file_name in manifest["workspaces"].items():
+                workspace_name = reduction_alg.getProperty(property_name).valueAsStr
+                if not workspace_name:
+                    continue
+                load_alg = create_managed_non_child_algorithm("LoadNexusProcessed",
+                                                              **{"Filename": os.path.join(entry_directory, file_name),
+                                                                 "OutputWorkspace": workspace_name})
+                load_alg.execute()
+                loaded_workspaces.append(workspace_name)
+        except (RuntimeError, ValueError) as error:
+            # The entry has been evicted by another process after the manifest was read
+            logger.debug("SANS reduction cache: Cannot load the entry {0}: {1}".format(key, str(error)))
+            for workspace_name in loaded_workspaces:
+                if AnalysisDataService.doesExist(workspace_name):
+                    AnalysisDataService.remove(workspace_name)
+            return None
+
+        # Mark the entry as recently used
+        try:
+            os.utime(manifest_file, None)
+        except OSError:
+            pass
+        return manifest["out_scale_factor"], manifest["out_shift_factor"]
+
+    def store(self, key, reduction_alg, out_scale_factor, out_shift_factor):
+        """
+        Stores the output workspaces of an executed reduction algorithm.
+
+        :param key: the key of the entry.
+        :param reduction_alg: a handle to the executed reduction algorithm.
+        :param out_scale_factor: a list of out scale factors.
+        :param out_shift_factor: a list of out shift factors.
+        """
+        if not os.path.isdir(self._cache_directory):
+            os.makedirs(self._cache_directory)
+
+        # Write into a temporary directory first, such that a concurrent reader never sees a partial entry
+        temporary_directory = tempfile.mkdtemp(prefix=TEMPORARY_DIRECTORY_PREFIX + key + ".",
+                                               dir=self._cache_directory)
+        try:
+            workspaces = {}
+            for property_name in OUTPUT_WORKSPACE_PROPERTIES:
+                workspace_name = reduction_alg.getProperty(property_name).valueAsStr
+                if not workspace_name or not AnalysisDataService.doesExist(workspace_name):
+                    continue
+                workspace = AnalysisDataService.retrieve(workspace_name)
+                if isinstance(workspace, WorkspaceGroup):
+                    return
+                file_name = property_name + ".nxs"
+                save_alg = create_unmanaged_algorithm("SaveNexusProcessed",
+                                                      **{"InputWorkspace": workspace,
+                                                         "Filename": os.path.join(temporary_directory, file_name)})
+                save_alg.execute()
+                workspaces[property_name] = file_name
+
+            manifest = {"workspaces": workspaces,
+                        "out_scale_factor": [float(value) for value in out_scale_factor],
+                        "out_shift_factor": [float(value) for value in out_shift_factor]}
+            with open(os.path.join(temporary_directory, MANIFEST_FILE_NAME), "w") as f:
+                json.dump(manifest, f)
+
+            entry_directory = os.path.join(self._cache_directory, key)
+            if os.path.isdir(entry_directory):
+                return
+            try:
+                os.rename(temporary_directory, entry_directory)
+            except OSError as error:
+                # Another process has stored the same key in the meantime, which is as good as our entry
+                if error.errno in (errno.EEXIST, errno.ENOTEMPTY) and os.path.isdir(entry_directory):
+                    return
+                raise
+        finally:
+            shutil.rmtree(temporary_directory, ignore_errors=True)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total_size = 0
+        for key in os.listdir(self._cache_directory):
+            # Skip the entries which other writers are still producing
+            if key.startswith(TEMPORARY_DIRECTORY_PREFIX):
+                continue
+            entry_directory = os.path.join(self._cache_directory, key)
+            manifest_file = os.path.join(entry_directory, MANIFEST_FILE_NAME)
+            try:
+                size = sum(os.path.getsize(os.path.join(entry_directory, file_name))
+                           for file_name in os.listdir(entry_directory))
+                last_used = os.path.getmtime(manifest_file)
+            except (FileNotFoundError, NotADirectoryError):
+                # The entry is incomplete or has been evicted by another process
+                continue
+            entries.append((last_used, entry_directory, size))
+            total_size += size
+
+        for _, entry_directory, size in sorted(entries):
+            if total_size <= self._maximum_size:
+                break
+            shutil.rmtree(entry_directory, ignore_errors=True)
+            total_size -= size
+
+
+def get_input_files(state):
+    """
+    Gets the full paths of all files which are read by a reduction.
+
+    :param state: a SANSState object.
+    :return: a list of full file paths.
+    """
+    data = state.data
+    file_names = [find_sans_file(file_name) for file_name in [data.sample_scatter, data.sample_transmission,
+                                                              data.sample_direct, data.can_scatter,
+                                                              data.can_transmission, data.can_direct]
+                  if file_name]
+
+    calibration = state.adjustment.calibration
+    mask_files = state.mask.mask_files if state.mask.mask_files else []
+    for file_name in ([calibration] if calibration else []) + list(mask_files):
+        full_file_name = find_full_file_path(file_name)
+        if not full_file_name:
+            raise RuntimeError("Cannot find the file {0}.".format(file_name))
+        file_names.append(full_file_name)
+    return file_names
+
+
+def get_reduced_workspace_cache():
+    """
+    Gets the reduced workspace cache if it has been enabled via the ConfigService.
+
+    :return: a ReducedWorkspaceCache or None.
+    """
+    cache_directory = ConfigService.getString(REDUCTION_CACHE_DIRECTORY_KEY)
+    if not cache_directory:
+        return None
+    maximum_size = ConfigService.getString(REDUCTION_CACHE_SIZE_KEY)
+    maximum_size = float(maximum_size) if maximum_size else DEFAULT_REDUCTION_CACHE_SIZE_MB
+    return ReducedWorkspaceCache(cache_directory, int(maximum_size * 1024 * 1024))
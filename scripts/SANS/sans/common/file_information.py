@@ -8,9 +8,14 @@
 
 # pylint: disable=too-few-public-methods, invalid-name
 
+import hashlib
+import json
+from collections import OrderedDict
 import os
 import h5py as h5
 import re
+import sqlite3
+import threading
 from abc import (ABCMeta, abstractmethod)
 from mantid.api import FileFinder
 from mantid.kernel import (DateAndTime, ConfigService, Logger)
@@ -51,6 +56,8 @@ MANTID_WORKSPACE_PREFIX = 'mantid_workspace_'
 EVENT_WORKSPACE = "event_workspace"
 
 # Other
+CHECKSUM_BLOCK_SIZE = 1024 * 1024
+MAXIMUM_NUMBER_OF_METADATA_ENTRIES = 1000
 DEFINITION = "Definition"
 PARAMETERS = "Parameters"
 
@@ -284,31 +291,298 @@ def convert_to_shape(shape_flag):
     return shape
 
 
+# ----------------------------------------------------------------------------------------------------------------------
+# File metadata index
+# ----------------------------------------------------------------------------------------------------------------------
+class SANSFileMetadataIndex(object):
+    """
+    Caches the header information of SANS data files.
+
+    The header information of a file is extracted in a single pass by a reader function and stored together with the
+    modification time and the size of the file. Cached entries are only served while both match the file on disk.
+    At most maximum_number_of_entries are held in memory, the least recently used entries are dropped first.
+    Optionally the entries are persisted to an sqlite database such that they survive between sessions.
+    """
+    def __init__(self, cache_file=None, maximum_number_of_entries=MAXIMUM_NUMBER_OF_METADATA_ENTRIES):
+        super(SANSFileMetadataIndex, self).__init__()
+        self._entries = OrderedDict()
+        self._maximum_number_of_entries = maximum_number_of_entries
+        self._lock = threading.Lock()
+        self._cache_file = cache_file
+
+    def set_cache_file(self, cache_file):
+        """
+        Sets the sqlite database which is used as an on-disk cache.
+
+        :param cache_file: the path to the database file or None to disable the on-disk cache.
+        """
+        self._cache_file = cache_file
+
+    def get_cache_file(self):
+        return self._cache_file
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_metadata(self, file_name, file_kind, reader):
+        """
+        Gets the header information of a file.
+
+        :param file_name: the full file path.
+        :param file_kind: the kind of header information, e.g. nxs or raw.
+        :param reader: a function handle which extracts the header information as a json-serializable dict.
+        :return: the header information.
+        """
+        full_file_name = os.path.abspath(file_name)
+        try:
+            file_stat = os.stat(full_file_name)
+        except OSError:
+            # Nothing to validate against, hence let the reader handle a missing file
+            return reader(file_name)
+        signature = (file_stat.st_mtime_ns, file_stat.st_size)
+        key = (full_file_name, file_kind)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        metadata = self._load_from_cache_file(key, signature)
+        if metadata is None:
+            metadata = reader(file_name)
+            self._save_to_cache_file(key, signature, metadata)
+
+        with self._lock:
+            self._entries[key] = (signature, metadata)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maximum_number_of_entries:
+                self._entries.popitem(last=False)
+        return metadata
+
+    def _connect(self):
+        connection = sqlite3.connect(self._cache_file, timeout=10.)
+        connection.execute("CREATE TABLE IF NOT EXISTS file_metadata (path TEXT, kind TEXT, mtime INTEGER, "
+                           "size INTEGER, metadata TEXT, PRIMARY KEY (path, kind))")
+        return connection
+
+    def _load_from_cache_file(self, key, signature):
+        if not self._cache_file:
+            return None
+        try:
+            connection = self._connect()
+            try:
+                row = connection.execute("SELECT metadata FROM file_metadata WHERE path=? AND kind=? AND mtime=? "
+                                         "AND size=?", key + signature).fetchone()
+            finally:
+                connection.close()
+        except sqlite3.Error as error:
+            SANSFileInformation.logger.warning("Could not read the SANS file metadata cache {0}: {1}"
+                                               "".format(self._cache_file, str(error)))
+            return None
+        return json.loads(row[0]) if row is not None else None
+
+    def _save_to_cache_file(self, key, signature, metadata):
+        if not self._cache_file:
+            return
+        try:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.execute("INSERT OR REPLACE INTO file_metadata VALUES (?, ?, ?, ?, ?)",
+                                       key + signature + (json.dumps(metadata),))
+            finally:
+                connection.close()
+        except sqlite3.Error as error:
+            SANSFileInformation.logger.warning("Could not write to the SANS file metadata cache {0}: {1}"
+                                               "".format(self._cache_file, str(error)))
+
+
+_file_metadata_index = SANSFileMetadataIndex()
+
+
+def set_file_metadata_cache_file(cache_file):
+    """
+    Persists the SANS file header information in an sqlite database.
+
+    :param cache_file: the path to the database file or None to only cache in memory.
+    """
+    _file_metadata_index.set_cache_file(cache_file)
+
+
+def clear_file_metadata_cache():
+    _file_metadata_index.clear()
+
+
+def read_file_checksum(file_name):
+    checksum = hashlib.sha256()
+    with open(file_name, "rb") as data_file:
+        for block in iter(lambda: data_file.read(CHECKSUM_BLOCK_SIZE), b""):
+            checksum.update(block)
+    return {"sha256": checksum.hexdigest()}
+
+
+def get_file_checksum(file_name):
+    """
+    Gets the SHA-256 checksum of the content of a file. The checksum is only recalculated when the file changes.
+
+    :param file_name: the full file path.
+    :return: the hex digest of the checksum.
+    """
+    return _file_metadata_index.get_metadata(file_name, "sha256", read_file_checksum)["sha256"]
+
+
+def get_metadata_entry(metadata, key, file_name):
+    value = metadata.get(key)
+    if value is None:
+        raise RuntimeError("SANSFileInformation: Could not find {0} in the file {1}.".format(key, file_name))
+    return value
+
+
+def _get_first_value(group, *names):
+    try:
+        for name in names:
+            group = group[name]
+        return group[0]
+    except KeyError:
+        return None
+
+
+def _to_string(value):
+    if value is None:
+        return None
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+def _to_float(value):
+    return float(value) if value is not None else None
+
+
+def _to_int(value):
+    return int(value) if value is not None else None
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 # Functions for ISIS Nexus
 # ----------------------------------------------------------------------------------------------------------------------
-def get_isis_nexus_info(file_name):
+def read_nexus_metadata(file_name):
     """
-    Get information if is ISIS Nexus and the number of periods.
+    Reads all the header information of a Nexus file, which is required by SANS, in a single pass.
 
     :param file_name: the full file path.
-    :return: if the file was a Nexus file and the number of periods.
+    :return: a dict with the header information.
     """
+    metadata = {"is_isis_nexus": False,
+                "number_of_periods": -1,
+                "is_added": False,
+                "number_of_added_periods": 1,
+                "is_added_event": False}
     try:
         with h5.File(file_name, 'r') as h5_file:
             keys = list(h5_file.keys())
-            is_isis_nexus = RAW_DATA_1 in keys
-            if is_isis_nexus:
-                first_entry = h5_file[RAW_DATA_1]
-                period_group = first_entry[PERIODS]
-                proton_charge_data_set = period_group[PROTON_CHARGE]
-                number_of_periods = len(proton_charge_data_set)
-            else:
-                number_of_periods = -1
+            if RAW_DATA_1 in keys:
+                metadata["is_isis_nexus"] = True
+                metadata["number_of_periods"] = len(h5_file[RAW_DATA_1][PERIODS][PROTON_CHARGE])
+
+            if keys:
+                try:
+                    metadata.update(_read_first_entry_metadata(h5_file[keys[0]]))
+                except (IOError, KeyError, ValueError, AttributeError) as error:
+                    # e.g. the first entry is a data set or holds unexpected types
+                    SANSFileInformation.logger.debug("Could not read the first entry of {0} in a single pass: {1}"
+                                                     "".format(file_name, str(error)))
+                    metadata.update(_read_first_entry_metadata_by_property(h5_file[keys[0]]))
+
+            if has_added_suffix(file_name):
+                is_added, number_of_periods, is_event = get_added_nexus_information_from_file(h5_file, file_name)
+                metadata["is_added"] = is_added
+                metadata["number_of_added_periods"] = number_of_periods
+                metadata["is_added_event"] = is_event
     except IOError:
-        is_isis_nexus = False
-        number_of_periods = -1
-    return is_isis_nexus, number_of_periods
+        pass
+    return metadata
+
+
+def _read_first_entry_metadata(first_entry):
+    """
+    Instrument, date, run number, event mode and sample information is stored in the first entry:
+    file|
+        |--mantid_workspace_1/raw_data_1|
+                                        |--instrument|
+                                                     |--name
+                                        |--start_time
+                                        |--run_number
+                                        |--logs|
+                                               |--start_time|
+                                                            |--value
+                                               |--run_number|
+                                                            |--value
+                                        |--sample|
+                                                 |--height, width, thickness, shape
+                                                 |--geom_height, geom_width, geom_thickness, geom_id
+                                        |--some_group|
+                                                     |--Attribute: NX_class = NXevent_data
+    """
+    return {name: read(first_entry) for name, read in _FIRST_ENTRY_READERS.items()}
+
+
+def _read_first_entry_metadata_by_property(first_entry):
+    """
+    Reads the header information of the first entry property by property. A property which cannot be read is None,
+    such that only the look up of this property fails.
+    """
+    metadata = {}
+    for name, read in _FIRST_ENTRY_READERS.items():
+        try:
+            metadata[name] = read(first_entry)
+        except (IOError, KeyError, ValueError, AttributeError, TypeError):
+            metadata[name] = None
+    return metadata
+
+
+def _is_event_mode(first_entry):
+    for value in list(first_entry.values()):
+        if NX_CLASS in value.attrs and NX_EVENT_DATA == _to_string(value.attrs[NX_CLASS]):
+            return True
+    return False
+
+
+def _read_shape(first_entry):
+    shape = _get_first_value(first_entry, SAMPLE, SHAPE)
+    return _to_string(shape).upper() if shape is not None else None
+
+
+_FIRST_ENTRY_READERS = OrderedDict([
+    ("instrument_name", lambda entry: _to_string(_get_first_value(entry, INSTRUMENT, NAME))),
+    ("start_time", lambda entry: _to_string(_get_first_value(entry, START_TIME))),
+    ("run_number", lambda entry: _to_int(_get_first_value(entry, RUN_NUMBER))),
+    ("log_start_time", lambda entry: _to_string(_get_first_value(entry, LOGS, START_TIME, VALUE))),
+    ("log_run_number", lambda entry: _to_int(_get_first_value(entry, LOGS, RUN_NUMBER, VALUE))),
+    ("is_event_mode", _is_event_mode),
+    ("height", lambda entry: _to_float(_get_first_value(entry, SAMPLE, HEIGHT))),
+    ("width", lambda entry: _to_float(_get_first_value(entry, SAMPLE, WIDTH))),
+    ("thickness", lambda entry: _to_float(_get_first_value(entry, SAMPLE, THICKNESS))),
+    ("shape", _read_shape),
+    ("geom_height", lambda entry: _to_float(_get_first_value(entry, SAMPLE, GEOM_HEIGHT))),
+    ("geom_width", lambda entry: _to_float(_get_first_value(entry, SAMPLE, GEOM_WIDTH))),
+    ("geom_thickness", lambda entry: _to_float(_get_first_value(entry, SAMPLE, GEOM_THICKNESS))),
+    ("geom_id", lambda entry: _to_int(_get_first_value(entry, SAMPLE, GEOM_ID)))])
+
+
+def get_nexus_metadata(file_name):
+    return _file_metadata_index.get_metadata(file_name, NXS_EXTENSION, read_nexus_metadata)
+
+
+def get_isis_nexus_info(file_name):
+    """
+    Get information if is ISIS Nexus and the number of periods.
+
+    :param file_name: the full file path.
+    :return: if the file was a Nexus file and the number of periods.
+    """
+    metadata = get_nexus_metadata(file_name)
+    return metadata["is_isis_nexus"], metadata["number_of_periods"]
 
 
 def is_isis_nexus_single_period(file_name):
@@ -331,17 +605,7 @@ def get_instrument_name_for_isis_nexus(file_name):
                                         |--instrument|
                                                      |--name
     """
-    with h5.File(file_name, 'r') as h5_file:
-        # Open first entry
-        keys = list(h5_file.keys())
-        first_entry = h5_file[keys[0]]
-        # Open instrument group
-        instrument_group = first_entry[INSTRUMENT]
-        # Open name data set
-        name_data_set = instrument_group[NAME]
-        # Read value
-        instrument_name = name_data_set[0].decode("utf-8")
-    return instrument_name
+    return get_metadata_entry(get_nexus_metadata(file_name), "instrument_name", file_name)
 
 
 def get_top_level_nexus_entry(file_name, entry_name):
@@ -362,10 +626,14 @@ def get_top_level_nexus_entry(file_name, entry_name):
 
 
 def get_date_for_isis_nexus(file_name):
-    value = get_top_level_nexus_entry(file_name, START_TIME)
+    value = get_metadata_entry(get_nexus_metadata(file_name), "start_time", file_name)
     return DateAndTime(value)
 
 
+def get_run_number_for_isis_nexus(file_name):
+    return get_metadata_entry(get_nexus_metadata(file_name), "run_number", file_name)
+
+
 def get_event_mode_information(file_name):
     """
     Event mode files have a class with a "NXevent_data" type
@@ -374,17 +642,7 @@ def get_event_mode_information(file_name):
                                     |--some_group|
                                                  |--Attribute: NX_class = NXevent_data
     """
-    with h5.File(file_name, 'r') as h5_file:
-        # Open first entry
-        keys = list(h5_file.keys())
-        first_entry = h5_file[keys[0]]
-        # Open instrument group
-        is_event_mode = False
-        for value in list(first_entry.values()):
-            if NX_CLASS in value.attrs and NX_EVENT_DATA == value.attrs[NX_CLASS].decode("utf-8"):
-                is_event_mode = True
-                break
-    return is_event_mode
+    return get_nexus_metadata(file_name).get("is_event_mode", False)
 
 
 def get_geometry_information_isis_nexus(file_name):
@@ -394,23 +652,19 @@ def get_geometry_information_isis_nexus(file_name):
     :param file_name:
     :return: height, width, thickness, shape
     """
-    with h5.File(file_name, 'r') as h5_file:
-        # Open first entry
-        keys = list(h5_file.keys())
-        top_level = h5_file[keys[0]]
-        sample = top_level[SAMPLE]
-        height = float(sample[HEIGHT][0])
-        width = float(sample[WIDTH][0])
-        thickness = float(sample[THICKNESS][0])
-        shape_as_string = sample[SHAPE][0].upper().decode("utf-8")
-        if shape_as_string == CYLINDER:
-            shape = SampleShape.CYLINDER
-        elif shape_as_string == FLAT_PLATE:
-            shape = SampleShape.FLAT_PLATE
-        elif shape_as_string == DISC:
-            shape = SampleShape.DISC
-        else:
-            shape = None
+    metadata = get_nexus_metadata(file_name)
+    height = get_metadata_entry(metadata, "height", file_name)
+    width = get_metadata_entry(metadata, "width", file_name)
+    thickness = get_metadata_entry(metadata, "thickness", file_name)
+    shape_as_string = get_metadata_entry(metadata, "shape", file_name)
+    if shape_as_string == CYLINDER:
+        shape = SampleShape.CYLINDER
+    elif shape_as_string == FLAT_PLATE:
+        shape = SampleShape.FLAT_PLATE
+    elif shape_as_string == DISC:
+        shape = SampleShape.DISC
+    else:
+        shape = None
     return height, width, thickness, shape
 
 
@@ -426,13 +680,25 @@ def get_geometry_information_isis_nexus(file_name):
 # 3. Scenario 2: Added event data, ie files which were added and saved as event data.
 
 
-def get_added_nexus_information(file_name):  # noqa
+def get_added_nexus_information(file_name):
     """
     Get information if is added data and the number of periods.
 
     :param file_name: the full file path.
     :return: if the file was a Nexus file and the number of periods.
     """
+    metadata = get_nexus_metadata(file_name)
+    return metadata["is_added"], metadata["number_of_added_periods"], metadata["is_added_event"]
+
+
+def get_added_nexus_information_from_file(h5_file, file_name):  # noqa
+    """
+    Get information if is added data and the number of periods from an open file with an added suffix.
+
+    :param h5_file: the open h5py file handle.
+    :param file_name: the full file path.
+    :return: if the file was added data, the number of periods and if it is event data.
+    """
     ADDED_SUFFIX = "-add_added_event_data"
     ADDED_MONITOR_SUFFIX = "-add_monitors_added_event_data"
 
@@ -507,43 +773,32 @@ def get_added_nexus_information(file_name):  # noqa
                 break
         return is_added_file_histogram, num_periods
 
-    if has_added_suffix(file_name):
-        try:
-            with h5.File(file_name, 'r') as h5_file:
-                # Get all mantid_workspace_X keys
-                keys = list(h5_file.keys())
-                top_level_keys = get_all_keys_for_top_level(keys)
-
-                # Check if entries are added event data, if we don't have a hit, then it can always be
-                # added histogram data
-                is_added_event_file, number_of_periods_event = get_added_event_info(h5_file, top_level_keys, file_name)
-                is_added_histogram_file, number_of_periods_histogram = get_added_histogram_info(h5_file, top_level_keys)
-
-                if is_added_event_file:
-                    is_added = True
-                    is_event = True
-                    number_of_periods = number_of_periods_event
-                elif is_added_histogram_file:
-                    is_added = True
-                    is_event = False
-                    number_of_periods = number_of_periods_histogram
-                else:
-                    is_added = True
-                    is_event = False
-                    number_of_periods = 1
-        except IOError:
-            is_added = False
-            is_event = False
-            number_of_periods = 1
+    # Get all mantid_workspace_X keys
+    keys = list(h5_file.keys())
+    top_level_keys = get_all_keys_for_top_level(keys)
+
+    # Check if entries are added event data, if we don't have a hit, then it can always be
+    # added histogram data
+    is_added_event_file, number_of_periods_event = get_added_event_info(h5_file, top_level_keys, file_name)
+    is_added_histogram_file, number_of_periods_histogram = get_added_histogram_info(h5_file, top_level_keys)
+
+    if is_added_event_file:
+        is_added = True
+        is_event = True
+        number_of_periods = number_of_periods_event
+    elif is_added_histogram_file:
+        is_added = True
+        is_event = False
+        number_of_periods = number_of_periods_histogram
     else:
-        is_added = False
+        is_added = True
         is_event = False
         number_of_periods = 1
     return is_added, number_of_periods, is_event
 
 
 def get_date_for_added_workspace(file_name):
-    value = get_top_level_nexus_entry(file_name, "start_time")
+    value = get_metadata_entry(get_nexus_metadata(file_name), "start_time", file_name)
     return DateAndTime(value)
 
 
@@ -569,45 +824,97 @@ def get_geometry_information_isis_added_nexus(file_name):
     :param file_name: the file name
     :return: height, width, thickness, shape
     """
-    with h5.File(file_name, 'r') as h5_file:
-        # Open first entry
-        keys = list(h5_file.keys())
-        top_level = h5_file[keys[0]]
-        sample = top_level[SAMPLE]
-        height = float(sample[GEOM_HEIGHT][0])
-        width = float(sample[GEOM_WIDTH][0])
-        thickness = float(sample[GEOM_THICKNESS][0])
-        shape_id = int(sample[GEOM_ID][0])
-        shape = convert_to_shape(shape_id)
+    metadata = get_nexus_metadata(file_name)
+    height = get_metadata_entry(metadata, "geom_height", file_name)
+    width = get_metadata_entry(metadata, "geom_width", file_name)
+    thickness = get_metadata_entry(metadata, "geom_thickness", file_name)
+    shape_id = get_metadata_entry(metadata, "geom_id", file_name)
+    shape = convert_to_shape(shape_id)
     return height, width, thickness, shape
 
 
 # ----------------------------------------------------------------------------------------------------------------------
 # ISIS Raw
 # ----------------------------------------------------------------------------------------------------------------------
-def get_raw_info(file_name):
+def read_raw_metadata(file_name):
+    """
+    Reads all the header information of a raw file, which is required by SANS, with a single RawFileInfo call.
+
+    :param file_name: the full file path.
+    :return: a dict with the header information.
+    """
+    def get_month(month_string):
+        month_conversion = {"JAN": "01", "FEB": "02", "MAR": "03", "APR": "04",
+                            "MAY": "05", "JUN": "06", "JUL": "07", "AUG": "08",
+                            "SEP": "09", "OCT": "10", "NOV": "11", "DEC": "12"}
+        month_upper = month_string.upper()
+        if month_upper in month_conversion:
+            return month_conversion[month_upper]
+        else:
+            raise RuntimeError("Cannot get measurement time. Invalid month in Raw file: " + month_upper)
+
+    def get_raw_measurement_time(date_input, time_input):
+        year = date_input[7:(7 + 4)]
+        day = date_input[0:2]
+        month_string = date_input[3:6]
+        month = get_month(month_string)
+        return year + "-" + month + "-" + day + "T" + time_input
+
+    def get_first_value(table, column_names, column_name):
+        return table.column(column_names.index(column_name))[0]
+
+    metadata = {"is_raw": False,
+                "number_of_periods": -1}
+
     # Preselect files which don't end with .raw
     split_file_name, file_extension = os.path.splitext(file_name)
     if file_extension.upper() != RAW_EXTENSION_WITH_DOT:
-        is_raw = False
-        number_of_periods = -1
-    else:
+        return metadata
+
+    try:
+        alg_info = AlgorithmManager.createUnmanaged("RawFileInfo")
+        alg_info.initialize()
+        alg_info.setChild(True)
+        alg_info.setProperty("Filename", file_name)
+        alg_info.setProperty("GetRunParameters", True)
+        alg_info.setProperty("GetSampleParameters", True)
+        alg_info.execute()
+    except IOError:
+        return metadata
+
+    metadata["is_raw"] = True
+    metadata["number_of_periods"] = int(alg_info.getProperty("PeriodCount").value)
+    metadata["run_header"] = alg_info.getProperty("RunHeader").value
+
+    def read_entry(key, reader):
+        # An entry which can not be read is None, such that only requesting it fails, see get_metadata_entry
         try:
-            alg_info = AlgorithmManager.createUnmanaged("RawFileInfo")
-            alg_info.initialize()
-            alg_info.setChild(True)
-            alg_info.setProperty("Filename", file_name)
-            alg_info.setProperty("GetRunParameters", True)
-            alg_info.execute()
+            metadata[key] = reader()
+        except (RuntimeError, ValueError, TypeError, IndexError, AttributeError) as error:
+            SANSFileInformation.logger.debug("Could not read {0} from {1}: {2}".format(key, file_name, str(error)))
+            metadata[key] = None
 
-            periods = alg_info.getProperty("PeriodCount").value
-            is_raw = True
-            number_of_periods = periods
-        except IOError:
-            is_raw = False
-            number_of_periods = -1
+    run_parameters = alg_info.getProperty("RunParameterTable").value
+    run_keys = run_parameters.getColumnNames()
+    read_entry("date", lambda: get_raw_measurement_time(get_first_value(run_parameters, run_keys, END_DATE),
+                                                        get_first_value(run_parameters, run_keys, END_TIME)))
+
+    sample_parameters = alg_info.getProperty("SampleParameterTable").value
+    sample_keys = sample_parameters.getColumnNames()
+    read_entry("height", lambda: float(get_first_value(sample_parameters, sample_keys, E_HEIGHT)))
+    read_entry("width", lambda: float(get_first_value(sample_parameters, sample_keys, E_WIDTH)))
+    read_entry("thickness", lambda: float(get_first_value(sample_parameters, sample_keys, E_THICK)))
+    read_entry("shape_flag", lambda: int(get_first_value(sample_parameters, sample_keys, E_GEOM)))
+    return metadata
 
-    return is_raw, number_of_periods
+
+def get_raw_metadata(file_name):
+    return _file_metadata_index.get_metadata(file_name, RAW_EXTENSION, read_raw_metadata)
+
+
+def get_raw_info(file_name):
+    metadata = get_raw_metadata(file_name)
+    return metadata["is_raw"], metadata["number_of_periods"]
 
 
 def is_raw_single_period(file_name):
@@ -619,14 +926,7 @@ def is_raw_multi_period(file_name):
 
 
 def get_from_raw_header(file_name, index):
-    alg_info = AlgorithmManager.createUnmanaged("RawFileInfo")
-    alg_info.initialize()
-    alg_info.setChild(True)
-    alg_info.setProperty("Filename", file_name)
-    alg_info.setProperty("GetRunParameters", True)
-    alg_info.execute()
-
-    header = alg_info.getProperty("RunHeader").value
+    header = get_metadata_entry(get_raw_metadata(file_name), "run_header", file_name)
     element = header.split()[index]
     return element
 
@@ -642,44 +942,8 @@ def get_number_of_periods_for_raw(file_name):
 
 
 def get_date_for_raw(file_name):
-    def get_month(month_string):
-        month_conversion = {"JAN": "01", "FEB": "02", "MAR": "03", "APR": "04",
-                            "MAY": "05", "JUN": "06", "JUL": "07", "AUG": "08",
-                            "SEP": "09", "OCT": "10", "NOV": "11", "DEC": "12"}
-        month_upper = month_string.upper()
-        if month_upper in month_conversion:
-            return month_conversion[month_upper]
-        else:
-            raise RuntimeError("Cannot get measurement time. Invalid month in Raw file: " + month_upper)
-
-    def get_raw_measurement_time(date_input, time_input):
-        year = date_input[7:(7 + 4)]
-        day = date_input[0:2]
-        month_string = date_input[3:6]
-        month = get_month(month_string)
-
-        date_and_time_string = year + "-" + month + "-" + day + "T" + time_input
-        return DateAndTime(date_and_time_string)
-
-    alg_info = AlgorithmManager.createUnmanaged("RawFileInfo")
-    alg_info.initialize()
-    alg_info.setChild(True)
-    alg_info.setProperty("Filename", file_name)
-    alg_info.setProperty("GetRunParameters", True)
-    alg_info.execute()
-
-    run_parameters = alg_info.getProperty("RunParameterTable").value
-
-    keys = run_parameters.getColumnNames()
-
-    time_id = END_TIME
-    date_id = END_DATE
-
-    time = run_parameters.column(keys.index(time_id))
-    date = run_parameters.column(keys.index(date_id))
-    time = time[0]
-    date = date[0]
-    return get_raw_measurement_time(date, time)
+    value = get_metadata_entry(get_raw_metadata(file_name), "date", file_name)
+    return DateAndTime(value)
 
 
 def get_geometry_information_raw(file_name):
@@ -689,26 +953,11 @@ def get_geometry_information_raw(file_name):
     :param file_name: the full file name to an existing raw file.
     :return: height, width, thickness and shape
     """
-    alg_info = AlgorithmManager.createUnmanaged("RawFileInfo")
-    alg_info.initialize()
-    alg_info.setChild(True)
-    alg_info.setProperty("Filename", file_name)
-    alg_info.setProperty("GetRunParameters", False)
-    alg_info.setProperty("GetSampleParameters", True)
-    alg_info.execute()
-
-    sample_parameters = alg_info.getProperty("SampleParameterTable").value
-    keys = sample_parameters.getColumnNames()
-
-    height_id = E_HEIGHT
-    width_id = E_WIDTH
-    thickness_id = E_THICK
-    shape_id = E_GEOM
-
-    height = sample_parameters.column(keys.index(height_id))[0]
-    width = sample_parameters.column(keys.index(width_id))[0]
-    thickness = sample_parameters.column(keys.index(thickness_id))[0]
-    shape_flag = sample_parameters.column(keys.index(shape_id))[0]
+    metadata = get_raw_metadata(file_name)
+    height = get_metadata_entry(metadata, "height", file_name)
+    width = get_metadata_entry(metadata, "width", file_name)
+    thickness = get_metadata_entry(metadata, "thickness", file_name)
+    shape_flag = get_metadata_entry(metadata, "shape_flag", file_name)
     shape = convert_to_shape(shape_flag)
     return height, width, thickness, shape
 
@@ -940,7 +1189,7 @@ class SANSFileInformationISISNexus(SANSFileInformation):
         return self._shape
 
     def _get_run_number_from_file(self, file_name):
-        return int(get_top_level_nexus_entry(file_name, RUN_NUMBER))
+        return get_run_number_for_isis_nexus(file_name)
 
 
 class SANSFileInformationISISAdded(SANSFileInformation):
@@ -1008,16 +1257,9 @@ class SANSFileInformationISISAdded(SANSFileInformation):
 
     @staticmethod
     def _get_date_and_run_number_added_nexus(file_name):
-        with h5.File(file_name, 'r') as h5_file:
-            keys = list(h5_file.keys())
-            first_entry = h5_file[keys[0]]
-            logs = first_entry["logs"]
-            # Start time
-            start_time = logs["start_time"]
-            start_time_value = DateAndTime(start_time["value"][0])
-            # Run number
-            run_number = logs["run_number"]
-            run_number_value = int(run_number["value"][0])
+        metadata = get_nexus_metadata(file_name)
+        start_time_value = DateAndTime(get_metadata_entry(metadata, "log_start_time", file_name))
+        run_number_value = get_metadata_entry(metadata, "log_run_number", file_name)
         return start_time_value, run_number_value
 
 
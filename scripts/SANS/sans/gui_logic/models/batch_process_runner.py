@@ -11,7 +11,7 @@ from qtpy.QtCore import Slot, QThreadPool, Signal, QObject
 from mantid.kernel import Logger
 from sans.algorithm_detail.batch_execution import load_workspaces_from_states
 from sans.common.enums import ReductionMode
-from sans.sans_batch import SANSBatchReduction
+from sans.sans_batch import SANSBatchReduction, can_reduce_in_parallel, create_reduction_worker_pool
 from ui.sans_isis.worker import Worker
 
 
@@ -39,11 +39,22 @@ class BatchProcessRunner(QObject):
         self._worker = None
 
     def process_states(self, row_index_pair, get_states_func, use_optimizations, output_mode, plot_results, output_graph,
-                       save_can=False):
-        self._worker = Worker(self._process_states_on_thread,
-                              row_index_pair=row_index_pair, get_states_func=get_states_func, use_optimizations=use_optimizations,
-                              output_mode=output_mode, plot_results=plot_results,
-                              output_graph=output_graph, save_can=save_can)
+                       save_can=False, number_of_workers=1):
+        if number_of_workers > 1 and not can_reduce_in_parallel(output_mode, plot_results):
+            self._logger.warning("Rows are reduced one after another, since reductions in worker processes can only "
+                                 "be saved to file and cannot be plotted.")
+            number_of_workers = 1
+
+        if number_of_workers > 1:
+            self._worker = Worker(self._process_states_in_parallel_on_thread,
+                                  row_index_pair=row_index_pair, get_states_func=get_states_func,
+                                  use_optimizations=use_optimizations, output_mode=output_mode, save_can=save_can,
+                                  number_of_workers=number_of_workers)
+        else:
+            self._worker = Worker(self._process_states_on_thread,
+                                  row_index_pair=row_index_pair, get_states_func=get_states_func,
+                                  use_optimizations=use_optimizations, output_mode=output_mode,
+                                  plot_results=plot_results, output_graph=output_graph, save_can=save_can)
         self._worker.signals.finished.connect(self.on_finished)
         self._worker.signals.error.connect(self.on_error)
 
@@ -82,13 +93,57 @@ class BatchProcessRunner(QObject):
                     self._handle_err(index, e)
                     continue
 
-                if state.all_states.reduction.reduction_mode == ReductionMode.MERGED:
-                    out_shift_factors = out_shift_factors[0]
-                    out_scale_factors = out_scale_factors[0]
-                else:
-                    out_shift_factors = []
-                    out_scale_factors = []
-                self.row_processed_signal.emit(index, out_shift_factors, out_scale_factors)
+                self._notify_row_processed(index, state, out_scale_factors[0], out_shift_factors[0])
+
+    def _process_states_in_parallel_on_thread(self, row_index_pair, get_states_func, use_optimizations, output_mode,
+                                              save_can=False, number_of_workers=2):
+        # States are created for all rows first, then reduced by a pool of worker processes. Rows are reported in
+        # their original order as their reductions complete.
+        indices_and_states = []
+        for row, index in row_index_pair:
+            try:
+                states, errors = get_states_func(row_entries=[row])
+            except Exception as e:
+                self._handle_err(index, e)
+                continue
+
+            for error in errors.values():
+                self.row_failed_signal.emit(index, error)
+
+            indices_and_states.extend((index, state) for state in states.values())
+
+        if not indices_and_states:
+            return
+
+        number_reported = 0
+        executor = None
+        try:
+            executor = create_reduction_worker_pool(number_of_workers)
+            futures = self.batch_processor.reduce_in_parallel(executor,
+                                                              [state.all_states for _, state in indices_and_states],
+                                                              use_optimizations, output_mode, save_can=save_can)
+            for (index, state), future in zip(indices_and_states, futures):
+                number_reported += 1
+                try:
+                    out_scale_factors, out_shift_factors = future.result()
+                except Exception as e:
+                    self._handle_err(index, e)
+                    continue
+
+                self._notify_row_processed(index, state, out_scale_factors, out_shift_factors)
+        except Exception as e:
+            # The pool itself failed, e.g. the states could not be serialised or the workers could not be started
+            for index, _ in indices_and_states[number_reported:]:
+                self._handle_err(index, e)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def _notify_row_processed(self, index, state, out_scale_factors, out_shift_factors):
+        if state.all_states.reduction.reduction_mode != ReductionMode.MERGED:
+            out_shift_factors = []
+            out_scale_factors = []
+        self.row_processed_signal.emit(index, out_shift_factors, out_scale_factors)
 
     def _load_workspaces_on_thread(self, row_index_pair, get_states_func):
         for row, index in row_index_pair:
@@ -44,7 +44,7 @@ from sans.gui_logic.presenter.presenter_common import PresenterCommon
 from sans.gui_logic.presenter.save_other_presenter import SaveOtherPresenter
 from sans.gui_logic.presenter.settings_adjustment_presenter import SettingsAdjustmentPresenter
 from sans.gui_logic.presenter.settings_diagnostic_presenter import SettingsDiagnosticPresenter
-from sans.sans_batch import SANSCentreFinder
+from sans.sans_batch import SANSCentreFinder, get_number_of_workers
 from sans.state.AllStates import AllStates
 
 IN_MANTIDPLOT = False
@@ -589,7 +589,8 @@ class RunTabPresenter(PresenterCommon):
                                                      self._view.output_mode,
                                                      self._view.plot_results,
                                                      output_graph,
-                                                     save_can)
+                                                     save_can,
+                                                     get_number_of_workers())
 
         except Exception as e:
             self.on_processing_finished()
@@ -6,18 +6,83 @@
 # SPDX - License - Identifier: GPL - 3.0 +
 # pylint: disable=invalid-name
 """ SANBatchReduction algorithm is the starting point for any new type reduction, event single reduction"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from mantid.kernel import ConfigService
 from sans.state.AllStates import AllStates
-from sans.algorithm_detail.batch_execution import (single_reduction_for_batch)
+from sans.state.Serializer import Serializer
+from sans.algorithm_detail.batch_execution import (single_reduction_for_batch, single_reduction_for_serialised_batch)
+from sans.algorithm_detail.reduction_cache import (REDUCTION_CACHE_DIRECTORY_KEY, REDUCTION_CACHE_SIZE_KEY)
 from sans.common.enums import (OutputMode, FindDirectionEnum, DetectorType)
 from sans.algorithm_detail.centre_finder_new import centre_finder_new, centre_finder_mass
 
 
+# ConfigService key which sets the number of worker processes of the ISIS SANS interface
+NUMBER_OF_WORKERS_KEY = "sans.batch.number_of_workers"
+
+# Configuration which worker processes need to find input data and to save reduced data
+WORKER_CONFIG_KEYS = ["datasearch.directories", "defaultsave.directory", "default.instrument", "default.facility",
+                      REDUCTION_CACHE_DIRECTORY_KEY, REDUCTION_CACHE_SIZE_KEY]
+
+
+def get_number_of_workers():
+    """
+    Gets the number of worker processes for batch reductions which has been set via the ConfigService.
+
+    :return: the number of workers, which is 1 if the setting is missing or invalid.
+    """
+    number_of_workers = ConfigService.getString(NUMBER_OF_WORKERS_KEY)
+    try:
+        return max(int(number_of_workers), 1)
+    except ValueError:
+        return 1
+
+
+def can_reduce_in_parallel(output_mode, plot_results):
+    """
+    Checks if reductions with the given output settings can run in worker processes. The reduced workspaces only
+    exist in the workers, so they can neither be published to the ADS nor be plotted.
+
+    :param output_mode: the output mode.
+    :param plot_results: if True then the results are plotted.
+    :return: True if the reductions can run in worker processes.
+    """
+    return output_mode is OutputMode.SAVE_TO_FILE and not plot_results
+
+
+def create_reduction_worker_pool(number_of_workers):
+    """
+    Creates a pool of worker processes for SANSBatchReduction.reduce_in_parallel. The workers are started with the
+    data search and save directories of this session. The caller owns the pool and has to shut it down.
+
+    :param number_of_workers: the number of worker processes.
+    :return: a ProcessPoolExecutor.
+    """
+    config = {key: ConfigService.getString(key) for key in WORKER_CONFIG_KEYS}
+    # Spawn rather than fork, since the parent process may be running Qt and framework threads
+    context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=number_of_workers, mp_context=context,
+                               initializer=_initialise_reduction_worker, initargs=(config,))
+
+
+def _initialise_reduction_worker(config):
+    """
+    Applies the configuration of the parent session to a worker process.
+
+    :param config: a dictionary of ConfigService keys to values
+    """
+    config_service = ConfigService.Instance()
+    for key, value in config.items():
+        config_service.setString(key, value)
+
+
 class SANSBatchReduction(object):
     def __init__(self):
         super(SANSBatchReduction, self).__init__()
 
     def __call__(self, states, use_optimizations=True, output_mode=OutputMode.PUBLISH_TO_ADS, plot_results = False,
-                 output_graph='', save_can=False):
+                 output_graph='', save_can=False, number_of_workers=1):
         """
         This is the start of any reduction.
 
@@ -27,9 +92,15 @@ class SANSBatchReduction(object):
                             1. PublishToADS
                             2. SaveToFile
                             3. Both
+        :param number_of_workers: The number of worker processes which reduce the states concurrently. If this is
+                                  larger than 1 then the output mode has to be SaveToFile, since the reduced
+                                  workspaces only exist in the worker processes.
         """
-        self.validate_inputs(states, use_optimizations, output_mode, plot_results, output_graph)
+        self.validate_inputs(states, use_optimizations, output_mode, plot_results, output_graph, number_of_workers)
 
+        if number_of_workers > 1 and len(states) > 1:
+            return self._execute_in_parallel(states, use_optimizations, output_mode, save_can=save_can,
+                                             number_of_workers=number_of_workers)
         return self._execute(states, use_optimizations, output_mode, plot_results, output_graph, save_can=save_can)
 
     @staticmethod
@@ -45,11 +116,55 @@ class SANSBatchReduction(object):
             out_scale_factors_list.append(out_scale_factors)
         return out_scale_factors_list, out_shift_factors_list
 
-    def validate_inputs(self, states, use_optimizations, output_mode, plot_results, output_graph):
+    @staticmethod
+    def _execute_in_parallel(states, use_optimizations, output_mode, save_can=False, number_of_workers=2):
+        # Results are collected in the order of the states, regardless of the order in which the workers finish
+        out_scale_factors_list = []
+        out_shift_factors_list = []
+        executor = create_reduction_worker_pool(number_of_workers)
+        try:
+            for future in SANSBatchReduction._reduce_in_parallel(executor, states, use_optimizations, output_mode,
+                                                                 save_can):
+                out_scale_factors, out_shift_factors = future.result()
+                out_shift_factors_list.append(out_shift_factors)
+                out_scale_factors_list.append(out_scale_factors)
+        finally:
+            executor.shutdown()
+        return out_scale_factors_list, out_shift_factors_list
+
+    def reduce_in_parallel(self, executor, states, use_optimizations, output_mode, save_can=False):
+        """
+        Reduces the states concurrently in a pool of worker processes.
+
+        Each state is sent to a worker serialised with sans.state.Serializer. The pool is owned by the caller, who
+        has to shut it down once the results have been collected.
+
+        :param executor: the pool of worker processes, see create_reduction_worker_pool.
+        :param states: a list of sans states.
+        :param use_optimizations: if True then the optimizations for file reloading are used.
+        :param output_mode: the output mode. Reduced workspaces only exist in the workers, so this has to be
+                            SaveToFile.
+        :param save_can: if True then the can workspaces are saved.
+        :return: a list of futures, one for each state and in the order of the states. The result of a future
+                 is the (out_scale_factors, out_shift_factors) of the reduction, or the error which it raised.
+        """
+        # Any number of workers larger than one, such that the output mode is checked for worker processes
+        self.validate_inputs(states, use_optimizations, output_mode, False, '', number_of_workers=2)
+        return self._reduce_in_parallel(executor, states, use_optimizations, output_mode, save_can)
+
+    @staticmethod
+    def _reduce_in_parallel(executor, states, use_optimizations, output_mode, save_can):
+        serialised_states = [Serializer.to_json(state) for state in states]
+        return [executor.submit(single_reduction_for_serialised_batch, serialised_state, use_optimizations,
+                                output_mode, save_can)
+                for serialised_state in serialised_states]
+
+    def validate_inputs(self, states, use_optimizations, output_mode, plot_results, output_graph, number_of_workers=1):
         # We are strict about the types here.
         # 1. states has to be a list of sans state objects
         # 2. use_optimizations has to be bool
         # 3. output_mode has to be an OutputMode enum
+        # 4. number_of_workers has to be a positive int; parallel reductions have to save to file
         if not isinstance(states, list):
             raise RuntimeError("The provided states are not in a list. They have to be in a list.")
 
@@ -75,6 +190,14 @@ class SANSBatchReduction(object):
             raise RuntimeError("The output mode has to be an enum of type OutputMode. The provided type is"
                                " {0}".format(type(output_mode)))
 
+        if not isinstance(number_of_workers, int) or number_of_workers < 1:
+            raise RuntimeError("The number of workers has to be a positive integer. The provided value is"
+                               " {0}".format(number_of_workers))
+
+        if number_of_workers > 1 and not can_reduce_in_parallel(output_mode, plot_results):
+            raise RuntimeError("Reductions in several worker processes can only be saved to file and cannot be"
+                               " plotted. Set the output mode to SaveToFile and do not plot results.")
+
         errors = self._validate_inputs(states)
         if errors:
             raise RuntimeError("The provided states are not valid: {}".format(errors))
@@ -7,8 +7,8 @@
 import numpy as np
 
 import abins
-from abins.constants import (FLOAT_ID, INT_ID, INT_TYPE,
-                             FUNDAMENTALS, HIGHER_ORDER_QUANTUM_EVENTS)
+from abins.constants import (FLOAT_ID, FLOAT_TYPE, INT_ID, INT_TYPE,
+                             FUNDAMENTALS, HIGHER_ORDER_QUANTUM_EVENTS, MIN_SIZE)
 
 
 class FrequencyPowderGenerator(object):
@@ -33,25 +33,9 @@ class FrequencyPowderGenerator(object):
         :returns: array with frequencies for the required quantum number event, array which stores coefficients for all
                  frequencies
         """
-        if not (isinstance(fundamentals_array, np.ndarray)
-                and len(fundamentals_array.shape) == 1
-                and fundamentals_array.dtype.num == FLOAT_ID):
-
-            raise ValueError("Fundamentals in the form of one dimensional array are expected.")
-
-        if not (isinstance(fundamentals_coefficients, np.ndarray)
-                and len(fundamentals_coefficients.shape) == 1
-                and fundamentals_coefficients.dtype.num == INT_ID):
-            raise ValueError("Coefficients of fundamentals in the form of one dimensional array are expected.")
-
-        if fundamentals_coefficients.size != fundamentals_array.size:
-            raise ValueError("Inconsistent size of fundamentals and corresponding coefficients. "
-                             "(%s != %s)" % (fundamentals_coefficients.size, fundamentals_array.size))
-
-        if not (isinstance(quantum_order, int)
-                and FUNDAMENTALS <= quantum_order
-                <= HIGHER_ORDER_QUANTUM_EVENTS + FUNDAMENTALS):
-            raise ValueError("Improper value of quantum order event (quantum_order = %s)" % quantum_order)
+        FrequencyPowderGenerator._check_fundamentals(fundamentals_array=fundamentals_array,
+                                                     fundamentals_coefficients=fundamentals_coefficients,
+                                                     quantum_order=quantum_order)
 
         # frequencies for fundamentals
         if quantum_order == FUNDAMENTALS:
@@ -63,16 +47,9 @@ class FrequencyPowderGenerator(object):
         # higher order quantum events.
         else:
 
-            if not (isinstance(previous_array, np.ndarray)
-                    and len(previous_array.shape) == 1
-                    and previous_array.dtype.num == FLOAT_ID):
-                raise ValueError("One dimensional previous_array is expected.")
-
-            if not (isinstance(previous_coefficients, np.ndarray)
-                    and len(previous_coefficients.shape) == min(2, quantum_order - 1)
-                    and previous_coefficients.dtype.num == INT_ID):
-                raise ValueError("Numpy array of previous_coefficients is expected. (%s)" % previous_coefficients,
-                                 type(previous_coefficients), previous_coefficients.dtype)
+            FrequencyPowderGenerator._check_previous(previous_array=previous_array,
+                                                     previous_coefficients=previous_coefficients,
+                                                     quantum_order=quantum_order)
 
             # generate indices
             fundamentals_size = fundamentals_array.size
@@ -111,3 +88,129 @@ class FrequencyPowderGenerator(object):
             valid_indices = energies < abins.parameters.sampling['max_wavenumber']
 
             return energies[valid_indices], coeff[valid_indices]
+
+    @staticmethod
+    def iter_freq_combinations(previous_array=None, previous_coefficients=None, fundamentals_array=None,
+                               fundamentals_coefficients=None, quantum_order=None, previous_s=None, block_size=None):
+        """
+        Generates frequencies for the given (higher) order of quantum event block by block.
+
+        Combinations of previous frequencies and fundamentals are built for a bounded number of previous frequencies
+        at a time, in preallocated buffers which are reused for every block. Only combinations within the valid
+        energy window are copied to the output, so the full outer product is never materialised.
+
+        Yielded arrays are views of the internal buffers: they are only valid until the next block is requested
+        and should be copied if they have to be kept.
+
+        :param previous_array: array with frequencies for the previous quantum event
+        :param previous_coefficients: coefficients which correspond to the previous order quantum event
+        :param fundamentals_array: array with frequencies for fundamentals
+        :param fundamentals_coefficients: coefficients for fundamentals
+        :param quantum_order: number of quantum order event for which new frequencies should be constructed
+        :param previous_s: (optional) S for previous_array; previous frequencies with S below
+                           abins.parameters.sampling['s_absolute_threshold'] are discarded before any combinations
+                           are constructed
+        :param block_size: (optional) maximum number of combinations in one block; defaults to
+                           abins.parameters.performance['optimal_size']
+        :returns: generator of (frequencies, coefficients) blocks for the required quantum order event
+        """
+        # arguments are validated once, not for every block
+        FrequencyPowderGenerator._check_fundamentals(fundamentals_array=fundamentals_array,
+                                                     fundamentals_coefficients=fundamentals_coefficients,
+                                                     quantum_order=quantum_order)
+        if quantum_order == FUNDAMENTALS:
+            raise ValueError("Blocks of combinations are only generated for higher order quantum events.")
+        FrequencyPowderGenerator._check_previous(previous_array=previous_array,
+                                                 previous_coefficients=previous_coefficients,
+                                                 quantum_order=quantum_order)
+
+        previous_coefficients = previous_coefficients.reshape(previous_array.size, -1)
+
+        if previous_s is not None:
+            indices = previous_s > abins.parameters.sampling['s_absolute_threshold']
+
+            # Mask out small values, but avoid returning an array smaller than MIN_SIZE
+            if np.count_nonzero(indices) >= MIN_SIZE:
+                previous_array = previous_array[indices]
+                previous_coefficients = previous_coefficients[indices]
+            else:
+                previous_array = previous_array[:MIN_SIZE]
+                previous_coefficients = previous_coefficients[:MIN_SIZE]
+
+        if block_size is None:
+            block_size = abins.parameters.performance['optimal_size']
+
+        fundamentals_size = fundamentals_array.size
+        previous_coefficients_dim = previous_coefficients.shape[1]
+        # as in construct_freq_combinations, previous coefficients are taken from the flattened array
+        flat_previous_coefficients = previous_coefficients.ravel()
+        max_wavenumber = abins.parameters.sampling['max_wavenumber']
+
+        rows = max(1, min(previous_array.size, block_size // max(1, fundamentals_size)))
+        energies = np.empty(shape=(rows, fundamentals_size), dtype=FLOAT_TYPE)
+        valid = np.empty(shape=(rows, fundamentals_size), dtype=bool)
+        out_energies = np.empty(shape=rows * fundamentals_size, dtype=FLOAT_TYPE)
+        out_coeff = np.empty(shape=(rows * fundamentals_size, quantum_order), dtype=INT_TYPE)
+
+        for start in range(0, previous_array.size, rows):
+            end = min(start + rows, previous_array.size)
+            n_rows = end - start
+
+            block_energies = energies[:n_rows]
+            block_valid = valid[:n_rows]
+            np.add(previous_array[start:end, np.newaxis], fundamentals_array[np.newaxis, :], out=block_energies)
+            np.less(block_energies, max_wavenumber, out=block_valid)
+
+            prev_ind, fund_ind = np.nonzero(block_valid)
+            size = prev_ind.size
+            if size == 0:
+                continue
+
+            np.compress(block_valid.ravel(), block_energies.ravel(), out=out_energies[:size])
+            prev_ind += start
+            np.take(flat_previous_coefficients, prev_ind, out=out_coeff[:size, 0])
+            out_coeff[:size, 1:previous_coefficients_dim] = out_coeff[:size, :1]
+            np.take(fundamentals_coefficients, fund_ind, out=out_coeff[:size, previous_coefficients_dim])
+
+            yield out_energies[:size], out_coeff[:size]
+
+    @staticmethod
+    def _check_fundamentals(fundamentals_array=None, fundamentals_coefficients=None, quantum_order=None):
+        """
+        Checks fundamentals, their coefficients and order of quantum event.
+        """
+        if not (isinstance(fundamentals_array, np.ndarray)
+                and len(fundamentals_array.shape) == 1
+                and fundamentals_array.dtype.num == FLOAT_ID):
+
+            raise ValueError("Fundamentals in the form of one dimensional array are expected.")
+
+        if not (isinstance(fundamentals_coefficients, np.ndarray)
+                and len(fundamentals_coefficients.shape) == 1
+                and fundamentals_coefficients.dtype.num == INT_ID):
+            raise ValueError("Coefficients of fundamentals in the form of one dimensional array are expected.")
+
+        if fundamentals_coefficients.size != fundamentals_array.size:
+            raise ValueError("Inconsistent size of fundamentals and corresponding coefficients. "
+                             "(%s != %s)" % (fundamentals_coefficients.size, fundamentals_array.size))
+
+        if not (isinstance(quantum_order, int)
+                and FUNDAMENTALS <= quantum_order
+                <= HIGHER_ORDER_QUANTUM_EVENTS + FUNDAMENTALS):
+            raise ValueError("Improper value of quantum order event (quantum_order = %s)" % quantum_order)
+
+    @staticmethod
+    def _check_previous(previous_array=None, previous_coefficients=None, quantum_order=None):
+        """
+        Checks frequencies and coefficients of the previous order quantum event.
+        """
+        if not (isinstance(previous_array, np.ndarray)
+                and len(previous_array.shape) == 1
+                and previous_array.dtype.num == FLOAT_ID):
+            raise ValueError("One dimensional previous_array is expected.")
+
+        if not (isinstance(previous_coefficients, np.ndarray)
+                and len(previous_coefficients.shape) == min(2, quantum_order - 1)
+                and previous_coefficients.dtype.num == INT_ID):
+            raise ValueError("Numpy array of previous_coefficients is expected. (%s)" % previous_coefficients,
+                             type(previous_coefficients), previous_coefficients.dtype)
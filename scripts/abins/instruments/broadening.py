@@ -4,11 +4,26 @@
 #   NScD Oak Ridge National Laboratory, European Spallation Source,
 #   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
 # SPDX - License - Identifier: GPL - 3.0 +
+from functools import lru_cache
+
 import numpy as np
+from scipy import sparse
 from scipy.special import erf
 from scipy.signal import convolve
 
 prebin_required_schemes = ['interpolate', 'interpolate_coarse']
+batch_schemes = ['none', 'gaussian_truncated', 'normal_truncated', 'interpolate', 'interpolate_coarse']
+
+# Number of kernel matrices kept by the cache used for batched broadening
+kernel_cache_size = 16
+
+# Pre-optimised transfer functions for mixing spectra broadened with neighbouring sampled widths
+# (see interpolated_broadening)
+_mix_functions = {'gaussian': {'2': {'lower': [-0.1873, 1.464, -4.079, 3.803],
+                                     'upper': [0.2638, -1.968, 5.057, -3.353]},
+                               'sqrt2': {'lower': [-0.6079, 4.101, -9.632, 7.139],
+                                         'upper': [0.7533, -4.882, 10.87, -6.746]}}}
+_log_bases = {'2': 2, 'sqrt2': np.sqrt(2)}
 
 
 def broaden_spectrum(frequencies, bins, s_dft, sigma, scheme='gaussian_truncated'):
@@ -148,6 +163,131 @@ def broaden_spectrum(frequencies, bins, s_dft, sigma, scheme='gaussian_truncated
                          'abins.parameters.sampling["broadening_scheme"]'.format(scheme))
 
 
+def broaden_spectra(bins, s_hist, sigma, scheme='gaussian_truncated'):
+    """Broaden a stack of histogrammed spectra on a common regular grid in one call
+
+    Every row of *s_hist* is a histogram on *bins* (i.e. the data has already been binned to the mid-bin
+    frequencies). As the broadening is linear, the same broadening operator applies to every row: it is
+    built once as a sparse (N-1 x N-1) matrix of truncated kernels, kept in an LRU cache keyed by (scheme, bins,
+    sigma), and applied to all rows with a single matrix product. Repeated calls on the same grid (e.g. for
+    every atom, quantum order and k-point in Abins) therefore do not recompute the kernels.
+
+    For a single histogram the results match :func:`broaden_spectrum` with the mid-bin frequencies as input, to
+    within floating-point rounding.
+
+    :param bins: Evenly-spaced frequency bin values for the output spectra.
+    :type bins: 1D array-like
+    :param s_hist: histogrammed scattering values; one row per spectrum
+    :type s_hist: 2D array-like (M x N-1)
+    :param sigma: width of broadening function at each mid-bin frequency, or a scalar used over the whole spectrum
+    :type sigma: float or 1D array-like
+    :param scheme: Name of broadening method used. Options are 'none', 'gaussian_truncated', 'normal_truncated',
+        'interpolate' and 'interpolate_coarse' (see :func:`broaden_spectrum`).
+    :type scheme: str
+
+    :returns: (freq_points, broadened_spectra) where *broadened_spectra* has the same shape as *s_hist*
+    """
+    if (bins is None) or (s_hist is None) or (sigma is None):
+        raise ValueError("Frequency bins, S data and broadening width must be provided.")
+    if scheme not in batch_schemes:
+        raise ValueError('Broadening scheme "{}" is not supported for batched broadening. Supported schemes: {}'
+                         .format(scheme, ', '.join(batch_schemes)))
+
+    bins = np.ascontiguousarray(bins, dtype=np.float64)
+    freq_points = (bins[1:] + bins[:-1]) / 2
+
+    s_hist = np.atleast_2d(np.asarray(s_hist, dtype=np.float64))
+    if s_hist.shape[1] != freq_points.size:
+        raise ValueError("Each row of s_hist should contain one value for each bin")
+
+    if scheme == 'none':
+        return freq_points, s_hist.copy()
+
+    sigma = np.ascontiguousarray(np.broadcast_to(sigma, freq_points.shape), dtype=np.float64)
+    kernel_matrix = _get_kernel_matrix(scheme, bins.tobytes(), sigma.tobytes())
+
+    # (K^T S^T)^T == S K without densifying the sparse matrix
+    return freq_points, np.asarray((kernel_matrix.T @ s_hist.T).T)
+
+
+@lru_cache(maxsize=kernel_cache_size)
+def _get_kernel_matrix(scheme, bins_bytes, sigma_bytes):
+    """Build (or return cached) sparse broadening matrix K, such that broadened = histogram @ K
+
+    Arguments are passed as bytes so that they can be hashed by the cache.
+    """
+    bins = np.frombuffer(bins_bytes, dtype=np.float64)
+    sigma = np.frombuffer(sigma_bytes, dtype=np.float64)
+    points = (bins[1:] + bins[:-1]) / 2
+    size = points.size
+
+    if scheme in ('gaussian_truncated', 'normal_truncated'):
+        if scheme == 'gaussian_truncated':
+            function, function_uses = gaussian, 'points'
+        else:
+            function, function_uses = normal, 'bins'
+
+        start_indices, kernels, _ = _trunc_kernels(function=function, function_uses=function_uses,
+                                                   sigma=sigma[:, np.newaxis], points=points, bins=bins,
+                                                   center=points[:, np.newaxis], limit=3, freq_matrix_required=False)
+        if scheme == 'gaussian_truncated':
+            # Normalize the Gaussian kernel such that sum of points matches input
+            kernels = kernels * (bins[1] - bins[0])
+
+        ncols = kernels.shape[1]
+        rows = np.repeat(np.arange(size), ncols)
+        cols = (start_indices.reshape(size, 1) + np.arange(ncols)).ravel()
+        values = kernels.ravel()
+
+        in_range = (cols >= 0) & (cols < size)
+        rows, cols, values = rows[in_range], cols[in_range], values[in_range]
+
+    elif scheme in ('interpolate', 'interpolate_coarse'):
+        spacing = 'sqrt2' if scheme == 'interpolate' else '2'
+        mix_functions = _mix_functions['gaussian'][spacing]
+        log_base = _log_bases[spacing]
+
+        n_kernels = int(np.ceil(np.log(max(sigma) / min(sigma)) / np.log(log_base)))
+        if n_kernels == 1:
+            sigma_samples = np.array([min(sigma)])
+        else:
+            sigma_samples = log_base**np.arange(n_kernels + 1) * min(sigma)
+
+        bin_width = bins[1] - bins[0]
+        kernel_npts_oneside = int(np.ceil(3 * max(sigma) / bin_width))
+        offsets = np.arange(-kernel_npts_oneside, kernel_npts_oneside + 1)
+        kernels = mesh_gaussian(sigma=sigma_samples[:, np.newaxis], points=offsets * bin_width, center=0)
+
+        # Each output point mixes (at most) two of the sampled kernels. As in interpolated_broadening, points with
+        # sigma beyond the sampled range receive no contribution.
+        sigma_locations = np.searchsorted(sigma_samples, sigma)
+        sampled = sigma_locations < sigma_samples.size
+        lower = np.clip(sigma_locations - 1, 0, sigma_samples.size - 1)
+        upper = np.minimum(sigma_locations, sigma_samples.size - 1)
+        sigma_factors = sigma / sigma_samples[lower]
+        lower_mix = np.where(sigma_locations == 0, 1., np.polyval(mix_functions['lower'], sigma_factors)) * sampled
+        upper_mix = np.where(sigma_locations == 0, 0., np.polyval(mix_functions['upper'], sigma_factors)) * sampled
+        column_kernels = (lower_mix[:, np.newaxis] * kernels[lower] + upper_mix[:, np.newaxis] * kernels[upper])
+
+        # 'same'-mode convolution: output[p] = sum_j hist[j] * kernel[p - j + kernel_npts_oneside]
+        cols = np.repeat(np.arange(size), offsets.size)
+        rows = (np.arange(size).reshape(size, 1) - offsets).ravel()
+        values = column_kernels.ravel()
+
+        in_range = (rows >= 0) & (rows < size)
+        rows, cols, values = rows[in_range], cols[in_range], values[in_range]
+
+    else:
+        raise ValueError('Broadening scheme "{}" is not supported for batched broadening.'.format(scheme))
+
+    return sparse.csr_matrix((values, (rows, cols)), shape=(size, size))
+
+
+def clear_kernel_cache():
+    """Discard all cached kernel matrices used by broaden_spectra"""
+    _get_kernel_matrix.cache_clear()
+
+
 def mesh_gaussian(sigma=None, points=None, center=0):
     """Evaluate a Gaussian function over a regular (given) mesh
 
@@ -356,6 +496,38 @@ def trunc_and_sum_inplace(function=None, function_uses='points',
     else:
         sum_method = method
 
+    start_indices, kernels, freq_matrix = _trunc_kernels(
+        function=function, function_uses=function_uses, sigma=sigma, points=points, bins=bins, center=center,
+        limit=limit, freq_matrix_required=(function_uses == 'points' or sum_method == 'histogram'))
+    ncols = kernels.shape[-1]
+
+    # Sum spectrum using selected method
+    if sum_method == 'histogram':
+        spectrum, bin_edges = np.histogram(np.ravel(freq_matrix),
+                                           bins,
+                                           weights=np.ravel(weights * kernels),
+                                           density=False)
+    elif sum_method == 'forloop':
+        spectrum = np.zeros_like(points)
+        for start, kernel, weight in zip(start_indices.flatten(), kernels, np.asarray(weights).flatten()):
+            scaled_kernel = kernel * weight
+            spectrum[start:start+ncols] += scaled_kernel
+    else:
+        raise ValueError('Summation method "{}" is unknown.', format(method))
+
+    return points, spectrum
+
+
+def _trunc_kernels(function=None, function_uses='points', sigma=None, points=None, bins=None, center=None,
+                   limit=3, freq_matrix_required=True):
+    """Evaluate broadening functions over blocks of a consistent size (limit * max(sigma)) around each center
+
+    See trunc_and_sum_inplace for a description of the scheme.
+
+    :returns: (start_indices, kernels, freq_matrix); start index in *points* of each block, the function values in
+        each block (one row per center) and the frequencies of each block (None unless *freq_matrix_required* or
+        *function_uses* == 'points')
+    """
     bin_width = bins[1] - bins[0]
     if not np.isclose(points[1] - points[0], bin_width):
         raise ValueError("Bin spacing and point spacing are not consistent")
@@ -413,7 +585,8 @@ def trunc_and_sum_inplace(function=None, function_uses='points',
     start_indices[right_justified] = len(points) - ncols
 
     # freq_matrix is not used in (bins, forloop) mode so only generate if needed
-    if (function_uses == 'points') or (function_uses == 'bins' and sum_method == 'histogram'):
+    freq_matrix = None
+    if (function_uses == 'points') or freq_matrix_required:
         freq_matrix = start_freqs.reshape(nrows, 1) + np.arange(0, 2 * freq_range, bin_width)
 
     # Dispatch kernel generation depending on x-coordinate scheme
@@ -429,21 +602,7 @@ def trunc_and_sum_inplace(function=None, function_uses='points',
     else:
         raise ValueError('x-basis "{}" for broadening function is unknown.'.format(function_uses))
 
-    # Sum spectrum using selected method
-    if sum_method == 'histogram':
-        spectrum, bin_edges = np.histogram(np.ravel(freq_matrix),
-                                           bins,
-                                           weights=np.ravel(weights * kernels),
-                                           density=False)
-    elif sum_method == 'forloop':
-        spectrum = np.zeros_like(points)
-        for start, kernel, weight in zip(start_indices.flatten(), kernels, np.asarray(weights).flatten()):
-            scaled_kernel = kernel * weight
-            spectrum[start:start+ncols] += scaled_kernel
-    else:
-        raise ValueError('Summation method "{}" is unknown.', format(method))
-
-    return points, spectrum
+    return start_indices, kernels, freq_matrix
 
 
 def interpolated_broadening(sigma=None, points=None, bins=None,
@@ -522,12 +681,8 @@ def interpolated_broadening(sigma=None, points=None, bins=None,
 
     """
 
-    mix_functions = {'gaussian': {'2': {'lower': [-0.1873, 1.464, -4.079, 3.803],
-                                        'upper': [0.2638, -1.968, 5.057, -3.353]},
-                                  'sqrt2': {'lower': [-0.6079, 4.101, -9.632, 7.139],
-                                            'upper': [0.7533, -4.882, 10.87, -6.746]}}}
-    log_bases = {'2': 2, 'sqrt2': np.sqrt(2)}
-    log_base = log_bases[spacing]
+    mix_functions = _mix_functions
+    log_base = _log_bases[spacing]
 
     # Sample on appropriate log scale: log_b(x) = log(x) / lob(b)
     n_kernels = int(np.ceil(np.log(max(sigma) / min(sigma)) / np.log(log_base)))
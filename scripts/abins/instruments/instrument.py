@@ -39,6 +39,37 @@ class Instrument(object):
         """
         raise NotImplementedError()
 
+    def get_histogram_scheme(self, frequencies=None, bins=None, scheme='auto'):
+        """
+        Gets the broadening scheme with which convolve_with_resolution_function would convolve the binned spectrum of
+        these frequencies. As convolution is linear, such spectra may instead be binned, summed and convolved together
+        with convolve_histograms_with_resolution_function.
+
+        :param frequencies: frequencies for which resolution function should be calculated (frequencies in cm-1)
+        :type frequencies: 1D array-like
+        :param bins: Bin edges for output histogram.
+        :type bins: 1D array-like
+        :param scheme: Broadening scheme, as for convolve_with_resolution_function.
+        :type scheme: str
+        :returns: name of the scheme, or None if the spectrum is not convolved from binned data
+
+        """
+        raise NotImplementedError()
+
+    def convolve_histograms_with_resolution_function(self, bins=None, s_hist=None, scheme='auto'):
+        """
+        Convolves a stack of binned spectra with the resolution function for the particular instrument in one call.
+
+        :param bins: Bin edges for input and output histograms. These must be regularly-spaced.
+        :type bins: 1D array-like
+        :param s_hist: S binned on *bins*; one row per spectrum
+        :type s_hist: 2D array-like
+        :param scheme: Broadening scheme; 'auto' should select something sensible.
+        :type scheme: str
+
+        """
+        raise NotImplementedError()
+
     def __str__(self):
         return self._name
 
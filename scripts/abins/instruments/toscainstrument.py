@@ -10,7 +10,7 @@ import abins
 import abins.parameters
 from abins.constants import WAVENUMBER_TO_INVERSE_A
 from .instrument import Instrument
-from .broadening import broaden_spectrum, prebin_required_schemes
+from .broadening import batch_schemes, broaden_spectra, broaden_spectrum, prebin_required_schemes
 
 
 class ToscaInstrument(Instrument, abins.FrequencyPowderGenerator):
@@ -77,6 +77,52 @@ class ToscaInstrument(Instrument, abins.FrequencyPowderGenerator):
         :returns: (points_freq, broadened_spectrum)
         """
 
+        selected_scheme, prebin = self._select_scheme(frequencies=frequencies, bins=bins, scheme=scheme, prebin=prebin)
+
+        if prebin is True:
+            s_dft, _ = np.histogram(frequencies, bins=bins, weights=s_dft, density=False)
+            frequencies = (bins[1:] + bins[:-1]) / 2
+        elif prebin is False:
+            if selected_scheme in prebin_required_schemes:
+                raise ValueError('"prebin" should not be set to False when using "{}" broadening scheme'.format(scheme))
+        else:
+            raise ValueError('"prebin" option must be True, False or "auto"')
+
+        sigma = self.get_sigma(frequencies)
+
+        if prebin is True and selected_scheme in batch_schemes:
+            # binned data always has the same frequencies and widths, so the cached broadening kernels can be used
+            points_freq, broadened_spectra = broaden_spectra(bins, s_dft[np.newaxis, :], sigma,
+                                                             scheme=selected_scheme)
+            return points_freq, broadened_spectra[0]
+
+        points_freq, broadened_spectrum = broaden_spectrum(frequencies, bins, s_dft,
+                                                           sigma, scheme=selected_scheme)
+        return points_freq, broadened_spectrum
+
+    def get_histogram_scheme(self, frequencies=None, bins=None, scheme='auto'):
+        """
+        Gets the broadening scheme with which convolve_with_resolution_function would convolve the binned spectrum of
+        these frequencies (with prebin='auto'), or None if the spectrum would not be binned or convolved with cached
+        kernels.
+        :param frequencies: DFT frequencies for which resolution function should be calculated (frequencies in cm^-1)
+        :param bins: Evenly-spaced frequency bin values for the output spectrum.
+        :param scheme: Broadening scheme, as for convolve_with_resolution_function
+
+        :returns: name of the scheme or None
+        """
+        selected_scheme, prebin = self._select_scheme(frequencies=frequencies, bins=bins, scheme=scheme)
+        if prebin is True and selected_scheme in batch_schemes:
+            return selected_scheme
+        return None
+
+    @staticmethod
+    def _select_scheme(frequencies=None, bins=None, scheme='auto', prebin='auto'):
+        """
+        Resolves the 'auto' broadening scheme and prebin options of convolve_with_resolution_function.
+
+        :returns: (selected_scheme, prebin)
+        """
         if scheme == 'auto':
             if frequencies.size > 50:
                 selected_scheme = 'interpolate'
@@ -93,17 +139,24 @@ class ToscaInstrument(Instrument, abins.FrequencyPowderGenerator):
             else:
                 prebin = False
 
-        if prebin is True:
-            s_dft, _ = np.histogram(frequencies, bins=bins, weights=s_dft, density=False)
-            frequencies = (bins[1:] + bins[:-1]) / 2
-        elif prebin is False:
-            if selected_scheme in prebin_required_schemes:
-                raise ValueError('"prebin" should not be set to False when using "{}" broadening scheme'.format(scheme))
-        else:
-            raise ValueError('"prebin" option must be True, False or "auto"')
+        return selected_scheme, prebin
 
-        sigma = self.get_sigma(frequencies)
+    def convolve_histograms_with_resolution_function(self, bins=None, s_hist=None, scheme='auto'):
+        """
+        Convolves a stack of binned spectra with the resolution function for the TOSCA instrument (and TOSCA-like).
 
-        points_freq, broadened_spectrum = broaden_spectrum(frequencies, bins, s_dft,
-                                                           sigma, scheme=selected_scheme)
-        return points_freq, broadened_spectrum
+        All spectra are broadened in one call with kernels which are cached for the given bins, so this is much
+        faster than calling convolve_with_resolution_function for each spectrum.
+        :param bins: Evenly-spaced frequency bin values for the input and output spectra.
+        :type bins: 1D array-like
+        :param s_hist: S binned on *bins*; one row per spectrum
+        :type s_hist: 2D array-like
+        :param scheme: Broadening scheme passed to ``Instruments.Broadening.broaden_spectra()`` unless set to 'auto',
+            in which case the 'interpolate' scheme is used.
+
+        :returns: (points_freq, broadened_spectra)
+        """
+        selected_scheme = 'interpolate' if scheme == 'auto' else scheme
+        sigma = self.get_sigma((bins[1:] + bins[:-1]) / 2)
+
+        return broaden_spectra(bins, s_hist, sigma, scheme=selected_scheme)
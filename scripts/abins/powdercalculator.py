@@ -139,8 +139,9 @@ class PowderCalculator:
         :returns: object of type PowderData with mean square displacements.
         """
         data = self._clerk.load(list_of_datasets=["powder_data"])
-        powder_data = abins.PowderData(**data["datasets"]["powder_data"],
-                                       num_atoms=data["datasets"]["powder_data"]["b_tensors"][str(GAMMA_POINT)].shape[0])
+        powder_data = abins.PowderData.from_extracted(
+            data["datasets"]["powder_data"],
+            num_atoms=data["datasets"]["powder_data"]["b_tensors"][str(GAMMA_POINT)].shape[0])
 
         return powder_data
 
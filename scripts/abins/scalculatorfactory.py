@@ -17,7 +17,7 @@ class SCalculatorFactory(object):
     """
     @staticmethod
     def init(filename=None, temperature=None, sample_form=None, abins_data=None, instrument=None,
-             quantum_order_num=None, bin_width=1.0):
+             quantum_order_num=None, bin_width=1.0, number_of_processes=1):
         """
         :param filename: name of input DFT file (CASTEP: foo.phonon)
         :param temperature: temperature in K for which calculation of S should be done
@@ -26,6 +26,7 @@ class SCalculatorFactory(object):
         :param instrument: object of type Instrument for which simulation should be performed
         :param quantum_order_num: number of quantum order events taken into account during the simulation
         :param bin_width: width of bins in wavenumber
+        :param number_of_processes: number of processes used to calculate S in parallel over atoms and k-points
         """
         if sample_form in ALL_SAMPLE_FORMS:
             if sample_form == "Powder":
@@ -33,7 +34,8 @@ class SCalculatorFactory(object):
                 return abins.SPowderSemiEmpiricalCalculator(filename=filename, temperature=temperature,
                                                             abins_data=abins_data, instrument=instrument,
                                                             quantum_order_num=quantum_order_num,
-                                                            bin_width=bin_width)
+                                                            bin_width=bin_width,
+                                                            number_of_processes=number_of_processes)
                 # TODO: implement numerical powder averaging
 
             # elif sample == "SingleCrystal":  #TODO implement single crystal scenario
@@ -5,15 +5,67 @@
 #   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
 # SPDX - License - Identifier: GPL - 3.0 +
 import gc
+import multiprocessing
+from multiprocessing import shared_memory
+import time
 import numpy as np
 
 import abins
 from abins.constants import (CM1_2_HARTREE, INT_TYPE, K_2_HARTREE, FLOAT_TYPE, FUNDAMENTALS,
-                             HIGHER_ORDER_QUANTUM_EVENTS, MAX_ORDER, MIN_SIZE, ONE_DIMENSIONAL_INSTRUMENTS,
+                             HIGHER_ORDER_QUANTUM_EVENTS, MIN_SIZE, ONE_DIMENSIONAL_INSTRUMENTS,
                              QUANTUM_ORDER_ONE, QUANTUM_ORDER_TWO, QUANTUM_ORDER_THREE, QUANTUM_ORDER_FOUR,
                              S_LAST_INDEX)
 from abins.instruments import Instrument
 
+# State of a worker process used by the parallel calculation of S; set once per worker by _init_worker
+_worker_state = {}
+
+
+def _to_shared_memory(array):
+    """
+    Copies a numpy array into a new block of shared memory.
+    :param array: numpy array to share with worker processes
+    :returns: SharedMemory block, (name, shape, dtype) specification used to attach to the block in a worker
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _init_worker(calculator, shared_specs, offsets, weights):
+    """
+    Attaches a worker process to the shared powder tensors.
+    :param calculator: SPowderSemiEmpiricalCalculator (without tensors) used to evaluate S
+    :param shared_specs: dictionary of (name, shape, dtype) of shared "a_tensors", "b_tensors" and "frequencies"
+    :param offsets: offsets of k-points along the frequency axis of the concatenated b_tensors and frequencies
+    :param weights: k-point weights ordered as the k-points in the shared tensors
+    """
+    blocks = {key: shared_memory.SharedMemory(name=name) for key, (name, _, _) in shared_specs.items()}
+    arrays = {key: np.ndarray(shape, dtype=np.dtype(dtype), buffer=blocks[key].buf)
+              for key, (_, shape, dtype) in shared_specs.items()}
+    _worker_state.update(calculator=calculator, blocks=blocks, arrays=arrays, offsets=offsets, weights=weights,
+                         k_position=None)
+
+
+def _calculate_s_for_atom_and_k(task):
+    """
+    Evaluates S for one atom at one k-point in a worker process.
+    :param task: (position of k-point in the shared tensors, atom index)
+    :returns: dictionary with S for all quantum orders
+    """
+    k_position, atom = task
+    calculator = _worker_state["calculator"]
+    if _worker_state["k_position"] != k_position:
+        arrays = _worker_state["arrays"]
+        start, end = _worker_state["offsets"][k_position:k_position + 2]
+        calculator._set_k_point_data(a_tensors=arrays["a_tensors"][k_position],
+                                     b_tensors=arrays["b_tensors"][:, start:end],
+                                     frequencies=arrays["frequencies"][start:end],
+                                     weight=_worker_state["weights"][k_position])
+        _worker_state["k_position"] = k_position
+
+    return calculator._calculate_s_powder_one_atom(atom=atom)
+
 
 # noinspection PyMethodMayBeStatic
 class SPowderSemiEmpiricalCalculator(object):
@@ -22,7 +74,7 @@ class SPowderSemiEmpiricalCalculator(object):
     """
 
     def __init__(self, filename=None, temperature=None, abins_data=None, instrument=None, quantum_order_num=None,
-                 bin_width=1.0):
+                 bin_width=1.0, number_of_processes=1):
         """
         :param filename: name of input DFT file (CASTEP: foo.phonon)
         :param temperature: temperature in K for which calculation of S should be done
@@ -31,6 +83,7 @@ class SPowderSemiEmpiricalCalculator(object):
         :param instrument: name of instrument (str)
         :param quantum_order_num: number of quantum order events taken into account during the simulation
         :param bin_width: bin width used in rebining in wavenumber
+        :param number_of_processes: number of processes used to calculate S in parallel over atoms and k-points
         """
         if not isinstance(temperature, (int, float)):
             raise ValueError("Invalid value of the temperature. Number was expected.")
@@ -63,6 +116,11 @@ class SPowderSemiEmpiricalCalculator(object):
         else:
             raise ValueError("Unknown instrument %s" % instrument)
 
+        if isinstance(number_of_processes, int) and number_of_processes >= 1:
+            self._number_of_processes = number_of_processes
+        else:
+            raise ValueError("Invalid number of processes. Positive integer was expected.")
+
         if isinstance(filename, str):
             if filename.strip() == "":
                 raise ValueError("Name of the file cannot be an empty string!")
@@ -99,11 +157,16 @@ class SPowderSemiEmpiricalCalculator(object):
         self._b_traces = None
         self._fundamentals_freq = None
 
+        # In-memory tensor store: powder data and k-point weights for all k-points, populated once per calculation
+        self._powder_data = None
+        self._weights = None
+
     def _calculate_s(self):
 
-        # calculate powder data
+        # calculate powder data and keep it in memory; it is sliced per k-point in _prepare_data
         powder_calculator = abins.PowderCalculator(filename=self._input_filename, abins_data=self._abins_data)
-        powder_calculator.get_formatted_data()
+        self._powder_data = powder_calculator.get_formatted_data()
+        self._weights = np.asarray([k_point_data.weight for k_point_data in self._abins_data.get_kpoints_data()])
 
         # free memory
         self._abins_data = None
@@ -141,17 +204,88 @@ class SPowderSemiEmpiricalCalculator(object):
 
         return freq, coeff
 
+    def __getstate__(self):
+        # Tensors are passed to worker processes through shared memory rather than pickled with the calculator
+        state = self.__dict__.copy()
+        state["_powder_data"] = None
+        state["_abins_data"] = None
+        return state
+
     def _calculate_s_powder_over_k(self):
         """
         Helper function. It calculates S for all q points  and all atoms.
         :returns: dictionary with S
         """
-        data = self._calculate_s_powder_over_atoms(q_indx=0)
+        k_indices = sorted(self._powder_data.get_frequencies().keys())
+        start = time.perf_counter()
+
+        if self._number_of_processes > 1 and len(k_indices) * self._num_atoms > 1:
+            data = self._calculate_s_powder_over_k_parallel(k_indices=k_indices)
+
+        else:
+            data = self._calculate_s_powder_over_atoms(q_indx=k_indices[0])
+
+            # iterate over remaining q-points
+            for q in k_indices[1:]:
+                local_data = self._calculate_s_powder_over_atoms(q_indx=q)
+                self._sum_s(current_val=data, addition=local_data)
+
+        elapsed = time.perf_counter() - start
+        self._report_progress(msg=f"S for {len(k_indices)} k-point(s) has been calculated in {elapsed:.2f} s "
+                                  f"({elapsed / len(k_indices):.3f} s per k-point).")
+        return data
+
+    def _calculate_s_powder_over_k_parallel(self, k_indices=None):
+        """
+        Calculates S for all q points and all atoms with a pool of worker processes; every (k-point, atom) pair is
+        an independent task. Tensors for all k-points are placed in shared memory once, and the results are summed
+        over k-points in the same order as in the serial calculation so that S does not depend on the number of
+        processes.
+        :param k_indices: sorted indices of k-points
+        :returns: dictionary with S
+        """
+        a_tensors = self._powder_data.get_a_tensors()
+        b_tensors = self._powder_data.get_b_tensors()
+        frequencies = self._powder_data.get_frequencies()
+
+        # number of frequencies differs between k-points, so b_tensors and frequencies are concatenated and indexed
+        # with offsets
+        offsets = np.cumsum([0] + [frequencies[k].size for k in k_indices])
+        blocks = []
+        shared_specs = {}
+        for key, array in (("a_tensors", np.stack([a_tensors[k] for k in k_indices])),
+                           ("b_tensors", np.concatenate([b_tensors[k] for k in k_indices], axis=1)),
+                           ("frequencies", np.concatenate([frequencies[k] for k in k_indices]))):
+            block, shared_specs[key] = _to_shared_memory(array)
+            blocks.append(block)
+
+        tasks = [(k_position, atom) for k_position in range(len(k_indices)) for atom in range(self._num_atoms)]
+        weights = np.asarray([self._weights[k] for k in k_indices])
+        chunksize = max(1, self._num_atoms // self._number_of_processes)
+        data = {f"atom_{atom}": {"s": None} for atom in range(self._num_atoms)}
+
+        try:
+            # spawned workers do not inherit the state (e.g. open HDF5 files or threads) of the calling process
+            with multiprocessing.get_context("spawn").Pool(processes=self._number_of_processes,
+                                                           initializer=_init_worker,
+                                                           initargs=(self, shared_specs, offsets, weights)) as pool:
+
+                # imap returns results in the order of tasks (k-point major), which makes the reduction deterministic
+                for (k_position, atom), s in zip(tasks, pool.imap(_calculate_s_for_atom_and_k, tasks,
+                                                                  chunksize=chunksize)):
+                    atom_s = data[f"atom_{atom}"]
+                    if atom_s["s"] is None:
+                        atom_s["s"] = s
+                    else:
+                        self._sum_s(current_val={"atom": atom_s}, addition={"atom": {"s": s}})
+
+                    if atom == self._num_atoms - 1:
+                        self._report_progress(msg=f"S for k-point {k_indices[k_position]} has been calculated.")
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
 
-        # iterate over remaining q-points
-        for q in range(1, self._num_k):
-            local_data = self._calculate_s_powder_over_atoms(q_indx=q)
-            self._sum_s(current_val=data, addition=local_data)
         return data
 
     def _sum_s(self, current_val=None, addition=None):
@@ -174,6 +308,10 @@ class SPowderSemiEmpiricalCalculator(object):
         """
         data = self._calculate_s_powder_over_k()
 
+        # tensors are no longer needed once S has been summed over k-points
+        self._powder_data = None
+        gc.collect()
+
         s_data = abins.SData(temperature=self._temperature,
                              sample_form=self._sample_form,
                              frequencies=self._frequencies,
@@ -193,30 +331,31 @@ class SPowderSemiEmpiricalCalculator(object):
 
     def _prepare_data(self, k_point=None):
         """
-        Sets all necessary fields for 1D calculations. Sorts atom indices to improve parallelism.
-        :returns: number of atoms, sorted atom indices
+        Sets all necessary fields for 1D calculations for the given k-point. Tensors are sliced from the in-memory
+        powder data populated once in _calculate_s, so the HDF file is not re-read for every k-point.
+        :param k_point: index of k-point
         """
-        # load powder data for one k
-        clerk = abins.IO(input_filename=self._input_filename,
-                         group_name=abins.parameters.hdf_groups['powder_data'])
-        powder_data = abins.PowderData.from_extracted(clerk.load(list_of_datasets=["powder_data"]
-                                                                 )["datasets"]["powder_data"])
-        self._a_tensors = powder_data.get_a_tensors()[k_point]
-        self._b_tensors = powder_data.get_b_tensors()[k_point]
+        self._set_k_point_data(a_tensors=self._powder_data.get_a_tensors()[k_point],
+                               b_tensors=self._powder_data.get_b_tensors()[k_point],
+                               frequencies=self._powder_data.get_frequencies()[k_point],
+                               weight=self._weights[k_point])
+
+    def _set_k_point_data(self, a_tensors=None, b_tensors=None, frequencies=None, weight=None):
+        """
+        Sets tensors, traces, fundamental frequencies and weight of the k-point for which S is calculated.
+        :param a_tensors: total MSD tensors for all atoms
+        :param b_tensors: frequency dependent MSD tensors for all atoms
+        :param frequencies: fundamental frequencies
+        :param weight: k-point weight
+        """
+        self._a_tensors = a_tensors
+        self._b_tensors = b_tensors
 
         self._a_traces = np.trace(a=self._a_tensors, axis1=1, axis2=2)
         self._b_traces = np.trace(a=self._b_tensors, axis1=2, axis2=3)
 
-        self._fundamentals_freq = powder_data.get_frequencies()[k_point]
-
-        # load dft data to get k-point weighting
-        clerk = abins.IO(input_filename=self._input_filename,
-                         group_name=abins.parameters.hdf_groups['ab_initio_data'])
-        dft_data = clerk.load(list_of_datasets=["frequencies", "weights"])
-        self._weight = dft_data["datasets"]["weights"][k_point]
-
-        # free memory
-        gc.collect()
+        self._fundamentals_freq = frequencies
+        self._weight = weight
 
     @staticmethod
     def _report_progress(msg):
@@ -241,6 +380,8 @@ class SPowderSemiEmpiricalCalculator(object):
         :returns: s, and corresponding frequencies for all quantum events taken into account
         """
         s = {}
+        # binned S of the spectra which are convolved from binned data, for each order and broadening scheme
+        histograms = {}
 
         local_freq = np.copy(self._fundamentals_freq)
         local_coeff = np.arange(start=0.0, step=1.0, stop=self._fundamentals_freq.size, dtype=INT_TYPE)
@@ -248,76 +389,70 @@ class SPowderSemiEmpiricalCalculator(object):
 
         for order in range(FUNDAMENTALS, self._quantum_order_num + S_LAST_INDEX):
 
-            # in case there is large number of transitions chop it into chunks and process chunk by chunk
+            # in case there is large number of transitions stream them block by block
             if local_freq.size * self._fundamentals_freq.size > abins.parameters.performance['optimal_size']:
 
-                chunked_fundamentals, chunked_fundamentals_coeff = self._prepare_chunks(local_freq=local_freq,
-                                                                                        order=order, s=s)
-
-                for fund_chunk, fund_coeff_chunk in zip(chunked_fundamentals, chunked_fundamentals_coeff):
-
-                    part_loc_freq = np.copy(local_freq)
-                    part_loc_coeff = np.copy(local_coeff)
-
-                    # number of transitions can only go up
-                    for lg_order in range(order, self._quantum_order_num + S_LAST_INDEX):
+                for lg_order in range(order, self._quantum_order_num + S_LAST_INDEX):
+                    s["order_%s" % lg_order] = np.zeros(shape=self._freq_size, dtype=FLOAT_TYPE)
 
-                        part_loc_freq, part_loc_coeff, part_broad_spectrum = self._helper_atom(
-                            atom=atom, local_freq=part_loc_freq, local_coeff=part_loc_coeff,
-                            fundamentals_freq=fund_chunk, fund_coeff=fund_coeff_chunk, order=lg_order)
-
-                        s["order_%s" % lg_order] += part_broad_spectrum
-
-                return s
+                self._calculate_s_streamed(atom=atom, s=s, histograms=histograms, previous_freq=local_freq,
+                                           previous_coeff=local_coeff, fund_coeff=fund_coeff, order=order)
+                break
 
             # if relatively small array of transitions then process it in one shot
             else:
 
                 local_freq, local_coeff, s["order_%s" % order] = self._helper_atom(
-                    atom=atom, local_freq=local_freq, local_coeff=local_coeff,
+                    atom=atom, histograms=histograms, local_freq=local_freq, local_coeff=local_coeff,
                     fundamentals_freq=self._fundamentals_freq, fund_coeff=fund_coeff, order=order)
 
+        self._broaden_histograms(s=s, histograms=histograms)
+
         if report_progress:
             self._report_progress(msg=f"S for atom {atom} has been calculated.")
 
         return s
 
-    def _prepare_chunks(self, local_freq=None, order=None, s=None):
+    def _calculate_s_streamed(self, atom=None, s=None, histograms=None, previous_freq=None, previous_coeff=None,
+                              previous_s=None, fund_coeff=None, order=None):
         """
-        Helper function for _calculate_s_powder_1d_one_atom in case transitions energies have to be created from
-        fundamentals chunks (chunk by chunk).
-        :param local_freq: frequency from the previous transition
-        :param order:  order of quantum event
-        :param s:  dictionary with s data
-        :returns: 2D numpy array with fundamentals chunks, 2D array with corresponding coefficients
+        Helper function for _calculate_s_powder_one_atom in case transition energies are too numerous to be created
+        in one shot. Transitions are generated block by block (depth first over quantum orders), so the memory used is
+        bounded by abins.parameters.performance['optimal_size'] for each order.
+        :param atom: number of atom
+        :param s: dictionary with s data; S for this and higher orders is accumulated in place
+        :param histograms: dictionary with binned S to be broadened by _broaden_histograms; accumulated in place
+        :param previous_freq: frequencies from the previous transition
+        :param previous_coeff: coefficients from the previous transition
+        :param previous_s: S for previous_freq, used to discard weak transitions before combining them; None if
+                           previous_freq has already been pruned
+        :param fund_coeff: fundamental coefficients
+        :param order: order of quantum event
         """
-        fund_size = self._fundamentals_freq.size
-        l_size = local_freq.size
-        opt_size = float(abins.parameters.performance['optimal_size'])
-
-        chunk_size = max(1.0, np.floor(opt_size / (l_size * 2**(MAX_ORDER - order))))
-        chunk_num = int(np.ceil(float(fund_size) / chunk_size))
-        new_dim = int(chunk_num * chunk_size)
-        new_fundamentals = np.zeros(shape=new_dim, dtype=FLOAT_TYPE)
-        new_fundamentals_coeff = np.zeros(shape=new_dim, dtype=INT_TYPE)
-        new_fundamentals[:fund_size] = self._fundamentals_freq
-        new_fundamentals_coeff[:fund_size] = np.arange(start=0.0, step=1.0, stop=self._fundamentals_freq.size,
-                                                       dtype=INT_TYPE)
-
-        new_fundamentals = new_fundamentals.reshape(chunk_num, int(chunk_size))
-        new_fundamentals_coeff = new_fundamentals_coeff.reshape(chunk_num, int(chunk_size))
-
-        total_size = self._freq_size
-        for lg_order in range(order, self._quantum_order_num + S_LAST_INDEX):
-            s["order_%s" % lg_order] = np.zeros(shape=total_size, dtype=FLOAT_TYPE)
-
-        return new_fundamentals, new_fundamentals_coeff
-
-    def _helper_atom(self, atom=None, local_freq=None, local_coeff=None, fundamentals_freq=None, fund_coeff=None,
-                     order=None):
+        blocks = self._freq_generator.iter_freq_combinations(previous_array=previous_freq,
+                                                             previous_coefficients=previous_coeff,
+                                                             previous_s=previous_s,
+                                                             fundamentals_array=self._fundamentals_freq,
+                                                             fundamentals_coefficients=fund_coeff,
+                                                             quantum_order=order)
+        for block_freq, block_coeff in blocks:
+            value_dft, broad_spectrum = self._calculate_s_and_spectrum(atom=atom, histograms=histograms,
+                                                                       local_freq=block_freq, local_coeff=block_coeff,
+                                                                       order=order)
+            s["order_%s" % order] += broad_spectrum
+
+            # number of transitions can only go up
+            if order < self._quantum_order_num:
+                self._calculate_s_streamed(atom=atom, s=s, histograms=histograms, previous_freq=block_freq,
+                                           previous_coeff=block_coeff, previous_s=value_dft, fund_coeff=fund_coeff,
+                                           order=order + 1)
+
+    def _helper_atom(self, atom=None, histograms=None, local_freq=None, local_coeff=None, fundamentals_freq=None,
+                     fund_coeff=None, order=None):
         """
         Helper function for _calculate_s_powder_1d_one_atom.
         :param atom: number of atom
+        :param histograms: dictionary with binned S to be broadened by _broaden_histograms; accumulated in place
         :param local_freq: frequency from the previous transition
         :param local_coeff: coefficients from the previous transition
         :param fundamentals_freq: fundamental frequencies
@@ -331,6 +466,30 @@ class SPowderSemiEmpiricalCalculator(object):
             fundamentals_coefficients=fund_coeff,
             quantum_order=order)
 
+        value_dft, rebinned_broad_spectrum = self._calculate_s_and_spectrum(atom=atom, histograms=histograms,
+                                                                            local_freq=local_freq,
+                                                                            local_coeff=local_coeff, order=order)
+        if value_dft is not None:
+            local_freq, local_coeff = self._calculate_s_over_threshold(s=value_dft,
+                                                                       freq=local_freq,
+                                                                       coeff=local_coeff)
+
+        return local_freq, local_coeff, rebinned_broad_spectrum
+
+    def _calculate_s_and_spectrum(self, atom=None, histograms=None, local_freq=None, local_coeff=None, order=None):
+        """
+        Calculates S for the given transitions and broadens it with the instrumental resolution. If the instrument
+        convolves S from binned data, S is binned and added to histograms instead, and is broadened together with
+        the other spectra of the atom by _broaden_histograms.
+        :param atom: number of atom
+        :param histograms: dictionary with binned S weighted by k-point, keyed by (order, broadening scheme)
+        :param local_freq: frequencies of transitions
+        :param local_coeff: coefficients of transitions
+        :param order: order of quantum event
+        :returns: S for the transitions (None if there are no transitions), broadened spectrum weighted by k-point
+        """
+        value_dft = None
+
         if local_freq.any():  # check if local_freq has non-zero values
 
             q2 = None
@@ -346,14 +505,19 @@ class SPowderSemiEmpiricalCalculator(object):
                                                      b_trace=self._b_traces[atom])
 
             broadening_scheme = abins.parameters.sampling['broadening_scheme']
-            _, rebinned_broad_spectrum = self._instrument.convolve_with_resolution_function(frequencies=local_freq,
-                                                                                            bins=self._bins,
-                                                                                            s_dft=value_dft,
-                                                                                            scheme=broadening_scheme)
-
-            local_freq, local_coeff = self._calculate_s_over_threshold(s=value_dft,
-                                                                       freq=local_freq,
-                                                                       coeff=local_coeff)
+            histogram_scheme = self._instrument.get_histogram_scheme(frequencies=local_freq, bins=self._bins,
+                                                                     scheme=broadening_scheme)
+            if histogram_scheme is None:
+                _, rebinned_broad_spectrum = self._instrument.convolve_with_resolution_function(
+                    frequencies=local_freq, bins=self._bins, s_dft=value_dft, scheme=broadening_scheme)
+            else:
+                s_hist, _ = np.histogram(local_freq, bins=self._bins, weights=value_dft, density=False)
+                key = (order, histogram_scheme)
+                if key in histograms:
+                    histograms[key] += s_hist * self._weight
+                else:
+                    histograms[key] = s_hist * self._weight
+                rebinned_broad_spectrum = np.zeros_like(self._frequencies)
 
         else:
             rebinned_broad_spectrum = np.zeros_like(self._frequencies)
@@ -361,7 +525,21 @@ class SPowderSemiEmpiricalCalculator(object):
         # multiply by k-point weight and scaling constant
         factor = self._weight
         rebinned_broad_spectrum = rebinned_broad_spectrum * factor
-        return local_freq, local_coeff, rebinned_broad_spectrum
+        return value_dft, rebinned_broad_spectrum
+
+    def _broaden_histograms(self, s=None, histograms=None):
+        """
+        Broadens the binned S of all orders with one call to the instrument for each broadening scheme. As broadening
+        is linear, this gives the same S as broadening every block of transitions separately.
+        :param s: dictionary with S for all orders; broadened spectra are added in place
+        :param histograms: dictionary with binned S weighted by k-point, keyed by (order, broadening scheme)
+        """
+        for scheme in sorted(set(scheme for _, scheme in histograms)):
+            orders = [order for order, order_scheme in histograms if order_scheme == scheme]
+            _, spectra = self._instrument.convolve_histograms_with_resolution_function(
+                bins=self._bins, s_hist=np.stack([histograms[(order, scheme)] for order in orders]), scheme=scheme)
+            for order, spectrum in zip(orders, spectra):
+                s["order_%s" % order] += spectrum
 
     # noinspection PyUnusedLocal
     def _calculate_order_one(self, q2=None, frequencies=None, indices=None, a_tensor=None, a_trace=None,
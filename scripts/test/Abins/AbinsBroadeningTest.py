@@ -10,6 +10,7 @@ import numpy as np
 from numpy.testing import assert_array_almost_equal
 from scipy.stats import norm as spnorm
 
+import abins
 from abins.instruments import broadening
 
 
@@ -165,6 +166,61 @@ class BroadeningTest(unittest.TestCase):
         self.assertLess(abs(sum(interp_spectrum) - pre_broadening_total) / pre_broadening_total,
                         0.05)
 
+    def test_broaden_spectra_matches_broaden_spectrum(self):
+        """Check batched broadening reproduces broadening of each histogram in turn"""
+        # Enough points for trunc_and_sum_inplace to use the 'forloop' summation, which places kernels identically
+        npts = 2000
+        bins = np.linspace(0, 100, npts + 1)
+        freq_points = (bins[1:] + bins[:-1]) / 2
+        sigma = freq_points * 0.1 + 1
+
+        np.random.seed(0)
+        s_hist = np.random.random((3, npts))
+        s_hist[1] = 0.
+
+        broadening.clear_kernel_cache()
+        for scheme in broadening.batch_schemes:
+            points, batch_spectra = broadening.broaden_spectra(bins, s_hist, sigma, scheme=scheme)
+            self.assertEqual(batch_spectra.shape, s_hist.shape)
+            assert_array_almost_equal(points, freq_points)
+
+            for row, batch_spectrum in zip(s_hist, batch_spectra):
+                _, spectrum = broadening.broaden_spectrum(freq_points, bins, row, sigma, scheme=scheme)
+                assert_array_almost_equal(batch_spectrum, spectrum)
+
+        # kernels are reused for the same scheme, bins and sigma
+        cache_info = broadening._get_kernel_matrix.cache_info()
+        broadening.broaden_spectra(bins, s_hist, sigma, scheme='interpolate')
+        self.assertEqual(broadening._get_kernel_matrix.cache_info().hits, cache_info.hits + 1)
+
+        with self.assertRaises(ValueError):
+            broadening.broaden_spectra(bins, s_hist, sigma, scheme='gaussian')
+
+    def test_tosca_histograms_match_convolution(self):
+        """Check summed binned spectra convolved together match the sum of spectra convolved in turn"""
+        instrument = abins.instruments.get_instrument("TOSCA")
+        bins = np.arange(0, 4001, 1.0)
+
+        np.random.seed(0)
+        frequencies = [np.random.uniform(100, 3900, size) for size in (100, 200)]
+        s_dft = [np.random.random(size) for size in (100, 200)]
+
+        # few frequencies are broadened directly with the truncated Gaussian, which does not need binned data
+        self.assertIsNone(instrument.get_histogram_scheme(frequencies=frequencies[0][:10], bins=bins, scheme='auto'))
+
+        expected = np.zeros(bins.size - 1)
+        s_hist = np.zeros(bins.size - 1)
+        for freq, s in zip(frequencies, s_dft):
+            scheme = instrument.get_histogram_scheme(frequencies=freq, bins=bins, scheme='auto')
+            self.assertEqual(scheme, 'interpolate')
+            expected += instrument.convolve_with_resolution_function(frequencies=freq, bins=bins, s_dft=s,
+                                                                     scheme='auto')[1]
+            s_hist += np.histogram(freq, bins=bins, weights=s)[0]
+
+        _, spectra = instrument.convolve_histograms_with_resolution_function(bins=bins, s_hist=s_hist[np.newaxis, :],
+                                                                             scheme='interpolate')
+        assert_array_almost_equal(spectra[0], expected)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -6,6 +6,7 @@
 # SPDX - License - Identifier: GPL - 3.0 +
 import unittest
 import json
+from unittest.mock import patch
 import numpy as np
 
 import abins
@@ -75,14 +76,47 @@ class SCalculatorFactoryPowderTest(unittest.TestCase):
     def test_good_case(self):
         self._good_case(name=self._si2)
 
+    def test_powder_data_not_reloaded_per_k_point(self):
+        good_data = self._get_good_data(filename=self._si2)
+        tester = abins.SCalculatorFactory.init(
+            filename=abins.test_helpers.find_file(filename=self._si2 + ".phonon"), temperature=self._temperature,
+            sample_form=self._sample_form, abins_data=good_data["DFT"], instrument=self._instrument,
+            quantum_order_num=self._order_event)
+
+        original_load = abins.IO.load
+        powder_loads = []
+
+        def load(clerk, list_of_attributes=None, list_of_datasets=None):
+            if list_of_datasets and "powder_data" in list_of_datasets:
+                powder_loads.append(list_of_datasets)
+            return original_load(clerk, list_of_attributes=list_of_attributes, list_of_datasets=list_of_datasets)
+
+        with patch.object(abins.IO, 'load', autospec=True, side_effect=load):
+            calculated_data = tester.calculate_data()
+
+        # powder data is calculated once and kept in memory rather than re-read from the HDF file for each k-point
+        self.assertEqual(powder_loads, [])
+        self._check_data(good_data=good_data["S"], data=calculated_data.extract())
+
+    def test_parallel_calculation_matches_serial(self):
+        self._good_case(name=self._si2, number_of_processes=2)
+
+    def test_wrong_number_of_processes(self):
+        good_data = self._get_good_data(filename=self._si2)
+        with self.assertRaises(ValueError):
+            abins.SCalculatorFactory.init(
+                filename=abins.test_helpers.find_file(filename=self._si2 + ".phonon"), temperature=self._temperature,
+                sample_form=self._sample_form, abins_data=good_data["DFT"], instrument=self._instrument,
+                quantum_order_num=self._order_event, number_of_processes=0)
+
     # helper functions
-    def _good_case(self, name=None):
+    def _good_case(self, name=None, number_of_processes=1):
         # calculation of powder data
         good_data = self._get_good_data(filename=name)
         good_tester = abins.SCalculatorFactory.init(
             filename=abins.test_helpers.find_file(filename=name + ".phonon"), temperature=self._temperature,
             sample_form=self._sample_form, abins_data=good_data["DFT"], instrument=self._instrument,
-            quantum_order_num=self._order_event)
+            quantum_order_num=self._order_event, number_of_processes=number_of_processes)
         calculated_data = good_tester.get_formatted_data()
 
         self._check_data(good_data=good_data["S"], data=calculated_data.extract())
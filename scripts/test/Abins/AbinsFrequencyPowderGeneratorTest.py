@@ -186,6 +186,44 @@ class FrequencyPowderGeneratorTest(unittest.TestCase):
                           + fundamentals[double_coeffs[20, 1]]),
                          doubles[20])
 
+    def test_iter_freq_combinations_matches_full_construction(self):
+        abins.parameters.sampling['max_wavenumber'] = 700.
+        np.random.seed(1)
+
+        fundamentals = np.array(np.random.random(50), dtype=FLOAT_TYPE) * 500
+        fund_coeffs = np.arange(len(fundamentals), dtype=INT_TYPE)
+
+        doubles, double_coeffs = abins.FrequencyPowderGenerator.construct_freq_combinations(
+            previous_array=fundamentals, previous_coefficients=fund_coeffs,
+            fundamentals_array=fundamentals, fundamentals_coefficients=fund_coeffs, quantum_order=2)
+
+        # blocks of at most 7 previous frequencies; blocks are views of reused buffers so they must be copied
+        blocks = [(freq.copy(), coeff.copy()) for freq, coeff in
+                  abins.FrequencyPowderGenerator.iter_freq_combinations(
+                      previous_array=fundamentals, previous_coefficients=fund_coeffs,
+                      fundamentals_array=fundamentals, fundamentals_coefficients=fund_coeffs,
+                      quantum_order=2, block_size=7 * len(fundamentals))]
+
+        self.assertEqual(len(blocks), 8)
+        assert_array_equal(doubles, np.concatenate([freq for freq, _ in blocks]))
+        assert_array_equal(double_coeffs, np.concatenate([coeff for _, coeff in blocks]))
+
+        # third order from the doubles, with weak doubles discarded before any combinations are made
+        previous_s = np.zeros_like(doubles)
+        previous_s[::2] = 1.0
+        triples, triple_coeffs = abins.FrequencyPowderGenerator.construct_freq_combinations(
+            previous_array=doubles[::2], previous_coefficients=double_coeffs[::2],
+            fundamentals_array=fundamentals, fundamentals_coefficients=fund_coeffs, quantum_order=3)
+
+        blocks = [(freq.copy(), coeff.copy()) for freq, coeff in
+                  abins.FrequencyPowderGenerator.iter_freq_combinations(
+                      previous_array=doubles, previous_coefficients=double_coeffs, previous_s=previous_s,
+                      fundamentals_array=fundamentals, fundamentals_coefficients=fund_coeffs,
+                      quantum_order=3, block_size=1000)]
+
+        assert_array_equal(triples, np.concatenate([freq for freq, _ in blocks]))
+        assert_array_equal(triple_coeffs, np.concatenate([coeff for _, coeff in blocks]))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -19,6 +19,12 @@ class InstrumentTest(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             instrument.convolve_with_resolution_function()
 
+        with self.assertRaises(NotImplementedError):
+            instrument.get_histogram_scheme()
+
+        with self.assertRaises(NotImplementedError):
+            instrument.convolve_histograms_with_resolution_function()
+
 
 if __name__ == '__main__':
     unittest.main()
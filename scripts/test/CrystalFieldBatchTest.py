@@ -0,0 +1,112 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+"""Test suite for the batched crystal field calculations in the Inelastic/CrystalField package
+"""
+import unittest
+
+import numpy as np
+# Import mantid to setup the python paths to the bundled scripts
+from CrystalField import CrystalField, CrystalFieldBatch, CrystalFieldFit
+from CrystalField.fitting import makeWorkspace
+
+from mantid.simpleapi import mtd
+
+
+class CrystalFieldBatchTest(unittest.TestCase):
+
+    def _make_crystal_field(self, **kwargs):
+        params = dict(B20=0.37737, B22=3.9770, B40=-0.031787, B42=-0.11611, B44=-0.12544, Temperature=44.0,
+                      FWHM=1.1)
+        params.update(kwargs)
+        return CrystalField('Ce', 'C2v', **params)
+
+    def test_eigenvalues_match_crystal_field(self):
+        cf = self._make_crystal_field()
+        eigenvalues, eigenvectors = cf.makeBatch().getEigensystems()
+        self.assertEqual(eigenvalues.shape, (1, 6))
+        self.assertEqual(eigenvectors.shape, (1, 6, 6))
+        np.testing.assert_allclose(eigenvalues[0], cf.getEigenvalues(), atol=1e-8)
+
+    def test_eigenvalues_of_parameter_grid(self):
+        batch = self._make_crystal_field().makeBatch('B20', 'BextZ')
+        params = batch.makeGrid([0.1, 0.5], [0.0, 1.0, 5.0])
+        self.assertEqual(params.shape, (6, 2))
+        eigenvalues, _ = batch.getEigensystems(params)
+        for values, batch_eigenvalues in zip(params, eigenvalues):
+            cf = self._make_crystal_field(B20=values[0], BextZ=values[1])
+            np.testing.assert_allclose(batch_eigenvalues, cf.getEigenvalues(), atol=1e-8)
+
+    def test_physical_properties_match_crystal_field(self):
+        cf = self._make_crystal_field()
+        batch = cf.makeBatch('B22')
+        temperatures = np.linspace(1, 300, 30)
+        heat_capacity = batch.getHeatCapacity([[3.9770], [1.0]], temperatures)
+        susceptibility = batch.getSusceptibility([[3.9770], [1.0]], temperatures, Hdir='powder', Unit='SI')
+        self.assertEqual(heat_capacity.shape, (2, 30))
+        np.testing.assert_allclose(heat_capacity[0], cf.getHeatCapacity(temperatures)[1], rtol=1e-6)
+        np.testing.assert_allclose(susceptibility[0], cf.getSusceptibility(temperatures, Hdir='powder', Unit='SI')[1],
+                                   rtol=1e-6)
+        cf['B22'] = 1.0
+        np.testing.assert_allclose(heat_capacity[1], cf.getHeatCapacity(temperatures)[1], rtol=1e-6)
+
+    def test_spectra_match_crystal_field(self):
+        x = np.linspace(-10, 60, 300)
+        for peak_shape in ['Gaussian', 'Lorentzian']:
+            cf = self._make_crystal_field()
+            cf.PeakShape = peak_shape
+            cf.IntensityScaling = 2.0
+            spectra = cf.makeBatch().getSpectra(None, x, Temperature=44.0, FWHM=1.1, IntensityScaling=2.0,
+                                                PeakShape=peak_shape)
+            _, y = cf.getSpectrum(x)
+            np.testing.assert_allclose(spectra[0], y, rtol=1e-5, atol=1e-6 * np.max(y))
+
+    def test_peak_lists_match_crystal_field(self):
+        cf = self._make_crystal_field()
+        energies, intensities = cf.makeBatch().getPeakLists(Temperature=44.0)
+        peaks = cf.getPeakList()
+        strong = intensities[0] > 0
+        for energy, intensity in peaks.T:
+            self.assertAlmostEqual(np.sum(intensities[0][strong & (np.abs(energies[0] - energy) < 1e-6)]),
+                                   intensity, 4)
+
+    def test_unknown_parameter_raises(self):
+        self.assertRaises(RuntimeError, CrystalFieldBatch, 'Ce', ['B21', 'B77'])
+
+    def test_estimate_parameters_in_processes(self):
+        origin = self._make_crystal_field()
+        x, y = origin.getSpectrum()
+        ws = makeWorkspace(x, y)
+
+        cf = CrystalField('Ce', 'C2v', B20=0, B22=0, B40=0, B42=0, B44=0, Temperature=44.0, FWHM=1.1)
+        cf.ties(B20=0.37737)
+        fit = CrystalFieldFit(cf, InputWorkspace=ws)
+        fit.estimate_parameters(50, ['B22', 'B40', 'B42', 'B44'], NSamples=2000, NOutputs=5, Seed=123,
+                                NumberOfProcesses=2, OutputWorkspace='batch_estimates')
+        self.assertEqual(fit.get_number_estimates(), 5)
+        self.assertEqual(mtd['batch_estimates'].rowCount(), 4)
+        fit.fit()
+        self.assertLess(cf.chi2, 100.0)
+
+        # The same seed gives the same estimates in a single process
+        cf1 = CrystalField('Ce', 'C2v', B20=0, B22=0, B40=0, B42=0, B44=0, Temperature=44.0, FWHM=1.1)
+        cf1.ties(B20=0.37737)
+        fit1 = CrystalFieldFit(cf1, InputWorkspace=ws)
+        fit1.estimate_parameters(50, ['B22', 'B40', 'B42', 'B44'], NSamples=2000, NOutputs=5, Seed=123,
+                                 NumberOfProcesses=1, OutputWorkspace='batch_estimates_1')
+        for row in range(4):
+            self.assertAlmostEqual(mtd['batch_estimates'].cell(row, 1), mtd['batch_estimates_1'].cell(row, 1))
+
+    def test_estimate_parameters_in_processes_rejects_unsupported_properties(self):
+        cf = self._make_crystal_field()
+        x, y = cf.getSpectrum()
+        fit = CrystalFieldFit(cf, InputWorkspace=makeWorkspace(x, y))
+        self.assertRaises(RuntimeError, fit.estimate_parameters, 50, ['B22', 'B40'], NumberOfProcesses=1,
+                          Type='Cross Entropy')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,9 +4,15 @@
 #   NScD Oak Ridge National Laboratory, European Spallation Source,
 #   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
 # SPDX - License - Identifier: GPL - 3.0 +
+import os
+import shutil
+import tempfile
+import threading
 import unittest
+from unittest import mock
 
 import Direct.dgreduce as dgreduce
+import Direct.DirectEnergyConversion
 from Direct.DirectEnergyConversion import DirectEnergyConversion
 from Direct.PropertyManager import PropertyManager
 
@@ -418,6 +424,149 @@ class DirectEnergyConversionTest(unittest.TestCase):
         rez = CompareWorkspaces(result[1], result2[1])
         self.assertTrue(rez[0])
 
+    def test_multirep_mode_saves_results_in_background(self):
+        run_monitors = CreateSampleWorkspace(Function='Multiple Peaks', NumBanks=4, BankPixelWidth=1,
+                                             NumEvents=100000, XUnit='Energy', XMin=3, XMax=200, BinWidth=0.1)
+        LoadInstrument(run_monitors, InstrumentName='MARI', RewriteSpectraMap=True)
+        ConvertUnits(InputWorkspace='run_monitors', OutputWorkspace='run_monitors', Target='TOF')
+        run_monitors = mtd['run_monitors']
+        tof = run_monitors.dataX(3)
+        tMin = tof[0]
+        tMax = tof[-1]
+        run = CreateSampleWorkspace(Function='Multiple Peaks', WorkspaceType='Event', NumBanks=8, BankPixelWidth=1,
+                                    NumEvents=100000, XUnit='TOF', xMin=tMin, xMax=tMax)
+        LoadInstrument(run, InstrumentName='MARI', RewriteSpectraMap=True)
+        MoveInstrumentComponent(Workspace='run', ComponentName='Detector', DetectorID=1102, Z=1)
+        wb_ws = Rebin(run, Params=[tMin, 1, tMax], PreserveEvents=False)
+
+        tReducer = DirectEnergyConversion(run.getInstrument())
+        tReducer.prop_man.run_diagnostics = True
+        tReducer.hard_mask_file = None
+        tReducer.map_file = None
+        tReducer.save_format = None
+        tReducer.multirep_tof_specta_list = [4, 5]
+        tReducer.save_multirep_in_background = True
+
+        with mock.patch.object(tReducer, '_write_results', wraps=tReducer._write_results) as write_results:
+            result = tReducer.convert_to_energy(wb_ws, run, [67., 122.], [-2, 0.02, 0.8])
+
+        self.assertEqual(write_results.call_count, 2)
+        # the results are in the order of the incident energies
+        self.assertEqual(len(result), 2)
+        for ws, ei in zip(result, [67., 122.]):
+            self.assertEqual(ws.getAxis(0).getUnit().unitID(), 'DeltaE')
+            self.assertAlmostEqual(ws.readX(0)[0], -2 * ei)
+
+    def test_multirep_mode_writes_nxspe_in_background(self):
+        run_monitors = CreateSampleWorkspace(Function='Multiple Peaks', NumBanks=4, BankPixelWidth=1,
+                                             NumEvents=100000, XUnit='Energy', XMin=3, XMax=200, BinWidth=0.1)
+        LoadInstrument(run_monitors, InstrumentName='MARI', RewriteSpectraMap=True)
+        ConvertUnits(InputWorkspace='run_monitors', OutputWorkspace='run_monitors', Target='TOF')
+        run_monitors = mtd['run_monitors']
+        tof = run_monitors.dataX(3)
+        tMin = tof[0]
+        tMax = tof[-1]
+        run = CreateSampleWorkspace(Function='Multiple Peaks', WorkspaceType='Event', NumBanks=8, BankPixelWidth=1,
+                                    NumEvents=100000, XUnit='TOF', xMin=tMin, xMax=tMax)
+        LoadInstrument(run, InstrumentName='MARI', RewriteSpectraMap=True)
+        MoveInstrumentComponent(Workspace='run', ComponentName='Detector', DetectorID=1102, Z=1)
+        wb_ws = Rebin(run, Params=[tMin, 1, tMax], PreserveEvents=False)
+
+        tReducer = DirectEnergyConversion(run.getInstrument())
+        tReducer.prop_man.run_diagnostics = True
+        tReducer.hard_mask_file = None
+        tReducer.map_file = None
+        tReducer.save_format = 'nxspe'
+        tReducer.multirep_tof_specta_list = [4, 5]
+        tReducer.save_multirep_in_background = True
+
+        save_directory = tempfile.mkdtemp()
+        default_save_directory = config['defaultsave.directory']
+        config['defaultsave.directory'] = save_directory
+        rename_threads = []
+        rename_workspace = Direct.DirectEnergyConversion.RenameWorkspace
+
+        def record_rename(*args, **kwargs):
+            rename_threads.append(threading.current_thread())
+            return rename_workspace(*args, **kwargs)
+
+        try:
+            with mock.patch('Direct.DirectEnergyConversion.RenameWorkspace', side_effect=record_rename):
+                result = tReducer.convert_to_energy(wb_ws, run, [67., 122.], [-2, 0.02, 0.8])
+            saved_files = sorted(os.listdir(save_directory))
+        finally:
+            config['defaultsave.directory'] = default_save_directory
+            shutil.rmtree(save_directory)
+
+        self.assertEqual(len(saved_files), 2)
+        for file_name in saved_files:
+            self.assertTrue(file_name.endswith('.nxspe'))
+        # only the reduction thread changes the ADS and the results have their names back
+        self.assertTrue(all(thread is threading.main_thread() for thread in rename_threads))
+        self.assertEqual(len(result), 2)
+        for chunk, ws in enumerate(result):
+            self.assertTrue(ws.name().startswith('#{0}/2#'.format(chunk + 1)))
+            self.assertTrue(ws.name() in mtd)
+
+    def test_multirep_background_saving_is_finished_when_a_chunk_fails(self):
+        run_monitors = CreateSampleWorkspace(Function='Multiple Peaks', NumBanks=4, BankPixelWidth=1,
+                                             NumEvents=100000, XUnit='Energy', XMin=3, XMax=200, BinWidth=0.1)
+        LoadInstrument(run_monitors, InstrumentName='MARI', RewriteSpectraMap=True)
+        ConvertUnits(InputWorkspace='run_monitors', OutputWorkspace='run_monitors', Target='TOF')
+        run_monitors = mtd['run_monitors']
+        tof = run_monitors.dataX(3)
+        tMin = tof[0]
+        tMax = tof[-1]
+        run = CreateSampleWorkspace(Function='Multiple Peaks', WorkspaceType='Event', NumBanks=8, BankPixelWidth=1,
+                                    NumEvents=100000, XUnit='TOF', xMin=tMin, xMax=tMax)
+        LoadInstrument(run, InstrumentName='MARI', RewriteSpectraMap=True)
+        MoveInstrumentComponent(Workspace='run', ComponentName='Detector', DetectorID=1102, Z=1)
+        wb_ws = Rebin(run, Params=[tMin, 1, tMax], PreserveEvents=False)
+
+        tReducer = DirectEnergyConversion(run.getInstrument())
+        tReducer.prop_man.run_diagnostics = True
+        tReducer.hard_mask_file = None
+        tReducer.map_file = None
+        tReducer.save_format = 'nxspe'
+        tReducer.multirep_tof_specta_list = [4, 5]
+        tReducer.save_multirep_in_background = True
+
+        save_directory = tempfile.mkdtemp()
+        default_save_directory = config['defaultsave.directory']
+        config['defaultsave.directory'] = save_directory
+        executors = []
+        executor_type = Direct.DirectEnergyConversion.ThreadPoolExecutor
+        mono_sample = tReducer.mono_sample
+        reduced_chunks = []
+
+        def create_executor(*args, **kwargs):
+            executors.append(executor_type(*args, **kwargs))
+            return executors[-1]
+
+        def fail_second_chunk(*args, **kwargs):
+            if reduced_chunks:
+                raise RuntimeError("reduction of the chunk failed")
+            reduced_chunks.append(args[1])
+            return mono_sample(*args, **kwargs)
+
+        try:
+            with mock.patch('Direct.DirectEnergyConversion.ThreadPoolExecutor', side_effect=create_executor), \
+                    mock.patch.object(tReducer, 'mono_sample', side_effect=fail_second_chunk):
+                self.assertRaises(RuntimeError, tReducer.convert_to_energy, wb_ws, run, [67., 122.],
+                                  [-2, 0.02, 0.8])
+            saved_files = os.listdir(save_directory)
+        finally:
+            config['defaultsave.directory'] = default_save_directory
+            shutil.rmtree(save_directory)
+
+        # the result of the first chunk has been saved and has its name back
+        self.assertEqual(len(executors), 1)
+        self.assertTrue(executors[0]._shutdown)
+        self.assertEqual(len(saved_files), 1)
+        first_results = [name for name in mtd.getObjectNames() if name.startswith('#1/2#')]
+        self.assertEqual(len(first_results), 1)
+        self.assertFalse(tReducer._get_nxspe_name(first_results[0]) in mtd)
+
     def test_multirep_abs_units_mode(self):
         # create test workspace
         run_monitors = CreateSampleWorkspace(Function='Multiple Peaks', NumBanks=4, BankPixelWidth=1,
@@ -0,0 +1,105 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+"""Test suite for the spectrum by spectrum helpers used by BayesQuasi and BayesStretch
+"""
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+from IndirectBayesSpectra import map_spectra, merge_parameters, read_ql_file, read_qse_file
+
+_HEADER = ['header', 'header', 'header', '{0} 1', 'header', 'header', 'header', 'header']
+
+
+def _ql_block(q, amax, hwhm, peaks):
+    """A block of a QLres or QLdata file for the (amplitude, FWHM, SIGIK, SIGFK) of each peak"""
+    lines = ['{0} {1} {2} 1.0 1.0'.format(q, amax, hwhm), '0.5 0.0 0.0 0.0']
+    lines += ['{0} {1}'.format(peak[0], peak[1]) for peak in peaks]
+    lines.append('0.01')
+    for peak in peaks:
+        lines += [str(peak[2]), str(peak[3])]
+    return lines + ['']
+
+
+def _qse_block(q, amax, hwhm):
+    return ['', '{0} {1} {2}'.format(q, amax, hwhm), '0.5', '0.4 0.3', '0.01', '0.04', '0.09', '0.8', '0.16']
+
+
+class IndirectBayesSpectraTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _write_file(self, name, lines):
+        path = os.path.join(self._directory, name)
+        with open(path, 'w') as handle:
+            handle.write('\n'.join(lines) + '\n')
+        return path
+
+    def test_read_ql_file(self):
+        lines = _HEADER[:3] + ['2 1'] + _HEADER[4:]
+        lines += _ql_block(0.5, 2.0, 0.1, [(0.25, 3.0, 0.04, 0.09), (0.5, 1.0, 0.16, 0.25)])
+        lines += _ql_block(0.7, 4.0, 0.2, [(0.75, 2.0, 0.01, 0.36), (0.25, 4.0, 0.49, 0.64)])
+        path = self._write_file('sample_QLr.ql2', lines)
+
+        q_data, (amp, fwhm, height), (amp_error, fwhm_error, height_error) = read_ql_file(path, 2)
+
+        self.assertEqual(q_data, [0.5, 0.7])
+        self.assertEqual(height, [1.0, 2.0])
+        self.assertEqual(height_error, [0.01, 0.01])
+        self.assertEqual(amp, [[0.5, 1.0], [3.0, 1.0]])
+        for (actual, expected) in zip(fwhm[0] + fwhm[1], [0.6, 0.2, 0.8, 1.6]):
+            self.assertAlmostEqual(actual, expected)
+        for (actual, expected) in zip(amp_error[1], [4.0 * 0.1, 4.0 * 0.7]):
+            self.assertAlmostEqual(actual, expected)
+        for (actual, expected) in zip(fwhm_error[0], [0.2 * 0.3, 0.2 * 0.5]):
+            self.assertAlmostEqual(actual, expected)
+
+    def test_read_qse_file(self):
+        lines = _HEADER[:3] + ['2 1'] + _HEADER[4:7]
+        lines += _qse_block(0.5, 2.0, 0.1) + _qse_block(0.7, 4.0, 0.2)
+        path = self._write_file('sample_QSe.qse', lines)
+
+        q_data, (amp, amp_error), (fwhm, fwhm_error), (beta, beta_error) = read_qse_file(path)
+
+        self.assertEqual(q_data, [0.5, 0.7])
+        for (actual, expected) in zip(amp + fwhm + beta, [0.8, 1.6, 0.06, 0.12, 0.8, 0.8]):
+            self.assertAlmostEqual(actual, expected)
+        for (actual, expected) in zip(amp_error + fwhm_error + beta_error, [0.4, 0.8, 0.06, 0.12, 0.4, 0.4]):
+            self.assertAlmostEqual(actual, expected)
+
+    def test_merge_parameters_joins_spectra_in_order(self):
+        first = ([0.5], ([[1.0]], [2.0]))
+        second = ([0.7], ([[3.0]], [4.0]))
+
+        self.assertEqual(merge_parameters([first, second]), ([0.5, 0.7], ([[1.0], [3.0]], [2.0, 4.0])))
+
+    def test_merge_parameters_of_single_spectrum_files_matches_file_of_all_spectra(self):
+        blocks = [_qse_block(0.5, 2.0, 0.1), _qse_block(0.7, 4.0, 0.2), _qse_block(0.9, 1.0, 0.3)]
+        all_spectra = read_qse_file(self._write_file('all.qse', _HEADER[:3] + ['3 1'] + _HEADER[4:7] + sum(blocks, [])))
+        single_spectra = [read_qse_file(self._write_file('{0}.qse'.format(i), _HEADER[:3] + ['1 1'] + _HEADER[4:7] + block))
+                          for (i, block) in enumerate(blocks)]
+
+        self.assertEqual(merge_parameters(single_spectra), all_spectra)
+
+    def test_map_spectra_returns_results_in_order(self):
+        arguments = [(2, 3), (3, 2), (2, 10), (5, 1)]
+
+        self.assertEqual(list(map_spectra(pow, arguments)), [8, 9, 1024, 5])
+        self.assertEqual(list(map_spectra(pow, arguments, 2)), [8, 9, 1024, 5])
+
+    def test_map_spectra_of_no_spectra(self):
+        self.assertEqual(list(map_spectra(math.sqrt, [], 2)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
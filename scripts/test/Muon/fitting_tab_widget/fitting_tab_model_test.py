@@ -5,7 +5,8 @@
 #   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
 # SPDX - License - Identifier: GPL - 3.0 +
 import unittest
-from Muon.GUI.Common.fitting_tab_widget.fitting_tab_model import FittingTabModel
+from Muon.GUI.Common.fitting_tab_widget.fitting_tab_model import FittingTabModel, get_sequential_fit_workers
+from Muon.GUI.Common.fitting_tab_widget.fitting_tab_model import MAX_DEFAULT_SEQUENTIAL_FIT_WORKERS
 from Muon.GUI.Common.test_helpers.context_setup import setup_context
 from mantid.api import FunctionFactory, AnalysisDataService
 from Muon.GUI.Common.muon_pair import MuonPair
@@ -282,6 +283,7 @@ class FittingTabModelTest(unittest.TestCase):
     def test_do_sequential_fit_calls_fetches_calls_single_fit_correctly(self):
         workspace_list = ["MUSR62260;bwd", "MUSR62260;fwd"]
         self.model.tf_asymmetry_mode = False
+        self.model.sequential_fit_workers = 1
         use_initial_values = True
         self.model.do_single_fit = mock.MagicMock(return_value=("test", 'success', 0.56))
 
@@ -289,6 +291,52 @@ class FittingTabModelTest(unittest.TestCase):
 
         self.assertEqual(self.model.do_single_fit.call_count, 2)
 
+    def test_do_sequential_fit_runs_fits_in_parallel_and_handles_outputs_in_order(self):
+        workspace_list = ["MUSR62260;bwd", "MUSR62260;fwd", "MUSR62261;bwd", "MUSR62261;fwd"]
+        self.model.sequential_fit_workers = 4
+        self.model.get_parameters_for_single_fit = mock.MagicMock(
+            side_effect=lambda workspace: {'InputWorkspace': workspace})
+        self.model.do_single_fit_and_return_workspace_parameters_and_fit_function = mock.MagicMock(
+            side_effect=lambda params: (params['InputWorkspace'] + "_Workspace", params['InputWorkspace'] + "_Parameters",
+                                        params['InputWorkspace'], 'success', 0.56, "covariance"))
+        self.model._handle_single_fit_results = mock.MagicMock()
+
+        function_list, status_list, chi_squared_list = self.model.do_sequential_fit(workspace_list, True)
+
+        self.assertEqual(function_list, workspace_list)
+        self.assertEqual(status_list, ['success'] * 4)
+        self.assertEqual(chi_squared_list, [0.56] * 4)
+        self.assertEqual([call[0][0] for call in self.model._handle_single_fit_results.call_args_list],
+                         workspace_list)
+
+    @mock.patch('Muon.GUI.Common.fitting_tab_widget.fitting_tab_model.os.cpu_count')
+    @mock.patch('Muon.GUI.Common.fitting_tab_widget.fitting_tab_model.ConfigService')
+    def test_number_of_sequential_fit_workers_is_read_from_config_with_bounded_default(self, config_mock, cpu_count_mock):
+        cpu_count_mock.return_value = 64
+        for value, expected in [("8", 8), ("1", 1), ("0", 1), ("", MAX_DEFAULT_SEQUENTIAL_FIT_WORKERS),
+                                ("many", MAX_DEFAULT_SEQUENTIAL_FIT_WORKERS)]:
+            config_mock.getString.return_value = value
+            self.assertEqual(get_sequential_fit_workers(), expected)
+
+        config_mock.getString.return_value = ""
+        cpu_count_mock.return_value = 2
+        self.assertEqual(get_sequential_fit_workers(), 2)
+        cpu_count_mock.return_value = None
+        self.assertEqual(get_sequential_fit_workers(), 1)
+
+    def test_do_sequential_fit_does_not_run_in_parallel_when_chaining_fits(self):
+        workspace_list = ["MUSR62260;bwd", "MUSR62260;fwd"]
+        self.model.sequential_fit_workers = 4
+        self.model._do_sequential_fits_in_parallel = mock.MagicMock()
+        trial_function = FunctionFactory.createInitialized('name = Quadratic, A0 = 0, A1 = 0, A2 = 0')
+        self.model.do_single_fit = mock.MagicMock(return_value=(trial_function, 'success', 0.56))
+        self.model.get_parameters_for_single_fit = mock.MagicMock(return_value={'Function': trial_function})
+
+        self.model.do_sequential_fit(workspace_list, False)
+
+        self.model._do_sequential_fits_in_parallel.assert_not_called()
+        self.assertEqual(self.model.do_single_fit.call_count, 2)
+
     def test_do_sequential_fit_uses_previous_values_if_requested(self):
         workspace_list = ["MUSR62260;bwd", "MUSR62260;fwd"]
         self.model.tf_asymmetry_mode = False
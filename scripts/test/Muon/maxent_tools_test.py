@@ -0,0 +1,202 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from Muon.MaxentTools import maxent
+from Muon.MaxentTools.deadfit import DEADFIT
+from Muon.MaxentTools.fftworkspace import FFTWorkspace
+from Muon.MaxentTools.maxent import MAXENT
+from Muon.MaxentTools.modab import MODAB
+from Muon.MaxentTools.modamp import MODAMP
+from Muon.MaxentTools.modbak import MODBAK
+from Muon.MaxentTools.opus import OPUS
+from Muon.MaxentTools.outspec import OUTSPEC
+from Muon.MaxentTools.start import START
+from Muon.MaxentTools.tropus import TROPUS
+from Muon.MaxentTools.zft import ZFT
+
+
+def one_spectrum_opus(x, SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e, fft_workspace=None):
+    # the transform as it was before the search directions were batched, one spectrum at a time
+    if x.ndim == 2:
+        return np.stack([one_spectrum_opus(x[:, k], SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e)
+                         for k in range(x.shape[1])], axis=2)
+    npts = DETECT_e.shape[0]
+    y = np.zeros([SAVETIME_i2], dtype=np.complex_)
+    y[:x.shape[0]] = x * PULSESHAPE_convol
+    y2 = np.fft.ifft(y) * SAVETIME_i2
+    return (np.outer(np.real(y2[:npts]), DETECT_a) + np.outer(np.imag(y2[:npts]), DETECT_b)) * DETECT_e[:, np.newaxis]
+
+
+def one_spectrum_tropus(ox, SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e, fft_workspace=None):
+    if ox.ndim == 3:
+        return np.stack([one_spectrum_tropus(ox[:, :, k], SAVETIME_i2, PULSESHAPE_convol, DETECT_a, DETECT_b, DETECT_e)
+                         for k in range(ox.shape[2])], axis=1)
+    npts = ox.shape[0]
+    n = PULSESHAPE_convol.shape[0]
+    y = np.zeros([SAVETIME_i2], dtype=np.complex_)
+    y[:npts] = np.dot(ox, DETECT_a) * DETECT_e + 1.j * np.dot(ox, DETECT_b) * DETECT_e
+    y2 = np.fft.fft(y)
+    return np.real(y2)[:n] * np.real(PULSESHAPE_convol) + np.imag(y2)[:n] * np.imag(PULSESHAPE_convol)
+
+
+def one_group_modab(hists, datum, sigma, MISSCHANNELS_mm, MAXPAGE_f, PULSESHAPE_convol, DETECT_e, SAVETIME_I2):
+    npts, ngroups = datum.shape
+    zr, zi = ZFT(MAXPAGE_f, PULSESHAPE_convol, DETECT_e, SAVETIME_I2)
+    DETECT_a = np.zeros([ngroups])
+    DETECT_b = np.zeros([ngroups])
+    for j in range(ngroups):
+        if hists[j] != 0:
+            x = zr / sigma[:, j]
+            y = zi / sigma[:, j]
+            s11 = np.sum(x**2)
+            s22 = np.sum(y**2)
+            s12 = np.sum(x * y)
+            sa = np.sum(datum[:, j] * x / sigma[:, j])
+            sb = np.sum(datum[:, j] * y / sigma[:, j])
+            DETECT_a[j] = (sa * s22 - sb * s12) / (s11 * s22 - s12 * s12)
+            DETECT_b[j] = (sb * s11 - sa * s12) / (s11 * s22 - s12 * s12)
+    AMPS_amp = np.sqrt(DETECT_a**2 + DETECT_b**2)
+    s = np.sum(AMPS_amp) / float(ngroups - MISSCHANNELS_mm)
+    return np.arctan2(DETECT_b, DETECT_a), DETECT_a / s, DETECT_b / s, AMPS_amp / s
+
+
+class MaxentToolsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.RandomState(42)
+        self.mylog = mock.Mock()
+        self.npts = 512
+        self.ngroups = 4
+        self.i2 = 2 * self.npts
+        self.n = 256
+        self.e, self.convol = START(self.npts, 1, 0.016, self.n, 0.0, self.mylog)
+        self.a = self.rng.uniform(-1.0, 1.0, self.ngroups)
+        self.b = self.rng.uniform(-1.0, 1.0, self.ngroups)
+        self.f = self.rng.uniform(0.01, 1.0, self.n)
+        self.sigma = self.rng.uniform(0.5, 1.5, (self.npts, self.ngroups))
+        self.datum = OPUS(self.f, self.i2, self.convol, self.a, self.b, self.e) + \
+            self.sigma * self.rng.normal(size=(self.npts, self.ngroups))
+
+    def assert_equal_transforms(self, actual, expected):
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12 * np.max(np.abs(expected)))
+
+    def test_opus_of_a_batch_equals_opus_of_each_spectrum(self):
+        x = self.rng.uniform(0.0, 1.0, (self.n, 3))
+        expected = one_spectrum_opus(x, self.i2, self.convol, self.a, self.b, self.e)
+
+        self.assertEqual(expected.shape, (self.npts, self.ngroups, 3))
+        self.assert_equal_transforms(OPUS(x, self.i2, self.convol, self.a, self.b, self.e), expected)
+        self.assert_equal_transforms(OPUS(x, self.i2, self.convol, self.a, self.b, self.e, FFTWorkspace(self.i2)),
+                                     expected)
+
+    def test_tropus_of_a_batch_equals_tropus_of_each_spectrum(self):
+        ox = self.rng.normal(size=(self.npts, self.ngroups, 3))
+        expected = one_spectrum_tropus(ox, self.i2, self.convol, self.a, self.b, self.e)
+
+        self.assertEqual(expected.shape, (self.n, 3))
+        self.assert_equal_transforms(TROPUS(ox, self.i2, self.convol, self.a, self.b, self.e), expected)
+        self.assert_equal_transforms(TROPUS(ox, self.i2, self.convol, self.a, self.b, self.e, FFTWorkspace(self.i2)),
+                                     expected)
+
+    def test_one_spectrum_transforms_are_unchanged(self):
+        ox = self.rng.normal(size=(self.npts, self.ngroups))
+
+        self.assert_equal_transforms(OPUS(self.f, self.i2, self.convol, self.a, self.b, self.e),
+                                     one_spectrum_opus(self.f, self.i2, self.convol, self.a, self.b, self.e))
+        self.assert_equal_transforms(TROPUS(ox, self.i2, self.convol, self.a, self.b, self.e),
+                                     one_spectrum_tropus(ox, self.i2, self.convol, self.a, self.b, self.e))
+
+    def test_fft_workspace_reused_between_transforms_gives_fresh_results(self):
+        fft_workspace = FFTWorkspace(self.i2)
+        short_convol = self.convol[:self.n - 56]
+        for _ in range(2):
+            x = self.rng.uniform(0.0, 1.0, (self.n, 2))
+            self.assert_equal_transforms(OPUS(x, self.i2, self.convol, self.a, self.b, self.e, fft_workspace),
+                                         one_spectrum_opus(x, self.i2, self.convol, self.a, self.b, self.e))
+            # a shorter spectrum must not see what is left in the buffer from the longer one
+            x = self.rng.uniform(0.0, 1.0, self.n - 56)
+            self.assert_equal_transforms(OPUS(x, self.i2, short_convol, self.a, self.b, self.e, fft_workspace),
+                                         one_spectrum_opus(x, self.i2, short_convol, self.a, self.b, self.e))
+            self.assert_equal_transforms(ZFT(self.f, self.convol, self.e, self.i2, fft_workspace),
+                                         ZFT(self.f, self.convol, self.e, self.i2))
+
+            ox = self.rng.normal(size=(self.npts, self.ngroups, 3))
+            self.assert_equal_transforms(TROPUS(ox, self.i2, self.convol, self.a, self.b, self.e, fft_workspace),
+                                         one_spectrum_tropus(ox, self.i2, self.convol, self.a, self.b, self.e))
+            ox = self.rng.normal(size=(self.npts - 100, self.ngroups))
+            self.assert_equal_transforms(TROPUS(ox, self.i2, self.convol, self.a, self.b, self.e[:-100],
+                                                fft_workspace),
+                                         one_spectrum_tropus(ox, self.i2, self.convol, self.a, self.b, self.e[:-100]))
+
+    def test_modab_equals_fit_of_each_group(self):
+        hists = np.array([1, 0, 1, 1])
+
+        actual = MODAB(hists, self.datum, self.sigma, 1, self.f, self.convol, self.e, self.i2, self.mylog)
+        expected = one_group_modab(hists, self.datum, self.sigma, 1, self.f, self.convol, self.e, self.i2)
+
+        for actual_values, expected_values in zip(actual, expected):
+            np.testing.assert_allclose(actual_values, expected_values, rtol=1e-12)
+        self.assertEqual(actual[1][1], 0.0)
+        self.assertEqual(actual[2][1], 0.0)
+
+    def test_zft_passed_down_gives_the_same_results_as_calculating_it(self):
+        hists = np.array([1, 1, 0, 1])
+        zft = ZFT(self.f, self.convol, self.e, self.i2, FFTWorkspace(self.i2))
+        d = self.rng.uniform(0.0, 1.0, self.ngroups)
+        datt = self.datum + np.outer(self.e, d)
+        phase = self.rng.uniform(-np.pi, np.pi, self.ngroups)
+
+        def copy(args):
+            # some of the routines modify their arrays in place
+            return [np.array(arg) if isinstance(arg, np.ndarray) else arg for arg in args]
+
+        def call(routine, *args):
+            without_zft = routine(*copy(args), self.mylog)
+            with_zft = routine(*copy(args), self.mylog, zft=zft)
+            for expected, actual in zip(without_zft, with_zft):
+                np.testing.assert_allclose(actual, expected, rtol=1e-12)
+
+        call(DEADFIT, self.datum, self.sigma, datt, self.a, self.b, d, self.e, 0.016, 1000.0, 1.0, 4.0, self.n, self.f,
+             self.convol, self.i2)
+        call(MODBAK, hists, self.datum, self.sigma, self.a, self.b, self.e, d, self.f, self.convol, self.i2)
+        call(MODAMP, hists, self.datum, self.sigma, 1, phase, self.f, self.convol, self.e, self.i2)
+        call(MODAB, hists, self.datum, self.sigma, 1, self.f, self.convol, self.e, self.i2)
+        call(OUTSPEC, self.datum, self.f, self.sigma, datt, 0, self.npts, self.convol, 1.0, self.a, self.b, d, self.e,
+             self.i2, 1.0)
+
+    def test_maxent_with_batched_transforms_equals_one_search_direction_at_a_time(self):
+        def run_maxent(fft_workspace):
+            # two calls, as MULTIMAX does, continuing from the previous spectrum with the same workspace
+            results = []
+            f = np.zeros(self.n)
+            for ngo in range(2):
+                result = MAXENT(self.datum, self.sigma, 0.1, None, 10, False, ngo, self.n, np.array(f), self.convol,
+                                self.a, self.b, self.e, 1.0, 1.0, self.i2, self.mylog, mock.Mock(), fft_workspace)
+                f = result[3]
+                results.append(result)
+            return results
+
+        batched = run_maxent(FFTWorkspace(self.i2))
+        with mock.patch.object(maxent, "OPUS", side_effect=one_spectrum_opus), \
+                mock.patch.object(maxent, "TROPUS", side_effect=one_spectrum_tropus):
+            one_at_a_time = run_maxent(None)
+
+        for batched_result, expected_result in zip(batched, one_at_a_time):
+            sigma, base, iterations, f = batched_result[:4]
+            self.assertEqual(iterations, expected_result[2])
+            np.testing.assert_allclose(f, expected_result[3], rtol=1e-8)
+            np.testing.assert_allclose(sigma, expected_result[0], rtol=1e-8)
+            np.testing.assert_allclose(base, expected_result[1], rtol=1e-8)
+        self.assertTrue(np.all(np.isfinite(batched[-1][3])))
+
+
+if __name__ == '__main__':
+    unittest.main()
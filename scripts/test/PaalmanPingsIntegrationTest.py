@@ -0,0 +1,133 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+"""Test suite for the vectorised Paalman & Pings integration used by CylinderPaalmanPingsCorrection
+"""
+import math
+import unittest
+
+import numpy as np
+from PaalmanPingsIntegration import cylinder_absorption
+
+
+def _reference_distance(r, radius, omega):
+    distance = 0.
+    b = r * math.sin(omega)
+    if abs(b) < radius:
+        t = r * math.cos(omega)
+        d = math.sqrt(radius * radius - b * b)
+        if r <= radius:
+            distance = t + d
+        else:
+            distance = d * (1.0 + math.copysign(1.0, t))
+    return distance
+
+
+def _reference_sum_rom(radii, n_scat, n_abs, a, r1, r2, ms, theta, amu_scat, amu_tot_i, amu_tot_s):
+    """The point by point integration for a single angle and wavelength"""
+    nan = len(radii) - 1
+    omega_add = math.pi if a < 0. else 0.
+    r_step = (r2 - r1) / ms
+    for m in range(1, ms + 1):
+        r = m * r_step - 0.5 * r_step + r1
+        number_omega = int(math.pi * r / r_step)
+        omega_ster = math.pi / number_omega
+        area_y = r * r_step * omega_ster * amu_scat[n_scat]
+        sum_1, sum_2, area_sum = 0., 0., 0.
+        index = 1
+        for _ in range(number_omega):
+            omega = index * omega_ster - 0.5 * omega_ster + omega_add
+            if abs(r * math.sin(omega)) > a:
+                index = number_omega - index + 2
+                continue
+            scattered = omega + math.pi - theta
+            lis = [_reference_distance(r, radii[j + 1], omega) - _reference_distance(r, radii[j], omega)
+                   for j in range(nan)]
+            lss = [_reference_distance(r, radii[j + 1], scattered) - _reference_distance(r, radii[j], scattered)
+                   for j in range(nan)]
+            path = [amu_tot_i[0] * lis[0] + amu_tot_s[0] * lss[0], 0., 0.]
+            if nan == 2:
+                path[2] = amu_tot_i[1] * lis[1] + amu_tot_s[1] * lss[1]
+                path[1] = path[0] + path[2]
+            sum_1 += math.exp(-path[n_abs])
+            sum_2 += math.exp(-path[n_abs + 1])
+            area_sum += 1.0
+            index += 1
+    # only the last radial step is summed
+    return sum_1 * area_y, sum_2 * area_y, area_sum * area_y
+
+
+def _reference_absorption(radii, amu_scat, amu_tot_i, amu_tot_s, angle, a):
+    theta = angle * math.pi / 180.
+    args = (theta, amu_scat, amu_tot_i, amu_tot_s)
+    if len(radii) == 2:
+        ass_a, _, area_a = _reference_sum_rom(radii, 0, 0, a, radii[0], radii[1], 1, *args)
+        ass_b, _, area_b = _reference_sum_rom(radii, 0, 0, -a, radii[0], radii[1], 1, *args)
+        return (ass_a + ass_b) / (area_a + area_b), 0., 0., 0.
+    ms = max(int((radii[2] - radii[1]) / (radii[1] - radii[0])), 1)
+    ass_a, assc_a, area_a = _reference_sum_rom(radii, 0, 0, a, radii[0], radii[1], 1, *args)
+    ass_b, assc_b, area_b = _reference_sum_rom(radii, 0, 0, -a, radii[0], radii[1], 1, *args)
+    acsc_a, acc_a, area_ca = _reference_sum_rom(radii, 1, 1, a, radii[1], radii[2], ms, *args)
+    acsc_b, acc_b, area_cb = _reference_sum_rom(radii, 1, 1, -a, radii[1], radii[2], ms, *args)
+    area_s = area_a + area_b
+    area_c = area_ca + area_cb
+    return (ass_a + ass_b) / area_s, (assc_a + assc_b) / area_s, (acsc_a + acsc_b) / area_c, (acc_a + acc_b) / area_c
+
+
+class PaalmanPingsIntegrationTest(unittest.TestCase):
+
+    _angles = np.array([12.5, 45.0, 90.0, 135.0, 160.0])
+    _waves = np.array([5.5, 6.5, 7.5])
+    _amu_scat = np.array([0.5, 0.35])
+    _sig_abs = np.array([0.3, 0.1])
+
+    def _amu_tot(self):
+        amu_tot_i = self._amu_scat + self._sig_abs * 6.0 / 1.7979 * np.ones((self._waves.size, 1))
+        amu_tot_s = self._amu_scat + self._sig_abs * self._waves[:, np.newaxis] / 1.7979
+        return amu_tot_i, amu_tot_s
+
+    def _assert_matches_reference(self, radii, beam_half_width):
+        amu_tot_i, amu_tot_s = self._amu_tot()
+        number_annuli = len(radii) - 1
+        factors = cylinder_absorption(radii, self._amu_scat[:number_annuli], amu_tot_i[:, :number_annuli],
+                                      amu_tot_s[:, :number_annuli], self._angles, beam_half_width)
+
+        for factor in factors:
+            self.assertEqual(factor.shape, (self._angles.size, self._waves.size))
+        for (i, angle) in enumerate(self._angles):
+            for j in range(self._waves.size):
+                expected = _reference_absorption(radii, self._amu_scat, amu_tot_i[j], amu_tot_s[j], angle,
+                                                 beam_half_width)
+                np.testing.assert_allclose([factor[i, j] for factor in factors], expected, rtol=1e-12)
+
+    def test_sample_matches_point_by_point_integration(self):
+        self._assert_matches_reference([0.05, 0.1], 1.0)
+
+    def test_sample_and_can_matches_point_by_point_integration(self):
+        self._assert_matches_reference([0.05, 0.1, 0.25], 1.0)
+
+    def test_beam_narrower_than_sample(self):
+        self._assert_matches_reference([0.0, 0.6], 0.3)
+
+    def test_no_attenuation_gives_unit_factors(self):
+        zeros = np.zeros((self._waves.size, 2))
+        factors = cylinder_absorption([0.05, 0.1, 0.15], self._amu_scat, zeros, zeros, self._angles, 1.0)
+        for factor in factors:
+            np.testing.assert_allclose(factor, 1.0, rtol=1e-14)
+
+    def test_process_pool_gives_same_results(self):
+        amu_tot_i, amu_tot_s = self._amu_tot()
+        args = ([0.05, 0.1, 0.15], self._amu_scat, amu_tot_i, amu_tot_s, self._angles, 1.0)
+
+        serial = cylinder_absorption(*args)
+        parallel = cylinder_absorption(*args, number_of_processes=2)
+
+        for (serial_factor, parallel_factor) in zip(serial, parallel):
+            np.testing.assert_array_equal(serial_factor, parallel_factor)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -84,6 +84,36 @@ class PyChop2Tests(unittest.TestCase):
             assert "Cannot calculate for energy transfer greater than Ei" in str(w[0].message)
             assert np.isnan(res[0])
 
+    def test_pychop_grid(self):
+        eis = np.linspace(5, 100, 12)
+        for instname, chopper, freqs in [('MARI', 'G', [[200], [350]]), ('LET', 'High flux', [[160, 80], [240, 120]])]:
+            chopobj = PyChop2(instname, chopper)
+            res, flux = chopobj.getResFluxGrid(eis, freqs, Etrans=[0., 0.5])
+            self.assertEqual(res.shape, (len(eis), 2, 1, 2))
+            self.assertEqual(flux.shape, (len(eis), 2, 1))
+            # Compares with the calculation for one setting at a time
+            for ie, ei in enumerate(eis):
+                for ifreq, freq in enumerate(freqs):
+                    chopobj.setFrequency(freq)
+                    np.testing.assert_allclose(res[ie, ifreq, 0], chopobj.getResolution([0., 0.5 * ei], ei), rtol=1e-10)
+                    self.assertAlmostEqual(flux[ie, ifreq, 0] / chopobj.getFlux(ei), 1., places=10)
+            # The preset frequency is unchanged by the grid calculation
+            self.assertEqual(chopobj.getFrequency(), freqs[-1])
+
+    def test_pychop_allowed_ei_grid(self):
+        chopobj = PyChop2('LET', 'High flux', [160, 80])
+        eis, phases = [2.2, 3.7], [5, 12000]
+        allowed = chopobj.getAllowedEiGrid(eis, phase=phases)
+        self.assertEqual(allowed.shape, (2, 1, 2))
+        for ie, ei in enumerate(eis):
+            for iphase, phase in enumerate(phases):
+                chopobj.setFrequency(phase=phase)
+                np.testing.assert_allclose(allowed[ie, 0, iphase], sorted(chopobj.getAllowedEi(ei)))
+        # The opening times of each setting are kept, so they are not calculated again
+        ncached = len(chopobj.chopper_system._chop_times_cache)
+        chopobj.getAllowedEiGrid(eis, phase=phases)
+        self.assertEqual(len(chopobj.chopper_system._chop_times_cache), ncached)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,131 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+import os
+import threading
+import time
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from Direct import RunFileWatcher as run_file_watcher
+from Direct.RunFileWatcher import RunFileWatcher, is_on_network_file_system, run_numbers_in_file_name
+
+
+def _write_file_later(file_name, delay=0.2):
+    def write():
+        time.sleep(delay)
+        with open(file_name, 'w') as fh:
+            fh.write('data')
+    thread = threading.Thread(target=write)
+    thread.start()
+    return thread
+
+
+class RunFileWatcherTest(unittest.TestCase):
+
+    def test_run_numbers_in_file_name(self):
+        self.assertEqual(run_numbers_in_file_name('/data/MAR00012345.nxs'), {12345})
+        self.assertEqual(run_numbers_in_file_name('LET12345_monitors.nxs'), {12345})
+
+    def test_expected_runs_are_queued_once_in_order(self):
+        with TemporaryDirectory() as data_dir:
+            watcher = RunFileWatcher([data_dir], use_inotify=False)
+            watcher.expect([12, 11])
+            watcher.expect([11, 13])
+            self.assertEqual(watcher.expected_runs, [12, 11, 13])
+
+    def test_network_file_systems_are_recognised(self):
+        mounts = [('/', 'ext4'), ('/archive', 'nfs4'), ('/archive/local', 'xfs'), ('/mnt/data share', 'cifs')]
+
+        self.assertTrue(is_on_network_file_system('/archive/NDXMARI/Instrument/data', mounts))
+        self.assertTrue(is_on_network_file_system('/archive', mounts))
+        self.assertTrue(is_on_network_file_system('/mnt/data share/cycle_21_1', mounts))
+        self.assertFalse(is_on_network_file_system('/archive/local/data', mounts))
+        self.assertFalse(is_on_network_file_system('/archived', mounts))
+        self.assertFalse(is_on_network_file_system('/home/data', mounts))
+
+    def test_wait_for_runs_returns_when_expected_run_arrives(self):
+        with TemporaryDirectory() as data_dir:
+            watcher = RunFileWatcher([data_dir, os.path.join(data_dir, 'missing')])
+            if not watcher.uses_inotify:
+                self.skipTest("inotify is not available")
+            self.assertEqual(watcher.directories, [os.path.abspath(data_dir)])
+            self.assertEqual(watcher.polled_directories, [])
+            watcher.expect([11, 12])
+
+            start = time.time()
+            writer = _write_file_later(os.path.join(data_dir, 'MAR00012.nxs'))
+            arrived = watcher.wait_for_runs(30)
+            writer.join()
+            watcher.close()
+
+            self.assertEqual(arrived, [12])
+            self.assertLess(time.time() - start, 10)
+            self.assertEqual(watcher.expected_runs, [11])
+
+    def _check_polled_run_arrival(self, watcher, data_dir):
+        self.assertEqual(watcher.polled_directories, [os.path.abspath(data_dir)])
+        watcher.expect([11, 12], ['MAR00011.nxs', 'MAR00012.nxs'])
+
+        with mock.patch.object(run_file_watcher.os, 'listdir') as listdir:
+            start = time.time()
+            writer = _write_file_later(os.path.join(data_dir, 'MAR00012.nxs'))
+            arrived = watcher.wait_for_runs(0.5)
+            writer.join()
+        watcher.close()
+
+        self.assertEqual(arrived, [12])
+        # the expected files are checked for at the end of the waiting interval only, without listing directories
+        self.assertGreaterEqual(time.time() - start, 0.5)
+        listdir.assert_not_called()
+        self.assertEqual(watcher.expected_runs, [11])
+
+    def test_polled_directory_is_checked_for_expected_files(self):
+        with TemporaryDirectory() as data_dir:
+            self._check_polled_run_arrival(RunFileWatcher([data_dir], use_inotify=False), data_dir)
+
+    def test_directory_on_network_file_system_is_polled(self):
+        with TemporaryDirectory() as data_dir:
+            with mock.patch.object(run_file_watcher, '_read_mounts',
+                                   return_value=[('/', 'ext4'), (os.path.realpath(data_dir), 'nfs')]):
+                watcher = RunFileWatcher([data_dir])
+            self.assertFalse(watcher.uses_inotify)
+            self._check_polled_run_arrival(watcher, data_dir)
+
+    def test_wait_for_runs_ignores_unexpected_files_until_timeout(self):
+        for use_inotify in (True, False):
+            with TemporaryDirectory() as data_dir:
+                watcher = RunFileWatcher([data_dir], use_inotify=use_inotify)
+                watcher.expect([11], ['MAR00011.nxs'])
+                writer = _write_file_later(os.path.join(data_dir, 'MAR00013.nxs'), 0.)
+                arrived = watcher.wait_for_runs(0.5)
+                writer.join()
+                watcher.close()
+
+                self.assertEqual(arrived, [])
+                self.assertEqual(watcher.expected_runs, [11])
+
+    def test_wait_for_runs_returns_when_watched_file_changes(self):
+        with TemporaryDirectory() as data_dir, TemporaryDirectory() as log_dir:
+            log_file = os.path.join(log_dir, 'lastrun.txt')
+            with open(log_file, 'w') as fh:
+                fh.write('MAR 10 0')
+            watcher = RunFileWatcher([data_dir], use_inotify=False)
+            watcher.watch_file(log_file)
+            watcher.expect([11])
+            # make the change visible to the modification time check
+            os.utime(log_file, (time.time() + 10, time.time() + 10))
+
+            arrived = watcher.wait_for_runs(0.5)
+
+            self.assertEqual(arrived, [])
+            self.assertEqual(watcher.expected_runs, [11])
+            self.assertEqual(watcher._poll_files(), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from mantid.api import AnalysisDataService
+from mantid.simpleapi import CreateSampleWorkspace
+from sans.algorithm_detail.reduction_cache import ReducedWorkspaceCache, TEMPORARY_DIRECTORY_PREFIX
+from sans.state.AllStates import AllStates
+
+
+class ReducedWorkspaceCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_directory)
+        AnalysisDataService.clear()
+
+    @staticmethod
+    def _get_reduction_package(state):
+        return mock.Mock(state=state, is_part_of_multi_period_reduction=False,
+                         is_part_of_event_slice_reduction=False, is_part_of_wavelength_range_reduction=False)
+
+    @staticmethod
+    def _get_reduction_alg(output_names):
+        reduction_alg = mock.Mock()
+        reduction_alg.getProperty.side_effect = \
+            lambda property_name: mock.Mock(valueAsStr=output_names.get(property_name, ""))
+        return reduction_alg
+
+    def test_that_key_does_not_depend_on_save_settings(self):
+        cache = ReducedWorkspaceCache(self.cache_directory, 1024)
+        state = AllStates()
+        other_state = AllStates()
+        other_state.save.user_specified_output_name = "other_name"
+
+        self.assertEqual(cache.get_key(self._get_reduction_package(state), True, False),
+                         cache.get_key(self._get_reduction_package(other_state), True, False))
+
+    def test_that_key_depends_on_reduction_settings(self):
+        cache = ReducedWorkspaceCache(self.cache_directory, 1024)
+        state = AllStates()
+        other_state = AllStates()
+        other_state.data.sample_scatter_period = 2
+
+        self.assertNotEqual(cache.get_key(self._get_reduction_package(state), True, False),
+                            cache.get_key(self._get_reduction_package(other_state), True, False))
+        self.assertNotEqual(cache.get_key(self._get_reduction_package(state), True, False),
+                            cache.get_key(self._get_reduction_package(state), False, False))
+
+    def test_that_stored_workspaces_are_restored_under_new_names(self):
+        cache = ReducedWorkspaceCache(self.cache_directory, 100 * 1024 * 1024)
+        CreateSampleWorkspace(OutputWorkspace="reduced_lab", NumBanks=1, BankPixelWidth=1)
+        cache.store("key", self._get_reduction_alg({"OutputWorkspaceLAB": "reduced_lab"}), [1.5], [0.5])
+
+        factors = cache.load("key", self._get_reduction_alg({"OutputWorkspaceLAB": "renamed_lab"}))
+
+        self.assertEqual(factors, ([1.5], [0.5]))
+        self.assertTrue(AnalysisDataService.doesExist("renamed_lab"))
+
+    def test_that_load_returns_none_for_missing_entry(self):
+        cache = ReducedWorkspaceCache(self.cache_directory, 1024)
+
+        self.assertEqual(cache.load("key", self._get_reduction_alg({})), None)
+
+    def test_that_least_recently_used_entry_is_evicted(self):
+        CreateSampleWorkspace(OutputWorkspace="reduced_lab", NumBanks=1, BankPixelWidth=1)
+        reduction_alg = self._get_reduction_alg({"OutputWorkspaceLAB": "reduced_lab"})
+        cache = ReducedWorkspaceCache(self.cache_directory, 100 * 1024 * 1024)
+        cache.store("first", reduction_alg, [1.], [0.])
+        entry_size = sum(os.path.getsize(os.path.join(self.cache_directory, "first", file_name))
+                         for file_name in os.listdir(os.path.join(self.cache_directory, "first")))
+        manifest_file = os.path.join(self.cache_directory, "first", "manifest.json")
+        os.utime(manifest_file, (0, 0))
+
+        cache = ReducedWorkspaceCache(self.cache_directory, int(1.5 * entry_size))
+        cache.store("second", reduction_alg, [1.], [0.])
+
+        self.assertFalse(os.path.isdir(os.path.join(self.cache_directory, "first")))
+        self.assertTrue(os.path.isdir(os.path.join(self.cache_directory, "second")))
+
+    def test_that_concurrent_writers_of_the_same_key_both_succeed(self):
+        CreateSampleWorkspace(OutputWorkspace="reduced_lab", NumBanks=1, BankPixelWidth=1)
+        reduction_alg = self._get_reduction_alg({"OutputWorkspaceLAB": "reduced_lab"})
+        cache = ReducedWorkspaceCache(self.cache_directory, 100 * 1024 * 1024)
+        barrier = threading.Barrier(2)
+        lock = threading.Lock()
+        errors = []
+
+        def rename_together(source, destination, rename=os.rename):
+            # Make both writers reach the final rename before either has moved its entry into place
+            barrier.wait(timeout=30)
+            with lock:
+                rename(source, destination)
+
+        def store():
+            try:
+                cache.store("key", reduction_alg, [1.], [0.])
+            except Exception as error:
+                errors.append(error)
+
+        with mock.patch("sans.algorithm_detail.reduction_cache.os.rename", side_effect=rename_together):
+            writers = [threading.Thread(target=store) for _ in range(2)]
+            for writer in writers:
+                writer.start()
+            for writer in writers:
+                writer.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(self.cache_directory), ["key"])
+        self.assertEqual(cache.load("key", self._get_reduction_alg({"OutputWorkspaceLAB": "renamed_lab"})),
+                         ([1.], [0.]))
+
+    def test_that_entries_of_writers_in_progress_are_not_evicted(self):
+        temporary_directory = tempfile.mkdtemp(prefix=TEMPORARY_DIRECTORY_PREFIX + "other.", dir=self.cache_directory)
+        with open(os.path.join(temporary_directory, "manifest.json"), "w") as f:
+            f.write("{}")
+        CreateSampleWorkspace(OutputWorkspace="reduced_lab", NumBanks=1, BankPixelWidth=1)
+
+        cache = ReducedWorkspaceCache(self.cache_directory, 0)
+        cache.store("key", self._get_reduction_alg({"OutputWorkspaceLAB": "reduced_lab"}), [1.], [0.])
+
+        self.assertTrue(os.path.isdir(temporary_directory))
+
+    def test_that_load_is_a_miss_when_the_entry_is_removed_after_the_manifest_is_read(self):
+        CreateSampleWorkspace(OutputWorkspace="reduced_lab", NumBanks=1, BankPixelWidth=1)
+        cache = ReducedWorkspaceCache(self.cache_directory, 100 * 1024 * 1024)
+        cache.store("key", self._get_reduction_alg({"OutputWorkspaceLAB": "reduced_lab",
+                                                    "OutputWorkspaceHAB": "reduced_lab"}), [1.], [0.])
+        os.remove(os.path.join(self.cache_directory, "key", "OutputWorkspaceHAB.nxs"))
+
+        reduction_alg = self._get_reduction_alg({"OutputWorkspaceLAB": "renamed_lab",
+                                                 "OutputWorkspaceHAB": "renamed_hab"})
+        factors = cache.load("key", reduction_alg)
+
+        self.assertEqual(factors, None)
+        self.assertFalse(AnalysisDataService.doesExist("renamed_lab"))
+        self.assertFalse(AnalysisDataService.doesExist("renamed_hab"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,13 +4,20 @@
 #   NScD Oak Ridge National Laboratory, European Spallation Source,
 #   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
 # SPDX - License - Identifier: GPL - 3.0 +
+import os
+import shutil
+import tempfile
 import unittest
 
 from mantid.kernel import DateAndTime
 from unittest import mock
 from sans.common.enums import SampleShape
-from sans.common.file_information import (SANSFileInformationFactory, FileType,
-                                          SANSInstrument, get_instrument_paths_for_sans_file)
+import h5py as h5
+from sans.common import file_information
+from sans.common.file_information import (SANSFileInformationFactory, FileType, SANSFileMetadataIndex,
+                                          SANSInstrument, get_instrument_paths_for_sans_file, read_nexus_metadata,
+                                          read_raw_metadata, get_raw_info, is_raw_single_period, is_raw_multi_period,
+                                          get_date_for_raw, get_geometry_information_raw)
 from sans.test_helper.file_information_mock import SANSFileInformationMock
 
 
@@ -207,5 +214,163 @@ class SANSFileInformationGeneralFunctionsTest(unittest.TestCase):
         self.assertTrue("Parameters" in ipf_path)
 
 
+class SANSFileMetadataIndexTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._file_name = os.path.join(self._directory, "SANS2D00022024.nxs")
+        with open(self._file_name, "w") as data_file:
+            data_file.write("data")
+        self._reader = mock.Mock(return_value={"run_number": 22024})
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_that_metadata_is_read_once_while_file_is_unchanged(self):
+        index = SANSFileMetadataIndex()
+
+        self.assertEqual(index.get_metadata(self._file_name, "nxs", self._reader), {"run_number": 22024})
+        self.assertEqual(index.get_metadata(self._file_name, "nxs", self._reader), {"run_number": 22024})
+
+        self._reader.assert_called_once_with(self._file_name)
+
+    def test_that_metadata_is_read_again_when_file_changes(self):
+        index = SANSFileMetadataIndex()
+        index.get_metadata(self._file_name, "nxs", self._reader)
+
+        with open(self._file_name, "w") as data_file:
+            data_file.write("modified data")
+        index.get_metadata(self._file_name, "nxs", self._reader)
+
+        self.assertEqual(self._reader.call_count, 2)
+
+    def test_that_metadata_is_served_from_cache_file_in_new_index(self):
+        cache_file = os.path.join(self._directory, "metadata.sqlite")
+        SANSFileMetadataIndex(cache_file).get_metadata(self._file_name, "nxs", self._reader)
+
+        metadata = SANSFileMetadataIndex(cache_file).get_metadata(self._file_name, "nxs", self._reader)
+
+        self.assertEqual(metadata, {"run_number": 22024})
+        self._reader.assert_called_once_with(self._file_name)
+
+    def test_that_least_recently_used_metadata_is_dropped_beyond_maximum_number_of_entries(self):
+        other_file_name = os.path.join(self._directory, "SANS2D00022025.nxs")
+        with open(other_file_name, "w") as data_file:
+            data_file.write("other data")
+        index = SANSFileMetadataIndex(maximum_number_of_entries=1)
+
+        index.get_metadata(self._file_name, "nxs", self._reader)
+        index.get_metadata(self._file_name, "nxs", self._reader)
+        index.get_metadata(other_file_name, "nxs", self._reader)
+        index.get_metadata(self._file_name, "nxs", self._reader)
+
+        self.assertEqual(self._reader.call_count, 3)
+
+
+class ReadNexusMetadataTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._file_name = os.path.join(self._directory, "SANS2D00022024.nxs")
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_that_str_attributes_are_read(self):
+        with h5.File(self._file_name, "w") as h5_file:
+            first_entry = h5_file.create_group("mantid_workspace_1")
+            first_entry.create_dataset("run_number", data=[22024])
+            first_entry.create_group("event_workspace").attrs["NX_class"] = "NXevent_data"
+
+        metadata = read_nexus_metadata(self._file_name)
+
+        self.assertTrue(metadata["is_event_mode"])
+        self.assertEqual(metadata["run_number"], 22024)
+
+    def test_that_first_entry_which_is_data_set_gives_missing_properties(self):
+        with h5.File(self._file_name, "w") as h5_file:
+            h5_file.create_dataset("a_data_set", data=[1, 2, 3])
+
+        metadata = read_nexus_metadata(self._file_name)
+
+        self.assertEqual(metadata["run_number"], None)
+        self.assertEqual(metadata["instrument_name"], None)
+        self.assertFalse(metadata["is_event_mode"])
+
+    def test_that_properties_which_can_be_read_are_kept_when_others_fail(self):
+        with h5.File(self._file_name, "w") as h5_file:
+            first_entry = h5_file.create_group("mantid_workspace_1")
+            first_entry.create_dataset("run_number", data=[22024])
+            first_entry.create_dataset("start_time", data=[b"2013-10-25T14:21:19"])
+            # A sample which is not a group
+            first_entry.create_dataset("sample", data=[1.])
+
+        metadata = read_nexus_metadata(self._file_name)
+
+        self.assertEqual(metadata["run_number"], 22024)
+        self.assertEqual(metadata["start_time"], "2013-10-25T14:21:19")
+        self.assertEqual(metadata["height"], None)
+
+
+class ReadRawMetadataTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._file_name = os.path.join(self._directory, "LOQ74044.raw")
+        with open(self._file_name, "w") as data_file:
+            data_file.write("data")
+        patcher = mock.patch.object(file_information, "_file_metadata_index", SANSFileMetadataIndex())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    @staticmethod
+    def _table(values):
+        table = mock.Mock()
+        names = list(values.keys())
+        table.getColumnNames.return_value = names
+        table.column.side_effect = lambda index: [values[names[index]]]
+        return table
+
+    def _mock_raw_file_info(self, end_date="25-OCT-2013", height="8.0", shape_flag="3", period_count=1):
+        properties = {"PeriodCount": period_count,
+                      "RunHeader": "LOQ 74044 some user",
+                      "RunParameterTable": self._table({"r_endtime": "14:21:19", "r_enddate": end_date}),
+                      "SampleParameterTable": self._table({"e_height": height, "e_width": "8.0", "e_thick": "1.0",
+                                                           "e_geom": shape_flag})}
+        alg_info = mock.Mock()
+        alg_info.getProperty.side_effect = lambda name: mock.Mock(value=properties[name])
+        return mock.patch.object(file_information.AlgorithmManager, "createUnmanaged", return_value=alg_info)
+
+    def test_that_raw_metadata_is_read(self):
+        with self._mock_raw_file_info():
+            metadata = read_raw_metadata(self._file_name)
+
+        self.assertTrue(metadata["is_raw"])
+        self.assertEqual(metadata["number_of_periods"], 1)
+        self.assertEqual(metadata["date"], "2013-10-25T14:21:19")
+        self.assertEqual(metadata["height"], 8.0)
+        self.assertEqual(metadata["shape_flag"], 3)
+
+    def test_that_invalid_date_only_fails_when_date_is_requested(self):
+        with self._mock_raw_file_info(end_date="25-XYZ-2013", period_count=2):
+            self.assertEqual(get_raw_info(self._file_name), (True, 2))
+            self.assertFalse(is_raw_single_period(self._file_name))
+            self.assertTrue(is_raw_multi_period(self._file_name))
+            self.assertEqual(get_geometry_information_raw(self._file_name)[:3], (8.0, 8.0, 1.0))
+            self.assertRaises(RuntimeError, get_date_for_raw, self._file_name)
+
+    def test_that_invalid_geometry_only_fails_when_geometry_is_requested(self):
+        with self._mock_raw_file_info(height="not a number", shape_flag=""):
+            metadata = read_raw_metadata(self._file_name)
+            self.assertEqual(get_raw_info(self._file_name), (True, 1))
+            self.assertTrue(is_raw_single_period(self._file_name))
+            self.assertRaises(RuntimeError, get_geometry_information_raw, self._file_name)
+
+        self.assertEqual(metadata["height"], None)
+        self.assertEqual(metadata["shape_flag"], None)
+        self.assertEqual(metadata["width"], 8.0)
+        self.assertEqual(metadata["date"], "2013-10-25T14:21:19")
+
+
 if __name__ == '__main__':
     unittest.main()
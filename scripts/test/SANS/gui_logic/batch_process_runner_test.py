@@ -25,6 +25,10 @@ class BatchProcessRunnerTest(unittest.TestCase):
         self.batch_mock = batch_patcher.start()
         self.batch_mock.return_value = self.sans_batch_instance
 
+        pool_patcher = mock.patch('sans.gui_logic.models.batch_process_runner.create_reduction_worker_pool')
+        self.addCleanup(pool_patcher.stop)
+        self.create_pool_mock = pool_patcher.start()
+
         load_patcher = mock.patch('sans.gui_logic.models.batch_process_runner.load_workspaces_from_states')
         self.addCleanup(load_patcher.stop)
         self.load_mock = load_patcher.start()
@@ -94,6 +98,73 @@ class BatchProcessRunnerTest(unittest.TestCase):
         self.batch_process_runner.row_failed_signal.emit.assert_any_call(2, 'failure')
         self.assertEqual(self.batch_process_runner.row_processed_signal.emit.call_count, 0)
 
+    def test_that_process_states_in_parallel_emits_signal_for_each_row_in_order(self):
+        self.batch_process_runner.row_processed_signal = mock.MagicMock()
+        self.batch_process_runner.row_failed_signal = mock.MagicMock()
+
+        get_states_mock = mock.MagicMock()
+        states = {0: mock.MagicMock()}
+        errors = {}
+        get_states_mock.return_value = states, errors
+
+        successful = mock.MagicMock()
+        successful.result.return_value = ([], [])
+        failed = mock.MagicMock()
+        failed.result.side_effect = Exception('failure')
+        self.sans_batch_instance.reduce_in_parallel.return_value = iter([successful, failed, successful])
+
+        self.batch_process_runner.process_states(row_index_pair=self._mock_rows,
+                                                 get_states_func=get_states_mock,
+                                                 use_optimizations=False, output_mode=OutputMode.SAVE_TO_FILE,
+                                                 plot_results=False, output_graph='', number_of_workers=2)
+        QThreadPool.globalInstance().waitForDone()
+
+        self.create_pool_mock.assert_called_once_with(2)
+        pool = self.create_pool_mock.return_value
+        self.sans_batch_instance.reduce_in_parallel.assert_called_once_with(
+            pool, [states[0].all_states] * 3, False, OutputMode.SAVE_TO_FILE, save_can=False)
+        self.sans_batch_instance.assert_not_called()
+        self.assertEqual(self.batch_process_runner.row_processed_signal.emit.call_args_list,
+                         [mock.call(0, [], []), mock.call(2, [], [])])
+        self.batch_process_runner.row_failed_signal.emit.assert_called_once_with(1, 'failure')
+        pool.shutdown.assert_called_once_with()
+
+    def test_that_process_states_in_parallel_shuts_down_the_pool_when_the_reduction_fails(self):
+        self.batch_process_runner.row_processed_signal = mock.MagicMock()
+        self.batch_process_runner.row_failed_signal = mock.MagicMock()
+        get_states_mock = mock.MagicMock()
+        get_states_mock.return_value = {0: mock.MagicMock()}, {}
+        self.sans_batch_instance.reduce_in_parallel.side_effect = RuntimeError('failure')
+
+        self.batch_process_runner.process_states(row_index_pair=self._mock_rows,
+                                                 get_states_func=get_states_mock,
+                                                 use_optimizations=False, output_mode=OutputMode.SAVE_TO_FILE,
+                                                 plot_results=False, output_graph='', number_of_workers=2)
+        QThreadPool.globalInstance().waitForDone()
+
+        self.create_pool_mock.return_value.shutdown.assert_called_once_with()
+        self.batch_process_runner.row_processed_signal.emit.assert_not_called()
+        self.assertEqual(self.batch_process_runner.row_failed_signal.emit.call_args_list,
+                         [mock.call(index, 'failure') for index in range(3)])
+
+    def test_that_process_states_falls_back_to_serial_reduction_for_output_to_ads_or_plots(self):
+        get_states_mock = mock.MagicMock()
+        get_states_mock.return_value = {0: mock.MagicMock()}, {}
+
+        for output_mode, plot_results in [(OutputMode.PUBLISH_TO_ADS, False), (OutputMode.BOTH, False),
+                                          (OutputMode.SAVE_TO_FILE, True)]:
+            self.sans_batch_instance.reset_mock()
+            self.batch_process_runner.process_states(row_index_pair=self._mock_rows,
+                                                     get_states_func=get_states_mock,
+                                                     use_optimizations=False, output_mode=output_mode,
+                                                     plot_results=plot_results, output_graph='graph',
+                                                     number_of_workers=2)
+            QThreadPool.globalInstance().waitForDone()
+
+            self.sans_batch_instance.reduce_in_parallel.assert_not_called()
+            self.create_pool_mock.assert_not_called()
+            self.assertEqual(self.sans_batch_instance.call_count, 3)
+
     def test_that_load_workspaces_emits_row_processed_signal_after_each_row(self):
         self.batch_process_runner.row_processed_signal = mock.MagicMock()
         self.batch_process_runner.row_failed_signal = mock.MagicMock()
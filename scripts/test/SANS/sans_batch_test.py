@@ -0,0 +1,79 @@
+# Mantid Repository : https://github.com/mantidproject/mantid
+#
+# Copyright &copy; 2021 ISIS Rutherford Appleton Laboratory UKRI,
+#   NScD Oak Ridge National Laboratory, European Spallation Source,
+#   Institut Laue - Langevin & CSNS, Institute of High Energy Physics, CAS
+# SPDX - License - Identifier: GPL - 3.0 +
+import unittest
+from unittest import mock
+
+from sans.common.enums import OutputMode
+from sans.sans_batch import SANSBatchReduction, get_number_of_workers
+from sans.state.AllStates import AllStates
+
+
+class SANSBatchReductionTest(unittest.TestCase):
+    def setUp(self):
+        self.batch_reduction = SANSBatchReduction()
+        self.states = [mock.create_autospec(AllStates, instance=True) for _ in range(2)]
+
+    def test_that_reduce_in_parallel_rejects_output_to_ads(self):
+        for output_mode in [OutputMode.PUBLISH_TO_ADS, OutputMode.BOTH]:
+            with mock.patch.object(SANSBatchReduction, '_reduce_in_parallel') as reduce_mock:
+                self.assertRaises(RuntimeError, self.batch_reduction.reduce_in_parallel, mock.Mock(), self.states,
+                                  False, output_mode)
+                reduce_mock.assert_not_called()
+
+    def test_that_reduce_in_parallel_validates_states(self):
+        self.states[1].validate.side_effect = ValueError("invalid state")
+
+        with mock.patch.object(SANSBatchReduction, '_reduce_in_parallel') as reduce_mock:
+            self.assertRaises(RuntimeError, self.batch_reduction.reduce_in_parallel, mock.Mock(), self.states, False,
+                              OutputMode.SAVE_TO_FILE)
+            reduce_mock.assert_not_called()
+
+    def test_that_reduce_in_parallel_reduces_valid_states(self):
+        executor = mock.Mock()
+        with mock.patch.object(SANSBatchReduction, '_reduce_in_parallel') as reduce_mock:
+            self.batch_reduction.reduce_in_parallel(executor, self.states, False, OutputMode.SAVE_TO_FILE)
+
+        reduce_mock.assert_called_once_with(executor, self.states, False, OutputMode.SAVE_TO_FILE, False)
+
+    @mock.patch('sans.sans_batch.Serializer')
+    def test_that_reduce_in_parallel_submits_all_states_and_returns_their_futures(self, serializer_mock):
+        serializer_mock.to_json.side_effect = ["state_1", "state_2"]
+        executor = mock.Mock()
+        executor.submit.side_effect = ["future_1", "future_2"]
+
+        futures = self.batch_reduction.reduce_in_parallel(executor, self.states, False, OutputMode.SAVE_TO_FILE)
+
+        self.assertEqual(futures, ["future_1", "future_2"])
+        self.assertEqual([call[0][1] for call in executor.submit.call_args_list], ["state_1", "state_2"])
+        executor.shutdown.assert_not_called()
+
+    @mock.patch('sans.sans_batch.create_reduction_worker_pool')
+    def test_that_parallel_execution_shuts_down_the_pool_when_a_reduction_fails(self, create_pool_mock):
+        failed = mock.Mock()
+        failed.result.side_effect = RuntimeError("reduction failed")
+        executor = create_pool_mock.return_value
+
+        with mock.patch.object(SANSBatchReduction, '_reduce_in_parallel', return_value=[failed]):
+            self.assertRaises(RuntimeError, self.batch_reduction, self.states, False, OutputMode.SAVE_TO_FILE,
+                              number_of_workers=2)
+
+        create_pool_mock.assert_called_once_with(2)
+        executor.shutdown.assert_called_once_with()
+
+    def test_that_reduction_with_plotting_cannot_run_in_parallel(self):
+        self.assertRaises(RuntimeError, self.batch_reduction, self.states, False, OutputMode.SAVE_TO_FILE, True,
+                          'graph', number_of_workers=2)
+
+    @mock.patch('sans.sans_batch.ConfigService')
+    def test_that_number_of_workers_is_read_from_config(self, config_mock):
+        for value, expected in [("4", 4), ("", 1), ("0", 1), ("many", 1)]:
+            config_mock.getString.return_value = value
+            self.assertEqual(get_number_of_workers(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()